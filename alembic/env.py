@@ -21,6 +21,10 @@ from app.models.notification import Notification
 from app.models.invoice import Invoice
 from app.models.security_audit_log import SecurityAuditLog
 from app.models.request_service_request import RequestServiceRequest
+from app.models.kanban_card import KanbanCard
+from app.models.notification_unread_counter import NotificationUnreadCounter
+from app.models.telegram_outbox import TelegramOutboxMessage
+from app.models.lawyer_metric_rollup import LawyerMetricRollup
 
 config = context.config
 fileConfig(config.config_file_name)
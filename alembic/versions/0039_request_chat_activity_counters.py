@@ -0,0 +1,50 @@
+"""add materialized chat activity counters to requests
+
+Live chat polling read COUNT/MAX aggregates over messages and attachments on
+every request. The counters below are maintained by the message/attachment
+write paths and backfilled here from the existing rows.
+
+Revision ID: 0039_request_chat_activity
+Revises: 0038_avatar_crop_fields
+Create Date: 2026-10-17
+"""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0039_request_chat_activity"
+down_revision = "0038_avatar_crop_fields"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("requests", sa.Column("chat_message_count", sa.Integer(), nullable=False, server_default="0"))
+    op.add_column("requests", sa.Column("chat_attachment_count", sa.Integer(), nullable=False, server_default="0"))
+    op.add_column("requests", sa.Column("chat_latest_message_at", sa.DateTime(timezone=True), nullable=True))
+    op.add_column("requests", sa.Column("chat_latest_attachment_at", sa.DateTime(timezone=True), nullable=True))
+    op.add_column("requests", sa.Column("chat_activity_version", sa.Integer(), nullable=False, server_default="0"))
+
+    op.execute(
+        """
+        UPDATE requests SET
+            chat_message_count = (SELECT COUNT(*) FROM messages m WHERE m.request_id = requests.id),
+            chat_latest_message_at = (
+                SELECT MAX(COALESCE(m.updated_at, m.created_at)) FROM messages m WHERE m.request_id = requests.id
+            ),
+            chat_attachment_count = (SELECT COUNT(*) FROM attachments a WHERE a.request_id = requests.id),
+            chat_latest_attachment_at = (
+                SELECT MAX(COALESCE(a.updated_at, a.created_at)) FROM attachments a WHERE a.request_id = requests.id
+            )
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("requests", "chat_activity_version")
+    op.drop_column("requests", "chat_latest_attachment_at")
+    op.drop_column("requests", "chat_latest_message_at")
+    op.drop_column("requests", "chat_attachment_count")
+    op.drop_column("requests", "chat_message_count")
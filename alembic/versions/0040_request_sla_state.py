@@ -0,0 +1,51 @@
+"""add materialized SLA state to requests
+
+The SLA snapshot reloaded every active request with its full status history and
+all lawyer messages. Status entry time, SLA deadline and first lawyer response
+are now stored per request; status_entered_at and first_lawyer_response_at are
+backfilled here, sla_deadline_at is filled in batches by the sla_check worker.
+
+Revision ID: 0040_request_sla_state
+Revises: 0039_request_chat_activity
+Create Date: 2026-10-17
+"""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0040_request_sla_state"
+down_revision = "0039_request_chat_activity"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("requests", sa.Column("status_entered_at", sa.DateTime(timezone=True), nullable=True))
+    op.add_column("requests", sa.Column("sla_deadline_at", sa.DateTime(timezone=True), nullable=True))
+    op.add_column("requests", sa.Column("first_lawyer_response_at", sa.DateTime(timezone=True), nullable=True))
+
+    op.execute(
+        """
+        UPDATE requests SET
+            status_entered_at = COALESCE(
+                (
+                    SELECT MAX(h.created_at) FROM status_history h
+                    WHERE h.request_id = requests.id AND h.to_status = requests.status_code
+                ),
+                requests.updated_at,
+                requests.created_at
+            ),
+            first_lawyer_response_at = (
+                SELECT MIN(m.created_at) FROM messages m
+                WHERE m.request_id = requests.id AND m.author_type = 'LAWYER'
+            )
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("requests", "first_lawyer_response_at")
+    op.drop_column("requests", "sla_deadline_at")
+    op.drop_column("requests", "status_entered_at")
@@ -0,0 +1,33 @@
+"""add partial index on requests.sla_deadline_at
+
+Terminal requests keep sla_deadline_at NULL, so the index only covers active
+cases; the SLA worker range-scans it for deadlines passed since its last run.
+
+Revision ID: 0041_request_sla_deadline_idx
+Revises: 0040_request_sla_state
+Create Date: 2026-10-17
+"""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0041_request_sla_deadline_idx"
+down_revision = "0040_request_sla_state"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_requests_sla_deadline_at_active",
+        "requests",
+        ["sla_deadline_at"],
+        unique=False,
+        postgresql_where=sa.text("sla_deadline_at IS NOT NULL"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_requests_sla_deadline_at_active", table_name="requests")
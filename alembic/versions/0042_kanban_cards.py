@@ -0,0 +1,53 @@
+"""add kanban_cards projection
+
+The kanban board rebuilt every card from requests, status history, lawyers and
+transitions on each call. Derived per-request board state now lives in
+kanban_cards, maintained on write; existing requests are projected by the
+refresh_pending_kanban_cards and reconcile_kanban_card_projection workers.
+
+Revision ID: 0042_kanban_cards
+Revises: 0041_request_sla_deadline_idx
+Create Date: 2026-10-17
+"""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision = "0042_kanban_cards"
+down_revision = "0041_request_sla_deadline_idx"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "kanban_cards",
+        sa.Column("request_id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("previous_status_code", sa.String(length=50), nullable=True),
+        sa.Column("status_entered_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("sla_deadline_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("case_deadline_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("deadline_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("assigned_lawyer_name", sa.String(length=255), nullable=True),
+        sa.Column("assigned_lawyer_sort_key", sa.String(length=255), nullable=True),
+        sa.Column("refreshed_at", sa.DateTime(timezone=True), nullable=True),
+    )
+    op.create_index("ix_kanban_cards_created_request", "kanban_cards", ["created_at", "request_id"], unique=False)
+    op.create_index(
+        "ix_kanban_cards_lawyer_sort",
+        "kanban_cards",
+        ["assigned_lawyer_sort_key", "created_at", "request_id"],
+        unique=False,
+    )
+    op.create_index("ix_kanban_cards_deadline", "kanban_cards", ["deadline_at", "created_at", "request_id"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_kanban_cards_deadline", table_name="kanban_cards")
+    op.drop_index("ix_kanban_cards_lawyer_sort", table_name="kanban_cards")
+    op.drop_index("ix_kanban_cards_created_request", table_name="kanban_cards")
+    op.drop_table("kanban_cards")
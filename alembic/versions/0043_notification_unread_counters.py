@@ -0,0 +1,84 @@
+"""add notification_unread_counters
+
+Unread badges ran COUNT ... GROUP BY event_type over notifications on every
+poll. Per-recipient, per-request, per-event unread counts now live in
+notification_unread_counters, maintained by the notification write paths and
+backfilled here from the unread rows.
+
+Revision ID: 0043_notification_unread_cnt
+Revises: 0042_kanban_cards
+Create Date: 2026-10-17
+"""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision = "0043_notification_unread_cnt"
+down_revision = "0042_kanban_cards"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "notification_unread_counters",
+        sa.Column("counter_key", sa.String(length=200), primary_key=True),
+        sa.Column("recipient_type", sa.String(length=20), nullable=False),
+        sa.Column("recipient_admin_user_id", postgresql.UUID(as_uuid=True), nullable=True),
+        sa.Column("recipient_track_number", sa.String(length=40), nullable=True),
+        sa.Column("request_id", postgresql.UUID(as_uuid=True), nullable=True),
+        sa.Column("event_type", sa.String(length=50), nullable=False),
+        sa.Column("unread_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=True),
+    )
+    op.create_index(
+        "ix_notification_unread_counters_admin",
+        "notification_unread_counters",
+        ["recipient_type", "recipient_admin_user_id", "request_id"],
+        unique=False,
+    )
+    op.create_index(
+        "ix_notification_unread_counters_track",
+        "notification_unread_counters",
+        ["recipient_type", "recipient_track_number", "request_id"],
+        unique=False,
+    )
+    op.create_index(
+        "ix_notification_unread_counters_request",
+        "notification_unread_counters",
+        ["request_id", "recipient_type"],
+        unique=False,
+    )
+
+    op.execute(
+        """
+        INSERT INTO notification_unread_counters (
+            counter_key, recipient_type, recipient_admin_user_id, recipient_track_number,
+            request_id, event_type, unread_count, updated_at
+        )
+        SELECT
+            n.recipient_type || '|'
+                || COALESCE(CAST(n.recipient_admin_user_id AS TEXT), n.recipient_track_number, '') || '|'
+                || COALESCE(CAST(n.request_id AS TEXT), '') || '|' || n.event_type,
+            n.recipient_type,
+            n.recipient_admin_user_id,
+            n.recipient_track_number,
+            n.request_id,
+            n.event_type,
+            COUNT(*),
+            NOW()
+        FROM notifications n
+        WHERE n.is_read IS FALSE
+        GROUP BY n.recipient_type, n.recipient_admin_user_id, n.recipient_track_number, n.request_id, n.event_type
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_notification_unread_counters_request", table_name="notification_unread_counters")
+    op.drop_index("ix_notification_unread_counters_track", table_name="notification_unread_counters")
+    op.drop_index("ix_notification_unread_counters_admin", table_name="notification_unread_counters")
+    op.drop_table("notification_unread_counters")
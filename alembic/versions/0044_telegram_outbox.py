@@ -0,0 +1,49 @@
+"""add telegram_outbox
+
+Telegram notifications were sent synchronously inside the request transaction.
+They are now queued in telegram_outbox and delivered by the
+deliver_telegram_outbox worker.
+
+Revision ID: 0044_telegram_outbox
+Revises: 0043_notification_unread_cnt
+Create Date: 2026-10-17
+"""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision = "0044_telegram_outbox"
+down_revision = "0043_notification_unread_cnt"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "telegram_outbox",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column("chat_id", sa.String(length=64), nullable=False),
+        sa.Column("text", sa.Text(), nullable=False),
+        sa.Column("status", sa.String(length=20), nullable=False, server_default="PENDING"),
+        sa.Column("attempts", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("next_attempt_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("sent_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("last_error", sa.String(length=500), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("responsible", sa.String(length=200), nullable=False, server_default="Администратор системы"),
+    )
+    op.create_index(
+        "ix_telegram_outbox_status_next_attempt",
+        "telegram_outbox",
+        ["status", "next_attempt_at", "created_at"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_telegram_outbox_status_next_attempt", table_name="telegram_outbox")
+    op.drop_table("telegram_outbox")
@@ -0,0 +1,44 @@
+"""add lawyer_metric_rollups
+
+The metrics overview joined status_history to requests and scanned the month's
+audit log on every dashboard load. Per-lawyer, per-day assigned / completed /
+paid counters now live in lawyer_metric_rollups, maintained on status-history
+and audit writes. Existing history is loaded with
+`python -m app.scripts.backfill_lawyer_metric_rollups`.
+
+Revision ID: 0045_lawyer_metric_rollups
+Revises: 0044_telegram_outbox
+Create Date: 2026-10-17
+"""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0045_lawyer_metric_rollups"
+down_revision = "0044_telegram_outbox"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "lawyer_metric_rollups",
+        sa.Column("lawyer_id", sa.String(length=64), primary_key=True),
+        sa.Column("day", sa.Date(), primary_key=True),
+        sa.Column("metric", sa.String(length=32), primary_key=True),
+        sa.Column("value", sa.Numeric(14, 2), nullable=False, server_default="0"),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=True),
+    )
+    op.create_index(
+        "ix_lawyer_metric_rollups_day_lawyer",
+        "lawyer_metric_rollups",
+        ["day", "lawyer_id"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_lawyer_metric_rollups_day_lawyer", table_name="lawyer_metric_rollups")
+    op.drop_table("lawyer_metric_rollups")
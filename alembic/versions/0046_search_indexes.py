@@ -0,0 +1,46 @@
+"""add search indexes for the "~" filter
+
+The admin search box filtered requests and clients with ILIKE '%value%',
+which always scanned the whole table. pg_trgm GIN indexes now back ILIKE on
+the short text columns, and request descriptions get a Russian full-text
+index matched by word prefixes. The column list is mirrored in
+app.services.search_index.SEARCHABLE_COLUMNS.
+
+Revision ID: 0046_search_indexes
+Revises: 0045_lawyer_metric_rollups
+Create Date: 2026-10-17
+"""
+
+from __future__ import annotations
+
+from alembic import op
+
+revision = "0046_search_indexes"
+down_revision = "0045_lawyer_metric_rollups"
+branch_labels = None
+depends_on = None
+
+TRIGRAM_INDEXES = (
+    ("ix_requests_track_number_trgm", "requests", "track_number"),
+    ("ix_requests_client_name_trgm", "requests", "client_name"),
+    ("ix_requests_client_phone_trgm", "requests", "client_phone"),
+    ("ix_requests_client_email_trgm", "requests", "client_email"),
+    ("ix_clients_full_name_trgm", "clients", "full_name"),
+    ("ix_clients_phone_trgm", "clients", "phone"),
+)
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    for name, table, column in TRIGRAM_INDEXES:
+        op.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {table} USING gin ({column} gin_trgm_ops)")
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_requests_description_fts ON requests "
+        "USING gin (to_tsvector('russian'::regconfig, coalesce(description, ''::text)))"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS ix_requests_description_fts")
+    for name, _, _ in reversed(TRIGRAM_INDEXES):
+        op.execute(f"DROP INDEX IF EXISTS {name}")
@@ -0,0 +1,31 @@
+"""attachment scan verdict reuse by content hash
+
+Every upload was rescanned by ClamAV even when the same document had already
+been checked. Attachments now record the clamd engine/signature version of
+their verdict, and an index on (content_sha256, scan_engine_version) lets the
+scanner reuse a recent CLEAN/INFECTED verdict for identical content.
+
+Revision ID: 0047_attachment_scan_verdicts
+Revises: 0046_search_indexes
+Create Date: 2026-10-17
+"""
+
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+
+revision = "0047_attachment_scan_verdicts"
+down_revision = "0046_search_indexes"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("attachments", sa.Column("scan_engine_version", sa.String(length=64), nullable=True))
+    op.create_index("ix_attachments_content_sha256", "attachments", ["content_sha256", "scan_engine_version"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_attachments_content_sha256", table_name="attachments")
+    op.drop_column("attachments", "scan_engine_version")
@@ -0,0 +1,36 @@
+"""partial index on stale kanban cards
+
+Topic and transition config writes used to drop the affected kanban cards and
+let the next board read rebuild them. They now mark the cards stale
+(refreshed_at IS NULL), and the refresh_pending_kanban_cards worker rebuilds
+them. The partial index keeps the worker's frequent poll from scanning the
+whole projection.
+
+Revision ID: 0048_kanban_card_stale_idx
+Revises: 0047_attachment_scan_verdicts
+Create Date: 2026-10-17
+"""
+
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+
+revision = "0048_kanban_card_stale_idx"
+down_revision = "0047_attachment_scan_verdicts"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_kanban_cards_stale",
+        "kanban_cards",
+        ["request_id"],
+        postgresql_where=sa.text("refreshed_at IS NULL"),
+        sqlite_where=sa.text("refreshed_at IS NULL"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_kanban_cards_stale", table_name="kanban_cards")
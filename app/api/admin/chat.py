@@ -4,8 +4,10 @@ from datetime import datetime, timezone
 from uuid import UUID
 
 from fastapi import APIRouter, Depends, HTTPException, Request as FastapiRequest
+from fastapi.responses import StreamingResponse
 from sqlalchemy import func
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 
 from app.core.deps import require_role
 from app.db.session import get_db
@@ -32,6 +34,7 @@ from app.services.chat_secure_service import (
     serialize_message_bodies_for_request,
     serialize_messages_for_request,
 )
+from app.services.chat_events import LIVE_STREAM_HEADERS, live_event_stream, live_stream_session
 from app.services.chat_presence import list_typing_presence, set_typing_presence
 from app.services.security_audit import extract_client_ip, record_pii_access_event
 
@@ -434,16 +437,13 @@ def create_request_message(
     return serialize_message_for_request(row, request_extra_fields=req.extra_fields)
 
 
-@router.get("/requests/{request_id}/live")
-def get_request_live_state(
-    request_id: str,
-    http_request: FastapiRequest,
-    cursor: str | None = None,
-    db: Session = Depends(get_db),
-    admin: dict = Depends(require_role("ADMIN", "LAWYER", "CURATOR")),
-):
-    req = _request_for_id_or_404(db, request_id)
-    _ensure_lawyer_can_view_request_or_403(admin, req)
+def _admin_actor_key(admin: dict) -> str:
+    actor_sub = str(admin.get("sub") or "").strip() or "unknown"
+    actor_role = str(admin.get("role") or "").strip().upper() or "UNKNOWN"
+    return f"{actor_role}:{actor_sub}"
+
+
+def _build_request_live_state(db: Session, *, req: Request, admin: dict, cursor: str | None) -> dict:
     mark_messages_delivered_for_staff(db, request_id=req.id)
     summary = get_chat_activity_summary(db, req.id)
     latest_activity_at = _as_utc_datetime(summary.get("latest_activity_at"))
@@ -480,11 +480,8 @@ def get_request_live_state(
         )
         delta_attachments = [_serialize_live_attachment(row) for row in attachment_rows]
 
-    actor_sub = str(admin.get("sub") or "").strip() or "unknown"
-    actor_role = str(admin.get("role") or "").strip().upper() or "UNKNOWN"
-    actor_key = f"{actor_role}:{actor_sub}"
-    typing_rows = list_typing_presence(request_key=str(req.id), exclude_actor_key=actor_key)
-    payload = {
+    typing_rows = list_typing_presence(request_key=str(req.id), exclude_actor_key=_admin_actor_key(admin))
+    return {
         "request_id": str(req.id),
         "cursor": latest_activity_iso,
         "has_updates": has_updates,
@@ -501,17 +498,74 @@ def get_request_live_state(
             request_id=req.id,
         ),
     }
+
+
+@router.get("/requests/{request_id}/live")
+def get_request_live_state(
+    request_id: str,
+    http_request: FastapiRequest,
+    cursor: str | None = None,
+    db: Session = Depends(get_db),
+    admin: dict = Depends(require_role("ADMIN", "LAWYER", "CURATOR")),
+):
+    req = _request_for_id_or_404(db, request_id)
+    _ensure_lawyer_can_view_request_or_403(admin, req)
+    payload = _build_request_live_state(db, req=req, admin=admin, cursor=cursor)
     _audit_admin_chat_read(
         db,
         admin=admin,
         http_request=http_request,
         req=req,
         action="READ_CHAT_LIVE_STATE",
-        details={"has_updates": bool(has_updates)},
+        details={"has_updates": bool(payload["has_updates"])},
     )
     return payload
 
 
+@router.get("/requests/{request_id}/stream")
+async def stream_request_live_state(
+    request_id: str,
+    http_request: FastapiRequest,
+    cursor: str | None = None,
+    admin: dict = Depends(require_role("ADMIN", "LAWYER", "CURATOR")),
+):
+    def _open_stream() -> str:
+        with live_stream_session(http_request) as db:
+            req = _request_for_id_or_404(db, request_id)
+            _ensure_lawyer_can_view_request_or_403(admin, req)
+            _audit_admin_chat_read(
+                db,
+                admin=admin,
+                http_request=http_request,
+                req=req,
+                action="READ_CHAT_LIVE_STREAM",
+            )
+            return str(req.id)
+
+    def _build_live(cursor_value: str | None) -> dict:
+        with live_stream_session(http_request) as db:
+            req = _request_for_id_or_404(db, request_key)
+            _ensure_lawyer_can_view_request_or_403(admin, req)
+            return _build_request_live_state(db, req=req, admin=admin, cursor=cursor_value)
+
+    def _list_typing() -> list[dict]:
+        return list_typing_presence(request_key=request_key, exclude_actor_key=_admin_actor_key(admin))
+
+    request_key = await run_in_threadpool(_open_stream)
+    return StreamingResponse(
+        live_event_stream(
+            request_key=request_key,
+            cursor=cursor,
+            build_live=_build_live,
+            list_typing=_list_typing,
+            is_disconnected=http_request.is_disconnected,
+            typing_payload={"request_id": request_key},
+        ),
+        media_type="text/event-stream",
+        headers=LIVE_STREAM_HEADERS,
+    )
+
+
 @router.post("/requests/{request_id}/typing")
 def set_request_typing_state(
     request_id: str,
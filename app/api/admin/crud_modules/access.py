@@ -22,6 +22,14 @@ SYSTEM_FIELDS = {
     "client_unread_event_type",
     "lawyer_has_unread_updates",
     "lawyer_unread_event_type",
+    "chat_message_count",
+    "chat_attachment_count",
+    "chat_latest_message_at",
+    "chat_latest_attachment_at",
+    "chat_activity_version",
+    "status_entered_at",
+    "sla_deadline_at",
+    "first_lawyer_response_at",
 }
 REQUEST_FINANCIAL_FIELDS = {"effective_rate", "invoice_amount", "paid_at", "paid_by_admin_id"}
 REQUEST_CALCULATED_FIELDS = {"invoice_amount", "paid_at", "paid_by_admin_id", "total_attachments_bytes"}
@@ -56,6 +64,10 @@ TABLE_ROLE_ACTIONS: dict[str, dict[str, set[str]]] = {
     "audit_log": {"ADMIN": {"query", "read"}},
     "security_audit_log": {"ADMIN": {"query", "read"}},
     "otp_sessions": {"ADMIN": {"query", "read"}},
+    "kanban_cards": {"ADMIN": {"query", "read"}},
+    "notification_unread_counters": {"ADMIN": {"query", "read"}},
+    "telegram_outbox": {"ADMIN": {"query", "read"}},
+    "lawyer_metric_rollups": {"ADMIN": {"query", "read"}},
     "admin_users": {
         "ADMIN": set(CRUD_ACTIONS),
         "LAWYER": {"read", "update"},
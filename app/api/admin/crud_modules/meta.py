@@ -1,7 +1,11 @@
 from __future__ import annotations
 
+import hashlib
+import json
 import uuid
+from dataclasses import dataclass
 from datetime import date, datetime
+from functools import lru_cache
 from decimal import Decimal
 from typing import Any
 
@@ -10,7 +14,7 @@ from sqlalchemy.inspection import inspect as sa_inspect
 from sqlalchemy.orm import Session
 from sqlalchemy.sql.sqltypes import Boolean, Date, DateTime, Float, Integer, JSON, Numeric
 
-from app.models.table_availability import TableAvailability
+from app.services.table_availability import TableAvailabilitySnapshot, get_table_availability
 
 from .access import (
     REQUEST_CALCULATED_FIELDS,
@@ -101,6 +105,10 @@ def _table_label(table_name: str) -> str:
         "request_data_requirements": "Требования данных заявки",
         "request_service_requests": "Запросы",
         "otp_sessions": "OTP-сессии",
+        "kanban_cards": "Карточки канбана",
+        "notification_unread_counters": "Счетчики непрочитанных уведомлений",
+        "telegram_outbox": "Очередь Telegram",
+        "lawyer_metric_rollups": "Сводные показатели юристов",
         "notifications": "Уведомления",
         "retention": "хранения",
         "policy": "политика",
@@ -247,6 +255,14 @@ def _column_label(table_name: str, column_name: str) -> str:
         "resolved_by_admin_id": "Обработал",
         "extra_fields": "Доп. поля",
         "total_attachments_bytes": "Размер вложений (байт)",
+        "chat_message_count": "Сообщений в чате",
+        "chat_attachment_count": "Вложений в чате",
+        "chat_latest_message_at": "Последнее сообщение",
+        "chat_latest_attachment_at": "Последнее вложение",
+        "chat_activity_version": "Версия активности чата",
+        "status_entered_at": "В текущем статусе с",
+        "sla_deadline_at": "Дедлайн SLA",
+        "first_lawyer_response_at": "Первый ответ юриста",
         "type": "Тип",
         "options": "Опции",
         "field_key": "Поле формы",
@@ -508,16 +524,60 @@ def _table_section(table_name: str) -> str:
     return "dictionary"
 
 
-def _table_availability_map(db: Session) -> dict[str, TableAvailability]:
-    rows = db.query(TableAvailability).all()
-    return {str(row.table_name): row for row in rows if row and row.table_name}
+def _table_availability_map(db: Session) -> TableAvailabilitySnapshot:
+    return get_table_availability(db)
 
 
-def _table_is_active(table_name: str, availability: dict[str, TableAvailability]) -> bool:
-    row = availability.get(table_name)
-    if row is None:
-        return True
-    return bool(row.is_active)
+def _table_is_active(table_name: str, availability: TableAvailabilitySnapshot) -> bool:
+    return availability.is_active(table_name)
+
+
+@dataclass(frozen=True)
+class _CompiledTableMeta:
+    table: str
+    label: str
+    section: str
+    default_sort: tuple[dict[str, str], ...]
+    columns: tuple[dict[str, Any], ...]
+
+
+@dataclass(frozen=True)
+class _CompiledMetaRegistry:
+    tables: tuple[_CompiledTableMeta, ...]
+    # Changes only when models or label/reference rules change, i.e. on deploy.
+    digest: str
+
+
+@lru_cache(maxsize=1)
+def _compiled_meta_registry() -> _CompiledMetaRegistry:
+    """Model-derived table metadata, built once per process; payloads only add role actions and availability."""
+    table_models = _table_model_map()
+    tables = tuple(
+        _CompiledTableMeta(
+            table=table_name,
+            label=_table_label(table_name),
+            section=_table_section(table_name),
+            default_sort=tuple(_default_sort_for_table(table_models[table_name])),
+            columns=tuple(_table_columns_meta(table_name, table_models[table_name])),
+        )
+        for table_name in sorted(table_models.keys())
+    )
+    encoded = json.dumps(
+        [[item.table, item.label, item.section, item.default_sort, item.columns] for item in tables],
+        ensure_ascii=False,
+        sort_keys=True,
+    )
+    return _CompiledMetaRegistry(tables=tables, digest=hashlib.sha256(encoded.encode("utf-8")).hexdigest()[:16])
+
+
+def warm_meta_registry() -> None:
+    """Build the compiled registry ahead of the first /meta request (called on app startup)."""
+    _compiled_meta_registry()
+
+
+def _meta_tables_etag(db: Session, *, role: str, variant: str) -> str:
+    availability = _table_availability_map(db)
+    return f'"{_compiled_meta_registry().digest}-{availability.digest}-{role.lower()}-{variant}"'
 
 
 def _meta_tables_payload(
@@ -526,30 +586,28 @@ def _meta_tables_payload(
     role: str,
     include_inactive_dictionaries: bool,
 ) -> list[dict[str, Any]]:
-    table_models = _table_model_map()
     availability = _table_availability_map(db)
     rows: list[dict[str, Any]] = []
-    for table_name in sorted(table_models.keys()):
-        model = table_models[table_name]
-        section = _table_section(table_name)
+    for item in _compiled_meta_registry().tables:
+        table_name = item.table
         is_active = _table_is_active(table_name, availability)
-        if section == "dictionary" and not include_inactive_dictionaries and not is_active:
+        if item.section == "dictionary" and not include_inactive_dictionaries and not is_active:
             continue
         actions = sorted(_allowed_actions(role, table_name))
         rows.append(
             {
                 "key": table_name,
                 "table": table_name,
-                "label": _table_label(table_name),
-                "section": section,
+                "label": item.label,
+                "section": item.section,
                 "is_active": is_active,
                 "actions": actions,
                 "query_endpoint": f"/api/admin/crud/{table_name}/query",
                 "create_endpoint": f"/api/admin/crud/{table_name}",
                 "update_endpoint_template": f"/api/admin/crud/{table_name}" + "/{id}",
                 "delete_endpoint_template": f"/api/admin/crud/{table_name}" + "/{id}",
-                "default_sort": _default_sort_for_table(model),
-                "columns": _table_columns_meta(table_name, model),
+                "default_sort": list(item.default_sort),
+                "columns": list(item.columns),
             }
         )
     return rows
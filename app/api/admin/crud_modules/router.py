@@ -2,7 +2,7 @@ from __future__ import annotations
 
 from typing import Any
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Request, Response
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
 
@@ -11,12 +11,14 @@ from app.db.session import get_db
 from app.schemas.universal import UniversalQuery
 
 from .service import (
+    available_tables_etag_service,
     create_row_service,
     delete_row_service,
     get_row_service,
     list_available_tables_service,
     list_tables_meta_service,
     query_table_service,
+    tables_meta_etag_service,
     update_available_table_service,
     update_row_service,
 )
@@ -28,13 +30,37 @@ class TableAvailabilityUpdatePayload(BaseModel):
     is_active: bool
 
 
+def _etag_matches(request: Request, etag: str) -> bool:
+    header = str(request.headers.get("if-none-match") or "")
+    candidates = {item.strip().removeprefix("W/") for item in header.split(",") if item.strip()}
+    return "*" in candidates or etag in candidates
+
+
 @router.get("/meta/tables")
-def list_tables_meta(db: Session = Depends(get_db), admin: dict = Depends(get_current_admin)):
+def list_tables_meta(
+    request: Request,
+    response: Response,
+    db: Session = Depends(get_db),
+    admin: dict = Depends(get_current_admin),
+):
+    etag = tables_meta_etag_service(db, admin)
+    if _etag_matches(request, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    response.headers["ETag"] = etag
     return list_tables_meta_service(db, admin)
 
 
 @router.get("/meta/available-tables")
-def list_available_tables(db: Session = Depends(get_db), admin: dict = Depends(get_current_admin)):
+def list_available_tables(
+    request: Request,
+    response: Response,
+    db: Session = Depends(get_db),
+    admin: dict = Depends(get_current_admin),
+):
+    etag = available_tables_etag_service(db, admin)
+    if _etag_matches(request, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    response.headers["ETag"] = etag
     return list_available_tables_service(db, admin)
 
 
@@ -42,7 +42,7 @@ from app.services.request_status import apply_status_change_effects
 from app.services.request_templates import validate_required_topic_fields_or_400
 from app.services.status_flow import transition_allowed_for_topic
 from app.services.status_transition_requirements import validate_transition_requirements_or_400
-from app.services.universal_query import apply_universal_query
+from app.services.universal_query import apply_universal_query, paginate_universal_query
 
 from .access import (
     REQUEST_FINANCIAL_FIELDS,
@@ -57,6 +57,7 @@ from .access import (
 from .audit import _actor_role, _append_audit, _integrity_error, _resolve_responsible, _strip_hidden_fields
 from .meta import (
     _columns_map,
+    _meta_tables_etag,
     _meta_tables_payload,
     _row_to_dict,
     _serialize_value,
@@ -163,17 +164,28 @@ def _apply_create_side_effects(db: Session, *, table_name: str, row: Any, admin:
         )
         return
 
-def list_tables_meta_service(db: Session, admin: dict) -> dict[str, Any]:
+def _admin_role_or_403(admin: dict) -> str:
     role = str(admin.get("role") or "").upper()
     if role != "ADMIN":
         raise HTTPException(status_code=403, detail="Недостаточно прав")
+    return role
+
+
+def tables_meta_etag_service(db: Session, admin: dict) -> str:
+    return _meta_tables_etag(db, role=_admin_role_or_403(admin), variant="tables")
+
+
+def available_tables_etag_service(db: Session, admin: dict) -> str:
+    return _meta_tables_etag(db, role=_admin_role_or_403(admin), variant="available")
+
+
+def list_tables_meta_service(db: Session, admin: dict) -> dict[str, Any]:
+    role = _admin_role_or_403(admin)
     return {"tables": _meta_tables_payload(db, role=role, include_inactive_dictionaries=False)}
 
 
 def list_available_tables_service(db: Session, admin: dict) -> dict[str, Any]:
-    role = str(admin.get("role") or "").upper()
-    if role != "ADMIN":
-        raise HTTPException(status_code=403, detail="Недостаточно прав")
+    role = _admin_role_or_403(admin)
 
     availability = _table_availability_map(db)
     rows = []
@@ -194,9 +206,7 @@ def list_available_tables_service(db: Session, admin: dict) -> dict[str, Any]:
 
 
 def update_available_table_service(table_name: str, is_active: bool, db: Session, admin: dict) -> dict[str, Any]:
-    role = str(admin.get("role") or "").upper()
-    if role != "ADMIN":
-        raise HTTPException(status_code=403, detail="Недостаточно прав")
+    _admin_role_or_403(admin)
 
     normalized, _ = _resolve_table_model(table_name)
     row = db.query(TableAvailability).filter(TableAvailability.table_name == normalized).first()
@@ -259,12 +269,11 @@ def query_table_service(table_name: str, uq: UniversalQuery, db: Session, admin:
             RequestServiceRequest.assigned_lawyer_id == actor_id,
         )
     query = apply_universal_query(base_query, model, uq)
-    total = query.count()
-    rows = query.offset(uq.page.offset).limit(uq.page.limit).all()
-    row_dicts = [_strip_hidden_fields(normalized, _row_to_dict(row)) for row in rows]
+    page = paginate_universal_query(query, model, uq)
+    row_dicts = [_strip_hidden_fields(normalized, _row_to_dict(row)) for row in page.rows]
     if normalized == "landing_featured_staff":
         row_dicts = _enrich_landing_featured_staff(row_dicts, db)
-    return {"rows": row_dicts, "total": total}
+    return {"rows": row_dicts, "total": page.total, "total_mode": page.total_mode, "next_cursor": page.next_cursor}
 
 
 def get_row_service(table_name: str, row_id: str, db: Session, admin: dict) -> dict[str, Any]:
@@ -21,7 +21,7 @@ from app.services.invoice_crypto import decrypt_requisites, encrypt_requisites
 from app.services.invoice_numbering import generate_invoice_number
 from app.services.invoice_pdf import build_invoice_pdf_bytes
 from app.services.security_audit import extract_client_ip, record_pii_access_event
-from app.services.universal_query import apply_universal_query
+from app.services.universal_query import apply_universal_query, paginate_universal_query
 
 router = APIRouter()
 
@@ -199,8 +199,8 @@ def query_invoices(
         query = query.join(Request, Request.id == Invoice.request_id).filter(Request.assigned_lawyer_id == str(actor_id))
     query = apply_universal_query(query, Invoice, uq)
 
-    total = query.count()
-    rows = query.offset(uq.page.offset).limit(uq.page.limit).all()
+    page = paginate_universal_query(query, Invoice, uq)
+    rows = page.rows
 
     request_ids = {row.request_id for row in rows}
     requests = db.query(Request.id, Request.track_number).filter(Request.id.in_(request_ids)).all() if request_ids else []
@@ -218,7 +218,7 @@ def query_invoices(
         )
         for row in rows
     ]
-    payload = {"rows": data, "total": int(total)}
+    payload = {"rows": data, "total": page.total, "total_mode": page.total_mode, "next_cursor": page.next_cursor}
     record_pii_access_event(
         db,
         actor_role=role,
@@ -226,7 +226,7 @@ def query_invoices(
         actor_ip=extract_client_ip(http_request),
         action="READ_INVOICE_LIST",
         scope="INVOICE",
-        details={"rows": int(total)},
+        details={"rows": int(page.total if page.total is not None else len(rows))},
         responsible=str(admin.get("email") or "").strip() or "Администратор системы",
         persist_now=True,
     )
@@ -1,44 +1,76 @@
 from __future__ import annotations
 
+import threading
+import time
 from datetime import datetime, timedelta, timezone
 from decimal import Decimal
 from uuid import UUID
 
 from fastapi import APIRouter, Depends
-from sqlalchemy import func
+from sqlalchemy import case, func
 from sqlalchemy.orm import Session
 
+from app.core.config import settings
 from app.core.deps import require_role
 from app.db.session import get_db
 from app.models.admin_user import AdminUser
-from app.models.audit_log import AuditLog
 from app.models.request import Request
 from app.models.request_service_request import RequestServiceRequest
-from app.models.status import Status
 from app.models.status_history import StatusHistory
+from app.services.lawyer_metrics import (
+    METRIC_ASSIGNED,
+    METRIC_COMPLETED,
+    METRIC_PAID_EVENTS,
+    METRIC_PAID_GROSS,
+    PAID_STATUS_CODES,
+    lawyer_rollup_totals,
+)
 from app.services.notifications import (
     unread_admin_summary,
     unread_global_summary_for_clients,
     unread_global_summary_for_lawyers,
 )
+from app.services.reference_data import terminal_status_codes
 from app.services.sla_metrics import compute_sla_snapshot
 
 router = APIRouter()
 
-DEFAULT_TERMINAL_STATUS_CODES = {"RESOLVED", "CLOSED", "REJECTED"}
-PAID_STATUS_CODES = {"PAID", "ОПЛАЧЕНО"}
-
-
-def _terminal_status_codes(db: Session) -> set[str]:
-    rows = db.query(Status.code).filter(Status.is_terminal.is_(True)).all()
-    codes = {str(code).strip() for (code,) in rows if code}
-    return codes or set(DEFAULT_TERMINAL_STATUS_CODES)
+_overview_cache_lock = threading.Lock()
+_overview_cache: dict[tuple, tuple[float, dict]] = {}
+_OVERVIEW_CACHE_MAX_ENTRIES = 256
 
 
 def _paid_status_codes() -> set[str]:
     return set(PAID_STATUS_CODES)
 
 
+def invalidate_overview_cache() -> None:
+    with _overview_cache_lock:
+        _overview_cache.clear()
+
+
+def _cached_overview(key: tuple) -> dict | None:
+    with _overview_cache_lock:
+        entry = _overview_cache.get(key)
+        if entry is None:
+            return None
+        if entry[0] <= time.monotonic():
+            _overview_cache.pop(key, None)
+            return None
+        return dict(entry[1])
+
+
+def _store_overview(key: tuple, payload: dict, ttl: int) -> None:
+    now = time.monotonic()
+    with _overview_cache_lock:
+        if len(_overview_cache) >= _OVERVIEW_CACHE_MAX_ENTRIES:
+            for stale in [cache_key for cache_key, (expires_at, _) in _overview_cache.items() if expires_at <= now]:
+                _overview_cache.pop(stale, None)
+            if len(_overview_cache) >= _OVERVIEW_CACHE_MAX_ENTRIES:
+                _overview_cache.clear()
+        _overview_cache[key] = (now + ttl, dict(payload))
+
+
 def _month_bounds(now_utc: datetime) -> tuple[datetime, datetime]:
     start = datetime(now_utc.year, now_utc.month, 1, tzinfo=timezone.utc)
     if now_utc.month == 12:
@@ -66,33 +98,6 @@ def _uuid_or_none(value: str | None) -> UUID | None:
         return None
 
 
-def _extract_assigned_lawyer_from_audit(diff: dict | None, action: str | None) -> str | None:
-    if not isinstance(diff, dict):
-        return None
-    action_code = str(action or "").upper()
-    if action_code == "MANUAL_CLAIM":
-        value = diff.get("assigned_lawyer_id")
-        return str(value).strip() if value else None
-    if action_code == "MANUAL_REASSIGN":
-        value = diff.get("to_lawyer_id")
-        return str(value).strip() if value else None
-    if action_code in {"CREATE", "UPDATE"}:
-        after = diff.get("after")
-        before = diff.get("before")
-        if action_code == "UPDATE":
-            if not isinstance(after, dict) or not isinstance(before, dict):
-                return None
-            prev_value = str(before.get("assigned_lawyer_id") or "").strip()
-            next_value = str(after.get("assigned_lawyer_id") or "").strip()
-            if not next_value or next_value == prev_value:
-                return None
-            return next_value
-        if isinstance(after, dict):
-            value = str(after.get("assigned_lawyer_id") or "").strip()
-            return value or None
-    return None
-
-
 def _empty_sla_snapshot() -> dict[str, object]:
     return {
         "frt_avg_minutes": None,
@@ -104,7 +109,7 @@ def _empty_sla_snapshot() -> dict[str, object]:
 
 
 def _overview_sla_payload(db: Session) -> dict[str, object]:
-    sla_snapshot = compute_sla_snapshot(db)
+    sla_snapshot = compute_sla_snapshot(db, use_cache=True)
     return {
         "frt_avg_minutes": sla_snapshot.get("frt_avg_minutes"),
         "sla_overdue": sla_snapshot.get("overdue_total", 0),
@@ -123,9 +128,14 @@ def overview(
     role = str(admin.get("role") or "").upper()
     actor_id = str(admin.get("sub") or "").strip()
     actor_uuid = _uuid_or_none(actor_id)
-
-    terminal_codes = _terminal_status_codes(db)
-    paid_codes = _paid_status_codes()
+    cache_ttl = max(0, int(settings.METRICS_OVERVIEW_CACHE_SECONDS or 0))
+    cache_key = (id(db.get_bind()), role, actor_id, bool(include_sla))
+    if cache_ttl:
+        cached = _cached_overview(cache_key)
+        if cached is not None:
+            return cached
+
+    terminal_codes = terminal_status_codes(db)
     now_utc = datetime.now(timezone.utc)
     month_start, next_month_start = _month_bounds(now_utc)
 
@@ -169,69 +179,28 @@ def overview(
             or 0
         )
 
-    active_load_rows = (
-        db.query(Request.assigned_lawyer_id, func.count(Request.id))
-        .filter(Request.assigned_lawyer_id.is_not(None))
-        .filter(Request.status_code.notin_(terminal_codes))
-        .group_by(Request.assigned_lawyer_id)
-        .all()
-    )
-    total_load_rows = (
-        db.query(Request.assigned_lawyer_id, func.count(Request.id))
-        .filter(Request.assigned_lawyer_id.is_not(None))
-        .group_by(Request.assigned_lawyer_id)
-        .all()
-    )
-    active_amount_rows = (
-        db.query(Request.assigned_lawyer_id, func.coalesce(func.sum(func.coalesce(Request.invoice_amount, 0)), 0))
-        .filter(Request.assigned_lawyer_id.is_not(None))
-        .filter(Request.status_code.notin_(terminal_codes))
-        .group_by(Request.assigned_lawyer_id)
-        .all()
-    )
-    paid_rows = (
+    is_active_request = Request.status_code.notin_(terminal_codes)
+    load_rows = (
         db.query(
             Request.assigned_lawyer_id,
-            func.count(StatusHistory.id),
-            func.coalesce(func.sum(func.coalesce(Request.invoice_amount, 0)), 0),
+            func.count(Request.id),
+            func.coalesce(func.sum(case((is_active_request, 1), else_=0)), 0),
+            func.coalesce(func.sum(case((is_active_request, func.coalesce(Request.invoice_amount, 0)), else_=0)), 0),
         )
-        .join(StatusHistory, StatusHistory.request_id == Request.id)
         .filter(Request.assigned_lawyer_id.is_not(None))
-        .filter(StatusHistory.created_at >= month_start, StatusHistory.created_at < next_month_start)
-        .filter(func.upper(StatusHistory.to_status).in_(paid_codes))
         .group_by(Request.assigned_lawyer_id)
         .all()
     )
+    total_load_map = {str(lawyer_id): int(total) for lawyer_id, total, _, _ in load_rows if lawyer_id}
+    active_load_map = {str(lawyer_id): int(active) for lawyer_id, _, active, _ in load_rows if lawyer_id}
+    active_amount_map = {str(lawyer_id): _to_float(amount) for lawyer_id, _, _, amount in load_rows if lawyer_id}
 
-    active_load_map = {str(lawyer_id): int(count) for lawyer_id, count in active_load_rows if lawyer_id}
-    total_load_map = {str(lawyer_id): int(count) for lawyer_id, count in total_load_rows if lawyer_id}
-    active_amount_map = {str(lawyer_id): _to_float(amount) for lawyer_id, amount in active_amount_rows if lawyer_id}
-    paid_events_map = {str(lawyer_id): int(events) for lawyer_id, events, _ in paid_rows if lawyer_id}
-    monthly_gross_map = {str(lawyer_id): _to_float(gross) for lawyer_id, _, gross in paid_rows if lawyer_id}
-
-    monthly_completed_rows = (
-        db.query(Request.assigned_lawyer_id, func.count(func.distinct(StatusHistory.request_id)))
-        .join(StatusHistory, StatusHistory.request_id == Request.id)
-        .filter(Request.assigned_lawyer_id.is_not(None))
-        .filter(StatusHistory.created_at >= month_start, StatusHistory.created_at < next_month_start)
-        .filter(func.upper(StatusHistory.to_status).in_({str(code).upper() for code in terminal_codes}))
-        .group_by(Request.assigned_lawyer_id)
-        .all()
-    )
-    monthly_completed_map = {str(lawyer_id): int(count) for lawyer_id, count in monthly_completed_rows if lawyer_id}
-
-    monthly_assigned_map: dict[str, int] = {}
-    audit_rows = (
-        db.query(AuditLog.action, AuditLog.diff)
-        .filter(AuditLog.entity == "requests")
-        .filter(AuditLog.created_at >= month_start, AuditLog.created_at < next_month_start)
-        .all()
-    )
-    for action, diff in audit_rows:
-        assigned_to = _extract_assigned_lawyer_from_audit(diff, action)
-        if not assigned_to:
-            continue
-        monthly_assigned_map[assigned_to] = int(monthly_assigned_map.get(assigned_to, 0)) + 1
+    # Monthly event totals come from the per-day rollups maintained on status/assignment writes.
+    month_totals = lawyer_rollup_totals(db, start=month_start.date(), end=next_month_start.date())
+    paid_events_map = {lawyer_id: int(row.get(METRIC_PAID_EVENTS, 0)) for lawyer_id, row in month_totals.items()}
+    monthly_gross_map = {lawyer_id: float(row.get(METRIC_PAID_GROSS, 0.0)) for lawyer_id, row in month_totals.items()}
+    monthly_completed_map = {lawyer_id: int(row.get(METRIC_COMPLETED, 0)) for lawyer_id, row in month_totals.items()}
+    monthly_assigned_map = {lawyer_id: int(row.get(METRIC_ASSIGNED, 0)) for lawyer_id, row in month_totals.items()}
 
     monthly_revenue = round(sum(monthly_gross_map.values()), 2)
 
@@ -276,13 +245,7 @@ def overview(
         )
         by_status = {status: int(count) for status, count in scoped_by_status_rows}
         assigned_total = int(sum(by_status.values()))
-        active_assigned_total = int(
-            db.query(func.count(Request.id))
-            .filter(Request.assigned_lawyer_id == str(actor_uuid))
-            .filter(Request.status_code.notin_(terminal_codes))
-            .scalar()
-            or 0
-        )
+        active_assigned_total = active_load_map.get(str(actor_uuid), 0)
         unassigned_total = int(db.query(func.count(Request.id)).filter(Request.assigned_lawyer_id.is_(None)).scalar() or 0)
         my_unread_updates = int(
             db.query(func.count(Request.id))
@@ -321,19 +284,8 @@ def overview(
     else:
         scoped_by_status_rows = db.query(Request.status_code, func.count(Request.id)).group_by(Request.status_code).all()
         by_status = {status: int(count) for status, count in scoped_by_status_rows}
-        assigned_total = int(
-            db.query(func.count(Request.id))
-            .filter(Request.assigned_lawyer_id.is_not(None))
-            .scalar()
-            or 0
-        )
-        active_assigned_total = int(
-            db.query(func.count(Request.id))
-            .filter(Request.assigned_lawyer_id.is_not(None))
-            .filter(Request.status_code.notin_(terminal_codes))
-            .scalar()
-            or 0
-        )
+        assigned_total = int(sum(total_load_map.values()))
+        active_assigned_total = int(sum(active_load_map.values()))
         unassigned_total = int(db.query(func.count(Request.id)).filter(Request.assigned_lawyer_id.is_(None)).scalar() or 0)
         my_unread_updates = int(my_unread_notifications.get("total") or 0)
         my_unread_by_event = dict(my_unread_notifications.get("by_event") or {})
@@ -377,6 +329,8 @@ def overview(
         "lawyer_loads": scoped_lawyer_loads,
     }
     payload.update(_overview_sla_payload(db) if include_sla else _empty_sla_snapshot())
+    if cache_ttl:
+        _store_overview(cache_key, payload, cache_ttl)
     return payload
 
 
@@ -401,7 +355,7 @@ def lawyer_active_requests(
     if lawyer is None:
         return {"rows": [], "total": 0, "totals": {"amount": 0.0, "salary": 0.0}}
 
-    terminal_codes = _terminal_status_codes(db)
+    terminal_codes = terminal_status_codes(db)
     paid_codes = _paid_status_codes()
     now_utc = datetime.now(timezone.utc)
     month_start, next_month_start = _month_bounds(now_utc)
@@ -5,15 +5,14 @@ from app.core.deps import require_role
 from app.schemas.universal import UniversalQuery
 from app.schemas.admin import QuoteUpsert
 from app.models.quote import Quote
-from app.services.universal_query import apply_universal_query
+from app.services.universal_query import apply_universal_query, paginate_universal_query
 
 router = APIRouter()
 
 @router.post("/query")
 def query_quotes(uq: UniversalQuery, db: Session = Depends(get_db), admin=Depends(require_role("ADMIN"))):
     q = apply_universal_query(db.query(Quote), Quote, uq)
-    total = q.count()
-    rows = q.offset(uq.page.offset).limit(uq.page.limit).all()
+    page = paginate_universal_query(q, Quote, uq)
     return {
         "rows": [
             {
@@ -25,9 +24,11 @@ def query_quotes(uq: UniversalQuery, db: Session = Depends(get_db), admin=Depend
                 "sort_order": r.sort_order,
                 "created_at": r.created_at.isoformat() if r.created_at else None,
             }
-            for r in rows
+            for r in page.rows
         ],
-        "total": total,
+        "total": page.total,
+        "total_mode": page.total_mode,
+        "next_cursor": page.next_cursor,
     }
 
 @router.post("", status_code=201)
@@ -1,22 +1,20 @@
 from __future__ import annotations
 
+import base64
 import json
 from datetime import datetime, timedelta, timezone
 from typing import Any
 from uuid import UUID
 
 from fastapi import HTTPException
-from sqlalchemy import case, func, or_
+from sqlalchemy import and_, case, exists, func, literal, or_
 from sqlalchemy.orm import Session
 
-from app.models.admin_user import AdminUser
+from app.models.kanban_card import KanbanCard
 from app.models.notification import Notification
 from app.models.request import Request
-from app.models.status import Status
-from app.models.status_group import StatusGroup
-from app.models.status_history import StatusHistory
-from app.models.topic_status_transition import TopicStatusTransition
 from app.schemas.universal import FilterClause, Page, UniversalQuery
+from app.services.reference_data import ReferenceData, StatusRef, TransitionRef, get_reference_data
 from app.services.universal_query import apply_universal_query
 
 from .common import parse_datetime_safe
@@ -41,6 +39,19 @@ FALLBACK_KANBAN_GROUPS = [
 ]
 
 
+def _status_meta(reference: ReferenceData, status: StatusRef) -> dict[str, object]:
+    group = reference.status_groups.get(status.status_group_id or "")
+    return {
+        "name": status.name,
+        "kind": status.kind,
+        "is_terminal": status.is_terminal,
+        "sort_order": status.sort_order,
+        "status_group_id": status.status_group_id,
+        "status_group_name": (group.name or None) if group is not None else None,
+        "status_group_order": group.sort_order if group is not None else None,
+    }
+
+
 def status_meta_or_default(meta_map: dict[str, dict[str, object]], status_code: str) -> dict[str, object]:
     return meta_map.get(status_code) or {
         "name": status_code,
@@ -77,26 +88,6 @@ def fallback_group_for_status(status_code: str, status_meta: dict[str, object])
     return FALLBACK_KANBAN_GROUPS[1]
 
 
-def extract_case_deadline(extra_fields: object) -> datetime | None:
-    if not isinstance(extra_fields, dict):
-        return None
-    deadline_keys = (
-        "deadline_at",
-        "deadline",
-        "due_date",
-        "due_at",
-        "case_deadline",
-        "court_date",
-        "hearing_date",
-        "next_action_deadline",
-    )
-    for key in deadline_keys:
-        parsed = parse_datetime_safe(extra_fields.get(key))
-        if parsed:
-            return parsed
-    return None
-
-
 def coerce_kanban_bool(value: object, field_name: str) -> bool:
     if isinstance(value, bool):
         return value
@@ -139,148 +130,120 @@ def parse_kanban_filters_or_400(raw_filters: str | None) -> tuple[list[FilterCla
     return universal_filters, boolean_filters
 
 
-def apply_boolean_kanban_filters(
-    items: list[dict[str, object]],
-    boolean_filters: list[tuple[str, str, bool]],
-) -> list[dict[str, object]]:
-    if not boolean_filters:
-        return items
-    now = datetime.now(timezone.utc)
-    out: list[dict[str, object]] = []
-    for item in items:
-        ok = True
-        for field, op, expected in boolean_filters:
-            if field == "overdue":
-                raw_deadline = item.get("sla_deadline_at") or item.get("case_deadline_at")
-                deadline_at = parse_datetime_safe(raw_deadline)
-                actual = bool(deadline_at and deadline_at <= now)
-            elif field == "has_unread_updates":
-                actual = bool(item.get("has_unread_updates"))
-            elif field == "deadline_alert":
-                actual = bool(item.get("deadline_alert"))
-            else:
-                actual = False
-            if op == "=":
-                ok = ok and (actual == expected)
-            elif op == "!=":
-                ok = ok and (actual != expected)
-            if not ok:
-                break
-        if ok:
-            out.append(item)
-    return out
-
-
-def sort_kanban_items(items: list[dict[str, object]], sort_mode: str) -> list[dict[str, object]]:
-    mode = sort_mode if sort_mode in ALLOWED_KANBAN_SORT_MODES else "created_newest"
-    epoch = datetime(1970, 1, 1, tzinfo=timezone.utc)
-
-    if mode == "lawyer":
-        return sorted(
-            items,
-            key=lambda row: (
-                1 if not str(row.get("assigned_lawyer_name") or "").strip() else 0,
-                str(row.get("assigned_lawyer_name") or "").lower(),
-                -int((parse_datetime_safe(row.get("created_at")) or epoch).timestamp()),
-            ),
-        )
-
-    if mode == "deadline":
-        far_future = datetime(9999, 12, 31, tzinfo=timezone.utc)
-        return sorted(
-            items,
-            key=lambda row: (
-                parse_datetime_safe(row.get("sla_deadline_at") or row.get("case_deadline_at")) or far_future,
-                -int((parse_datetime_safe(row.get("created_at")) or epoch).timestamp()),
-            ),
-        )
-
-    return sorted(
-        items,
-        key=lambda row: parse_datetime_safe(row.get("created_at")) or epoch,
-        reverse=True,
-    )
-
-
-def _apply_sql_safe_boolean_filters(
-    query,
+def _kanban_boolean_expressions(
     *,
-    boolean_filters: list[tuple[str, str, bool]],
     role: str,
     actor: str,
+    actor_unread,
     terminal_codes: set[str],
+    now_utc: datetime,
     next_day_start: datetime,
-):
-    remaining_filters: list[tuple[str, str, bool]] = []
-    for field, op, expected in boolean_filters:
-        if field != "deadline_alert":
-            remaining_filters.append((field, op, expected))
-            continue
-        actual_true_expr = (
-            Request.important_date_at.is_not(None)
-            & (Request.important_date_at < next_day_start)
-            & Request.status_code.notin_(terminal_codes)
+) -> dict[str, Any]:
+    deadline_alert = (
+        Request.important_date_at.is_not(None)
+        & (Request.important_date_at < next_day_start)
+        & Request.status_code.notin_(terminal_codes)
+    )
+    if role == "LAWYER":
+        deadline_alert = deadline_alert & (Request.assigned_lawyer_id == actor)
+        has_unread_updates = Request.lawyer_has_unread_updates.is_(True) | actor_unread
+    else:
+        has_unread_updates = (
+            Request.lawyer_has_unread_updates.is_(True) | Request.client_has_unread_updates.is_(True) | actor_unread
         )
-        if role == "LAWYER":
-            actual_true_expr = actual_true_expr & (Request.assigned_lawyer_id == actor)
+    return {
+        "overdue": KanbanCard.deadline_at.is_not(None) & (KanbanCard.deadline_at <= now_utc),
+        "has_unread_updates": has_unread_updates,
+        "deadline_alert": deadline_alert,
+    }
+
 
+def _apply_boolean_kanban_filters(query, boolean_filters: list[tuple[str, str, bool]], expressions: dict[str, Any]):
+    for field, op, expected in boolean_filters:
+        actual_true_expr = expressions[field]
         target_true = expected if op == "=" else not expected
         query = query.filter(actual_true_expr if target_true else ~actual_true_expr)
-    return query, remaining_filters
+    return query
 
 
-def _build_lawyer_sort_order(query, db: Session) -> list[str]:
-    assigned_id_rows = (
-        query.with_entities(Request.assigned_lawyer_id)
-        .filter(Request.assigned_lawyer_id.is_not(None))
-        .distinct()
-        .all()
-    )
-    assigned_ids = [str(raw_id).strip() for (raw_id,) in assigned_id_rows if str(raw_id or "").strip()]
-    if not assigned_ids:
-        return []
+# Cards without any deadline sort after every dated card.
+_NO_DEADLINE_SORT_VALUE = datetime(9999, 12, 31, tzinfo=timezone.utc)
 
-    valid_lawyer_ids: list[UUID] = []
-    for raw in assigned_ids:
-        try:
-            valid_lawyer_ids.append(UUID(raw))
-        except ValueError:
-            continue
 
-    lawyer_name_rows = db.query(AdminUser.id, AdminUser.name).filter(AdminUser.id.in_(valid_lawyer_ids)).all() if valid_lawyer_ids else []
-    lawyer_name_map = {
-        str(lawyer_id): str(name or "").strip()
-        for lawyer_id, name in lawyer_name_rows
-        if str(lawyer_id or "").strip()
-    }
-    return sorted(
-        lawyer_name_map.keys(),
-        key=lambda lawyer_id: (
-            1 if not lawyer_name_map.get(lawyer_id) else 0,
-            lawyer_name_map.get(lawyer_id, "").lower(),
-            lawyer_id,
-        ),
-    )
+def _kanban_sort_keys(sort_mode: str) -> list[tuple[Any, bool, str]]:
+    # (expression, descending, cursor value kind); the trailing request_id makes every key unique for keyset pagination.
+    tail = [(KanbanCard.created_at, True, "datetime"), (KanbanCard.request_id, True, "uuid")]
+    if sort_mode == "lawyer":
+        return [
+            (case((KanbanCard.assigned_lawyer_sort_key.is_(None), 1), else_=0), False, "int"),
+            (func.coalesce(KanbanCard.assigned_lawyer_sort_key, ""), False, "str"),
+            *tail,
+        ]
+    if sort_mode == "deadline":
+        return [(func.coalesce(KanbanCard.deadline_at, _NO_DEADLINE_SORT_VALUE), False, "datetime"), *tail]
+    return tail
+
+
+def _kanban_cursor_values(card: KanbanCard, sort_mode: str) -> list[Any]:
+    tail = [card.created_at, card.request_id]
+    if sort_mode == "lawyer":
+        sort_key = card.assigned_lawyer_sort_key
+        return [1 if sort_key is None else 0, sort_key or "", *tail]
+    if sort_mode == "deadline":
+        return [card.deadline_at or _NO_DEADLINE_SORT_VALUE, *tail]
+    return tail
+
+
+def encode_kanban_cursor(sort_mode: str, values: list[Any]) -> str:
+    keys = []
+    for value in values:
+        if isinstance(value, datetime):
+            keys.append(parse_datetime_safe(value).isoformat())
+        elif isinstance(value, UUID):
+            keys.append(str(value))
+        else:
+            keys.append(value)
+    payload = {"sort_mode": sort_mode, "keys": keys}
+    return base64.urlsafe_b64encode(json.dumps(payload, separators=(",", ":")).encode("utf-8")).decode("ascii")
 
 
-def _apply_sql_sort(query, *, sort_mode: str, lawyer_sort_order: list[str] | None = None):
-    if sort_mode == "lawyer":
-        ordered_ids = lawyer_sort_order or []
-        if ordered_ids:
-            lawyer_rank_case = case(
-                *[(Request.assigned_lawyer_id == lawyer_id, index) for index, lawyer_id in enumerate(ordered_ids)],
-                else_=len(ordered_ids) + 1,
-            )
-            return query.order_by(
-                lawyer_rank_case.asc(),
-                case((Request.assigned_lawyer_id.is_(None), 1), else_=0).asc(),
-                Request.created_at.desc(),
-            )
-        return query.order_by(
-            case((Request.assigned_lawyer_id.is_(None), 1), else_=0).asc(),
-            Request.created_at.desc(),
-        )
-    return query.order_by(Request.created_at.desc())
+def _decode_cursor_value(value: Any, kind: str) -> Any:
+    if kind == "int":
+        if not isinstance(value, int):
+            raise ValueError(kind)
+        return value
+    if kind == "str":
+        if not isinstance(value, str):
+            raise ValueError(kind)
+        return value
+    if kind == "datetime":
+        parsed = parse_datetime_safe(value)
+        if parsed is None:
+            raise ValueError(kind)
+        return parsed
+    return UUID(str(value))
+
+
+def decode_kanban_cursor_or_400(cursor: str, sort_mode: str) -> list[Any]:
+    sort_keys = _kanban_sort_keys(sort_mode)
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(str(cursor).encode("ascii")).decode("utf-8"))
+        if not isinstance(payload, dict) or payload.get("sort_mode") != sort_mode:
+            raise ValueError("sort_mode")
+        keys = list(payload.get("keys") or [])
+        if len(keys) != len(sort_keys):
+            raise ValueError("keys")
+        return [_decode_cursor_value(value, kind) for value, (_, _, kind) in zip(keys, sort_keys)]
+    except (TypeError, ValueError, UnicodeError):
+        raise HTTPException(status_code=400, detail="Некорректный курсор канбана")
+
+
+def _apply_kanban_keyset(query, sort_keys: list[tuple[Any, bool, str]], values: list[Any]):
+    clauses = []
+    for index, (expr, descending, _) in enumerate(sort_keys):
+        step = expr < values[index] if descending else expr > values[index]
+        clauses.append(and_(*[sort_keys[i][0] == values[i] for i in range(index)], step))
+    return query.filter(or_(*clauses))
 
 
 def get_requests_kanban_service(
@@ -290,11 +253,12 @@ def get_requests_kanban_service(
     limit: int,
     filters: str | None,
     sort_mode: str,
+    cursor: str | None = None,
 ) -> dict[str, Any]:
     role = str(admin.get("role") or "").upper()
     actor = str(admin.get("sub") or "").strip()
 
-    base_query = db.query(Request)
+    base_query = db.query(Request).join(KanbanCard, KanbanCard.request_id == Request.id)
     if role == "LAWYER":
         if not actor:
             raise HTTPException(status_code=401, detail="Некорректный токен")
@@ -309,11 +273,8 @@ def get_requests_kanban_service(
     query_filters, boolean_filters = parse_kanban_filters_or_400(filters)
     now_utc = datetime.now(timezone.utc)
     next_day_start = datetime(now_utc.year, now_utc.month, now_utc.day, tzinfo=timezone.utc) + timedelta(days=1)
-    terminal_codes = {
-        str(code).strip()
-        for (code,) in db.query(Status.code).filter(Status.is_terminal.is_(True)).all()
-        if str(code or "").strip()
-    } or {"RESOLVED", "CLOSED", "REJECTED"}
+    reference = get_reference_data(db)
+    terminal_codes = set(reference.terminal_status_codes)
     if query_filters:
         base_query = apply_universal_query(
             base_query,
@@ -325,176 +286,71 @@ def get_requests_kanban_service(
             ),
         )
 
-    base_query, boolean_filters = _apply_sql_safe_boolean_filters(
-        base_query,
-        boolean_filters=boolean_filters,
-        role=role,
-        actor=actor,
-        terminal_codes=terminal_codes,
-        next_day_start=next_day_start,
-    )
-
-    can_apply_sql_window = normalized_sort_mode in {"created_newest", "lawyer"} and not boolean_filters
-    total = 0
-    request_query = base_query
-    if can_apply_sql_window:
-        lawyer_sort_order = _build_lawyer_sort_order(request_query, db) if normalized_sort_mode == "lawyer" else []
-        total = request_query.count()
-        request_query = _apply_sql_sort(
-            request_query,
-            sort_mode=normalized_sort_mode,
-            lawyer_sort_order=lawyer_sort_order,
-        ).limit(limit)
-
-    request_rows: list[Request] = request_query.all()
-
-    request_id_to_row = {str(row.id): row for row in request_rows}
-    request_ids = [row.id for row in request_rows]
-    unread_notification_request_ids: set[str] = set()
     actor_uuid = None
     if actor:
         try:
             actor_uuid = UUID(actor)
         except ValueError:
             actor_uuid = None
-    if actor_uuid is not None and request_ids:
-        unread_notification_rows = (
-            db.query(Notification.request_id)
-            .filter(
-                Notification.recipient_type == "ADMIN_USER",
-                Notification.recipient_admin_user_id == actor_uuid,
-                Notification.is_read.is_(False),
-                Notification.request_id.is_not(None),
-                Notification.request_id.in_(request_ids),
-            )
-            .all()
+    actor_unread = literal(False)
+    if actor_uuid is not None:
+        # Unread flags are per viewer, so they stay out of kanban_cards: the projection would need one row per
+        # (request, admin) and a write on every notification read. The correlated EXISTS is an index probe per card.
+        actor_unread = exists().where(
+            Notification.request_id == Request.id,
+            Notification.recipient_type == "ADMIN_USER",
+            Notification.recipient_admin_user_id == actor_uuid,
+            Notification.is_read.is_(False),
         )
-        unread_notification_request_ids = {
-            str(notification_request_id)
-            for (notification_request_id,) in unread_notification_rows
-            if notification_request_id is not None
-        }
-    status_codes = {str(row.status_code or "").strip() for row in request_rows if str(row.status_code or "").strip()}
-    status_meta_map: dict[str, dict[str, object]] = {}
-    if status_codes:
-        status_rows = (
-            db.query(Status, StatusGroup)
-            .outerjoin(StatusGroup, StatusGroup.id == Status.status_group_id)
-            .filter(Status.code.in_(list(status_codes)))
-            .all()
+    boolean_expressions = _kanban_boolean_expressions(
+        role=role,
+        actor=actor,
+        actor_unread=actor_unread,
+        terminal_codes=terminal_codes,
+        now_utc=now_utc,
+        next_day_start=next_day_start,
+    )
+    base_query = _apply_boolean_kanban_filters(base_query, boolean_filters, boolean_expressions)
+
+    total = base_query.count()
+    sort_keys = _kanban_sort_keys(normalized_sort_mode)
+    request_query = base_query.add_columns(KanbanCard, actor_unread.label("actor_unread"))
+    if cursor:
+        cursor_values = decode_kanban_cursor_or_400(cursor, normalized_sort_mode)
+        request_query = _apply_kanban_keyset(request_query, sort_keys, cursor_values)
+    request_query = request_query.order_by(
+        *[expr.desc() if descending else expr.asc() for expr, descending, _ in sort_keys]
+    ).limit(limit + 1)
+
+    # One row past the page tells whether another page exists; memory stays bounded by `limit`.
+    card_rows = request_query.all()
+    next_cursor = None
+    if len(card_rows) > limit:
+        card_rows = card_rows[:limit]
+        next_cursor = encode_kanban_cursor(
+            normalized_sort_mode, _kanban_cursor_values(card_rows[-1][1], normalized_sort_mode)
         )
-        status_meta_map = {
-            str(status_row.code): {
-                "name": str(status_row.name or status_row.code),
-                "kind": str(status_row.kind or "DEFAULT"),
-                "is_terminal": bool(status_row.is_terminal),
-                "sort_order": int(status_row.sort_order or 0),
-                "status_group_id": str(status_row.status_group_id) if status_row.status_group_id else None,
-                "status_group_name": (str(group_row.name) if group_row is not None and group_row.name else None),
-                "status_group_order": (int(group_row.sort_order or 0) if group_row is not None else None),
-            }
-            for status_row, group_row in status_rows
-        }
 
-    topic_codes = {str(row.topic_code or "").strip() for row in request_rows if str(row.topic_code or "").strip()}
-    transition_rows: list[TopicStatusTransition] = []
-    if topic_codes:
-        transition_rows = (
-            db.query(TopicStatusTransition)
-            .filter(
-                TopicStatusTransition.topic_code.in_(list(topic_codes)),
-                TopicStatusTransition.enabled.is_(True),
-            )
-            .order_by(
-                TopicStatusTransition.topic_code.asc(),
-                TopicStatusTransition.sort_order.asc(),
-                TopicStatusTransition.created_at.asc(),
-            )
-            .all()
-        )
-    transitions_by_topic: dict[str, list[TopicStatusTransition]] = {}
-    transition_lookup: dict[tuple[str, str, str], TopicStatusTransition] = {}
-    first_incoming_by_topic_to: dict[tuple[str, str], TopicStatusTransition] = {}
-    for transition in transition_rows:
-        topic = str(transition.topic_code or "").strip()
-        from_status = str(transition.from_status or "").strip()
-        to_status = str(transition.to_status or "").strip()
-        if not topic or not from_status or not to_status:
-            continue
-        transitions_by_topic.setdefault(topic, []).append(transition)
-        transition_lookup[(topic, from_status, to_status)] = transition
-        first_incoming_by_topic_to.setdefault((topic, to_status), transition)
-
-    assigned_ids = {
-        str(row.assigned_lawyer_id or "").strip()
-        for row in request_rows
-        if str(row.assigned_lawyer_id or "").strip()
+    request_rows = [row for row, _, _ in card_rows]
+    status_codes = {str(row.status_code or "").strip() for row in request_rows if str(row.status_code or "").strip()}
+    status_meta_map: dict[str, dict[str, object]] = {
+        code: _status_meta(reference, reference.statuses[code])
+        for code in status_codes
+        if code in reference.statuses
     }
-    lawyer_name_map: dict[str, str] = {}
-    if assigned_ids:
-        valid_lawyer_ids: list[UUID] = []
-        for raw in assigned_ids:
-            try:
-                valid_lawyer_ids.append(UUID(raw))
-            except ValueError:
-                continue
-        if valid_lawyer_ids:
-            lawyer_rows = db.query(AdminUser).filter(AdminUser.id.in_(valid_lawyer_ids)).all()
-            lawyer_name_map = {
-                str(row.id): str(row.name or row.email or row.id)
-                for row in lawyer_rows
-            }
 
-    history_rows: list[StatusHistory] = []
-    if request_ids:
-        history_rows = (
-            db.query(StatusHistory)
-            .filter(StatusHistory.request_id.in_(request_ids))
-            .order_by(StatusHistory.request_id.asc(), StatusHistory.created_at.desc())
-            .all()
-        )
+    topic_codes = {str(row.topic_code or "").strip() for row in request_rows if str(row.topic_code or "").strip()}
+    transitions_by_topic: dict[str, tuple[TransitionRef, ...]] = {
+        topic: reference.transitions_for_topic(topic) for topic in topic_codes
+    }
 
-    current_status_changed_at: dict[str, datetime] = {}
-    previous_status_by_request: dict[str, str] = {}
-    for row in history_rows:
-        request_id = str(row.request_id)
-        request_row = request_id_to_row.get(request_id)
-        if request_row is None:
-            continue
-        current_status = str(request_row.status_code or "").strip()
-        to_status = str(row.to_status or "").strip()
-        if not current_status or to_status != current_status:
-            continue
-        if request_id not in current_status_changed_at and row.created_at:
-            current_status_changed_at[request_id] = row.created_at
-            previous_status_by_request[request_id] = str(row.from_status or "").strip()
-
-    all_enabled_status_rows = (
-        db.query(Status, StatusGroup)
-        .outerjoin(StatusGroup, StatusGroup.id == Status.status_group_id)
-        .filter(Status.enabled.is_(True))
-        .order_by(Status.sort_order.asc(), Status.name.asc(), Status.code.asc())
-        .all()
-    )
     all_enabled_statuses: list[dict[str, object]] = []
-    for status_row, group_row in all_enabled_status_rows:
-        code = str(status_row.code or "").strip()
-        if not code:
-            continue
-        meta = {
-            "code": code,
-            "name": str(status_row.name or code),
-            "kind": str(status_row.kind or "DEFAULT"),
-            "is_terminal": bool(status_row.is_terminal),
-            "status_group_id": str(status_row.status_group_id) if status_row.status_group_id else None,
-            "status_group_name": (str(group_row.name) if group_row is not None and group_row.name else None),
-            "status_group_order": (int(group_row.sort_order or 0) if group_row is not None else None),
-            "sort_order": int(status_row.sort_order or 0),
-        }
-        status_meta_map.setdefault(code, meta)
+    for status_row in reference.enabled_statuses():
+        meta = {"code": status_row.code, **_status_meta(reference, status_row)}
+        status_meta_map.setdefault(status_row.code, meta)
         all_enabled_statuses.append(meta)
 
-    status_groups_rows = db.query(StatusGroup).order_by(StatusGroup.sort_order.asc(), StatusGroup.name.asc()).all()
+    status_groups_rows = reference.ordered_status_groups()
     columns_catalog = [
         {
             "key": str(group.id),
@@ -507,7 +363,7 @@ def get_requests_kanban_service(
 
     items: list[dict[str, object]] = []
     group_totals: dict[str, int] = {row["key"]: 0 for row in columns_catalog}
-    for row in request_rows:
+    for row, card, has_actor_unread_notification in card_rows:
         request_id = str(row.id)
         status_code = str(row.status_code or "").strip()
         topic_code = str(row.topic_code or "").strip()
@@ -582,31 +438,11 @@ def get_requests_kanban_service(
                     }
                 )
 
-        case_deadline = row.important_date_at or extract_case_deadline(row.extra_fields)
-        entered_at = parse_datetime_safe(current_status_changed_at.get(request_id))
-        if entered_at is None:
-            entered_at = parse_datetime_safe(row.updated_at) or parse_datetime_safe(row.created_at)
-        sla_deadline = None
-        previous_status = str(previous_status_by_request.get(request_id) or "").strip()
-        transition_rule = (
-            transition_lookup.get((topic_code, previous_status, status_code))
-            if previous_status
-            else None
-        )
-        if transition_rule is None:
-            transition_rule = first_incoming_by_topic_to.get((topic_code, status_code))
-        if (
-            transition_rule is not None
-            and transition_rule.sla_hours is not None
-            and int(transition_rule.sla_hours) > 0
-            and entered_at is not None
-        ):
-            sla_deadline = entered_at + timedelta(hours=int(transition_rule.sla_hours))
+        case_deadline = parse_datetime_safe(card.case_deadline_at)
+        sla_deadline = parse_datetime_safe(card.sla_deadline_at)
 
         assigned_id = str(row.assigned_lawyer_id or "").strip() or None
-        request_id = str(row.id)
         status_is_terminal = bool(status_meta.get("is_terminal"))
-        has_actor_unread_notification = request_id in unread_notification_request_ids
         has_unread_updates = bool(row.lawyer_has_unread_updates)
         if role != "LAWYER":
             has_unread_updates = bool(row.lawyer_has_unread_updates or row.client_has_unread_updates)
@@ -630,7 +466,7 @@ def get_requests_kanban_service(
                 "status_group_name": status_group_name or None,
                 "status_group_order": int(status_group_order or 0) if status_group_order is not None else None,
                 "assigned_lawyer_id": assigned_id,
-                "assigned_lawyer_name": lawyer_name_map.get(assigned_id or "", assigned_id),
+                "assigned_lawyer_name": card.assigned_lawyer_name,
                 "description": row.description,
                 "created_at": row.created_at.isoformat() if row.created_at else None,
                 "updated_at": row.updated_at.isoformat() if row.updated_at else None,
@@ -646,15 +482,6 @@ def get_requests_kanban_service(
             }
         )
 
-    if boolean_filters:
-        items = apply_boolean_kanban_filters(items, boolean_filters)
-    if not can_apply_sql_window:
-        items = sort_kanban_items(items, normalized_sort_mode)
-        total = len(items)
-        if total > limit:
-            items = items[:limit]
-    else:
-        items = sort_kanban_items(items, normalized_sort_mode)
 
     for row in items:
         key = str(row.get("status_group") or "").strip()
@@ -689,5 +516,6 @@ def get_requests_kanban_service(
         "total": total,
         "limit": int(limit),
         "sort_mode": normalized_sort_mode,
-        "truncated": bool(total > len(items)),
+        "truncated": bool(next_cursor),
+        "next_cursor": next_cursor,
     }
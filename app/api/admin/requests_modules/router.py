@@ -57,8 +57,9 @@ def get_requests_kanban(
     limit: int = Query(default=400, ge=1, le=1000),
     filters: str | None = Query(default=None),
     sort_mode: str = Query(default="created_newest"),
+    cursor: str | None = Query(default=None),
 ):
-    return get_requests_kanban_service(db, admin, limit=limit, filters=filters, sort_mode=sort_mode)
+    return get_requests_kanban_service(db, admin, limit=limit, filters=filters, sort_mode=sort_mode, cursor=cursor)
 
 
 @router.post("", status_code=201)
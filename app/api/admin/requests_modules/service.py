@@ -15,7 +15,6 @@ from app.models.admin_user import AdminUser
 from app.models.attachment import Attachment
 from app.models.audit_log import AuditLog
 from app.models.invoice import Invoice
-from app.models.notification import Notification
 from app.models.request import Request
 from app.models.request_service_request import RequestServiceRequest
 from app.schemas.admin import RequestAdminCreate, RequestAdminPatch
@@ -27,10 +26,12 @@ from app.services.chat_secure_service import (
 )
 from app.schemas.universal import UniversalQuery
 from app.services.billing_flow import apply_billing_transition_effects
+from app.services.kanban_cards import refresh_kanban_cards
 from app.services.notifications import (
     EVENT_STATUS as NOTIFICATION_EVENT_STATUS,
     mark_admin_notifications_read,
     notify_request_event,
+    unread_counts_by_request,
 )
 from app.services.request_assignment_events import apply_assignment_change
 from app.services.request_read_markers import (
@@ -47,7 +48,7 @@ from app.services.request_status import apply_status_change_effects
 from app.services.request_templates import validate_required_topic_fields_or_400
 from app.services.status_flow import transition_allowed_for_topic
 from app.services.status_transition_requirements import validate_transition_requirements_or_400
-from app.services.universal_query import apply_universal_query
+from app.services.universal_query import apply_universal_query, paginate_universal_query
 
 from .common import normalize_important_date_or_default
 from .permissions import (
@@ -87,8 +88,8 @@ def query_requests_service(uq: UniversalQuery, db: Session, admin: dict) -> dict
         special_filters=special_filters,
     )
     q = apply_universal_query(base_query, Request, regular_uq)
-    total = q.count()
-    rows = q.offset(uq.page.offset).limit(uq.page.limit).all()
+    page = paginate_universal_query(q, Request, regular_uq)
+    rows = page.rows
     row_ids = [str(row.id) for row in rows if row and row.id]
 
     unread_service_requests_by_request: dict[str, int] = {}
@@ -116,16 +117,8 @@ def query_requests_service(uq: UniversalQuery, db: Session, admin: dict) -> dict
                 actor_uuid = None
             if actor_uuid is not None:
                 try:
-                    notif_rows = (
-                        db.query(Notification.request_id, Notification.event_type, func.count(Notification.id))
-                        .filter(
-                            Notification.recipient_type == "ADMIN_USER",
-                            Notification.recipient_admin_user_id == actor_uuid,
-                            Notification.is_read.is_(False),
-                            Notification.request_id.in_(row_ids),
-                        )
-                        .group_by(Notification.request_id, Notification.event_type)
-                        .all()
+                    notif_rows = unread_counts_by_request(
+                        db, row_ids, recipient_type="ADMIN_USER", admin_user_id=actor_uuid
                     )
                 except SQLAlchemyError:
                     notif_rows = []
@@ -169,7 +162,9 @@ def query_requests_service(uq: UniversalQuery, db: Session, admin: dict) -> dict
             }
             for r in rows
         ],
-        "total": total,
+        "total": page.total,
+        "total_mode": page.total_mode,
+        "next_cursor": page.next_cursor,
     }
 
 
@@ -217,6 +212,7 @@ def create_request_service(payload: RequestAdminCreate, db: Session, admin: dict
         paid_at=payload.paid_at,
         paid_by_admin_id=payload.paid_by_admin_id,
         total_attachments_bytes=payload.total_attachments_bytes,
+        status_entered_at=datetime.now(timezone.utc),
         responsible=responsible,
     )
     try:
@@ -633,6 +629,8 @@ def claim_request_service(request_id: str, db: Session, admin: dict) -> dict[str
                 raise HTTPException(status_code=404, detail="Заявка не найдена")
             db.rollback()
             raise HTTPException(status_code=409, detail="Заявка уже назначена")
+        # The conditional UPDATE bypasses the unit of work, so the board card is refreshed explicitly.
+        refresh_kanban_cards(db, [request_uuid])
 
         db.add(
             AuditLog(
@@ -721,6 +719,7 @@ def reassign_request_service(request_id: str, lawyer_id: str, db: Session, admin
         if updated_rows == 0:
             db.rollback()
             raise HTTPException(status_code=409, detail="Заявка уже была переназначена")
+        refresh_kanban_cards(db, [request_uuid])
 
         db.add(
             AuditLog(
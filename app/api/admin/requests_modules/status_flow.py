@@ -19,6 +19,7 @@ from app.models.topic_status_transition import TopicStatusTransition
 from app.schemas.admin import RequestStatusChange
 from app.schemas.universal import FilterClause, UniversalQuery
 from app.services.billing_flow import apply_billing_transition_effects
+from app.services.reference_data import terminal_status_codes
 from app.services.notifications import (
     EVENT_STATUS as NOTIFICATION_EVENT_STATUS,
     notify_request_event,
@@ -34,12 +35,6 @@ from .permissions import ensure_lawyer_can_manage_request_or_403, ensure_lawyer_
 _STATUS_ROUTE_LOG = logging.getLogger("uvicorn.error")
 
 
-def terminal_status_codes(db: Session) -> set[str]:
-    rows = db.query(Status.code).filter(Status.is_terminal.is_(True)).all()
-    codes = {str(code or "").strip() for (code,) in rows if str(code or "").strip()}
-    return codes or {"RESOLVED", "CLOSED", "REJECTED"}
-
-
 def coerce_request_bool_filter_or_400(value: object) -> bool:
     if isinstance(value, bool):
         return value
@@ -1,10 +1,15 @@
 from __future__ import annotations
 
 from fastapi import APIRouter, Depends
+from sqlalchemy.orm import Session
 
 from app.core.deps import require_role
+from app.db.session import get_db
+from app.services.clamav_client import clamav_health
 from app.services.email_service import email_provider_health
+from app.services.redis_client import redis_health
 from app.services.sms_service import sms_provider_health
+from app.services.telegram_notify import telegram_outbox_health
 
 router = APIRouter()
 
@@ -19,3 +24,21 @@ def get_sms_provider_health(admin: dict = Depends(require_role("ADMIN"))):
 def get_email_provider_health(admin: dict = Depends(require_role("ADMIN"))):
     _ = admin
     return email_provider_health()
+
+
+@router.get("/redis-health")
+def get_redis_health(admin: dict = Depends(require_role("ADMIN"))):
+    _ = admin
+    return redis_health()
+
+
+@router.get("/telegram-outbox-health")
+def get_telegram_outbox_health(db: Session = Depends(get_db), admin: dict = Depends(require_role("ADMIN"))):
+    _ = admin
+    return telegram_outbox_health(db)
+
+
+@router.get("/clamav-health")
+def get_clamav_health(admin: dict = Depends(require_role("ADMIN"))):
+    _ = admin
+    return clamav_health()
@@ -7,7 +7,6 @@ from typing import Tuple
 
 from botocore.exceptions import ClientError
 from fastapi import APIRouter, Depends, HTTPException, Query, Request as FastapiRequest
-from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from PIL import Image, ImageOps, UnidentifiedImageError
 
@@ -29,15 +28,22 @@ from app.schemas.uploads import (
     UploadScope,
 )
 from app.api.admin.requests_modules.permissions import ensure_lawyer_can_view_request_or_403
+from app.services.chat_events import CHAT_EVENT_ATTACHMENT, queue_chat_event
 from app.services.notifications import EVENT_ATTACHMENT as NOTIFICATION_EVENT_ATTACHMENT, notify_request_event
 from app.services.request_read_markers import EVENT_ATTACHMENT, mark_unread_for_client
-from app.services.security_audit import record_file_security_event
+from app.services.security_audit import enqueue_file_security_event, record_file_security_event
 from app.services.attachment_scan import (
     SCAN_STATUS_ERROR,
     enqueue_attachment_scan,
     ensure_attachment_download_allowed_or_4xx,
     initial_scan_status_for_new_attachment,
 )
+from app.services.s3_proxy import (
+    direct_download_enabled,
+    download_audit_fields,
+    s3_direct_download_response,
+    s3_object_response,
+)
 from app.services.s3_storage import build_object_key, get_s3_storage
 
 router = APIRouter()
@@ -523,6 +529,7 @@ def upload_complete(
                 details={"mime_type": payload.mime_type, "size_bytes": int(actual_size)},
                 responsible=responsible,
             )
+            queue_chat_event(db, request.id, CHAT_EVENT_ATTACHMENT)
             db.commit()
             db.refresh(row)
             try:
@@ -793,16 +800,17 @@ def get_object_proxy(
             ensure_attachment_download_allowed_or_4xx(attachment)
 
         storage = get_s3_storage()
+        served_key = key
         if scope == "avatars" and requested_variant == "thumb":
             # New deterministic layout: cropped.webp → cropped__thumb.webp
             # Old layout: {uuid}-name.ext → {uuid}-name__thumb.webp (preserved via _avatar_variant_key)
             if key.endswith("/cropped.webp"):
                 # New-style key — thumb is always stored alongside as cropped__thumb.webp
-                thumb_key = key[: -len("cropped.webp")] + "cropped__thumb.webp"
+                served_key = key[: -len("cropped.webp")] + "cropped__thumb.webp"
             else:
-                thumb_key = _avatar_variant_key(key, "thumb")
+                served_key = _avatar_variant_key(key, "thumb")
             try:
-                obj = storage.get_object(thumb_key)
+                storage.head_object(served_key)
             except ClientError:
                 try:
                     source_obj = storage.get_object(key)
@@ -810,36 +818,40 @@ def get_object_proxy(
                     raise HTTPException(status_code=404, detail="Файл не найден")
                 source = _read_object_body_or_400(source_obj)
                 optimized = _render_avatar_to_webp_or_400(source, max_size_px=AVATAR_THUMB_MAX_SIZE_PX)
-                _write_object_bytes_or_500(storage, key=thumb_key, content=optimized, mime_type="image/webp")
-                obj = storage.get_object(thumb_key)
-        else:
-            try:
-                obj = storage.get_object(key)
-            except ClientError:
-                raise HTTPException(status_code=404, detail="Файл не найден")
+                _write_object_bytes_or_500(storage, key=served_key, content=optimized, mime_type="image/webp")
 
-        record_file_security_event(
-            db,
-            actor_role=actor_role,
-            actor_subject=actor_subject,
-            actor_ip=actor_ip,
-            action="DOWNLOAD_OBJECT",
-            scope=scope,
-            allowed=True,
-            object_key=key,
-            request_id=scoped_uuid if scope == "requests" else None,
-            details={"variant": requested_variant or None},
-            responsible=responsible,
-            persist_now=True,
-        )
+        if direct_download_enabled():
+            response = s3_direct_download_response(storage, served_key)
+            enqueue_file_security_event(
+                db,
+                actor_role=actor_role,
+                actor_subject=actor_subject,
+                actor_ip=actor_ip,
+                action="DOWNLOAD_OBJECT",
+                scope=scope,
+                object_key=key,
+                request_id=scoped_uuid if scope == "requests" else None,
+                details={"variant": requested_variant or None, "mode": "signed_url"},
+                responsible=responsible,
+            )
+            return response
+
+        def record_outcome(status: int) -> None:
+            record_file_security_event(
+                db,
+                actor_role=actor_role,
+                actor_subject=actor_subject,
+                actor_ip=actor_ip,
+                scope=scope,
+                object_key=key,
+                request_id=scoped_uuid if scope == "requests" else None,
+                details={"variant": requested_variant or None, "http_status": status},
+                responsible=responsible,
+                persist_now=True,
+                **download_audit_fields(status),
+            )
 
-        body = obj["Body"]
-        content_length = obj.get("ContentLength")
-        media_type = obj.get("ContentType") or "application/octet-stream"
-        headers = {}
-        if content_length is not None:
-            headers["Content-Length"] = str(content_length)
-        return StreamingResponse(body.iter_chunks(chunk_size=64 * 1024), media_type=media_type, headers=headers)
+        return s3_object_response(storage, served_key, http_request, on_outcome=record_outcome)
     except HTTPException as exc:
         record_file_security_event(
             db,
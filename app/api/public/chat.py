@@ -3,8 +3,10 @@ from datetime import datetime, timezone
 from uuid import UUID
 
 from fastapi import APIRouter, Depends, HTTPException, Request as FastapiRequest
+from fastapi.responses import StreamingResponse
 from sqlalchemy import func
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 
 from app.core.deps import get_public_session
 from app.db.session import get_db
@@ -13,6 +15,7 @@ from app.models.message import Message
 from app.models.request import Request
 from app.models.request_data_requirement import RequestDataRequirement
 from app.schemas.public import PublicMessageCreate
+from app.services.chat_events import LIVE_STREAM_HEADERS, live_event_stream, live_stream_session
 from app.services.chat_presence import list_typing_presence, set_typing_presence
 from app.services.notifications import EVENT_REQUEST_DATA as NOTIFICATION_EVENT_REQUEST_DATA, notify_request_event, unread_client_summary
 from app.services.chat_secure_service import (
@@ -326,16 +329,12 @@ def create_message_by_track(
     return serialize_message_for_request(row, request_extra_fields=req.extra_fields)
 
 
-@router.get("/requests/{track_number}/live")
-def get_live_chat_state_by_track(
-    track_number: str,
-    http_request: FastapiRequest,
-    cursor: str | None = None,
-    db: Session = Depends(get_db),
-    session: dict = Depends(get_public_session),
-):
-    req = _request_for_track_or_404(db, track_number)
-    _ensure_view_access_or_403(session, req)
+def _client_actor_key(session: dict) -> str:
+    subject = _require_view_session_or_403(session)
+    return f"CLIENT:{_normalize_track(subject) or _normalize_phone(subject)}"
+
+
+def _build_live_chat_state(db: Session, *, req: Request, session: dict, cursor: str | None) -> dict:
     mark_messages_delivered_for_client(db, request_id=req.id)
     summary = get_chat_activity_summary(db, req.id)
     latest_activity_at = _as_utc_datetime(summary.get("latest_activity_at"))
@@ -372,10 +371,8 @@ def get_live_chat_state_by_track(
         )
         delta_attachments = [_serialize_public_attachment(row) for row in attachment_rows]
 
-    subject = _require_view_session_or_403(session)
-    actor_key = f"CLIENT:{_normalize_track(subject) or _normalize_phone(subject)}"
-    typing_rows = list_typing_presence(request_key=str(req.id), exclude_actor_key=actor_key)
-    payload = {
+    typing_rows = list_typing_presence(request_key=str(req.id), exclude_actor_key=_client_actor_key(session))
+    return {
         "track_number": req.track_number,
         "cursor": latest_activity_iso,
         "has_updates": has_updates,
@@ -392,17 +389,74 @@ def get_live_chat_state_by_track(
             request_id=req.id,
         ),
     }
+
+
+@router.get("/requests/{track_number}/live")
+def get_live_chat_state_by_track(
+    track_number: str,
+    http_request: FastapiRequest,
+    cursor: str | None = None,
+    db: Session = Depends(get_db),
+    session: dict = Depends(get_public_session),
+):
+    req = _request_for_track_or_404(db, track_number)
+    _ensure_view_access_or_403(session, req)
+    payload = _build_live_chat_state(db, req=req, session=session, cursor=cursor)
     _audit_public_chat_read(
         db,
         session=session,
         http_request=http_request,
         req=req,
         action="READ_CHAT_LIVE_STATE",
-        details={"has_updates": bool(has_updates)},
+        details={"has_updates": bool(payload["has_updates"])},
     )
     return payload
 
 
+@router.get("/requests/{track_number}/stream")
+async def stream_live_chat_state_by_track(
+    track_number: str,
+    http_request: FastapiRequest,
+    cursor: str | None = None,
+    session: dict = Depends(get_public_session),
+):
+    def _open_stream() -> tuple[str, str]:
+        with live_stream_session(http_request) as db:
+            req = _request_for_track_or_404(db, track_number)
+            _ensure_view_access_or_403(session, req)
+            _audit_public_chat_read(
+                db,
+                session=session,
+                http_request=http_request,
+                req=req,
+                action="READ_CHAT_LIVE_STREAM",
+            )
+            return str(req.id), str(req.track_number)
+
+    def _build_live(cursor_value: str | None) -> dict:
+        with live_stream_session(http_request) as db:
+            req = _request_for_track_or_404(db, track_number)
+            _ensure_view_access_or_403(session, req)
+            return _build_live_chat_state(db, req=req, session=session, cursor=cursor_value)
+
+    def _list_typing() -> list[dict]:
+        return list_typing_presence(request_key=request_key, exclude_actor_key=_client_actor_key(session))
+
+    request_key, request_track = await run_in_threadpool(_open_stream)
+    return StreamingResponse(
+        live_event_stream(
+            request_key=request_key,
+            cursor=cursor,
+            build_live=_build_live,
+            list_typing=_list_typing,
+            is_disconnected=http_request.is_disconnected,
+            typing_payload={"track_number": request_track},
+        ),
+        media_type="text/event-stream",
+        headers=LIVE_STREAM_HEADERS,
+    )
+
+
 @router.post("/requests/{track_number}/typing")
 def set_live_chat_typing_by_track(
     track_number: str,
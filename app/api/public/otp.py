@@ -170,13 +170,14 @@ def _rate_limit_or_429(
     if track_number:
         keys.append(f"otp:{action}:track:{_hash_key_part(track_number)}:purpose:{purpose_norm}")
 
-    for key in keys:
-        result = limiter.hit(key, limit=limit, window_seconds=window)
-        if not result.allowed:
-            raise HTTPException(
-                status_code=429,
-                detail=f"Слишком много OTP-запросов. Повторите через {max(result.retry_after_seconds, 1)} сек.",
-            )
+    burst = int(max(settings.OTP_RATE_LIMIT_BURST, 0))
+    results = limiter.hit_many(keys, limit=limit, window_seconds=window, burst=burst)
+    if not all(result.allowed for result in results):
+        retry_after = max(result.retry_after_seconds for result in results)
+        raise HTTPException(
+            status_code=429,
+            detail=f"Слишком много OTP-запросов. Повторите через {max(retry_after, 1)} сек.",
+        )
 
 
 def _set_public_cookie(response: Response, *, subject: str, purpose: str, auth_channel: str) -> None:
@@ -6,7 +6,6 @@ from uuid import uuid4
 
 from fastapi import APIRouter, Depends, HTTPException, Response, Request as FastapiRequest
 from fastapi.responses import StreamingResponse
-from sqlalchemy import func
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import SQLAlchemyError
 
@@ -20,7 +19,6 @@ from app.models.client import Client
 from app.models.invoice import Invoice
 from app.models.message import Message
 from app.models.audit_log import AuditLog
-from app.models.notification import Notification
 from app.models.request import Request
 from app.models.request_service_request import RequestServiceRequest
 from app.models.status import Status
@@ -35,6 +33,7 @@ from app.services.notifications import (
     mark_client_notifications_read,
     serialize_notification,
     unread_client_summary,
+    unread_counts_by_request,
 )
 from app.services.request_read_markers import clear_unread_for_client
 from app.services.request_deadline import initial_important_date_at
@@ -289,6 +288,7 @@ def create_request(
         pdn_consent=True,
         pdn_consent_at=_now_utc(),
         pdn_consent_ip=extract_client_ip(request),
+        status_entered_at=_now_utc(),
         responsible="Клиент",
     )
     db.add(row)
@@ -362,16 +362,7 @@ def list_my_requests(
     unread_by_request: dict[str, dict[str, object]] = {}
     if row_ids:
         try:
-            notif_rows = (
-                db.query(Notification.request_id, Notification.event_type, func.count(Notification.id))
-                .filter(
-                    Notification.recipient_type == "CLIENT",
-                    Notification.is_read.is_(False),
-                    Notification.request_id.in_(row_ids),
-                )
-                .group_by(Notification.request_id, Notification.event_type)
-                .all()
-            )
+            notif_rows = unread_counts_by_request(db, row_ids, recipient_type="CLIENT")
         except SQLAlchemyError:
             notif_rows = []
         for request_id, event_type, count in notif_rows:
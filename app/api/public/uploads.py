@@ -5,7 +5,6 @@ from urllib.parse import quote
 
 from botocore.exceptions import ClientError
 from fastapi import APIRouter, Depends, HTTPException, Request as FastapiRequest
-from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 
 from app.core.config import settings
@@ -15,15 +14,22 @@ from app.models.attachment import Attachment
 from app.models.message import Message
 from app.models.request import Request
 from app.schemas.uploads import UploadCompletePayload, UploadCompleteResponse, UploadInitPayload, UploadInitResponse, UploadScope
+from app.services.chat_events import CHAT_EVENT_ATTACHMENT, queue_chat_event
 from app.services.notifications import EVENT_ATTACHMENT as NOTIFICATION_EVENT_ATTACHMENT, notify_request_event
 from app.services.request_read_markers import EVENT_ATTACHMENT, mark_unread_for_lawyer
-from app.services.security_audit import record_file_security_event
+from app.services.security_audit import enqueue_file_security_event, record_file_security_event
 from app.services.attachment_scan import (
     SCAN_STATUS_ERROR,
     enqueue_attachment_scan,
     ensure_attachment_download_allowed_or_4xx,
     initial_scan_status_for_new_attachment,
 )
+from app.services.s3_proxy import (
+    direct_download_enabled,
+    download_audit_fields,
+    s3_direct_download_response,
+    s3_object_response,
+)
 from app.services.s3_storage import build_object_key, get_s3_storage
 from app.services.origin_guard import enforce_public_origin_or_403
 
@@ -270,6 +276,7 @@ def upload_complete(
             details={"mime_type": payload.mime_type, "size_bytes": int(actual_size)},
             responsible="Клиент",
         )
+        queue_chat_event(db, request.id, CHAT_EVENT_ATTACHMENT)
         db.commit()
         db.refresh(row)
         try:
@@ -316,37 +323,57 @@ def get_public_attachment_object(
         ensure_attachment_download_allowed_or_4xx(attachment)
         key = attachment.s3_key
         request_id = attachment.request_id
-        try:
-            obj = get_s3_storage().get_object(attachment.s3_key)
-        except ClientError:
-            raise HTTPException(status_code=404, detail="Файл не найден в хранилище")
+        encoded_name = quote(str(attachment.file_name or "file"), safe="")
+        content_disposition = f"inline; filename*=UTF-8''{encoded_name}"
+        if direct_download_enabled():
+            response = s3_direct_download_response(
+                get_s3_storage(),
+                attachment.s3_key,
+                content_type=attachment.mime_type or None,
+                content_disposition=content_disposition,
+            )
+            enqueue_file_security_event(
+                db,
+                actor_role="CLIENT",
+                actor_subject=actor_subject,
+                actor_ip=actor_ip,
+                action="DOWNLOAD_OBJECT",
+                scope="REQUEST_ATTACHMENT",
+                object_key=key,
+                request_id=request_id,
+                attachment_id=attachment.id,
+                details={"mode": "signed_url"},
+                responsible="Клиент",
+            )
+            return response
 
-        record_file_security_event(
-            db,
-            actor_role="CLIENT",
-            actor_subject=actor_subject,
-            actor_ip=actor_ip,
-            action="DOWNLOAD_OBJECT",
-            scope="REQUEST_ATTACHMENT",
-            allowed=True,
-            object_key=key,
-            request_id=request_id,
-            attachment_id=attachment.id,
-            details={},
-            responsible="Клиент",
-            persist_now=True,
-        )
+        missing_detail = "Файл не найден в хранилище"
 
-        body = obj["Body"]
-        content_length = obj.get("ContentLength")
-        media_type = obj.get("ContentType") or attachment.mime_type or "application/octet-stream"
-        encoded_name = quote(str(attachment.file_name or "file"), safe="")
-        headers = {
-            "Content-Disposition": f"inline; filename*=UTF-8''{encoded_name}",
-        }
-        if content_length is not None:
-            headers["Content-Length"] = str(content_length)
-        return StreamingResponse(body.iter_chunks(chunk_size=64 * 1024), media_type=media_type, headers=headers)
+        def record_outcome(status: int) -> None:
+            record_file_security_event(
+                db,
+                actor_role="CLIENT",
+                actor_subject=actor_subject,
+                actor_ip=actor_ip,
+                scope="REQUEST_ATTACHMENT",
+                object_key=key,
+                request_id=request_id,
+                attachment_id=attachment.id,
+                details={"http_status": status},
+                responsible="Клиент",
+                persist_now=True,
+                **download_audit_fields(status, missing_detail=missing_detail),
+            )
+
+        return s3_object_response(
+            get_s3_storage(),
+            attachment.s3_key,
+            http_request,
+            default_media_type=attachment.mime_type or "application/octet-stream",
+            headers={"Content-Disposition": content_disposition},
+            missing_detail=missing_detail,
+            on_outcome=record_outcome,
+        )
     except HTTPException as exc:
         record_file_security_event(
             db,
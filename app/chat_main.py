@@ -6,6 +6,7 @@ from app.api.admin.chat import router as admin_chat_router
 from app.api.public.chat import router as public_chat_router
 from app.core.config import settings, validate_production_security_or_raise
 from app.core.http_hardening import install_http_hardening
+from app.services.chat_events import chat_event_broker
 
 app = FastAPI(title=f"{settings.APP_NAME}-chat", version="0.1.0")
 app.add_middleware(
@@ -26,6 +27,11 @@ def _validate_security_config_on_startup() -> None:
     validate_production_security_or_raise("chat-service")
 
 
+@app.on_event("shutdown")
+async def _close_chat_event_broker_on_shutdown() -> None:
+    await chat_event_broker.close()
+
+
 @app.get("/", include_in_schema=False)
 def landing():
     return JSONResponse({"service": f"{settings.APP_NAME}-chat", "status": "ok"})
@@ -35,6 +35,11 @@ class Settings(BaseSettings):
 
     DATABASE_URL: str
     REDIS_URL: str
+    REDIS_SOCKET_TIMEOUT_SECONDS: float = 0.4
+    REDIS_HEALTH_CHECK_INTERVAL_SECONDS: int = 30
+    REDIS_MAX_CONNECTIONS: int = 50
+    REDIS_CIRCUIT_FAILURE_THRESHOLD: int = 3
+    REDIS_CIRCUIT_COOLDOWN_SECONDS: int = 5
 
     S3_ENDPOINT: str
     S3_ACCESS_KEY: str
@@ -44,6 +49,13 @@ class Settings(BaseSettings):
     S3_USE_SSL: bool = False
     S3_VERIFY_SSL: bool = True
     S3_CA_CERT_PATH: str = ""
+    # Read size for proxied downloads; larger chunks mean fewer threadpool hops per file.
+    S3_PROXY_CHUNK_KB: int = 256
+    # Stream proxied downloads with httpx on the event loop instead of a boto3 body in the threadpool.
+    S3_PROXY_ASYNC: bool = False
+    # Answer attachment downloads with a redirect to a short-lived signed /s3 URL; bytes bypass the API process.
+    S3_DIRECT_DOWNLOAD_ENABLED: bool = False
+    S3_DIRECT_DOWNLOAD_TTL_SECONDS: int = 60
     MAX_FILE_MB: int = 25
     MAX_CASE_MB: int = 250
     ATTACHMENT_SCAN_ENABLED: bool = False
@@ -55,9 +67,25 @@ class Settings(BaseSettings):
     CLAMAV_HOST: str = "clamav"
     CLAMAV_PORT: int = 3310
     CLAMAV_TIMEOUT_SECONDS: int = 20
+    # Per-process cap on concurrent clamd sessions; keep workers x sessions below clamd MaxThreads.
+    CLAMAV_MAX_SESSIONS: int = 4
+    CLAMAV_QUEUE_TIMEOUT_SECONDS: int = 60
+    # Below clamd IdleTimeout (30s by default) so pooled sessions are dropped before clamd closes them.
+    CLAMAV_POOL_IDLE_SECONDS: int = 25
+    # Reuse a ClamAV verdict for identical content scanned with the same signature database; 0 disables.
+    ATTACHMENT_SCAN_VERDICT_CACHE_HOURS: int = 72
 
     TELEGRAM_BOT_TOKEN: str = "change_me"
     TELEGRAM_CHAT_ID: str = "0"
+    TELEGRAM_HTTP_TIMEOUT_SECONDS: float = 5.0
+    TELEGRAM_OUTBOX_POLL_SECONDS: int = 10
+    TELEGRAM_OUTBOX_BATCH_SIZE: int = 200
+    TELEGRAM_OUTBOX_MAX_ATTEMPTS: int = 8
+    TELEGRAM_OUTBOX_RETRY_BASE_SECONDS: int = 30
+    TELEGRAM_OUTBOX_RETRY_MAX_SECONDS: int = 3600
+    TELEGRAM_OUTBOX_SEND_INTERVAL_MS: int = 1000
+    TELEGRAM_OUTBOX_RETENTION_HOURS: int = 72
+    TELEGRAM_OUTBOX_LEASE_SECONDS: int = 900
     SMS_PROVIDER: str = "dummy"
     SMSAERO_EMAIL: str = ""
     SMSAERO_API_KEY: str = ""
@@ -85,9 +113,29 @@ class Settings(BaseSettings):
     CHAT_ENCRYPTION_KEYS: str = ""
     DATA_ENCRYPTION_SECRET: str = "change_me_data_encryption"
     CHAT_ENCRYPTION_SECRET: str = ""
+    CHAT_KEY_CACHE_TTL_SECONDS: int = 300
+    CHAT_KEY_CACHE_MAX_ENTRIES: int = 2048
+    CHAT_LEGACY_MIGRATION_BATCH_SIZE: int = 200
+    CHAT_LEGACY_MIGRATION_MAX_BATCHES: int = 50
+    CHAT_LEGACY_MIGRATION_THROTTLE_MS: int = 50
+    CHAT_LEGACY_MIGRATION_CONTINUE_DELAY_SECONDS: int = 5
+    # Single-flight lease of a migration chain; renewed after every batch and handed to the continuation task.
+    CHAT_LEGACY_MIGRATION_LEASE_SECONDS: int = 600
+    CHAT_STREAM_HEARTBEAT_SECONDS: int = 15
+    CHAT_STREAM_MAX_SECONDS: int = 300
+    CHAT_STREAM_FALLBACK_POLL_SECONDS: int = 5
+    CHAT_RECEIPT_FLUSH_INTERVAL_MS: int = 1000
+    SLA_SNAPSHOT_CACHE_SECONDS: int = 60
+    SLA_BACKFILL_BATCH_SIZE: int = 500
+    METRICS_OVERVIEW_CACHE_SECONDS: int = 15
+    REFERENCE_DATA_VERSION_CHECK_SECONDS: int = 1
+    REFERENCE_DATA_TTL_SECONDS: int = 60
+    KANBAN_CARD_REBUILD_BATCH_SIZE: int = 500
+    KANBAN_CARD_REFRESH_POLL_SECONDS: int = 60
     OTP_RATE_LIMIT_WINDOW_SECONDS: int = 300
     OTP_SEND_RATE_LIMIT: int = 8
     OTP_VERIFY_RATE_LIMIT: int = 20
+    OTP_RATE_LIMIT_BURST: int = 0
     OTP_DEV_MODE: bool = False
     ADMIN_BOOTSTRAP_ENABLED: bool = True
     ADMIN_BOOTSTRAP_EMAIL: str = "admin@example.com"
@@ -126,8 +126,9 @@ def install_http_hardening(app: FastAPI) -> None:
         for key, value in _response_security_headers(request).items():
             response.headers[key] = value
         # Backend serves application data and operational endpoints only.
-        # Keep responses non-cacheable to avoid stale or sensitive data reuse.
-        response.headers["Cache-Control"] = "no-store"
+        # Keep responses non-cacheable to avoid stale or sensitive data reuse;
+        # ETag-validated responses may be kept by the browser but are revalidated on every use.
+        response.headers["Cache-Control"] = "private, no-cache" if "etag" in response.headers else "no-store"
         response.headers["Pragma"] = "no-cache"
         response.headers["Expires"] = "0"
         response.headers[REQUEST_ID_HEADER] = request_id
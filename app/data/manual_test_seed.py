@@ -28,6 +28,7 @@ from app.models.status_group import StatusGroup
 from app.models.status_history import StatusHistory
 from app.models.topic import Topic
 from app.models.topic_data_template import TopicDataTemplate
+from app.services import notification_counters  # noqa: F401  registers the unread-counter hooks
 from app.services.admin_bootstrap import ensure_bootstrap_admin_for_login
 from app.services.s3_storage import get_s3_storage
 
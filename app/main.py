@@ -5,6 +5,7 @@ from app.core.config import settings, validate_production_security_or_raise
 from app.core.http_hardening import install_http_hardening
 from app.api.public.router import router as public_router
 from app.api.admin.router import router as admin_router
+from app.api.admin.crud_modules.meta import warm_meta_registry
 
 app = FastAPI(title=settings.APP_NAME, version="0.1.0")
 app.add_middleware(
@@ -24,6 +25,11 @@ app.include_router(admin_router, prefix="/api/admin")
 def _validate_security_config_on_startup() -> None:
     validate_production_security_or_raise("backend")
 
+
+@app.on_event("startup")
+def _compile_admin_meta_registry_on_startup() -> None:
+    warm_meta_registry()
+
 @app.get("/", include_in_schema=False)
 def landing():
     return JSONResponse({"service": settings.APP_NAME, "status": "ok"})
@@ -12,6 +12,7 @@ class Attachment(Base, UUIDMixin, TimestampMixin):
     __tablename__ = "attachments"
     __table_args__ = (
         Index("ix_attachments_request_created_id", "request_id", "created_at", "id"),
+        Index("ix_attachments_content_sha256", "content_sha256", "scan_engine_version"),
     )
     request_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), index=True, nullable=False)
     message_id: Mapped[uuid.UUID | None] = mapped_column(UUID(as_uuid=True), index=True, nullable=True)
@@ -26,3 +27,5 @@ class Attachment(Base, UUIDMixin, TimestampMixin):
     scanned_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
     content_sha256: Mapped[str | None] = mapped_column(String(64), nullable=True)
     detected_mime: Mapped[str | None] = mapped_column(String(150), nullable=True)
+    # ClamAV engine/signature-database version behind scan_status; set only for verdicts that came from clamd.
+    scan_engine_version: Mapped[str | None] = mapped_column(String(64), nullable=True)
@@ -0,0 +1,36 @@
+import uuid
+from datetime import datetime
+
+from sqlalchemy import DateTime, Index, String, text
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.session import Base
+
+
+# Denormalized per-request board state; maintained by app.services.kanban_cards. refreshed_at is NULL while a
+# config write has left the card stale and the refresh worker has not rebuilt it yet.
+class KanbanCard(Base):
+    __tablename__ = "kanban_cards"
+    __table_args__ = (
+        Index("ix_kanban_cards_created_request", "created_at", "request_id"),
+        Index("ix_kanban_cards_lawyer_sort", "assigned_lawyer_sort_key", "created_at", "request_id"),
+        Index("ix_kanban_cards_deadline", "deadline_at", "created_at", "request_id"),
+        Index(
+            "ix_kanban_cards_stale",
+            "request_id",
+            postgresql_where=text("refreshed_at IS NULL"),
+            sqlite_where=text("refreshed_at IS NULL"),
+        ),
+    )
+
+    request_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True)
+    created_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    previous_status_code: Mapped[str | None] = mapped_column(String(50), nullable=True)
+    status_entered_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    sla_deadline_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    case_deadline_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    deadline_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    assigned_lawyer_name: Mapped[str | None] = mapped_column(String(255), nullable=True)
+    assigned_lawyer_sort_key: Mapped[str | None] = mapped_column(String(255), nullable=True)
+    refreshed_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
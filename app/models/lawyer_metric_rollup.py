@@ -0,0 +1,19 @@
+from datetime import date, datetime
+
+from sqlalchemy import Date, DateTime, Index, Numeric, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.session import Base
+
+
+# Per-lawyer daily event totals for the metrics overview; maintained by app.services.lawyer_metrics.
+class LawyerMetricRollup(Base):
+    __tablename__ = "lawyer_metric_rollups"
+    __table_args__ = (Index("ix_lawyer_metric_rollups_day_lawyer", "day", "lawyer_id"),)
+
+    lawyer_id: Mapped[str] = mapped_column(String(64), primary_key=True)
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+    # assigned | completed | paid_events | paid_gross
+    metric: Mapped[str] = mapped_column(String(32), primary_key=True)
+    value: Mapped[float] = mapped_column(Numeric(14, 2), nullable=False, default=0)
+    updated_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
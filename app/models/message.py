@@ -1,13 +1,19 @@
 import uuid
 from datetime import datetime
 
-from sqlalchemy import String, Boolean, DateTime, Index, Text, event
+from sqlalchemy import String, Boolean, DateTime, Index, Text, event, select
 from sqlalchemy.orm import Mapped, Session as OrmSession, mapped_column
 from sqlalchemy.dialects.postgresql import UUID
 from app.db.session import Base
 from app.models.common import UUIDMixin, TimestampMixin
 from app.models.request import Request
-from app.services.chat_crypto import encrypt_message_body, encrypt_message_body_for_request, is_encrypted_message
+from app.services.chat_activity import record_chat_activity_for_flush
+from app.services.chat_crypto import (
+    encrypt_message_body,
+    encrypt_message_body_for_request,
+    is_encrypted_message,
+    merge_request_chat_crypto,
+)
 
 class Message(Base, UUIDMixin, TimestampMixin):
     __tablename__ = "messages"
@@ -38,6 +44,16 @@ def _find_request_for_message(session: OrmSession, request_id: uuid.UUID | None)
     return session.get(Request, request_id)
 
 
+def _locked_request_extra_fields(session: OrmSession, request_row: Request) -> dict:
+    # Re-read the wrapped chat key under a row lock so concurrent senders and the legacy migration never wrap two keys.
+    if request_row in session.new:
+        return dict(request_row.extra_fields or {})
+    current = session.execute(
+        select(Request.extra_fields).where(Request.id == request_row.id).with_for_update()
+    ).scalar_one_or_none()
+    return merge_request_chat_crypto(request_row.extra_fields, current)
+
+
 @event.listens_for(OrmSession, "before_flush")
 def _encrypt_message_bodies_before_flush(session: OrmSession, flush_context, instances) -> None:
     candidates = [obj for obj in session.new if isinstance(obj, Message)]
@@ -57,6 +73,15 @@ def _encrypt_message_bodies_before_flush(session: OrmSession, flush_context, ins
             text,
             request_extra_fields=request_row.extra_fields,
         )
-        message.body = encrypted_body
         if changed:
+            encrypted_body, next_extra_fields, _ = encrypt_message_body_for_request(
+                text,
+                request_extra_fields=_locked_request_extra_fields(session, request_row),
+            )
             request_row.extra_fields = next_extra_fields
+        message.body = encrypted_body
+
+
+@event.listens_for(OrmSession, "after_flush")
+def _record_chat_activity_after_flush(session: OrmSession, flush_context) -> None:
+    record_chat_activity_for_flush(session)
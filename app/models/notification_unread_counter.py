@@ -0,0 +1,28 @@
+import uuid
+from datetime import datetime
+
+from sqlalchemy import DateTime, Index, Integer, String
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.session import Base
+
+
+# Unread notifications per (recipient, request, event); maintained by app.services.notification_counters.
+class NotificationUnreadCounter(Base):
+    __tablename__ = "notification_unread_counters"
+    __table_args__ = (
+        Index("ix_notification_unread_counters_admin", "recipient_type", "recipient_admin_user_id", "request_id"),
+        Index("ix_notification_unread_counters_track", "recipient_type", "recipient_track_number", "request_id"),
+        Index("ix_notification_unread_counters_request", "request_id", "recipient_type"),
+    )
+
+    # recipient_type|recipient|request_id|event_type; a single key keeps the upsert target free of NULL columns.
+    counter_key: Mapped[str] = mapped_column(String(200), primary_key=True)
+    recipient_type: Mapped[str] = mapped_column(String(20), nullable=False)
+    recipient_admin_user_id: Mapped[uuid.UUID | None] = mapped_column(UUID(as_uuid=True), nullable=True)
+    recipient_track_number: Mapped[str | None] = mapped_column(String(40), nullable=True)
+    request_id: Mapped[uuid.UUID | None] = mapped_column(UUID(as_uuid=True), nullable=True)
+    event_type: Mapped[str] = mapped_column(String(50), nullable=False)
+    unread_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    updated_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
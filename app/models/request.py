@@ -1,7 +1,7 @@
 from datetime import datetime
 import uuid
 
-from sqlalchemy import Boolean, DateTime, Integer, JSON, Numeric, String, Text
+from sqlalchemy import Boolean, DateTime, Index, Integer, JSON, Numeric, String, Text, text
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import Mapped, mapped_column
 from app.db.session import Base
@@ -9,6 +9,14 @@ from app.models.common import UUIDMixin, TimestampMixin
 
 class Request(Base, UUIDMixin, TimestampMixin):
     __tablename__ = "requests"
+    __table_args__ = (
+        Index(
+            "ix_requests_sla_deadline_at_active",
+            "sla_deadline_at",
+            postgresql_where=text("sla_deadline_at IS NOT NULL"),
+            sqlite_where=text("sla_deadline_at IS NOT NULL"),
+        ),
+    )
     track_number: Mapped[str] = mapped_column(String(40), unique=True, nullable=False, index=True)
     client_id: Mapped[uuid.UUID | None] = mapped_column(UUID(as_uuid=True), nullable=True, index=True)
     client_name: Mapped[str] = mapped_column(String(200), nullable=False)
@@ -33,3 +41,11 @@ class Request(Base, UUIDMixin, TimestampMixin):
     client_unread_event_type: Mapped[str | None] = mapped_column(String(32), nullable=True)
     lawyer_has_unread_updates: Mapped[bool] = mapped_column(Boolean, default=False, nullable=False)
     lawyer_unread_event_type: Mapped[str | None] = mapped_column(String(32), nullable=True)
+    chat_message_count: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    chat_attachment_count: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    chat_latest_message_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    chat_latest_attachment_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    chat_activity_version: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    status_entered_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    sla_deadline_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    first_lawyer_response_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
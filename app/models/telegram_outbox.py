@@ -0,0 +1,21 @@
+from datetime import datetime
+
+from sqlalchemy import DateTime, Index, Integer, String, Text
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.session import Base
+from app.models.common import TimestampMixin, UUIDMixin
+
+
+class TelegramOutboxMessage(Base, UUIDMixin, TimestampMixin):
+    __tablename__ = "telegram_outbox"
+    __table_args__ = (Index("ix_telegram_outbox_status_next_attempt", "status", "next_attempt_at", "created_at"),)
+
+    chat_id: Mapped[str] = mapped_column(String(64), nullable=False)
+    text: Mapped[str] = mapped_column(Text, nullable=False)
+    status: Mapped[str] = mapped_column(String(20), nullable=False, default="PENDING")  # PENDING|SENDING|SENT|FAILED
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    # For SENDING rows: when the worker's claim lease expires.
+    next_attempt_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    sent_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    last_error: Mapped[str | None] = mapped_column(String(500), nullable=True)
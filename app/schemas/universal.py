@@ -1,8 +1,9 @@
 from pydantic import BaseModel
-from typing import Any, List, Literal
+from typing import Any, List, Literal, Optional
 
 Op = Literal["=", "!=", ">", "<", ">=", "<=", "~"]
 Dir = Literal["asc", "desc"]
+TotalMode = Literal["exact", "estimated", "skip"]
 
 class FilterClause(BaseModel):
     field: str
@@ -16,6 +17,10 @@ class SortClause(BaseModel):
 class Page(BaseModel):
     limit: int = 50
     offset: int = 0
+    # Opaque keyset cursor from a previous response's next_cursor; when set, offset is ignored.
+    cursor: Optional[str] = None
+    # "estimated" uses planner row estimates for large results, "skip" returns total=null.
+    total_mode: TotalMode = "exact"
 
 class UniversalQuery(BaseModel):
     filters: List[FilterClause] = []
@@ -0,0 +1,36 @@
+from __future__ import annotations
+
+import argparse
+from datetime import date, datetime, timedelta, timezone
+
+from app.db.session import SessionLocal
+from app.services.lawyer_metrics import rebuild_lawyer_metric_rollups
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Rebuild per-lawyer metric rollups from status history and audit log")
+    parser.add_argument("--since", default=None, help="First day to rebuild (YYYY-MM-DD); default is full history")
+    parser.add_argument("--days", type=int, default=None, help="Rebuild only the last N days")
+    args = parser.parse_args()
+
+    since: date | None = None
+    if args.since:
+        since = date.fromisoformat(args.since)
+    elif args.days is not None:
+        since = datetime.now(timezone.utc).date() - timedelta(days=max(0, args.days))
+
+    db = SessionLocal()
+    try:
+        result = rebuild_lawyer_metric_rollups(db, since=since)
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+    print(f"since={since.isoformat() if since else 'all'}")
+    for key in sorted(result.keys()):
+        print(f"{key}={result[key]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,130 +1,422 @@
 from __future__ import annotations
 
 import argparse
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
 from datetime import datetime, timezone
+from typing import Any, Callable, Iterator
 from uuid import UUID
 
-from sqlalchemy import text
+from sqlalchemy import func
 
 from app.db.session import SessionLocal
 from app.models.admin_user import AdminUser
 from app.models.invoice import Invoice
+from app.models.message import Message
 from app.models.request import Request
-from app.services.chat_crypto import decrypt_message_body, encrypt_message_body
+from app.services.chat_crypto import (
+    active_chat_kid,
+    decrypt_message_body,
+    encrypt_message_body,
+    encrypt_message_body_with_chat_key,
+    extract_message_kid,
+    extract_request_chat_kek_kid,
+    invalidate_chat_key_cache,
+    prepare_request_chat_crypto,
+    rewrap_request_chat_key,
+)
+from app.services.chat_crypto_migration import count_legacy_chat_messages, run_legacy_chat_migration
 from app.services.invoice_crypto import active_requisites_kid, decrypt_requisites, encrypt_requisites, extract_requisites_kid
 
+STAGES = ("invoices", "admin_totp", "request_keys", "messages")
+DEFAULT_BATCH_SIZE = 500
+
+Mapper = Callable[[Callable[[Any], Any], list[Any]], list[Any]]
+Reporter = Callable[[str], None]
+
 
 def _now_utc() -> datetime:
     return datetime.now(timezone.utc)
 
 
-def reencrypt_with_active_kid(*, dry_run: bool = True) -> dict[str, int]:
-    db = SessionLocal()
-    counts = {
+def _parse_resume_token(raw: str | None) -> tuple[int, UUID | None]:
+    value = str(raw or "").strip()
+    if not value:
+        return 0, None
+    stage, _, last_id = value.partition(":")
+    if stage not in STAGES:
+        raise ValueError(f"Некорректный resume token: {value}")
+    try:
+        return STAGES.index(stage), (UUID(last_id) if last_id else None)
+    except ValueError as exc:
+        raise ValueError(f"Некорректный resume token: {value}") from exc
+
+
+def _resume_token(stage: str, last_id: Any) -> str:
+    return f"{stage}:{last_id}" if last_id is not None else f"{stage}:"
+
+
+def _reencrypt_requisites_token(token: str) -> str | None:
+    try:
+        return encrypt_requisites(decrypt_requisites(token))
+    except Exception:
+        return None
+
+
+def _reencrypt_message_body(job: tuple[str, bytes | None, str | None]) -> str | None:
+    raw_body, chat_key, kid = job
+    try:
+        plaintext = decrypt_message_body(raw_body)
+        if chat_key is None or not kid:
+            return encrypt_message_body(plaintext)
+        return encrypt_message_body_with_chat_key(plaintext or "", chat_key=chat_key, kid=kid)
+    except Exception:
+        return None
+
+
+def _forget_inherited_connections() -> None:
+    # Forked workers only run crypto; dropping the parent's pooled DB connections without closing them keeps
+    # the child from terminating sockets the parent is still using.
+    bind = SessionLocal.kw.get("bind")
+    if bind is not None:
+        bind.dispose(close=False)
+
+
+@contextmanager
+def _crypto_mapper(workers: int) -> Iterator[Mapper]:
+    if workers <= 1:
+        yield lambda fn, items: [fn(item) for item in items]
+        return
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("fork"),
+        initializer=_forget_inherited_connections,
+    ) as executor:
+        yield lambda fn, items: list(executor.map(fn, items, chunksize=max(1, len(items) // (workers * 4))))
+
+
+class _Progress:
+    def __init__(self, stage: str, total: int, report: Reporter | None):
+        self.stage = stage
+        self.total = max(0, int(total))
+        self.processed = 0
+        self.report = report
+        self.started_at = time.monotonic()
+
+    def advance(self, processed: int, *, resume_token: str) -> None:
+        self.processed += int(processed)
+        if self.report is None:
+            return
+        elapsed = max(time.monotonic() - self.started_at, 1e-6)
+        rate = self.processed / elapsed
+        remaining = max(self.total - self.processed, 0)
+        eta = int(remaining / rate) if rate > 0 else 0
+        self.report(
+            f"stage={self.stage} processed={self.processed}/{self.total} "
+            f"rate={rate:.1f}/s eta={eta}s resume={resume_token}"
+        )
+
+
+def _page(db, id_column, *columns, after_id: UUID | None, batch_size: int) -> list[Any]:
+    query = db.query(id_column, *columns)
+    if after_id is not None:
+        query = query.filter(id_column > after_id)
+    return query.order_by(id_column.asc()).limit(batch_size).all()
+
+
+def _stage_total(db, id_column, *, after_id: UUID | None) -> int:
+    query = db.query(func.count(id_column))
+    if after_id is not None:
+        query = query.filter(id_column > after_id)
+    return int(query.scalar() or 0)
+
+
+def _finish_batch(db, *, dry_run: bool) -> None:
+    if dry_run:
+        db.rollback()
+    else:
+        db.commit()
+    db.expunge_all()
+
+
+def _reencrypt_requisites_rows(
+    db,
+    rows: list[Any],
+    *,
+    model,
+    column,
+    current_kid: str,
+    mapper: Mapper,
+) -> tuple[int, int]:
+    candidates: list[tuple[Any, str]] = []
+    for row_id, raw_token in rows:
+        token = str(raw_token or "").strip()
+        if not token or extract_requisites_kid(token) == current_kid:
+            continue
+        candidates.append((row_id, token))
+    updated_tokens = mapper(_reencrypt_requisites_token, [token for _, token in candidates])
+    reencrypted = 0
+    errors = 0
+    for (row_id, _), updated in zip(candidates, updated_tokens):
+        if updated is None:
+            errors += 1
+            continue
+        db.query(model).filter(model.id == row_id).update(
+            {
+                column: updated,
+                model.responsible: func.coalesce(func.nullif(model.responsible, ""), "Администратор системы"),
+            },
+            synchronize_session=False,
+        )
+        reencrypted += 1
+    return reencrypted, errors
+
+
+def _rewrap_request_key_rows(db, rows: list[Any], *, current_kid: str) -> tuple[int, int]:
+    rewrapped = 0
+    errors = 0
+    candidate_ids = [
+        row_id for row_id, extra_fields in rows if extract_request_chat_kek_kid(extra_fields) not in (None, "", current_kid)
+    ]
+    # Re-read under the row lock senders take before minting a chat key; the page snapshot may be stale.
+    for request_row in _locked_requests(db, candidate_ids):
+        kid = extract_request_chat_kek_kid(request_row.extra_fields)
+        if not kid or kid == current_kid:
+            continue
+        try:
+            updated, changed = rewrap_request_chat_key(request_row.extra_fields)
+        except Exception:
+            errors += 1
+            continue
+        if not changed:
+            continue
+        request_row.extra_fields = updated
+        rewrapped += 1
+    return rewrapped, errors
+
+
+def _locked_requests(db, request_ids) -> list[Request]:
+    if not request_ids:
+        return []
+    return (
+        db.query(Request)
+        .filter(Request.id.in_(list(request_ids)))
+        .order_by(Request.id)
+        .with_for_update()
+        .populate_existing()
+        .all()
+    )
+
+
+def _reencrypt_message_rows(db, rows: list[Any], *, current_kid: str, mapper: Mapper) -> tuple[int, int]:
+    pending = [
+        (message_id, request_id, str(body))
+        for message_id, request_id, body in rows
+        if body and not str(body).startswith("chatenc:v3:")
+    ]
+    if not pending:
+        return 0, 0
+
+    request_ids = {request_id for _, request_id, _ in pending if request_id is not None}
+    requests_by_id = {row.id: row for row in _locked_requests(db, request_ids)}
+    chat_keys: dict[Any, tuple[bytes, str]] = {}
+    errors = 0
+    jobs: list[tuple[Any, tuple[str, bytes | None, str | None]]] = []
+    for message_id, request_id, raw_body in pending:
+        request_row = requests_by_id.get(request_id)
+        if request_row is None:
+            if raw_body.startswith("chatenc:v2:") and extract_message_kid(raw_body) == current_kid:
+                continue
+            jobs.append((message_id, (raw_body, None, None)))
+            continue
+        if request_id not in chat_keys:
+            try:
+                next_extra_fields, chat_key, changed = prepare_request_chat_crypto(request_row.extra_fields)
+            except Exception:
+                errors += 1
+                continue
+            if changed:
+                request_row.extra_fields = next_extra_fields
+            chat_keys[request_id] = (chat_key, str(extract_request_chat_kek_kid(next_extra_fields) or current_kid))
+        chat_key, kid = chat_keys[request_id]
+        jobs.append((message_id, (raw_body, chat_key, kid)))
+
+    updated_bodies = mapper(_reencrypt_message_body, [job for _, job in jobs])
+    now = _now_utc()
+    reencrypted = 0
+    for (message_id, (raw_body, _, _)), updated in zip(jobs, updated_bodies):
+        if updated is None:
+            errors += 1
+            continue
+        if updated == raw_body:
+            continue
+        db.query(Message).filter(Message.id == message_id).update(
+            {Message.body: updated, Message.updated_at: now},
+            synchronize_session=False,
+        )
+        reencrypted += 1
+    return reencrypted, errors
+
+
+def reencrypt_with_active_kid(
+    *,
+    dry_run: bool = True,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    workers: int = 1,
+    resume_token: str | None = None,
+    report: Reporter | None = None,
+) -> dict[str, Any]:
+    counts: dict[str, Any] = {
         "invoices_total": 0,
         "invoices_reencrypted": 0,
         "admin_totp_total": 0,
         "admin_totp_reencrypted": 0,
+        "request_keys_total": 0,
+        "request_keys_rewrapped": 0,
         "messages_total": 0,
         "messages_reencrypted": 0,
         "errors": 0,
+        "resume_token": None,
     }
+    size = max(1, int(batch_size or DEFAULT_BATCH_SIZE))
+    start_stage, start_after_id = _parse_resume_token(resume_token)
     current_data_kid = active_requisites_kid()
-    try:
-        invoice_rows = db.query(Invoice).all()
-        counts["invoices_total"] = len(invoice_rows)
-        for row in invoice_rows:
-            token = str(row.payer_details_encrypted or "").strip()
-            if not token:
-                continue
-            if extract_requisites_kid(token) == current_data_kid:
-                continue
-            try:
-                payload = decrypt_requisites(token)
-                row.payer_details_encrypted = encrypt_requisites(payload)
-                row.responsible = row.responsible or "Администратор системы"
-                counts["invoices_reencrypted"] += 1
-            except Exception:
-                counts["errors"] += 1
-
-        admin_rows = db.query(AdminUser).all()
-        counts["admin_totp_total"] = len(admin_rows)
-        for row in admin_rows:
-            token = str(row.totp_secret_encrypted or "").strip()
-            if not token:
-                continue
-            if extract_requisites_kid(token) == current_data_kid:
-                continue
-            try:
-                payload = decrypt_requisites(token)
-                row.totp_secret_encrypted = encrypt_requisites(payload)
-                row.responsible = row.responsible or "Администратор системы"
-                counts["admin_totp_reencrypted"] += 1
-            except Exception:
-                counts["errors"] += 1
+    current_chat_kid = active_chat_kid()
+    stage_columns = {
+        "invoices": (Invoice.id, (Invoice.payer_details_encrypted,)),
+        "admin_totp": (AdminUser.id, (AdminUser.totp_secret_encrypted,)),
+        "request_keys": (Request.id, (Request.extra_fields,)),
+        "messages": (Message.id, (Message.request_id, Message.body)),
+    }
 
-        message_rows = db.execute(text("SELECT id, request_id, body FROM messages")).all()
-        counts["messages_total"] = len(message_rows)
-        for message_id, request_id, body in message_rows:
-            raw_body = str(body or "")
-            if not raw_body:
-                continue
-            if raw_body.startswith("chatenc:v3:"):
-                continue
-            try:
-                request_key = None
-                if request_id:
-                    try:
-                        request_key = UUID(str(request_id))
-                    except (TypeError, ValueError):
-                        request_key = None
-                request_row = db.get(Request, request_key) if request_key else None
-                if request_row is None:
-                    plaintext = decrypt_message_body(raw_body)
-                    updated = encrypt_message_body(plaintext)
-                else:
-                    from app.services.chat_crypto import decrypt_message_body_for_request, encrypt_message_body_for_request
-
-                    plaintext = (
-                        decrypt_message_body_for_request(raw_body, request_extra_fields=request_row.extra_fields)
-                        if raw_body.startswith("chatenc:v3:")
-                        else decrypt_message_body(raw_body)
-                    )
-                    updated, next_extra_fields, changed = encrypt_message_body_for_request(
-                        plaintext,
-                        request_extra_fields=request_row.extra_fields,
-                    )
-                    if changed:
-                        request_row.extra_fields = next_extra_fields
-                if updated == raw_body:
+    db = SessionLocal()
+    try:
+        with _crypto_mapper(max(1, int(workers or 1))) as mapper:
+            for stage_index, stage in enumerate(STAGES):
+                if stage_index < start_stage:
                     continue
-                db.execute(
-                    text("UPDATE messages SET body = :body, updated_at = :updated_at WHERE id = :id"),
-                    {"id": message_id, "body": updated, "updated_at": _now_utc()},
-                )
-                counts["messages_reencrypted"] += 1
-            except Exception:
-                counts["errors"] += 1
+                after_id = start_after_id if stage_index == start_stage else None
+                id_column, columns = stage_columns[stage]
+                progress = _Progress(stage, _stage_total(db, id_column, after_id=after_id), report)
+                while True:
+                    rows = _page(db, id_column, *columns, after_id=after_id, batch_size=size)
+                    if not rows:
+                        break
+                    if stage == "invoices":
+                        changed, errors = _reencrypt_requisites_rows(
+                            db,
+                            rows,
+                            model=Invoice,
+                            column=Invoice.payer_details_encrypted,
+                            current_kid=current_data_kid,
+                            mapper=mapper,
+                        )
+                        counts["invoices_reencrypted"] += changed
+                    elif stage == "admin_totp":
+                        changed, errors = _reencrypt_requisites_rows(
+                            db,
+                            rows,
+                            model=AdminUser,
+                            column=AdminUser.totp_secret_encrypted,
+                            current_kid=current_data_kid,
+                            mapper=mapper,
+                        )
+                        counts["admin_totp_reencrypted"] += changed
+                    elif stage == "request_keys":
+                        changed, errors = _rewrap_request_key_rows(db, rows, current_kid=current_chat_kid)
+                        counts["request_keys_rewrapped"] += changed
+                    else:
+                        changed, errors = _reencrypt_message_rows(db, rows, current_kid=current_chat_kid, mapper=mapper)
+                        counts["messages_reencrypted"] += changed
+                    counts[f"{stage}_total"] += len(rows)
+                    counts["errors"] += errors
+                    _finish_batch(db, dry_run=dry_run)
 
-        if dry_run:
-            db.rollback()
-        else:
-            db.commit()
+                    after_id = rows[-1][0]
+                    counts["resume_token"] = _resume_token(stage, after_id)
+                    progress.advance(len(rows), resume_token=counts["resume_token"])
+                    if len(rows) < size:
+                        break
+        counts["resume_token"] = None
     except Exception:
         db.rollback()
         raise
     finally:
         db.close()
+        if not dry_run:
+            invalidate_chat_key_cache()
 
     return counts
 
 
+def migrate_legacy_chat(
+    *,
+    dry_run: bool = True,
+    checkpoint: str | None = None,
+    batch_size: int | None = None,
+    max_batches: int = 0,
+    throttle_ms: int | None = None,
+) -> dict[str, object]:
+    db = SessionLocal()
+    try:
+        result = run_legacy_chat_migration(
+            db,
+            checkpoint=checkpoint,
+            batch_size=batch_size,
+            max_batches=max_batches,
+            throttle_seconds=(max(0, int(throttle_ms)) / 1000.0) if throttle_ms is not None else None,
+            dry_run=dry_run,
+            on_batch=lambda batch: print(
+                f"batch={batch['batch']} scanned={batch['scanned']} migrated={batch['migrated']} "
+                f"errors={batch['errors']} checkpoint={batch['checkpoint']}",
+                flush=True,
+            ),
+        )
+        result["remaining"] = count_legacy_chat_messages(db)
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+    if not dry_run:
+        invalidate_chat_key_cache()
+    return result
+
+
 def main() -> None:
     parser = argparse.ArgumentParser(description="Re-encrypt sensitive fields using active KID keys")
     parser.add_argument("--apply", action="store_true", help="Apply changes (default is dry-run)")
+    parser.add_argument("--batch-size", type=int, default=None, help="Rows per keyset page / committed batch")
+    parser.add_argument("--workers", type=int, default=1, help="Processes for the decrypt/encrypt stage")
+    parser.add_argument("--resume", default=None, help="Resume token printed by a previous run (stage:last_id)")
+    parser.add_argument(
+        "--legacy-chat",
+        action="store_true",
+        help="Only migrate chatenc:v1/v2 messages to per-request v3 in resumable batches",
+    )
+    parser.add_argument("--checkpoint", default=None, help="Resume --legacy-chat after this message id")
+    parser.add_argument("--max-batches", type=int, default=0, help="Stop --legacy-chat after N batches (0 = until done)")
+    parser.add_argument("--throttle-ms", type=int, default=None, help="Pause between --legacy-chat batches")
     args = parser.parse_args()
 
-    result = reencrypt_with_active_kid(dry_run=not args.apply)
+    if args.legacy_chat:
+        result = migrate_legacy_chat(
+            dry_run=not args.apply,
+            checkpoint=args.checkpoint,
+            batch_size=args.batch_size,
+            max_batches=args.max_batches,
+            throttle_ms=args.throttle_ms,
+        )
+    else:
+        result = reencrypt_with_active_kid(
+            dry_run=not args.apply,
+            batch_size=args.batch_size or DEFAULT_BATCH_SIZE,
+            workers=args.workers,
+            resume_token=args.resume,
+            report=lambda line: print(line, flush=True),
+        )
     mode = "APPLY" if args.apply else "DRY_RUN"
     print(f"mode={mode}")
     for key in sorted(result.keys()):
@@ -1,11 +1,14 @@
 from __future__ import annotations
 
+import codecs
 import hashlib
+import logging
 import os
-import socket
-import struct
-from datetime import datetime, timezone
-from typing import Iterable
+import tempfile
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from time import perf_counter
+from typing import Callable, Iterator
 from uuid import UUID
 
 from fastapi import HTTPException
@@ -14,6 +17,7 @@ from sqlalchemy.orm import Session
 from app.core.config import settings
 from app.db.session import SessionLocal
 from app.models.attachment import Attachment
+from app.services.clamav_client import ClamavInstream, clamav_signature_version
 from app.services.s3_storage import get_s3_storage
 from app.services.security_audit import record_file_security_event
 from app.workers.celery_app import celery_app
@@ -33,6 +37,13 @@ _MIME_BY_EXT = {
     ".txt": {"text/plain"},
 }
 
+# One S3 chunk is in flight per scan; the MIME sniffer keeps only the head of the stream.
+_STREAM_CHUNK_BYTES = 64 * 1024
+_SNIFF_HEAD_BYTES = 4096
+_SNIFF_TEXT_CHARS = 2048
+
+logger = logging.getLogger("app.attachment_scan")
+
 
 def _now_utc() -> datetime:
     return datetime.now(timezone.utc)
@@ -67,46 +78,65 @@ def enqueue_attachment_scan(attachment_id: str) -> bool:
     return True
 
 
-def _iter_bytes_from_s3(key: str) -> Iterable[bytes]:
+def _iter_bytes_from_s3(key: str) -> Iterator[bytes]:
     obj = get_s3_storage().get_object(key)
     body = obj.get("Body")
     if body is None:
-        return []
-    return body.iter_chunks(chunk_size=64 * 1024)
-
-
-def _download_object_bytes(key: str, max_bytes: int) -> bytes:
-    chunks = []
-    total = 0
-    for chunk in _iter_bytes_from_s3(key):
-        if not chunk:
-            continue
-        total += len(chunk)
-        if total > max_bytes:
-            raise ValueError("Файл превышает допустимый размер для антивирусной проверки")
-        chunks.append(chunk)
-    return b"".join(chunks)
-
-
-def _detect_mime(data: bytes) -> str:
-    if data.startswith(b"%PDF-"):
-        return "application/pdf"
-    if data.startswith(b"\xFF\xD8\xFF"):
-        return "image/jpeg"
-    if data.startswith(b"\x89PNG\r\n\x1a\n"):
-        return "image/png"
-    if len(data) > 12 and data[4:8] == b"ftyp":
-        return "video/mp4"
+        return
     try:
-        text = data.decode("utf-8")
-        if text:
-            printable = sum(1 for ch in text[:2048] if ch.isprintable() or ch in "\r\n\t")
-            ratio = printable / max(1, min(len(text), 2048))
-            if ratio > 0.95:
-                return "text/plain"
-    except Exception:
-        pass
-    return "application/octet-stream"
+        yield from body.iter_chunks(chunk_size=_STREAM_CHUNK_BYTES)
+    finally:
+        close = getattr(body, "close", None)
+        if callable(close):
+            close()
+
+
+class _MimeSniffer:
+    """Bounded MIME detection: magic bytes from the head, UTF-8 validity over the whole stream."""
+
+    def __init__(self) -> None:
+        self.head = bytearray()
+        self.text_head = ""
+        self.size = 0
+        self._decoder = codecs.getincrementaldecoder("utf-8")()
+        self._utf8 = True
+
+    def feed(self, chunk: bytes) -> None:
+        self.size += len(chunk)
+        if len(self.head) < _SNIFF_HEAD_BYTES:
+            self.head += chunk[: _SNIFF_HEAD_BYTES - len(self.head)]
+        if not self._utf8:
+            return
+        try:
+            text = self._decoder.decode(chunk)
+        except UnicodeDecodeError:
+            self._utf8 = False
+            return
+        if len(self.text_head) < _SNIFF_TEXT_CHARS:
+            self.text_head += text[: _SNIFF_TEXT_CHARS - len(self.text_head)]
+
+    def detect(self) -> str:
+        head = bytes(self.head)
+        if head.startswith(b"%PDF-"):
+            return "application/pdf"
+        if head.startswith(b"\xFF\xD8\xFF"):
+            return "image/jpeg"
+        if head.startswith(b"\x89PNG\r\n\x1a\n"):
+            return "image/png"
+        if self.size > 12 and head[4:8] == b"ftyp":
+            return "video/mp4"
+        if self._utf8:
+            try:
+                self._decoder.decode(b"", final=True)
+            except UnicodeDecodeError:
+                return "application/octet-stream"
+            text = self.text_head
+            if text:
+                printable = sum(1 for ch in text if ch.isprintable() or ch in "\r\n\t")
+                ratio = printable / max(1, len(text))
+                if ratio > 0.95:
+                    return "text/plain"
+        return "application/octet-stream"
 
 
 def _file_ext(file_name: str) -> str:
@@ -131,34 +161,140 @@ def _content_policy_check(*, file_name: str, declared_mime: str, detected_mime:
     return True, None
 
 
-def _clamav_scan_bytes(data: bytes) -> tuple[bool, str | None]:
-    host = str(getattr(settings, "CLAMAV_HOST", "clamav") or "clamav").strip()
-    port = int(getattr(settings, "CLAMAV_PORT", 3310) or 3310)
-    timeout = int(getattr(settings, "CLAMAV_TIMEOUT_SECONDS", 20) or 20)
-    with socket.create_connection((host, port), timeout=timeout) as sock:
-        sock.settimeout(timeout)
-        sock.sendall(b"zINSTREAM\0")
-        offset = 0
-        chunk_size = 64 * 1024
-        while offset < len(data):
-            chunk = data[offset : offset + chunk_size]
-            offset += len(chunk)
-            sock.sendall(struct.pack(">I", len(chunk)))
-            sock.sendall(chunk)
-        sock.sendall(struct.pack(">I", 0))
-        response = b""
+@dataclass
+class _StreamScanResult:
+    sha256: str
+    detected_mime: str
+    size_bytes: int
+    clamav_verdict: tuple[bool, str | None] | None
+    cache_hit: bool = False
+    timings_ms: dict[str, float] = field(default_factory=dict)
+
+
+VerdictLookup = Callable[[str], "tuple[bool, str | None] | None"]
+
+
+def _scan_object_stream(
+    key: str,
+    *,
+    max_bytes: int,
+    use_clamav: bool,
+    lookup_verdict: VerdictLookup | None = None,
+) -> _StreamScanResult:
+    """Single pass over the S3 object: every chunk feeds SHA-256, the MIME sniffer and clamd in turn.
+
+    With `lookup_verdict` the verdict cache needs the digest before clamd is involved, so chunks are
+    spooled to a temporary file instead and replayed to clamd only on a cache miss.
+    """
+    timings = {
+        "s3_ms": 0.0,
+        "sha256_ms": 0.0,
+        "sniff_ms": 0.0,
+        "spool_ms": 0.0,
+        "cache_lookup_ms": 0.0,
+        "clamav_send_ms": 0.0,
+        "clamav_verdict_ms": 0.0,
+    }
+    started_at = perf_counter()
+    digest = hashlib.sha256()
+    sniffer = _MimeSniffer()
+    spool = tempfile.TemporaryFile() if use_clamav and lookup_verdict is not None else None
+    clamav = ClamavInstream() if use_clamav and spool is None else None
+    chunks = _iter_bytes_from_s3(key)
+    verdict = None
+    cache_hit = False
+    try:
         while True:
-            part = sock.recv(4096)
-            if not part:
+            mark = perf_counter()
+            chunk = next(chunks, None)
+            timings["s3_ms"] += (perf_counter() - mark) * 1000.0
+            if chunk is None:
                 break
-            response += part
-    text = response.decode("utf-8", errors="replace").strip().strip("\x00")
-    if " FOUND" in text:
-        signature = text.split(":", 1)[-1].replace("FOUND", "").strip() or "MALWARE_FOUND"
-        return False, signature
-    if text.endswith("OK") or " OK" in text:
-        return True, None
-    raise ValueError(f"Некорректный ответ ClamAV: {text or '-'}")
+            if not chunk:
+                continue
+            if sniffer.size + len(chunk) > max_bytes:
+                raise ValueError("Файл превышает допустимый размер для антивирусной проверки")
+            mark = perf_counter()
+            digest.update(chunk)
+            timings["sha256_ms"] += (perf_counter() - mark) * 1000.0
+            mark = perf_counter()
+            sniffer.feed(chunk)
+            timings["sniff_ms"] += (perf_counter() - mark) * 1000.0
+            if spool is not None:
+                mark = perf_counter()
+                spool.write(chunk)
+                timings["spool_ms"] += (perf_counter() - mark) * 1000.0
+            if clamav is not None:
+                mark = perf_counter()
+                clamav.send(chunk)
+                timings["clamav_send_ms"] += (perf_counter() - mark) * 1000.0
+        if spool is not None:
+            mark = perf_counter()
+            verdict = lookup_verdict(digest.hexdigest())
+            timings["cache_lookup_ms"] = (perf_counter() - mark) * 1000.0
+            cache_hit = verdict is not None
+            if not cache_hit:
+                clamav = ClamavInstream()
+                mark = perf_counter()
+                spool.seek(0)
+                for chunk in iter(lambda: spool.read(_STREAM_CHUNK_BYTES), b""):
+                    clamav.send(chunk)
+                timings["clamav_send_ms"] = (perf_counter() - mark) * 1000.0
+        if clamav is not None:
+            mark = perf_counter()
+            verdict = clamav.verdict()
+            timings["clamav_verdict_ms"] = (perf_counter() - mark) * 1000.0
+    finally:
+        chunks.close()
+        if spool is not None:
+            spool.close()
+        if clamav is not None:
+            clamav.close()
+    timings["total_ms"] = (perf_counter() - started_at) * 1000.0
+    result = _StreamScanResult(
+        sha256=digest.hexdigest(),
+        detected_mime=sniffer.detect(),
+        size_bytes=sniffer.size,
+        clamav_verdict=verdict,
+        cache_hit=cache_hit,
+        timings_ms={name: round(value, 2) for name, value in timings.items()},
+    )
+    logger.info(
+        "attachment scan stream key=%s bytes=%s cache_hit=%s total_ms=%.2f s3_ms=%.2f sha256_ms=%.2f sniff_ms=%.2f "
+        "spool_ms=%.2f cache_lookup_ms=%.2f clamav_send_ms=%.2f clamav_verdict_ms=%.2f",
+        key,
+        result.size_bytes,
+        cache_hit,
+        timings["total_ms"],
+        timings["s3_ms"],
+        timings["sha256_ms"],
+        timings["sniff_ms"],
+        timings["spool_ms"],
+        timings["cache_lookup_ms"],
+        timings["clamav_send_ms"],
+        timings["clamav_verdict_ms"],
+    )
+    return result
+
+
+def _verdict_cache_hours() -> int:
+    return max(0, int(getattr(settings, "ATTACHMENT_SCAN_VERDICT_CACHE_HOURS", 0) or 0))
+
+
+def _cached_clamav_verdict(db: Session, *, sha256: str, engine_version: str, exclude_id) -> Attachment | None:
+    """Most recent clamd verdict for identical content under the same signature database."""
+    return (
+        db.query(Attachment)
+        .filter(
+            Attachment.content_sha256 == sha256,
+            Attachment.scan_engine_version == engine_version,
+            Attachment.scan_status.in_([SCAN_STATUS_CLEAN, SCAN_STATUS_INFECTED]),
+            Attachment.scanned_at >= _now_utc() - timedelta(hours=_verdict_cache_hours()),
+            Attachment.id != exclude_id,
+        )
+        .order_by(Attachment.scanned_at.desc())
+        .first()
+    )
 
 
 def ensure_attachment_download_allowed_or_4xx(attachment: Attachment) -> None:
@@ -185,14 +321,30 @@ def scan_attachment_file_impl(attachment_id: str) -> dict:
         row.scan_error = None
         row.scan_signature = None
         row.scanned_at = None
+        row.scan_engine_version = None
         db.add(row)
         db.flush()
 
-        data = _download_object_bytes(row.s3_key, max_bytes=max(1, int(settings.MAX_FILE_MB)) * 1024 * 1024)
-        digest = hashlib.sha256(data).hexdigest()
-        detected_mime = _detect_mime(data)
-        row.content_sha256 = digest
+        engine_version = clamav_signature_version() if _clamav_enabled() and _verdict_cache_hours() else None
+        cached_from: list[Attachment] = []
+
+        def lookup_verdict(sha256: str) -> tuple[bool, str | None] | None:
+            source = _cached_clamav_verdict(db, sha256=sha256, engine_version=str(engine_version), exclude_id=row.id)
+            if source is None:
+                return None
+            cached_from.append(source)
+            return source.scan_status == SCAN_STATUS_CLEAN, source.scan_signature
+
+        scan = _scan_object_stream(
+            row.s3_key,
+            max_bytes=max(1, int(settings.MAX_FILE_MB)) * 1024 * 1024,
+            use_clamav=_clamav_enabled(),
+            lookup_verdict=lookup_verdict if engine_version else None,
+        )
+        detected_mime = scan.detected_mime
+        row.content_sha256 = scan.sha256
         row.detected_mime = detected_mime
+        cache_details = {"cache_hit": True, "cached_from_attachment_id": str(cached_from[0].id)} if cached_from else {}
 
         allowed, reason = _content_policy_check(
             file_name=row.file_name,
@@ -221,10 +373,11 @@ def scan_attachment_file_impl(attachment_id: str) -> dict:
                 responsible="Система AV",
             )
             db.commit()
-            return {"status": row.scan_status, "signature": row.scan_signature, "reason": reason}
+            return {"status": row.scan_status, "signature": row.scan_signature, "reason": reason, "timings_ms": scan.timings_ms}
 
-        if _clamav_enabled():
-            clean, signature = _clamav_scan_bytes(data)
+        if scan.clamav_verdict is not None:
+            clean, signature = scan.clamav_verdict
+            row.scan_engine_version = engine_version
             if not clean:
                 row.scan_status = SCAN_STATUS_INFECTED
                 row.scan_signature = signature or "MALWARE_FOUND"
@@ -243,11 +396,21 @@ def scan_attachment_file_impl(attachment_id: str) -> dict:
                     object_key=row.s3_key,
                     request_id=row.request_id,
                     attachment_id=row.id,
-                    details={"scan_status": row.scan_status, "signature": row.scan_signature, "detected_mime": detected_mime},
+                    details={
+                        "scan_status": row.scan_status,
+                        "signature": row.scan_signature,
+                        "detected_mime": detected_mime,
+                        **cache_details,
+                    },
                     responsible="Система AV",
                 )
                 db.commit()
-                return {"status": row.scan_status, "signature": row.scan_signature}
+                return {
+                    "status": row.scan_status,
+                    "signature": row.scan_signature,
+                    "cache_hit": scan.cache_hit,
+                    "timings_ms": scan.timings_ms,
+                }
 
         row.scan_status = SCAN_STATUS_CLEAN
         row.scan_error = None
@@ -265,11 +428,11 @@ def scan_attachment_file_impl(attachment_id: str) -> dict:
             object_key=row.s3_key,
             request_id=row.request_id,
             attachment_id=row.id,
-            details={"scan_status": row.scan_status, "detected_mime": detected_mime},
+            details={"scan_status": row.scan_status, "detected_mime": detected_mime, **cache_details},
             responsible="Система AV",
         )
         db.commit()
-        return {"status": row.scan_status}
+        return {"status": row.scan_status, "cache_hit": scan.cache_hit, "timings_ms": scan.timings_ms}
     except Exception as exc:
         db.rollback()
         try:
@@ -279,6 +442,7 @@ def scan_attachment_file_impl(attachment_id: str) -> dict:
         if row is not None:
             row.scan_status = SCAN_STATUS_ERROR
             row.scan_error = str(exc)[:500]
+            row.scan_engine_version = None
             row.scanned_at = _now_utc()
             db.add(row)
             record_file_security_event(
@@ -0,0 +1,140 @@
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Any
+
+from sqlalchemy import case, select, update
+from sqlalchemy.orm import Session
+
+from app.models.request import Request
+
+# Tables whose rows count as chat activity; matched by name so the models can import this module.
+_ACTIVITY_KINDS = {"messages": "message", "attachments": "attachment"}
+
+
+def _activity_at(row: Any) -> datetime | None:
+    return getattr(row, "updated_at", None) or getattr(row, "created_at", None)
+
+
+def _later_of(column, value: datetime):
+    return case((column.is_(None), value), (column < value, value), else_=column)
+
+
+def _earlier_of(column, value: datetime):
+    return case((column.is_(None), value), (column > value, value), else_=column)
+
+
+def _earlier_value(current: datetime | None, value: datetime | None) -> datetime | None:
+    if value is None:
+        return current
+    if current is None:
+        return value
+    try:
+        return value if value < current else current
+    except TypeError:
+        return value
+
+
+def _later_value(current: datetime | None, value: datetime | None) -> datetime | None:
+    if value is None:
+        return current
+    if current is None:
+        return value
+    try:
+        return value if value > current else current
+    except TypeError:
+        return value
+
+
+def _apply_chat_activity(
+    db: Session,
+    request_id: Any,
+    *,
+    message_delta: int = 0,
+    attachment_delta: int = 0,
+    message_at: datetime | None = None,
+    attachment_at: datetime | None = None,
+    first_lawyer_response_at: datetime | None = None,
+) -> None:
+    table = Request.__table__
+    values: dict[Any, Any] = {table.c.chat_activity_version: table.c.chat_activity_version + 1}
+    if message_delta:
+        values[table.c.chat_message_count] = table.c.chat_message_count + int(message_delta)
+    if attachment_delta:
+        values[table.c.chat_attachment_count] = table.c.chat_attachment_count + int(attachment_delta)
+    if message_at is not None:
+        values[table.c.chat_latest_message_at] = _later_of(table.c.chat_latest_message_at, message_at)
+    if attachment_at is not None:
+        values[table.c.chat_latest_attachment_at] = _later_of(table.c.chat_latest_attachment_at, attachment_at)
+    if first_lawyer_response_at is not None:
+        values[table.c.first_lawyer_response_at] = _earlier_of(
+            table.c.first_lawyer_response_at, first_lawyer_response_at
+        )
+    # Core statement on the flush connection: relative increments stay correct under concurrent writers.
+    db.connection().execute(update(table).where(table.c.id == request_id).values(values))
+
+
+def touch_chat_activity(
+    db: Session,
+    request_id: Any,
+    *,
+    message_at: datetime | None = None,
+    attachment_at: datetime | None = None,
+) -> None:
+    if request_id is None:
+        return
+    _apply_chat_activity(db, request_id, message_at=message_at, attachment_at=attachment_at)
+
+
+def record_chat_activity_for_flush(session: Session) -> None:
+    changes: dict[Any, dict[str, Any]] = {}
+    for rows, delta in ((session.new, 1), (session.dirty, 0), (session.deleted, -1)):
+        for row in rows:
+            kind = _ACTIVITY_KINDS.get(getattr(type(row), "__tablename__", None))
+            if kind is None:
+                continue
+            request_id = getattr(row, "request_id", None)
+            if request_id is None:
+                continue
+            if delta == 0 and not session.is_modified(row, include_collections=False):
+                continue
+            entry = changes.setdefault(
+                request_id, {"message": [0, None], "attachment": [0, None], "first_response": None}
+            )
+            entry[kind][0] += delta
+            if delta >= 0:
+                entry[kind][1] = _later_value(entry[kind][1], _activity_at(row))
+            if delta > 0 and kind == "message" and str(getattr(row, "author_type", "") or "").upper() == "LAWYER":
+                # Feeds the SLA first-response metric without rescanning messages.
+                entry["first_response"] = _earlier_value(entry["first_response"], getattr(row, "created_at", None))
+    for request_id, entry in changes.items():
+        _apply_chat_activity(
+            session,
+            request_id,
+            message_delta=entry["message"][0],
+            attachment_delta=entry["attachment"][0],
+            message_at=entry["message"][1],
+            attachment_at=entry["attachment"][1],
+            first_lawyer_response_at=entry["first_response"],
+        )
+
+
+def read_chat_activity(db: Session, request_id: Any) -> dict[str, Any] | None:
+    row = db.execute(
+        select(
+            Request.chat_message_count,
+            Request.chat_attachment_count,
+            Request.chat_latest_message_at,
+            Request.chat_latest_attachment_at,
+            Request.chat_activity_version,
+        ).where(Request.id == request_id)
+    ).one_or_none()
+    if row is None:
+        return None
+    return {
+        "message_count": int(row[0] or 0),
+        "attachment_count": int(row[1] or 0),
+        "latest_message_at": row[2],
+        "latest_attachment_at": row[3],
+        "activity_version": int(row[4] or 0),
+    }
@@ -4,10 +4,14 @@ import base64
 import hashlib
 import hmac
 import secrets
-from typing import Any
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Iterable
 
 from cryptography.hazmat.primitives.ciphers.aead import AESGCM
 
+from app.core.config import settings
 from app.services.crypto_keyring import get_chat_secrets, key_digest, ordered_unique_key_digests
 
 _VERSION_LEGACY = b"v1"
@@ -16,6 +20,9 @@ _PREFIX_V2 = "chatenc:v2:"
 _PREFIX_V3 = "chatenc:v3:"
 _CHAT_CRYPTO_EXTRA_FIELDS_KEY = "chat_crypto"
 
+_chat_key_cache_lock = threading.Lock()
+_chat_key_cache: OrderedDict[tuple[str, str, str], tuple[bytes, str, str, float]] = OrderedDict()
+
 
 def _xor_bytes(a: bytes, b: bytes) -> bytes:
     return bytes(x ^ y for x, y in zip(a, b))
@@ -41,6 +48,10 @@ def _aad_v3_wrapped_key(kid: str) -> bytes:
     return b"v3|chat-key|" + str(kid).encode("utf-8") + b"|"
 
 
+def clear_chat_key_cache_for_tests() -> None:
+    invalidate_chat_key_cache()
+
+
 def active_chat_kid() -> str:
     active_kid, _ = get_chat_secrets()
     return active_kid
@@ -146,12 +157,82 @@ def prepare_request_chat_crypto(extra_fields: dict[str, Any] | None) -> tuple[di
     return updated, chat_key, changed
 
 
-def _request_chat_key(extra_fields: dict[str, Any] | None) -> tuple[bytes, str]:
+def merge_request_chat_crypto(extra_fields: dict[str, Any] | None, source: dict[str, Any] | None) -> dict[str, Any]:
+    """extra_fields with the wrapped chat key taken from `source` (a freshly locked copy of the request row)."""
+    merged = dict(extra_fields or {})
+    payload = _chat_payload_or_none(source)
+    if payload:
+        merged[_CHAT_CRYPTO_EXTRA_FIELDS_KEY] = payload
+    return merged
+
+
+def _keyring_fingerprint(key_map: dict[str, str]) -> str:
+    digest = hashlib.sha256()
+    for kid in sorted(key_map):
+        digest.update(str(kid).encode("utf-8") + b"=" + key_digest(key_map[kid]) + b"|")
+    return digest.hexdigest()
+
+
+def _wrapped_key_fingerprint(payload: dict[str, Any]) -> str:
+    raw = f"{payload.get('version')}|{payload.get('nonce')}|{payload.get('wrapped_key')}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _chat_key_cache_get(cache_key: tuple[str, str, str], *, keyring: str) -> tuple[bytes, str] | None:
+    ttl = int(getattr(settings, "CHAT_KEY_CACHE_TTL_SECONDS", 0) or 0)
+    if ttl <= 0:
+        return None
+    now = time.monotonic()
+    with _chat_key_cache_lock:
+        entry = _chat_key_cache.get(cache_key)
+        if entry is None:
+            return None
+        chat_key, payload_kid, entry_keyring, expires_at = entry
+        if expires_at <= now or entry_keyring != keyring:
+            _chat_key_cache.pop(cache_key, None)
+            return None
+        _chat_key_cache.move_to_end(cache_key)
+        return chat_key, payload_kid
+
+
+def _chat_key_cache_put(cache_key: tuple[str, str, str], chat_key: bytes, payload_kid: str, *, keyring: str) -> None:
+    ttl = int(getattr(settings, "CHAT_KEY_CACHE_TTL_SECONDS", 0) or 0)
+    max_entries = int(getattr(settings, "CHAT_KEY_CACHE_MAX_ENTRIES", 0) or 0)
+    if ttl <= 0 or max_entries <= 0:
+        return
+    with _chat_key_cache_lock:
+        _chat_key_cache[cache_key] = (chat_key, payload_kid, keyring, time.monotonic() + ttl)
+        _chat_key_cache.move_to_end(cache_key)
+        while len(_chat_key_cache) > max_entries:
+            _chat_key_cache.popitem(last=False)
+
+
+def invalidate_chat_key_cache(request_id: Any = None) -> None:
+    with _chat_key_cache_lock:
+        if request_id is None:
+            _chat_key_cache.clear()
+            return
+        request_key = str(request_id)
+        for cache_key in [item for item in _chat_key_cache if item[0] == request_key]:
+            _chat_key_cache.pop(cache_key, None)
+
+
+def _request_chat_key(extra_fields: dict[str, Any] | None, *, request_id: Any = None) -> tuple[bytes, str]:
     payload = _chat_payload_or_none(extra_fields)
     if not payload:
         raise ValueError("Не найден ключ шифрования чата для заявки")
     key_map = get_chat_secrets()[1]
+    keyring = _keyring_fingerprint(key_map)
+    cache_key = (
+        str(request_id or ""),
+        _wrapped_key_fingerprint(payload),
+        str(payload.get("kek_kid") or "").strip(),
+    )
+    cached = _chat_key_cache_get(cache_key, keyring=keyring)
+    if cached is not None:
+        return cached
     chat_key, payload_kid = _unwrap_chat_key(payload, key_map=key_map)
+    _chat_key_cache_put(cache_key, chat_key, payload_kid, keyring=keyring)
     return chat_key, payload_kid
 
 
@@ -187,9 +268,26 @@ def encrypt_message_body_for_request(
 
     updated_extra_fields, chat_key, changed = prepare_request_chat_crypto(request_extra_fields)
     kid = str(extract_request_chat_kek_kid(updated_extra_fields) or active_chat_kid())
+    return encrypt_message_body_with_chat_key(text, chat_key=chat_key, kid=kid), updated_extra_fields, changed
+
+
+def encrypt_message_body_with_chat_key(text: str, *, chat_key: bytes, kid: str) -> str:
     nonce = secrets.token_bytes(12)
-    cipher = AESGCM(chat_key).encrypt(nonce, text.encode("utf-8"), _aad_v3_message(kid))
-    return f"{_PREFIX_V3}{kid}:" + _urlsafe_b64encode(nonce + cipher), updated_extra_fields, changed
+    cipher = AESGCM(chat_key).encrypt(nonce, str(text).encode("utf-8"), _aad_v3_message(kid))
+    return f"{_PREFIX_V3}{kid}:" + _urlsafe_b64encode(nonce + cipher)
+
+
+def rewrap_request_chat_key(extra_fields: dict[str, Any] | None) -> tuple[dict[str, Any], bool]:
+    updated = dict(extra_fields or {})
+    payload = _chat_payload_or_none(updated)
+    if not payload:
+        return updated, False
+    active_kid, active_secret = _active_chat_secret()
+    chat_key, payload_kid = _unwrap_chat_key(payload, key_map=get_chat_secrets()[1])
+    if payload_kid == active_kid:
+        return updated, False
+    updated[_CHAT_CRYPTO_EXTRA_FIELDS_KEY] = _wrap_chat_key(chat_key, kid=active_kid, secret=active_secret)
+    return updated, True
 
 
 def extract_request_chat_kek_kid(extra_fields: dict[str, Any] | None) -> str | None:
@@ -215,8 +313,7 @@ def _decrypt_v2(encoded: str, *, kid: str, key: bytes) -> str:
     return raw.decode("utf-8")
 
 
-def _decrypt_v3(encoded: str, *, kid: str, request_extra_fields: dict[str, Any] | None) -> str:
-    chat_key, _ = _request_chat_key(request_extra_fields)
+def _decrypt_v3_with_key(encoded: str, *, kid: str, chat_key: bytes) -> str:
     blob = _urlsafe_b64decode(encoded)
     if len(blob) <= 12:
         raise ValueError("Некорректный зашифрованный формат сообщения")
@@ -280,10 +377,19 @@ def decrypt_message_body(value: str | None) -> str | None:
     return _decrypt_legacy(encoded, ordered_unique_key_digests(key_map.values()))
 
 
+def _split_v3_token(text: str) -> tuple[str, str]:
+    encoded = text[len(_PREFIX_V3) :]
+    parts = encoded.split(":", 1)
+    if len(parts) != 2:
+        raise ValueError("Некорректный зашифрованный формат сообщения")
+    return str(parts[0] or "").strip(), parts[1]
+
+
 def decrypt_message_body_for_request(
     value: str | None,
     *,
     request_extra_fields: dict[str, Any] | None,
+    request_id: Any = None,
 ) -> str | None:
     if value is None:
         return None
@@ -291,10 +397,30 @@ def decrypt_message_body_for_request(
     if not text or not is_encrypted_message(text):
         return text
     if text.startswith(_PREFIX_V3):
-        encoded = text[len(_PREFIX_V3) :]
-        parts = encoded.split(":", 1)
-        if len(parts) != 2:
-            raise ValueError("Некорректный зашифрованный формат сообщения")
-        kid, payload = str(parts[0] or "").strip(), parts[1]
-        return _decrypt_v3(payload, kid=kid, request_extra_fields=request_extra_fields)
+        kid, payload = _split_v3_token(text)
+        chat_key, _ = _request_chat_key(request_extra_fields, request_id=request_id)
+        return _decrypt_v3_with_key(payload, kid=kid, chat_key=chat_key)
     return decrypt_message_body(text)
+
+
+def decrypt_message_bodies_for_request(
+    values: Iterable[str | None],
+    *,
+    request_extra_fields: dict[str, Any] | None,
+    request_id: Any = None,
+) -> list[str | None]:
+    chat_key: bytes | None = None
+    out: list[str | None] = []
+    for value in values:
+        text = None if value is None else str(value)
+        if text is None or not text or not is_encrypted_message(text):
+            out.append(text)
+            continue
+        if not text.startswith(_PREFIX_V3):
+            out.append(decrypt_message_body(text))
+            continue
+        if chat_key is None:
+            chat_key, _ = _request_chat_key(request_extra_fields, request_id=request_id)
+        kid, payload = _split_v3_token(text)
+        out.append(_decrypt_v3_with_key(payload, kid=kid, chat_key=chat_key))
+    return out
@@ -0,0 +1,230 @@
+from __future__ import annotations
+
+import logging
+import threading
+import time
+import uuid
+from typing import Any, Callable
+
+from sqlalchemy import or_
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.message import Message
+from app.models.request import Request
+from app.services.chat_crypto import decrypt_message_body, encrypt_message_body_for_request
+from app.services.redis_client import get_redis_client, report_redis_failure, report_redis_success
+
+LEGACY_CHAT_PREFIXES = ("chatenc:v1:", "chatenc:v2:")
+MAX_LEGACY_CHAT_BATCH_SIZE = 2000
+_LOG = logging.getLogger("app.chat_crypto_migration")
+
+_LEASE_KEY = "chat:legacy_migration:lease"
+# Renew when owned, take over when expired, refuse while another chain holds it.
+_LEASE_CLAIM_SCRIPT = """
+local owner = redis.call('GET', KEYS[1])
+if owner == ARGV[1] or not owner then
+    redis.call('SET', KEYS[1], ARGV[1], 'PX', ARGV[2])
+    return 1
+end
+return 0
+"""
+_LEASE_RELEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+_local_lease_lock = threading.Lock()
+# (owner, monotonic deadline) used while Redis is unavailable.
+_local_lease: tuple[str, float] | None = None
+
+
+def _legacy_body_filter():
+    return or_(*[Message.body.like(f"{prefix}%") for prefix in LEGACY_CHAT_PREFIXES])
+
+
+def _parse_checkpoint(raw: str | None) -> uuid.UUID | None:
+    value = str(raw or "").strip()
+    if not value:
+        return None
+    try:
+        return uuid.UUID(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def clamp_legacy_chat_batch_size(batch_size: int | None) -> int:
+    default = int(getattr(settings, "CHAT_LEGACY_MIGRATION_BATCH_SIZE", 200) or 200)
+    try:
+        normalized = int(batch_size) if batch_size is not None else default
+    except (TypeError, ValueError):
+        normalized = default
+    return max(1, min(normalized, MAX_LEGACY_CHAT_BATCH_SIZE))
+
+
+def _lease_ms() -> int:
+    return max(1, int(getattr(settings, "CHAT_LEGACY_MIGRATION_LEASE_SECONDS", 600) or 600)) * 1000
+
+
+def claim_legacy_migration_lease(owner: str | None = None) -> str | None:
+    """Take or renew the single-flight lease of the migration chain; None while another chain holds it."""
+    global _local_lease
+    token = owner or uuid.uuid4().hex
+    client = get_redis_client("chat_crypto_migration")
+    if client is not None:
+        try:
+            claimed = bool(client.eval(_LEASE_CLAIM_SCRIPT, 1, _LEASE_KEY, token, _lease_ms()))
+            report_redis_success()
+            return token if claimed else None
+        except Exception:
+            report_redis_failure("chat_crypto_migration")
+    now = time.monotonic()
+    with _local_lease_lock:
+        if _local_lease is not None and _local_lease[0] != token and _local_lease[1] > now:
+            return None
+        _local_lease = (token, now + _lease_ms() / 1000.0)
+    return token
+
+
+def release_legacy_migration_lease(owner: str) -> None:
+    global _local_lease
+    client = get_redis_client("chat_crypto_migration")
+    if client is not None:
+        try:
+            client.eval(_LEASE_RELEASE_SCRIPT, 1, _LEASE_KEY, owner)
+            report_redis_success()
+        except Exception:
+            report_redis_failure("chat_crypto_migration")
+    with _local_lease_lock:
+        if _local_lease is not None and _local_lease[0] == owner:
+            _local_lease = None
+
+
+def count_legacy_chat_messages(db: Session) -> int:
+    return int(db.query(Message.id).filter(_legacy_body_filter()).count() or 0)
+
+
+def migrate_legacy_chat_batch(
+    db: Session,
+    *,
+    checkpoint: str | None = None,
+    batch_size: int | None = None,
+    dry_run: bool = False,
+) -> dict[str, Any]:
+    size = clamp_legacy_chat_batch_size(batch_size)
+    after_id = _parse_checkpoint(checkpoint)
+    query = db.query(Message.id, Message.request_id, Message.body).filter(_legacy_body_filter())
+    if after_id is not None:
+        query = query.filter(Message.id > after_id)
+    rows = query.order_by(Message.id.asc()).limit(size).all()
+
+    request_ids = {request_id for _, request_id, _ in rows if request_id is not None}
+    # Row locks (held until the batch commits) plus a fresh read of chat_crypto: a sender that wrapped a chat key
+    # meanwhile is reused instead of being overwritten by a second key.
+    requests_by_id = (
+        {
+            row.id: row
+            for row in db.query(Request)
+            .filter(Request.id.in_(request_ids))
+            .order_by(Request.id.asc())
+            .with_for_update()
+            .populate_existing()
+            .all()
+        }
+        if request_ids
+        else {}
+    )
+
+    migrated = 0
+    orphaned = 0
+    errors = 0
+    for message_id, request_id, body in rows:
+        request_row = requests_by_id.get(request_id)
+        if request_row is None:
+            # v3 needs the per-request chat key; messages without a request stay on the legacy format.
+            orphaned += 1
+            continue
+        try:
+            plaintext = decrypt_message_body(body)
+            updated, next_extra_fields, changed = encrypt_message_body_for_request(
+                plaintext,
+                request_extra_fields=request_row.extra_fields,
+            )
+            if changed:
+                request_row.extra_fields = next_extra_fields
+            db.query(Message).filter(Message.id == message_id).update(
+                {Message.body: updated},
+                synchronize_session=False,
+            )
+            migrated += 1
+        except Exception:
+            errors += 1
+            _LOG.warning("legacy chat migration failed message_id=%s request_id=%s", message_id, request_id)
+
+    if dry_run:
+        db.rollback()
+    else:
+        db.commit()
+
+    next_checkpoint = str(rows[-1][0]) if rows else (str(after_id) if after_id else None)
+    return {
+        "scanned": len(rows),
+        "migrated": migrated,
+        "orphaned": orphaned,
+        "errors": errors,
+        "checkpoint": next_checkpoint,
+        "done": len(rows) < size,
+    }
+
+
+def run_legacy_chat_migration(
+    db: Session,
+    *,
+    checkpoint: str | None = None,
+    batch_size: int | None = None,
+    max_batches: int | None = None,
+    throttle_seconds: float | None = None,
+    dry_run: bool = False,
+    on_batch: Callable[[dict[str, Any]], None] | None = None,
+) -> dict[str, Any]:
+    if max_batches is None:
+        max_batches = int(getattr(settings, "CHAT_LEGACY_MIGRATION_MAX_BATCHES", 50) or 0)
+    batches_limit = max(0, int(max_batches))
+    if throttle_seconds is None:
+        throttle_seconds = max(0, int(getattr(settings, "CHAT_LEGACY_MIGRATION_THROTTLE_MS", 0) or 0)) / 1000.0
+    totals: dict[str, Any] = {
+        "batches": 0,
+        "scanned": 0,
+        "migrated": 0,
+        "orphaned": 0,
+        "errors": 0,
+        "checkpoint": checkpoint,
+        "done": False,
+    }
+    started_at = time.monotonic()
+    while not batches_limit or totals["batches"] < batches_limit:
+        result = migrate_legacy_chat_batch(db, checkpoint=totals["checkpoint"], batch_size=batch_size, dry_run=dry_run)
+        totals["batches"] += 1
+        for key in ("scanned", "migrated", "orphaned", "errors"):
+            totals[key] += int(result[key])
+        totals["checkpoint"] = result["checkpoint"]
+        totals["done"] = bool(result["done"])
+        if on_batch is not None:
+            on_batch({**result, "batch": totals["batches"]})
+        if totals["done"]:
+            break
+        if throttle_seconds > 0:
+            time.sleep(throttle_seconds)
+    totals["elapsed_ms"] = round((time.monotonic() - started_at) * 1000.0, 2)
+    _LOG.info(
+        "legacy chat migration batches=%s scanned=%s migrated=%s orphaned=%s errors=%s done=%s checkpoint=%s",
+        totals["batches"],
+        totals["scanned"],
+        totals["migrated"],
+        totals["orphaned"],
+        totals["errors"],
+        totals["done"],
+        totals["checkpoint"],
+    )
+    return totals
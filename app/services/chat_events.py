@@ -0,0 +1,313 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Awaitable, Callable, Iterator
+
+from fastapi import HTTPException, Request as FastapiRequest
+from sqlalchemy import event as sa_event
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.db.session import get_db
+from app.services.redis_client import (
+    get_async_redis_client,
+    get_redis_client,
+    report_redis_failure,
+    report_redis_success,
+)
+
+CHAT_EVENT_MESSAGE = "message"
+CHAT_EVENT_ATTACHMENT = "attachment"
+CHAT_EVENT_RECEIPT = "receipt"
+CHAT_EVENT_TYPING = "typing"
+
+_CHANNEL_PREFIX = "chat:events:req:"
+_SUBSCRIBER_QUEUE_SIZE = 64
+_RECONNECT_DELAY_SECONDS = 2.0
+_PENDING_EVENTS_KEY = "chat_events_pending"
+_LOG = logging.getLogger("app.chat_events")
+
+LIVE_STREAM_HEADERS = {
+    "Cache-Control": "no-cache",
+    "Connection": "keep-alive",
+    "X-Accel-Buffering": "no",
+}
+
+
+def _channel(request_key: str) -> str:
+    return f"{_CHANNEL_PREFIX}{request_key}"
+
+
+class ChatEventBroker:
+    """Fans chat events out to the SSE streams of this process.
+
+    Events published by any backend/worker process travel through Redis pub/sub;
+    one listener per event loop forwards them to per-request subscriber queues.
+    Without Redis, events published in-process are still dispatched locally.
+    """
+
+    def __init__(self) -> None:
+        self._subscribers: dict[str, set[asyncio.Queue]] = {}
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._listener: asyncio.Task | None = None
+        self.redis_connected = False
+
+    async def subscribe(self, request_key: str) -> asyncio.Queue:
+        self._ensure_listener()
+        queue: asyncio.Queue = asyncio.Queue(maxsize=_SUBSCRIBER_QUEUE_SIZE)
+        self._subscribers.setdefault(str(request_key), set()).add(queue)
+        return queue
+
+    def unsubscribe(self, request_key: str, queue: asyncio.Queue) -> None:
+        key = str(request_key)
+        queues = self._subscribers.get(key)
+        if not queues:
+            return
+        queues.discard(queue)
+        if not queues:
+            self._subscribers.pop(key, None)
+
+    def subscriber_count(self, request_key: str | None = None) -> int:
+        if request_key is not None:
+            return len(self._subscribers.get(str(request_key)) or ())
+        return sum(len(queues) for queues in self._subscribers.values())
+
+    def dispatch(self, request_key: str, event: dict[str, Any]) -> None:
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            return
+        try:
+            loop.call_soon_threadsafe(self._dispatch_local, str(request_key), event)
+        except RuntimeError:
+            pass
+
+    def _dispatch_local(self, request_key: str, event: dict[str, Any]) -> None:
+        for queue in list(self._subscribers.get(request_key) or ()):
+            if queue.full():
+                # Slow consumer: every event only triggers a cursor delta, so dropping the oldest is lossless.
+                try:
+                    queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    pass
+            queue.put_nowait(event)
+
+    def _ensure_listener(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._listener = None
+            self.redis_connected = False
+        if self._listener is None or self._listener.done():
+            self._listener = loop.create_task(self._listen_redis())
+
+    async def _listen_redis(self) -> None:
+        while True:
+            pubsub = None
+            try:
+                client = get_async_redis_client("chat_events")
+                if client is None:
+                    await asyncio.sleep(_RECONNECT_DELAY_SECONDS)
+                    continue
+                pubsub = client.pubsub()
+                await pubsub.psubscribe(f"{_CHANNEL_PREFIX}*")
+                report_redis_success()
+                self.redis_connected = True
+                while True:
+                    # Bounded reads keep the pooled socket timeout from killing an idle subscription.
+                    message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+                    if not message or message.get("type") != "pmessage":
+                        continue
+                    channel = str(message.get("channel") or "")
+                    request_key = channel[len(_CHANNEL_PREFIX):]
+                    try:
+                        event = json.loads(message.get("data") or "{}")
+                    except (TypeError, ValueError):
+                        continue
+                    if request_key and isinstance(event, dict):
+                        self._dispatch_local(request_key, event)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                if self.redis_connected:
+                    _LOG.warning("chat event listener lost redis connection, retrying")
+                report_redis_failure("chat_events")
+            finally:
+                self.redis_connected = False
+                if pubsub is not None:
+                    try:
+                        await pubsub.aclose()
+                    except Exception:
+                        pass
+            await asyncio.sleep(_RECONNECT_DELAY_SECONDS)
+
+    async def close(self) -> None:
+        listener = self._listener
+        self._listener = None
+        self.redis_connected = False
+        if listener is not None and not listener.done():
+            listener.cancel()
+            try:
+                await listener
+            except (asyncio.CancelledError, Exception):
+                pass
+
+    def reset(self) -> None:
+        listener = self._listener
+        if listener is not None and not listener.done():
+            try:
+                listener.cancel()
+            except RuntimeError:
+                pass
+        self._subscribers.clear()
+        self._loop = None
+        self._listener = None
+        self.redis_connected = False
+
+
+chat_event_broker = ChatEventBroker()
+
+
+def publish_chat_event(request_id: Any, event_type: str, **details: Any) -> None:
+    request_key = str(request_id or "").strip()
+    if not request_key:
+        return
+    event = {
+        "type": str(event_type or "").strip().lower(),
+        "request_id": request_key,
+        "at": datetime.now(timezone.utc).isoformat(),
+        **details,
+    }
+    published = False
+    client = get_redis_client("chat_events")
+    if client is not None:
+        try:
+            client.publish(_channel(request_key), json.dumps(event, ensure_ascii=False, default=str))
+            report_redis_success()
+            published = True
+        except Exception:
+            report_redis_failure("chat_events")
+    if not published or not chat_event_broker.redis_connected:
+        chat_event_broker.dispatch(request_key, event)
+
+
+def queue_chat_event(db: Session, request_id: Any, event_type: str) -> None:
+    request_key = str(request_id or "").strip()
+    if not request_key:
+        return
+    pending: dict[tuple[str, str], None] = db.info.setdefault(_PENDING_EVENTS_KEY, {})
+    pending[(request_key, str(event_type or "").strip().lower())] = None
+
+
+@sa_event.listens_for(Session, "after_commit")
+def _publish_chat_events_after_commit(session: Session) -> None:
+    pending = session.info.pop(_PENDING_EVENTS_KEY, None)
+    for request_key, event_type in pending or ():
+        publish_chat_event(request_key, event_type)
+
+
+@sa_event.listens_for(Session, "after_rollback")
+def _drop_chat_events_after_rollback(session: Session) -> None:
+    session.info.pop(_PENDING_EVENTS_KEY, None)
+
+
+@contextmanager
+def live_stream_session(http_request: FastapiRequest) -> Iterator[Session]:
+    # Streams outlive the request-scoped get_db session, so each rebuild opens its own one.
+    provider = http_request.app.dependency_overrides.get(get_db, get_db)
+    sessions = provider()
+    try:
+        yield next(sessions)
+    finally:
+        sessions.close()
+
+
+def _sse(event: str, payload: Any) -> str:
+    return f"event: {event}\ndata: {json.dumps(payload, ensure_ascii=False, default=str)}\n\n"
+
+
+def _live_fingerprint(payload: dict[str, Any]) -> str:
+    state = {key: value for key, value in payload.items() if key not in {"has_updates", "messages", "attachments"}}
+    return json.dumps(state, sort_keys=True, ensure_ascii=False, default=str)
+
+
+def _drain(queue: asyncio.Queue) -> list[dict[str, Any]]:
+    events: list[dict[str, Any]] = []
+    while True:
+        try:
+            events.append(queue.get_nowait())
+        except asyncio.QueueEmpty:
+            return events
+
+
+async def live_event_stream(
+    *,
+    request_key: str,
+    cursor: str | None,
+    build_live: Callable[[str | None], dict[str, Any]],
+    list_typing: Callable[[], list[dict[str, Any]]],
+    is_disconnected: Callable[[], Awaitable[bool]],
+    typing_payload: dict[str, Any],
+) -> AsyncIterator[str]:
+    heartbeat = max(1.0, float(settings.CHAT_STREAM_HEARTBEAT_SECONDS or 15))
+    fallback_poll = max(1.0, float(settings.CHAT_STREAM_FALLBACK_POLL_SECONDS or 5))
+    max_seconds = float(settings.CHAT_STREAM_MAX_SECONDS or 0)
+    started_at = time.monotonic()
+    queue = await chat_event_broker.subscribe(request_key)
+    try:
+        # Subscribe before the first snapshot so nothing published in between is lost.
+        payload = await run_in_threadpool(build_live, cursor)
+        cursor = payload.get("cursor") or cursor
+        last_sent = _live_fingerprint(payload)
+        yield "retry: 3000\n\n"
+        yield _sse("live", payload)
+        while True:
+            timeout = heartbeat if chat_event_broker.redis_connected else min(heartbeat, fallback_poll)
+            if max_seconds > 0:
+                remaining = max_seconds - (time.monotonic() - started_at)
+                if remaining <= 0:
+                    break
+                timeout = min(timeout, remaining)
+            try:
+                events = [await asyncio.wait_for(queue.get(), timeout=timeout)]
+            except asyncio.TimeoutError:
+                if await is_disconnected():
+                    break
+                if not chat_event_broker.redis_connected:
+                    # No cross-process delivery without Redis: degrade to a cheap cursor check.
+                    payload = await run_in_threadpool(build_live, cursor)
+                    fingerprint = _live_fingerprint(payload)
+                    if payload.get("has_updates") or fingerprint != last_sent:
+                        cursor = payload.get("cursor") or cursor
+                        last_sent = fingerprint
+                        yield _sse("live", payload)
+                        continue
+                yield ": keepalive\n\n"
+                continue
+            if await is_disconnected():
+                break
+            events.extend(_drain(queue))
+            if any(str(event.get("type") or "") != CHAT_EVENT_TYPING for event in events):
+                payload = await run_in_threadpool(build_live, cursor)
+                fingerprint = _live_fingerprint(payload)
+                # Our own delivery receipts echo back here; skip snapshots that carry nothing new.
+                if payload.get("has_updates") or fingerprint != last_sent:
+                    cursor = payload.get("cursor") or cursor
+                    last_sent = fingerprint
+                    yield _sse("live", payload)
+            else:
+                typing_rows = await run_in_threadpool(list_typing)
+                yield _sse(CHAT_EVENT_TYPING, {**typing_payload, "typing": typing_rows})
+    except HTTPException as exc:
+        yield _sse("error", {"status": exc.status_code, "detail": exc.detail})
+    finally:
+        chat_event_broker.unsubscribe(request_key, queue)
+
+
+def clear_chat_events_for_tests() -> None:
+    chat_event_broker.reset()
@@ -5,15 +5,11 @@ import threading
 from datetime import datetime, timezone
 from typing import Any
 
-import redis
-
-from app.core.config import settings
+from app.services.chat_events import CHAT_EVENT_TYPING, publish_chat_event
+from app.services.redis_client import get_redis_client, report_redis_failure, report_redis_success
 
 _DEFAULT_TYPING_TTL_SECONDS = 9
 
-_redis_client: redis.Redis | None = None
-_redis_lock = threading.Lock()
-
 _memory_lock = threading.Lock()
 _memory_state: dict[str, dict[str, dict[str, Any]]] = {}
 
@@ -26,28 +22,6 @@ def _iso_utc(dt: datetime) -> str:
     return dt.astimezone(timezone.utc).isoformat()
 
 
-def _get_redis_client() -> redis.Redis | None:
-    global _redis_client
-    if _redis_client is not None:
-        return _redis_client
-    with _redis_lock:
-        if _redis_client is not None:
-            return _redis_client
-        try:
-            client = redis.Redis.from_url(
-                settings.REDIS_URL,
-                decode_responses=True,
-                socket_timeout=0.25,
-                socket_connect_timeout=0.25,
-            )
-            client.ping()
-            _redis_client = client
-            return _redis_client
-        except Exception:
-            _redis_client = None
-            return None
-
-
 def _request_actors_key(request_key: str) -> str:
     return f"chat:typing:req:{request_key}:actors"
 
@@ -64,6 +38,26 @@ def set_typing_presence(
     actor_role: str,
     typing: bool,
     ttl_seconds: int = _DEFAULT_TYPING_TTL_SECONDS,
+) -> None:
+    _store_typing_presence(
+        request_key=request_key,
+        actor_key=actor_key,
+        actor_label=actor_label,
+        actor_role=actor_role,
+        typing=typing,
+        ttl_seconds=ttl_seconds,
+    )
+    publish_chat_event(request_key, CHAT_EVENT_TYPING)
+
+
+def _store_typing_presence(
+    *,
+    request_key: str,
+    actor_key: str,
+    actor_label: str,
+    actor_role: str,
+    typing: bool,
+    ttl_seconds: int = _DEFAULT_TYPING_TTL_SECONDS,
 ) -> None:
     normalized_request = str(request_key or "").strip()
     normalized_actor = str(actor_key or "").strip()
@@ -81,7 +75,7 @@ def set_typing_presence(
     else:
         payload = None
 
-    client = _get_redis_client()
+    client = get_redis_client("chat_presence")
     if client is not None:
         actors_key = _request_actors_key(normalized_request)
         actor_payload_key = _actor_payload_key(normalized_request, normalized_actor)
@@ -95,9 +89,10 @@ def set_typing_presence(
                 pipe.setex(actor_payload_key, ttl, json.dumps(payload, ensure_ascii=False))
                 pipe.expire(actors_key, max(60, ttl * 8))
             pipe.execute()
+            report_redis_success()
             return
         except Exception:
-            pass
+            report_redis_failure("chat_presence")
 
     with _memory_lock:
         actors = _memory_state.setdefault(normalized_request, {})
@@ -121,11 +116,12 @@ def list_typing_presence(
     excluded = str(exclude_actor_key or "").strip()
     now_ts = _utc_now().timestamp()
 
-    client = _get_redis_client()
+    client = get_redis_client("chat_presence")
     if client is not None:
         actors_key = _request_actors_key(normalized_request)
         try:
             members = list(client.smembers(actors_key) or [])
+            report_redis_success()
             if not members:
                 return []
             keys = [_actor_payload_key(normalized_request, str(member)) for member in members]
@@ -160,7 +156,7 @@ def list_typing_presence(
             result.sort(key=lambda item: str(item.get("updated_at") or ""), reverse=True)
             return result
         except Exception:
-            pass
+            report_redis_failure("chat_presence")
 
     with _memory_lock:
         actors = _memory_state.get(normalized_request) or {}
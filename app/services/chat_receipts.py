@@ -0,0 +1,113 @@
+from __future__ import annotations
+
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.services.chat_activity import read_chat_activity
+from app.services.redis_client import get_redis_client, report_redis_failure, report_redis_success
+from app.workers.celery_app import celery_app
+
+RECEIPT_KIND_DELIVERED = "delivered"
+RECEIPT_KIND_READ = "read"
+
+_MAX_HIGH_WATER_MARKS = 20_000
+_LOG = logging.getLogger("app.chat_receipts")
+
+_state_lock = threading.Lock()
+# (request, side, kind) -> chat_activity_version already covered by a receipt write.
+_high_water_marks: OrderedDict[tuple[str, str, str], int] = OrderedDict()
+
+
+def _flush_interval_ms() -> int:
+    return max(0, int(getattr(settings, "CHAT_RECEIPT_FLUSH_INTERVAL_MS", 0) or 0))
+
+
+def _window_key(key: tuple[str, str, str]) -> str:
+    request_key, side, kind = key
+    return f"chat:receipts:req:{request_key}:{side}:{kind}"
+
+
+def _claim_redis_slot(redis_key: str, *, value: str, interval_ms: int) -> bool | None:
+    """SET NX PX on the shared Redis; None while Redis is unavailable."""
+    client = get_redis_client("chat_receipts")
+    if client is None:
+        return None
+    try:
+        acquired = bool(client.set(redis_key, value, nx=True, px=interval_ms))
+        report_redis_success()
+        return acquired
+    except Exception:
+        report_redis_failure("chat_receipts")
+        return None
+
+
+def _acquire_flush_window(key: tuple[str, str, str]) -> bool:
+    interval_ms = _flush_interval_ms()
+    if interval_ms <= 0:
+        return True
+    # Without Redis there is neither a shared window nor a broker for the deferred flush, so every poll writes.
+    return _claim_redis_slot(_window_key(key), value="1", interval_ms=interval_ms) is not False
+
+
+def _defer_receipt_write(key: tuple[str, str, str], version: int) -> bool:
+    """Schedule one flush for when the window closes; False when it cannot be scheduled and the caller writes now."""
+    interval_ms = _flush_interval_ms()
+    # Later polls in the same window ride on the flush the first one scheduled.
+    claimed = _claim_redis_slot(_window_key(key) + ":deferred", value=str(version), interval_ms=interval_ms)
+    if claimed is None:
+        return False
+    if not claimed:
+        return True
+    request_key, side, kind = key
+    try:
+        celery_app.send_task(
+            "app.workers.tasks.chat_activity.flush_deferred_chat_receipt",
+            kwargs={"request_id": request_key, "side": side, "kind": kind},
+            countdown=interval_ms / 1000.0,
+            # Called from a poll request: a broker outage must not stall it behind publish retries.
+            retry=False,
+        )
+    except Exception:
+        _LOG.warning("deferred chat receipt not scheduled request_id=%s side=%s kind=%s", request_key, side, kind, exc_info=True)
+        return False
+    return True
+
+
+def begin_receipt_write(db: Session, *, request_id: Any, side: str, kind: str, deferred: bool = False) -> int | None:
+    """Return the activity version to write receipts against, or None when the write is skipped or deferred.
+
+    `deferred=True` is the flush scheduled for a window that was busy; it writes regardless of the window.
+    """
+    key = (str(request_id), side, kind)
+    activity = read_chat_activity(db, request_id)
+    if activity is None:
+        return 0
+    version = int(activity["activity_version"])
+    with _state_lock:
+        if _high_water_marks.get(key) == version:
+            _high_water_marks.move_to_end(key)
+            return None
+    if not deferred and not _acquire_flush_window(key) and _defer_receipt_write(key, version):
+        # Another poller issued the set-based UPDATE within the interval; the scheduled flush catches up.
+        return None
+    return version
+
+
+def finish_receipt_write(*, request_id: Any, side: str, kinds: tuple[str, ...], version: int) -> None:
+    with _state_lock:
+        for kind in kinds:
+            key = (str(request_id), side, kind)
+            _high_water_marks[key] = int(version)
+            _high_water_marks.move_to_end(key)
+        while len(_high_water_marks) > _MAX_HIGH_WATER_MARKS:
+            _high_water_marks.popitem(last=False)
+
+
+def clear_receipt_state_for_tests() -> None:
+    with _state_lock:
+        _high_water_marks.clear()
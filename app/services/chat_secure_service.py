@@ -7,23 +7,33 @@ from datetime import datetime, timezone
 from typing import Any
 
 from fastapi import HTTPException
-from sqlalchemy import and_, func, or_
+from sqlalchemy import and_, func, or_, update
 from sqlalchemy.orm import Session
 
 from app.models.attachment import Attachment
 from app.models.message import Message
 from app.models.request import Request
 from app.models.request_data_requirement import RequestDataRequirement
-from app.services.chat_crypto import decrypt_message_body_for_request
+from app.services.chat_activity import read_chat_activity, touch_chat_activity
+from app.services.chat_crypto import decrypt_message_bodies_for_request, decrypt_message_body_for_request
+from app.services.chat_events import CHAT_EVENT_MESSAGE, CHAT_EVENT_RECEIPT, queue_chat_event
+from app.services.chat_receipts import (
+    RECEIPT_KIND_DELIVERED,
+    RECEIPT_KIND_READ,
+    begin_receipt_write,
+    finish_receipt_write,
+)
 from app.services.notifications import EVENT_MESSAGE as NOTIFICATION_EVENT_MESSAGE, notify_request_event
 from app.services.request_read_markers import EVENT_MESSAGE, mark_unread_for_client, mark_unread_for_lawyer
 
 MAX_CHAT_MESSAGE_LEN = 12_000
 DEFAULT_CHAT_WINDOW_LIMIT = 50
+DEFAULT_CHAT_ACTIVITY_RECONCILE_BATCH = 500
 MAX_CHAT_WINDOW_LIMIT = 200
 MAX_CHAT_BODY_BATCH = 200
 CHAT_PARTICIPANT_ADMIN_IDS_KEY = "chat_participant_admin_ids"
 _CHAT_WORKSPACE_LOG = logging.getLogger("uvicorn.error")
+_CHAT_ACTIVITY_LOG = logging.getLogger("app.chat_activity")
 
 
 def _normalize_message_body(body: str | None) -> str:
@@ -153,11 +163,17 @@ def _mark_counterparty_delivery(
     recipient: str,
     mark_read: bool,
     commit: bool = True,
+    deferred: bool = False,
 ) -> bool:
     side = str(recipient or "").strip().upper()
     if side not in {"CLIENT", "STAFF"}:
         return False
 
+    kind = RECEIPT_KIND_READ if mark_read else RECEIPT_KIND_DELIVERED
+    observed_version = begin_receipt_write(db, request_id=request_id, side=side, kind=kind, deferred=deferred)
+    if observed_version is None:
+        return False
+
     now = datetime.now(timezone.utc)
     changed = False
     if side == "CLIENT":
@@ -199,8 +215,18 @@ def _mark_counterparty_delivery(
         if read_count:
             changed = True
 
-    if changed and commit:
-        db.commit()
+    if changed:
+        touch_chat_activity(db, request_id, message_at=now)
+        queue_chat_event(db, request_id, CHAT_EVENT_RECEIPT)
+        if commit:
+            db.commit()
+    finish_receipt_write(
+        request_id=request_id,
+        side=side,
+        kinds=(RECEIPT_KIND_DELIVERED, RECEIPT_KIND_READ) if mark_read else (kind,),
+        # Our own touch bumps the version once; a concurrent writer only costs one extra no-op check.
+        version=observed_version + 1 if changed else observed_version,
+    )
     return changed
 
 
@@ -220,6 +246,16 @@ def mark_messages_read_for_staff(db: Session, *, request_id: Any, commit: bool =
     return _mark_counterparty_delivery(db, request_id=request_id, recipient="STAFF", mark_read=True, commit=commit)
 
 
+def flush_deferred_chat_receipt(db: Session, *, request_id: Any, side: str, kind: str) -> bool:
+    return _mark_counterparty_delivery(
+        db,
+        request_id=request_id,
+        recipient=side,
+        mark_read=kind == RECEIPT_KIND_READ,
+        deferred=True,
+    )
+
+
 def serialize_message(row: Message, *, body: str | None = None, body_loaded: bool = True) -> dict[str, Any]:
     return {
         "id": str(row.id),
@@ -368,6 +404,16 @@ def serialize_messages_for_request(
     else:
         attachment_lookup_ms = 0.0
 
+    decrypted_bodies: dict[str, str | None] = {}
+    if include_bodies:
+        body_rows = [row for row in rows if str(row.id) not in by_message_id]
+        decrypted = decrypt_message_bodies_for_request(
+            [row.body for row in body_rows],
+            request_extra_fields=request_extra_fields,
+            request_id=request_id,
+        )
+        decrypted_bodies = {str(row.id): body for row, body in zip(body_rows, decrypted)}
+
     out: list[dict[str, Any]] = []
     for row in rows:
         linked = by_message_id.get(str(row.id), [])
@@ -376,7 +422,7 @@ def serialize_messages_for_request(
             body_value = "Запрос"
             body_loaded = True
         elif include_bodies:
-            body_value = decrypt_message_body_for_request(row.body, request_extra_fields=request_extra_fields)
+            body_value = decrypted_bodies.get(str(row.id))
             body_loaded = True
         else:
             body_value = None
@@ -453,19 +499,20 @@ def serialize_message_bodies_for_request(
     request_extra_fields: dict[str, Any] | None,
 ) -> list[dict[str, Any]]:
     request_data_ids = _request_data_message_ids(db, request_id, _message_uuid_list(rows))
+    body_rows = [row for row in rows if str(row.id) not in request_data_ids]
+    decrypted = decrypt_message_bodies_for_request(
+        [row.body for row in body_rows],
+        request_extra_fields=request_extra_fields,
+        request_id=request_id,
+    )
+    decrypted_bodies = {str(row.id): body for row, body in zip(body_rows, decrypted)}
     payload: list[dict[str, Any]] = []
     for row in rows:
         row_id = str(row.id)
         if row_id in request_data_ids:
             payload.append({"id": row_id, "body": "Запрос", "body_loaded": True})
             continue
-        payload.append(
-            {
-                "id": row_id,
-                "body": decrypt_message_body_for_request(row.body, request_extra_fields=request_extra_fields),
-                "body_loaded": True,
-            }
-        )
+        payload.append({"id": row_id, "body": decrypted_bodies.get(row_id), "body_loaded": True})
     return payload
 
 
@@ -476,7 +523,11 @@ def serialize_message_for_request(
 ) -> dict[str, Any]:
     return serialize_message(
         row,
-        body=decrypt_message_body_for_request(row.body, request_extra_fields=request_extra_fields),
+        body=decrypt_message_body_for_request(
+            row.body,
+            request_extra_fields=request_extra_fields,
+            request_id=row.request_id,
+        ),
         body_loaded=True,
     )
 
@@ -510,6 +561,7 @@ def create_client_message(
     )
     db.add(row)
     db.add(request)
+    queue_chat_event(db, request.id, CHAT_EVENT_MESSAGE)
     db.commit()
     db.refresh(row)
     return row
@@ -556,34 +608,136 @@ def create_admin_or_lawyer_message(
     )
     db.add(row)
     db.add(request)
+    queue_chat_event(db, request.id, CHAT_EVENT_MESSAGE)
     db.commit()
     db.refresh(row)
     return row
 
 
-def get_chat_activity_summary(db: Session, request_id: Any) -> dict[str, Any]:
-    message_count, latest_message_at = (
+def aggregate_chat_activity(db: Session, request_ids: list[Any]) -> dict[Any, dict[str, Any]]:
+    out: dict[Any, dict[str, Any]] = {
+        request_id: {
+            "message_count": 0,
+            "attachment_count": 0,
+            "latest_message_at": None,
+            "latest_attachment_at": None,
+        }
+        for request_id in request_ids
+    }
+    if not request_ids:
+        return out
+    message_rows = (
         db.query(
+            Message.request_id,
             func.count(Message.id),
             func.max(func.coalesce(Message.updated_at, Message.created_at)),
         )
-        .filter(Message.request_id == request_id)
-        .one()
+        .filter(Message.request_id.in_(request_ids))
+        .group_by(Message.request_id)
+        .all()
     )
-    attachment_count, latest_attachment_at = (
+    for request_id, count, latest in message_rows:
+        if request_id in out:
+            out[request_id]["message_count"] = int(count or 0)
+            out[request_id]["latest_message_at"] = latest
+    attachment_rows = (
         db.query(
+            Attachment.request_id,
             func.count(Attachment.id),
             func.max(func.coalesce(Attachment.updated_at, Attachment.created_at)),
         )
-        .filter(Attachment.request_id == request_id)
-        .one()
+        .filter(Attachment.request_id.in_(request_ids))
+        .group_by(Attachment.request_id)
+        .all()
     )
-    latest_candidates = [value for value in (latest_message_at, latest_attachment_at) if value is not None]
-    latest_activity_at = max(latest_candidates) if latest_candidates else None
+    for request_id, count, latest in attachment_rows:
+        if request_id in out:
+            out[request_id]["attachment_count"] = int(count or 0)
+            out[request_id]["latest_attachment_at"] = latest
+    return out
+
+
+def _parse_request_id(raw: str | None) -> uuid.UUID | None:
+    value = str(raw or "").strip()
+    if not value:
+        return None
+    try:
+        return uuid.UUID(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def reconcile_chat_activity(
+    db: Session,
+    *,
+    batch_size: int | None = None,
+    checkpoint: str | None = None,
+    max_batches: int | None = None,
+) -> dict[str, Any]:
+    size = max(1, int(batch_size or DEFAULT_CHAT_ACTIVITY_RECONCILE_BATCH))
+    after_id = _parse_request_id(checkpoint)
+    batches_limit = max(0, int(max_batches or 0))
+    totals: dict[str, Any] = {"batches": 0, "scanned": 0, "fixed": 0, "checkpoint": checkpoint, "done": False}
+    while not batches_limit or totals["batches"] < batches_limit:
+        query = db.query(
+            Request.id,
+            Request.chat_message_count,
+            Request.chat_attachment_count,
+            Request.chat_latest_message_at,
+            Request.chat_latest_attachment_at,
+        )
+        if after_id is not None:
+            query = query.filter(Request.id > after_id)
+        rows = query.order_by(Request.id.asc()).limit(size).all()
+        actual = aggregate_chat_activity(db, [row[0] for row in rows])
+        for request_id, message_count, attachment_count, latest_message_at, latest_attachment_at in rows:
+            expected = actual[request_id]
+            stored = {
+                "message_count": int(message_count or 0),
+                "attachment_count": int(attachment_count or 0),
+                "latest_message_at": latest_message_at,
+                "latest_attachment_at": latest_attachment_at,
+            }
+            if stored == expected:
+                continue
+            db.execute(
+                update(Request)
+                .where(Request.id == request_id)
+                .values(
+                    chat_message_count=expected["message_count"],
+                    chat_attachment_count=expected["attachment_count"],
+                    chat_latest_message_at=expected["latest_message_at"],
+                    chat_latest_attachment_at=expected["latest_attachment_at"],
+                    chat_activity_version=Request.chat_activity_version + 1,
+                )
+                .execution_options(synchronize_session=False)
+            )
+            totals["fixed"] += 1
+        db.commit()
+        totals["batches"] += 1
+        totals["scanned"] += len(rows)
+        if rows:
+            after_id = rows[-1][0]
+            totals["checkpoint"] = str(after_id)
+        if len(rows) < size:
+            totals["done"] = True
+            break
+    _CHAT_ACTIVITY_LOG.info(
+        "chat activity reconcile batches=%s scanned=%s fixed=%s done=%s",
+        totals["batches"],
+        totals["scanned"],
+        totals["fixed"],
+        totals["done"],
+    )
+    return totals
+
+
+def get_chat_activity_summary(db: Session, request_id: Any) -> dict[str, Any]:
+    summary = read_chat_activity(db, request_id)
+    if summary is None:
+        summary = {**aggregate_chat_activity(db, [request_id])[request_id], "activity_version": 0}
+    latest_candidates = [value for value in (summary["latest_message_at"], summary["latest_attachment_at"]) if value]
     return {
-        "message_count": int(message_count or 0),
-        "attachment_count": int(attachment_count or 0),
-        "latest_message_at": latest_message_at,
-        "latest_attachment_at": latest_attachment_at,
-        "latest_activity_at": latest_activity_at,
+        **summary,
+        "latest_activity_at": max(latest_candidates) if latest_candidates else None,
     }
@@ -0,0 +1,326 @@
+from __future__ import annotations
+
+import itertools
+import logging
+import socket
+import struct
+import threading
+import time
+from collections import deque
+from time import perf_counter
+from typing import Any
+
+from app.core.config import settings
+
+_LOG = logging.getLogger("app.clamav")
+
+# Reused sessions idle longer than this are PINGed before use; clamd may have dropped them.
+_PING_AFTER_IDLE_SECONDS = 5.0
+_SIGNATURE_VERSION_TTL_SECONDS = 60.0
+
+
+class ClamavBusyError(RuntimeError):
+    """Every clamd session stayed busy for CLAMAV_QUEUE_TIMEOUT_SECONDS."""
+
+
+def parse_scan_reply(reply: str) -> tuple[bool, str | None]:
+    text = str(reply or "").strip().strip("\x00")
+    if " FOUND" in text:
+        signature = text.split(":", 1)[-1].replace("FOUND", "").strip() or "MALWARE_FOUND"
+        return False, signature
+    if text.endswith("OK") or " OK" in text:
+        return True, None
+    raise ValueError(f"Некорректный ответ ClamAV: {text or '-'}")
+
+
+def parse_signature_version(reply: str) -> str | None:
+    # "ClamAV 1.3.1/27400/Thu Oct 16 08:21:47 2026" -> "1.3.1/27400" (engine / signature database).
+    parts = str(reply or "").strip().strip("\x00").split("/")
+    if len(parts) < 2 or not parts[0].startswith("ClamAV ") or not parts[1].strip().isdigit():
+        return None
+    return f"{parts[0].removeprefix('ClamAV ').strip()}/{parts[1].strip()}"[:64]
+
+
+class ClamavSession:
+    """One clamd connection in IDSESSION mode: commands are numbered and every reply is "<id>: <text>\\0"."""
+
+    def __init__(self, host: str, port: int, timeout: float) -> None:
+        self._sock = socket.create_connection((host, port), timeout=timeout)
+        self._sock.settimeout(timeout)
+        self._sock.sendall(b"zIDSESSION\0")
+        self._ids = itertools.count(1)
+        self._buffer = b""
+        self.last_used = time.monotonic()
+
+    def _read_reply(self, request_id: int) -> str:
+        while b"\0" not in self._buffer:
+            part = self._sock.recv(4096)
+            if not part:
+                raise ConnectionError("ClamAV закрыл сессию")
+            self._buffer += part
+        raw, _, self._buffer = self._buffer.partition(b"\0")
+        text = raw.decode("utf-8", errors="replace").strip()
+        prefix, separator, reply = text.partition(": ")
+        if not separator or prefix != str(request_id):
+            raise ValueError(f"Некорректный ответ ClamAV: {text or '-'}")
+        self.last_used = time.monotonic()
+        return reply
+
+    def command(self, name: str) -> str:
+        request_id = next(self._ids)
+        self._sock.sendall(b"z" + name.encode("ascii") + b"\0")
+        return self._read_reply(request_id)
+
+    def begin_instream(self) -> int:
+        request_id = next(self._ids)
+        self._sock.sendall(b"zINSTREAM\0")
+        return request_id
+
+    def send_chunk(self, chunk: bytes) -> None:
+        self._sock.sendall(struct.pack(">I", len(chunk)))
+        self._sock.sendall(chunk)
+
+    def end_instream(self, request_id: int) -> str:
+        self._sock.sendall(struct.pack(">I", 0))
+        return self._read_reply(request_id)
+
+    def close(self) -> None:
+        try:
+            self._sock.sendall(b"zEND\0")
+        except OSError:
+            pass
+        self._sock.close()
+
+
+class ClamavPool:
+    """Keeps IDSESSION connections alive between scans and caps concurrent sessions below clamd MaxThreads."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._idle: deque[ClamavSession] = deque()
+        self._semaphore: threading.BoundedSemaphore | None = None
+        self.limit = 0
+        self.in_use = 0
+        self.waiting = 0
+        self.connections_opened = 0
+        self.scans = 0
+        self.errors = 0
+        self.busy_rejections = 0
+        self._wait_ms_total = 0.0
+        self.wait_ms_max = 0.0
+        self._scan_ms_total = 0.0
+        self.scan_ms_max = 0.0
+        self._acquired = 0
+
+    def _gate(self) -> threading.BoundedSemaphore:
+        with self._lock:
+            if self._semaphore is None:
+                self.limit = max(1, int(getattr(settings, "CLAMAV_MAX_SESSIONS", 4) or 1))
+                self._semaphore = threading.BoundedSemaphore(self.limit)
+            return self._semaphore
+
+    def _connect(self) -> ClamavSession:
+        host = str(getattr(settings, "CLAMAV_HOST", "clamav") or "clamav").strip()
+        port = int(getattr(settings, "CLAMAV_PORT", 3310) or 3310)
+        timeout = float(getattr(settings, "CLAMAV_TIMEOUT_SECONDS", 20) or 20)
+        session = ClamavSession(host, port, timeout)
+        with self._lock:
+            self.connections_opened += 1
+        return session
+
+    def _checkout(self) -> ClamavSession:
+        max_idle = max(0.0, float(getattr(settings, "CLAMAV_POOL_IDLE_SECONDS", 25) or 0))
+        while True:
+            with self._lock:
+                session = self._idle.pop() if self._idle else None
+            if session is None:
+                return self._connect()
+            idle_for = time.monotonic() - session.last_used
+            if idle_for > max_idle:
+                session.close()
+                continue
+            if idle_for > _PING_AFTER_IDLE_SECONDS:
+                try:
+                    if session.command("PING").strip() != "PONG":
+                        raise ValueError("PING")
+                except (OSError, ValueError):
+                    session.close()
+                    continue
+            return session
+
+    def acquire(self, *, timeout: float | None = None) -> ClamavSession:
+        """Wait up to `timeout` seconds (CLAMAV_QUEUE_TIMEOUT_SECONDS by default; 0 does not wait) for a slot."""
+        gate = self._gate()
+        if timeout is None:
+            timeout = float(getattr(settings, "CLAMAV_QUEUE_TIMEOUT_SECONDS", 60) or 0)
+        queue_timeout = max(0.0, float(timeout))
+        started_at = perf_counter()
+        with self._lock:
+            self.waiting += 1
+        acquired = gate.acquire(timeout=queue_timeout)
+        wait_ms = (perf_counter() - started_at) * 1000.0
+        with self._lock:
+            self.waiting -= 1
+            if not acquired:
+                self.busy_rejections += 1
+            else:
+                self.in_use += 1
+                self._acquired += 1
+                self._wait_ms_total += wait_ms
+                self.wait_ms_max = max(self.wait_ms_max, wait_ms)
+        if not acquired:
+            raise ClamavBusyError("ClamAV перегружен: нет свободной сессии")
+        try:
+            return self._checkout()
+        except Exception:
+            self._release_slot(failed=True)
+            raise
+
+    def _release_slot(self, *, failed: bool, scan_ms: float | None = None) -> None:
+        with self._lock:
+            self.in_use -= 1
+            if failed:
+                self.errors += 1
+            if scan_ms is not None:
+                self.scans += 1
+                self._scan_ms_total += scan_ms
+                self.scan_ms_max = max(self.scan_ms_max, scan_ms)
+        self._gate().release()
+
+    def release(self, session: ClamavSession, *, broken: bool, scan_ms: float | None = None) -> None:
+        if broken:
+            session.close()
+        else:
+            with self._lock:
+                keep = len(self._idle) < self.limit
+                if keep:
+                    self._idle.append(session)
+            if not keep:
+                session.close()
+        self._release_slot(failed=broken, scan_ms=scan_ms)
+
+    def metrics(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "limit": self.limit or max(1, int(getattr(settings, "CLAMAV_MAX_SESSIONS", 4) or 1)),
+                "in_use": self.in_use,
+                "waiting": self.waiting,
+                "idle": len(self._idle),
+                "connections_opened": self.connections_opened,
+                "scans": self.scans,
+                "errors": self.errors,
+                "busy_rejections": self.busy_rejections,
+                "wait_ms_avg": round(self._wait_ms_total / self._acquired, 2) if self._acquired else 0.0,
+                "wait_ms_max": round(self.wait_ms_max, 2),
+                "scan_ms_avg": round(self._scan_ms_total / self.scans, 2) if self.scans else 0.0,
+                "scan_ms_max": round(self.scan_ms_max, 2),
+            }
+
+    def close_all(self) -> None:
+        with self._lock:
+            sessions = list(self._idle)
+            self._idle.clear()
+        for session in sessions:
+            session.close()
+
+
+clamav_pool = ClamavPool()
+
+_version_lock = threading.Lock()
+_version_cache: tuple[float, str | None] | None = None
+
+
+class ClamavInstream:
+    """INSTREAM scan on a pooled session; the slot is held from construction until close()."""
+
+    def __init__(self) -> None:
+        self._session: ClamavSession | None = clamav_pool.acquire()
+        self._broken = True
+        self._started_at = perf_counter()
+        try:
+            self._request_id = self._session.begin_instream()
+        except Exception:
+            self.close()
+            raise
+
+    def send(self, chunk: bytes) -> None:
+        self._session.send_chunk(chunk)
+
+    def verdict(self) -> tuple[bool, str | None]:
+        reply = self._session.end_instream(self._request_id)
+        result = parse_scan_reply(reply)
+        self._broken = False
+        return result
+
+    def close(self) -> None:
+        if self._session is None:
+            return
+        session, self._session = self._session, None
+        clamav_pool.release(session, broken=self._broken, scan_ms=(perf_counter() - self._started_at) * 1000.0)
+
+
+def _session_command(name: str, *, timeout: float | None = None) -> str:
+    session = clamav_pool.acquire(timeout=timeout)
+    broken = True
+    try:
+        reply = session.command(name)
+        broken = False
+        return reply
+    finally:
+        clamav_pool.release(session, broken=broken)
+
+
+def clamav_signature_version() -> str | None:
+    """clamd engine and signature-database version, refreshed at most once a minute (failures included)."""
+    global _version_cache
+    now = time.monotonic()
+    with _version_lock:
+        cached = _version_cache
+    if cached is not None and now - cached[0] < _SIGNATURE_VERSION_TTL_SECONDS:
+        return cached[1]
+    try:
+        version = parse_signature_version(_session_command("VERSION"))
+    except (OSError, ValueError, ClamavBusyError):
+        version = None
+    with _version_lock:
+        _version_cache = (now, version)
+    return version
+
+
+def clamav_health() -> dict[str, Any]:
+    enabled = bool(getattr(settings, "CLAMAV_ENABLED", False))
+    metrics = clamav_pool.metrics()
+    if not enabled:
+        return {"status": "disabled", "enabled": False, "version": None, "ping_ms": None, "pool": metrics, "issues": []}
+    issues: list[str] = []
+    version = None
+    ping_ms = None
+    try:
+        # Health probes never queue behind scans: a saturated pool is reported, not waited out.
+        started_at = perf_counter()
+        if _session_command("PING", timeout=0).strip() != "PONG":
+            raise ValueError("PING")
+        ping_ms = round((perf_counter() - started_at) * 1000.0, 2)
+        version = parse_signature_version(_session_command("VERSION", timeout=0))
+    except ClamavBusyError:
+        issues.append("Все сессии ClamAV заняты")
+    except (OSError, ValueError) as exc:
+        issues.append(f"ClamAV недоступен: {exc.__class__.__name__}")
+    if metrics["waiting"]:
+        issues.append(f"В очереди на проверку: {metrics['waiting']}")
+    return {
+        "status": "ok" if ping_ms is not None else "degraded",
+        "enabled": True,
+        "version": version,
+        "ping_ms": ping_ms,
+        "pool": clamav_pool.metrics(),
+        "issues": issues,
+    }
+
+
+def reset_clamav_for_tests() -> None:
+    global clamav_pool, _version_cache
+    clamav_pool.close_all()
+    clamav_pool = ClamavPool()
+    with _version_lock:
+        _version_cache = None
@@ -13,6 +13,7 @@ from app.models.invoice import Invoice
 from app.models.message import Message
 from app.models.request import Request
 from app.services.attachment_scan import SCAN_STATUS_CLEAN
+from app.services.chat_events import CHAT_EVENT_MESSAGE, queue_chat_event
 from app.services.invoice_crypto import decrypt_requisites
 from app.services.invoice_pdf import build_invoice_pdf_bytes
 from app.services.notifications import EVENT_MESSAGE as NOTIFICATION_EVENT_MESSAGE, notify_request_event
@@ -163,6 +164,7 @@ def create_invoice_chat_message_with_attachment(
         responsible=safe_responsible,
     )
     db.add(attachment)
+    queue_chat_event(db, request.id, CHAT_EVENT_MESSAGE)
 
     _register_chat_participant(request, actor_admin_user_id)
     mark_unread_for_client(request, EVENT_MESSAGE)
@@ -0,0 +1,329 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+from typing import Any, Iterable
+from uuid import UUID
+
+from sqlalchemy import delete, exists, insert, inspect as sa_inspect, select, update
+from sqlalchemy import event as sa_event
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.admin_user import AdminUser
+from app.models.kanban_card import KanbanCard
+from app.models.request import Request
+from app.models.status_history import StatusHistory
+from app.models.topic_status_transition import TopicStatusTransition
+from app.services.reference_data import ReferenceData, TransitionRef, get_reference_data
+from app.services.status_flow import bulk_write_values, transition_topic_codes
+
+CASE_DEADLINE_KEYS = (
+    "deadline_at",
+    "deadline",
+    "due_date",
+    "due_at",
+    "case_deadline",
+    "court_date",
+    "hearing_date",
+    "next_action_deadline",
+)
+# Request columns a card is derived from; other request writes (unread flags, chat counters) leave it alone.
+_CARD_SOURCE_FIELDS = (
+    "status_code",
+    "topic_code",
+    "assigned_lawyer_id",
+    "important_date_at",
+    "extra_fields",
+    "status_entered_at",
+    "created_at",
+)
+_CHUNK_SIZE = 500
+
+
+def _as_utc(value: datetime | None) -> datetime | None:
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+def _parse_datetime(value: object) -> datetime | None:
+    if isinstance(value, datetime):
+        return _as_utc(value)
+    text = str(value or "").strip()
+    if not text:
+        return None
+    if text.endswith("Z"):
+        text = text[:-1] + "+00:00"
+    try:
+        return _as_utc(datetime.fromisoformat(text))
+    except ValueError:
+        return None
+
+
+def extract_case_deadline(extra_fields: object) -> datetime | None:
+    if not isinstance(extra_fields, dict):
+        return None
+    for key in CASE_DEADLINE_KEYS:
+        parsed = _parse_datetime(extra_fields.get(key))
+        if parsed:
+            return parsed
+    return None
+
+
+def _chunks(values: list[Any]) -> Iterable[list[Any]]:
+    for start in range(0, len(values), _CHUNK_SIZE):
+        yield values[start : start + _CHUNK_SIZE]
+
+
+def _as_uuid(value: Any) -> UUID | None:
+    if isinstance(value, UUID):
+        return value
+    try:
+        return UUID(str(value))
+    except (TypeError, ValueError):
+        return None
+
+
+def lawyer_display_name(row: Any) -> str:
+    return str(row.name or row.email or row.id)
+
+
+def _incoming_rule(
+    reference: ReferenceData, topic_code: str, previous_status: str | None, status_code: str
+) -> TransitionRef | None:
+    rules = reference.transitions_for_topic(topic_code)
+    if previous_status:
+        for rule in rules:
+            if rule.from_status == previous_status and rule.to_status == status_code:
+                return rule
+    for rule in rules:
+        if rule.to_status == status_code:
+            return rule
+    return None
+
+
+def _latest_status_entries(db: Session, rows: list[Any]) -> dict[Any, tuple[str | None, datetime | None]]:
+    current = {row.id: str(row.status_code or "").strip() for row in rows}
+    history = db.connection().execute(
+        select(StatusHistory.request_id, StatusHistory.from_status, StatusHistory.to_status, StatusHistory.created_at)
+        .where(StatusHistory.request_id.in_(list(current)))
+        .order_by(StatusHistory.request_id.asc(), StatusHistory.created_at.desc())
+    ).all()
+    entries: dict[Any, tuple[str | None, datetime | None]] = {}
+    for request_id, from_status, to_status, created_at in history:
+        if request_id in entries or str(to_status or "").strip() != current.get(request_id):
+            continue
+        entries[request_id] = (str(from_status or "").strip() or None, created_at)
+    return entries
+
+
+def _lawyer_names(db: Session, rows: list[Any]) -> dict[str, str]:
+    lawyer_ids = {_as_uuid(row.assigned_lawyer_id) for row in rows if row.assigned_lawyer_id}
+    lawyer_ids.discard(None)
+    if not lawyer_ids:
+        return {}
+    lawyers = db.connection().execute(
+        select(AdminUser.id, AdminUser.name, AdminUser.email).where(AdminUser.id.in_(list(lawyer_ids)))
+    ).all()
+    return {str(row.id): lawyer_display_name(row) for row in lawyers}
+
+
+def _card_values(
+    row: Any,
+    entry: tuple[str | None, datetime | None] | None,
+    lawyer_names: dict[str, str],
+    reference: ReferenceData,
+    now: datetime,
+) -> dict[str, Any]:
+    status_code = str(row.status_code or "").strip()
+    previous_status, entered_at = entry or (None, None)
+    entered_at = _as_utc(entered_at or row.status_entered_at or row.updated_at or row.created_at)
+    rule = _incoming_rule(reference, str(row.topic_code or "").strip(), previous_status, status_code)
+    sla_deadline = None
+    if rule is not None and rule.sla_hours is not None and int(rule.sla_hours) > 0 and entered_at is not None:
+        sla_deadline = entered_at + timedelta(hours=int(rule.sla_hours))
+    case_deadline = _as_utc(row.important_date_at) or extract_case_deadline(row.extra_fields)
+    assigned_id = str(row.assigned_lawyer_id or "").strip() or None
+    lawyer_name = lawyer_names.get(assigned_id, assigned_id) if assigned_id else None
+    return {
+        "request_id": row.id,
+        "created_at": _as_utc(row.created_at) or now,
+        "previous_status_code": previous_status,
+        "status_entered_at": entered_at,
+        "sla_deadline_at": sla_deadline,
+        "case_deadline_at": case_deadline,
+        "deadline_at": sla_deadline or case_deadline,
+        "assigned_lawyer_name": lawyer_name,
+        # Python-side casefold keeps the lawyer sort identical on SQLite (ASCII-only lower()) and PostgreSQL.
+        "assigned_lawyer_sort_key": lawyer_name.casefold() if lawyer_name else None,
+        "refreshed_at": now,
+    }
+
+
+def refresh_kanban_cards(db: Session, request_ids: Iterable[Any]) -> int:
+    ids = list({request_uuid for request_uuid in (_as_uuid(value) for value in request_ids) if request_uuid})
+    if not ids:
+        return 0
+    reference = get_reference_data(db)
+    now = datetime.now(timezone.utc)
+    conn = db.connection()
+    written = 0
+    for chunk in _chunks(ids):
+        rows = conn.execute(
+            select(
+                Request.id,
+                Request.status_code,
+                Request.topic_code,
+                Request.assigned_lawyer_id,
+                Request.important_date_at,
+                Request.extra_fields,
+                Request.status_entered_at,
+                Request.created_at,
+                Request.updated_at,
+            ).where(Request.id.in_(chunk))
+        ).all()
+        entries = _latest_status_entries(db, rows) if rows else {}
+        names = _lawyer_names(db, rows)
+        values = [_card_values(row, entries.get(row.id), names, reference, now) for row in rows]
+        gone = set(chunk) - {row.id for row in rows}
+        if gone:
+            conn.execute(delete(KanbanCard).where(KanbanCard.request_id.in_(list(gone))))
+        if values:
+            _upsert_cards(conn, values)
+        written += len(values)
+    return written
+
+
+def _upsert_cards(conn, values: list[dict[str, Any]]) -> None:
+    # Concurrent refreshes of the same request both land instead of racing a delete-then-insert.
+    table = KanbanCard.__table__
+    dialect_insert = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}.get(conn.dialect.name)
+    if dialect_insert is None:
+        conn.execute(delete(KanbanCard).where(KanbanCard.request_id.in_([row["request_id"] for row in values])))
+        conn.execute(insert(KanbanCard), values)
+        return
+    stmt = dialect_insert(table).values(values)
+    conn.execute(
+        stmt.on_conflict_do_update(
+            index_elements=[table.c.request_id],
+            set_={column.name: stmt.excluded[column.name] for column in table.columns if not column.primary_key},
+        )
+    )
+
+
+def refresh_pending_kanban_cards(db: Session, *, batch_size: int | None = None) -> dict[str, int]:
+    """Build cards for requests that have none and rebuild cards marked stale by config writes; commits per batch."""
+    size = max(1, int(batch_size or settings.KANBAN_CARD_REBUILD_BATCH_SIZE or 500))
+    pending = {
+        "built": select(Request.id)
+        .outerjoin(KanbanCard, KanbanCard.request_id == Request.id)
+        .where(KanbanCard.request_id.is_(None)),
+        "refreshed": select(KanbanCard.request_id).where(KanbanCard.refreshed_at.is_(None)),
+    }
+    counts = {name: 0 for name in pending}
+    for name, query in pending.items():
+        while True:
+            ids = db.execute(query.limit(size)).scalars().all()
+            if ids:
+                counts[name] += refresh_kanban_cards(db, ids)
+                db.commit()
+            if len(ids) < size:
+                break
+    return counts
+
+
+def reconcile_kanban_cards(db: Session, *, batch_size: int | None = None) -> dict[str, int]:
+    size = max(1, int(batch_size or settings.KANBAN_CARD_REBUILD_BATCH_SIZE or 500))
+    orphaned = db.execute(
+        delete(KanbanCard).where(~exists().where(Request.id == KanbanCard.request_id))
+    ).rowcount or 0
+    db.commit()
+    refreshed = 0
+    last_id = None
+    while True:
+        query = select(Request.id).order_by(Request.id.asc()).limit(size)
+        if last_id is not None:
+            query = query.where(Request.id > last_id)
+        ids = db.execute(query).scalars().all()
+        if not ids:
+            break
+        refreshed += refresh_kanban_cards(db, ids)
+        db.commit()
+        last_id = ids[-1]
+    return {"orphaned_removed": int(orphaned), "refreshed": refreshed}
+
+
+def _has_changes(row: Any, fields: Iterable[str]) -> bool:
+    attrs = sa_inspect(row).attrs
+    return any(attrs[name].history.has_changes() for name in fields)
+
+
+@sa_event.listens_for(Session, "after_flush")
+def _refresh_kanban_cards_after_flush(session: Session, flush_context) -> None:
+    request_ids: set[Any] = set()
+    deleted_ids: set[Any] = set()
+    topics: set[str] = set()
+    lawyer_names: dict[str, str] = {}
+    for row in session.new:
+        if isinstance(row, Request):
+            request_ids.add(row.id)
+        elif isinstance(row, StatusHistory):
+            request_ids.add(row.request_id)
+        elif isinstance(row, TopicStatusTransition):
+            topics |= transition_topic_codes(row)
+    for row in session.dirty:
+        if isinstance(row, Request) and _has_changes(row, _CARD_SOURCE_FIELDS):
+            request_ids.add(row.id)
+        elif isinstance(row, AdminUser) and _has_changes(row, ("name", "email")):
+            lawyer_names[str(row.id)] = lawyer_display_name(row)
+        elif isinstance(row, TopicStatusTransition) and session.is_modified(row, include_collections=False):
+            topics |= transition_topic_codes(row)
+    for row in session.deleted:
+        if isinstance(row, Request):
+            deleted_ids.add(row.id)
+        elif isinstance(row, StatusHistory):
+            request_ids.add(row.request_id)
+        elif isinstance(row, AdminUser):
+            lawyer_names[str(row.id)] = str(row.id)
+        elif isinstance(row, TopicStatusTransition):
+            topics |= transition_topic_codes(row)
+    if not (request_ids or deleted_ids or topics or lawyer_names):
+        return
+    conn = session.connection()
+    if topics:
+        _mark_topic_cards_stale(conn, topics)
+    if deleted_ids:
+        conn.execute(delete(KanbanCard).where(KanbanCard.request_id.in_(list(deleted_ids))))
+    refresh_kanban_cards(session, request_ids - deleted_ids)
+    for lawyer_id, name in lawyer_names.items():
+        conn.execute(
+            update(KanbanCard)
+            .where(KanbanCard.request_id.in_(select(Request.id).where(Request.assigned_lawyer_id == lawyer_id)))
+            .values(assigned_lawyer_name=name, assigned_lawyer_sort_key=name.casefold())
+        )
+
+
+def _mark_topic_cards_stale(conn, topics: set[str] | None) -> None:
+    # SLA deadlines of the whole topic may move; the refresh worker rebuilds marked cards off the request path.
+    statement = update(KanbanCard).values(refreshed_at=None)
+    if topics is not None:
+        statement = statement.where(
+            KanbanCard.request_id.in_(select(Request.id).where(Request.topic_code.in_(sorted(topics))))
+        )
+    conn.execute(statement)
+
+
+@sa_event.listens_for(Session, "do_orm_execute")
+def _mark_kanban_cards_stale_on_bulk_transition_writes(orm_execute_state) -> None:
+    if not (orm_execute_state.is_update or orm_execute_state.is_delete or orm_execute_state.is_insert):
+        return
+    mapper = orm_execute_state.bind_mapper
+    if mapper is None or not issubclass(mapper.class_, TopicStatusTransition):
+        return
+    _mark_topic_cards_stale(
+        orm_execute_state.session.connection(),
+        bulk_write_values(orm_execute_state, TopicStatusTransition.topic_code),
+    )
@@ -0,0 +1,244 @@
+from __future__ import annotations
+
+from collections import defaultdict
+from datetime import date, datetime, time, timezone
+from decimal import Decimal
+from typing import Any, Iterable, Mapping
+
+from sqlalchemy import delete, func, insert, select, update
+from sqlalchemy import event as sa_event
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from app.models.audit_log import AuditLog
+from app.models.lawyer_metric_rollup import LawyerMetricRollup
+from app.models.request import Request
+from app.models.status_history import StatusHistory
+from app.services.reference_data import terminal_status_codes
+
+PAID_STATUS_CODES = {"PAID", "ОПЛАЧЕНО"}
+
+METRIC_ASSIGNED = "assigned"
+METRIC_COMPLETED = "completed"
+METRIC_PAID_EVENTS = "paid_events"
+METRIC_PAID_GROSS = "paid_gross"
+
+_CHUNK_SIZE = 500
+
+# (lawyer_id, day, metric)
+RollupKey = tuple[str, date, str]
+
+
+def extract_assigned_lawyer_from_audit(diff: dict | None, action: str | None) -> str | None:
+    if not isinstance(diff, dict):
+        return None
+    action_code = str(action or "").upper()
+    if action_code == "MANUAL_CLAIM":
+        value = diff.get("assigned_lawyer_id")
+        return str(value).strip() if value else None
+    if action_code == "MANUAL_REASSIGN":
+        value = diff.get("to_lawyer_id")
+        return str(value).strip() if value else None
+    if action_code in {"CREATE", "UPDATE"}:
+        after = diff.get("after")
+        before = diff.get("before")
+        if action_code == "UPDATE":
+            if not isinstance(after, dict) or not isinstance(before, dict):
+                return None
+            prev_value = str(before.get("assigned_lawyer_id") or "").strip()
+            next_value = str(after.get("assigned_lawyer_id") or "").strip()
+            if not next_value or next_value == prev_value:
+                return None
+            return next_value
+        if isinstance(after, dict):
+            value = str(after.get("assigned_lawyer_id") or "").strip()
+            return value or None
+    return None
+
+
+def _event_day(value: datetime | None) -> date:
+    if value is None:
+        return datetime.now(timezone.utc).date()
+    if value.tzinfo is None:
+        return value.date()
+    return value.astimezone(timezone.utc).date()
+
+
+def _day_start(day: date) -> datetime:
+    return datetime.combine(day, time.min, tzinfo=timezone.utc)
+
+
+def _amount(value: Any) -> Decimal:
+    if value is None:
+        return Decimal("0")
+    try:
+        return Decimal(str(value))
+    except ArithmeticError:
+        return Decimal("0")
+
+
+def _terminal_codes(db: Session) -> set[str]:
+    return {code.upper() for code in terminal_status_codes(db)}
+
+
+def _status_deltas(
+    deltas: dict[RollupKey, Decimal],
+    *,
+    lawyer_id: str | None,
+    to_status: str | None,
+    created_at: datetime | None,
+    invoice_amount: Any,
+    terminal_codes: set[str],
+) -> None:
+    lawyer = str(lawyer_id or "").strip()
+    if not lawyer:
+        return
+    code = str(to_status or "").strip().upper()
+    day = _event_day(created_at)
+    if code in PAID_STATUS_CODES:
+        deltas[(lawyer, day, METRIC_PAID_EVENTS)] += 1
+        deltas[(lawyer, day, METRIC_PAID_GROSS)] += _amount(invoice_amount)
+    if code in terminal_codes:
+        deltas[(lawyer, day, METRIC_COMPLETED)] += 1
+
+
+def _audit_deltas(deltas: dict[RollupKey, Decimal], *, action: str | None, diff: Any, created_at: datetime | None) -> None:
+    lawyer = extract_assigned_lawyer_from_audit(diff, action)
+    if lawyer:
+        deltas[(lawyer, _event_day(created_at), METRIC_ASSIGNED)] += 1
+
+
+def _chunks(values: list[Any]) -> Iterable[list[Any]]:
+    for start in range(0, len(values), _CHUNK_SIZE):
+        yield values[start : start + _CHUNK_SIZE]
+
+
+def apply_rollup_deltas(db: Session, deltas: Mapping[RollupKey, Any]) -> None:
+    """Add per-(lawyer, day, metric) deltas with relative upserts so concurrent writers never lose increments."""
+    pending = {key: _amount(value) for key, value in deltas.items() if _amount(value)}
+    if not pending:
+        return
+    table = LawyerMetricRollup.__table__
+    conn = db.connection()
+    now = datetime.now(timezone.utc)
+    rows = [
+        {"lawyer_id": lawyer_id, "day": day, "metric": metric, "value": value, "updated_at": now}
+        for (lawyer_id, day, metric), value in pending.items()
+    ]
+    dialect_insert = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}.get(conn.dialect.name)
+    for chunk in _chunks(rows):
+        if dialect_insert is not None:
+            stmt = dialect_insert(table).values(chunk)
+            conn.execute(
+                stmt.on_conflict_do_update(
+                    index_elements=[table.c.lawyer_id, table.c.day, table.c.metric],
+                    set_={"value": table.c.value + stmt.excluded.value, "updated_at": now},
+                )
+            )
+            continue
+        for row in chunk:
+            updated = conn.execute(
+                update(table)
+                .where(
+                    table.c.lawyer_id == row["lawyer_id"],
+                    table.c.day == row["day"],
+                    table.c.metric == row["metric"],
+                )
+                .values(value=table.c.value + row["value"], updated_at=now)
+            ).rowcount
+            if not updated:
+                conn.execute(insert(table).values(**row))
+
+
+def rebuild_lawyer_metric_rollups(db: Session, *, since: date | None = None) -> dict[str, int]:
+    """Recompute rollups from status history and the audit log (from `since`, or everything) and commit."""
+    conn = db.connection()
+    since_at = _day_start(since) if since is not None else None
+    deleted = conn.execute(
+        delete(LawyerMetricRollup).where(LawyerMetricRollup.day >= since) if since is not None else delete(LawyerMetricRollup)
+    ).rowcount
+    terminal_codes = _terminal_codes(db)
+    deltas: dict[RollupKey, Decimal] = defaultdict(Decimal)
+
+    # Backfill attributes past events to the request's current lawyer and invoice; live writes use the values at event time.
+    status_query = (
+        select(Request.assigned_lawyer_id, StatusHistory.to_status, StatusHistory.created_at, Request.invoice_amount)
+        .join(Request, Request.id == StatusHistory.request_id)
+        .where(Request.assigned_lawyer_id.is_not(None))
+    )
+    if since_at is not None:
+        status_query = status_query.where(StatusHistory.created_at >= since_at)
+    status_events = 0
+    for lawyer_id, to_status, created_at, invoice_amount in conn.execute(status_query.execution_options(yield_per=_CHUNK_SIZE)):
+        status_events += 1
+        _status_deltas(
+            deltas,
+            lawyer_id=lawyer_id,
+            to_status=to_status,
+            created_at=created_at,
+            invoice_amount=invoice_amount,
+            terminal_codes=terminal_codes,
+        )
+
+    audit_query = select(AuditLog.action, AuditLog.diff, AuditLog.created_at).where(AuditLog.entity == "requests")
+    if since_at is not None:
+        audit_query = audit_query.where(AuditLog.created_at >= since_at)
+    audit_events = 0
+    for action, diff, created_at in conn.execute(audit_query.execution_options(yield_per=_CHUNK_SIZE)):
+        audit_events += 1
+        _audit_deltas(deltas, action=action, diff=diff, created_at=created_at)
+
+    apply_rollup_deltas(db, deltas)
+    db.commit()
+    return {
+        "deleted": int(deleted or 0),
+        "status_events": status_events,
+        "audit_events": audit_events,
+        "rollups": len([value for value in deltas.values() if value]),
+    }
+
+
+def lawyer_rollup_totals(db: Session, *, start: date, end: date) -> dict[str, dict[str, float]]:
+    """Summed metrics per lawyer for days in [start, end)."""
+    rows = (
+        db.query(LawyerMetricRollup.lawyer_id, LawyerMetricRollup.metric, func.sum(LawyerMetricRollup.value))
+        .filter(LawyerMetricRollup.day >= start, LawyerMetricRollup.day < end)
+        .group_by(LawyerMetricRollup.lawyer_id, LawyerMetricRollup.metric)
+        .all()
+    )
+    totals: dict[str, dict[str, float]] = {}
+    for lawyer_id, metric, value in rows:
+        totals.setdefault(str(lawyer_id), {})[str(metric)] = float(value or 0)
+    return totals
+
+
+@sa_event.listens_for(Session, "after_flush")
+def _record_lawyer_metrics_after_flush(session: Session, flush_context) -> None:
+    history_rows = [row for row in session.new if isinstance(row, StatusHistory)]
+    audit_rows = [row for row in session.new if isinstance(row, AuditLog) and row.entity == "requests"]
+    if not history_rows and not audit_rows:
+        return
+    deltas: dict[RollupKey, Decimal] = defaultdict(Decimal)
+    for row in audit_rows:
+        _audit_deltas(deltas, action=row.action, diff=row.diff, created_at=row.created_at)
+    if history_rows:
+        conn = session.connection()
+        request_ids = list({row.request_id for row in history_rows})
+        requests = {
+            request_id: (lawyer_id, invoice_amount)
+            for request_id, lawyer_id, invoice_amount in conn.execute(
+                select(Request.id, Request.assigned_lawyer_id, Request.invoice_amount).where(Request.id.in_(request_ids))
+            )
+        }
+        terminal_codes = _terminal_codes(session)
+        for row in history_rows:
+            lawyer_id, invoice_amount = requests.get(row.request_id, (None, None))
+            _status_deltas(
+                deltas,
+                lawyer_id=lawyer_id,
+                to_status=row.to_status,
+                created_at=row.created_at,
+                invoice_amount=invoice_amount,
+                terminal_codes=terminal_codes,
+            )
+    apply_rollup_deltas(session, deltas)
@@ -0,0 +1,166 @@
+from __future__ import annotations
+
+import uuid
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Any, Iterable, Mapping
+
+from sqlalchemy import delete, func, inspect as sa_inspect, insert, select, update
+from sqlalchemy import event as sa_event
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from app.models.notification import Notification
+from app.models.notification_unread_counter import NotificationUnreadCounter
+
+_KEY_FIELDS = ("recipient_type", "recipient_admin_user_id", "recipient_track_number", "request_id", "event_type")
+_CHUNK_SIZE = 500
+
+# (recipient_type, recipient_admin_user_id, recipient_track_number, request_id, event_type)
+CounterKey = tuple[str, uuid.UUID | None, str | None, uuid.UUID | None, str]
+
+
+def _as_uuid(value: Any) -> uuid.UUID | None:
+    if value is None or isinstance(value, uuid.UUID):
+        return value
+    try:
+        return uuid.UUID(str(value))
+    except (TypeError, ValueError):
+        return None
+
+
+def counter_key(values: Mapping[str, Any] | Iterable[Any]) -> CounterKey:
+    if isinstance(values, Mapping):
+        values = [values.get(name) for name in _KEY_FIELDS]
+    recipient_type, admin_id, track, request_id, event_type = values
+    return (
+        str(recipient_type or "").strip().upper(),
+        _as_uuid(admin_id),
+        str(track or "").strip().upper() or None,
+        _as_uuid(request_id),
+        str(event_type or "").strip().upper(),
+    )
+
+
+def _key_text(key: CounterKey) -> str:
+    recipient_type, admin_id, track, request_id, event_type = key
+    recipient = str(admin_id) if admin_id is not None else (track or "")
+    return f"{recipient_type}|{recipient}|{request_id or ''}|{event_type}"
+
+
+def _chunks(values: list[Any]) -> Iterable[list[Any]]:
+    for start in range(0, len(values), _CHUNK_SIZE):
+        yield values[start : start + _CHUNK_SIZE]
+
+
+def _upsert_statement(conn, rows: list[dict[str, Any]], now: datetime):
+    table = NotificationUnreadCounter.__table__
+    dialect_insert = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}.get(conn.dialect.name)
+    if dialect_insert is None:
+        return None
+    stmt = dialect_insert(table).values(rows)
+    return stmt.on_conflict_do_update(
+        index_elements=[table.c.counter_key],
+        set_={"unread_count": table.c.unread_count + stmt.excluded.unread_count, "updated_at": now},
+    )
+
+
+def apply_unread_deltas(db: Session, deltas: Mapping[CounterKey, int]) -> None:
+    """Add signed per-key deltas with relative upserts; keys that drop to zero are removed."""
+    pending = {key: int(delta) for key, delta in deltas.items() if int(delta or 0) and key[0] and key[4]}
+    if not pending:
+        return
+    table = NotificationUnreadCounter.__table__
+    conn = db.connection()
+    now = datetime.now(timezone.utc)
+    rows = [
+        {
+            "counter_key": _key_text(key),
+            "recipient_type": key[0],
+            "recipient_admin_user_id": key[1],
+            "recipient_track_number": key[2],
+            "request_id": key[3],
+            "event_type": key[4],
+            "unread_count": delta,
+            "updated_at": now,
+        }
+        for key, delta in pending.items()
+    ]
+    for chunk in _chunks(rows):
+        stmt = _upsert_statement(conn, chunk, now)
+        if stmt is not None:
+            conn.execute(stmt)
+        else:
+            for row in chunk:
+                updated = conn.execute(
+                    update(table)
+                    .where(table.c.counter_key == row["counter_key"])
+                    .values(unread_count=table.c.unread_count + row["unread_count"], updated_at=now)
+                ).rowcount
+                if not updated:
+                    conn.execute(insert(table).values(**row))
+        conn.execute(
+            delete(table).where(
+                table.c.counter_key.in_([row["counter_key"] for row in chunk]),
+                table.c.unread_count <= 0,
+            )
+        )
+
+
+def record_unread_rows(db: Session, rows: Iterable[Any], *, delta: int) -> None:
+    counts: Counter = Counter()
+    for row in rows:
+        counts[counter_key(row if isinstance(row, Mapping) else tuple(row))] += delta
+    apply_unread_deltas(db, counts)
+
+
+def _committed_value(row: Any, name: str) -> Any:
+    history = sa_inspect(row).attrs[name].history
+    if history.deleted:
+        return history.deleted[0]
+    return getattr(row, name)
+
+
+def _committed_key(row: Any) -> CounterKey:
+    return counter_key([_committed_value(row, name) for name in _KEY_FIELDS])
+
+
+def _current_key(row: Any) -> CounterKey:
+    return counter_key([getattr(row, name, None) for name in _KEY_FIELDS])
+
+
+@sa_event.listens_for(Session, "after_flush")
+def _record_notification_counters_after_flush(session: Session, flush_context) -> None:
+    counts: Counter = Counter()
+    for row in session.new:
+        if isinstance(row, Notification) and not row.is_read:
+            counts[_current_key(row)] += 1
+    for row in session.dirty:
+        if not isinstance(row, Notification) or not session.is_modified(row, include_collections=False):
+            continue
+        if not _committed_value(row, "is_read"):
+            counts[_committed_key(row)] -= 1
+        if not row.is_read:
+            counts[_current_key(row)] += 1
+    for row in session.deleted:
+        if isinstance(row, Notification) and not _committed_value(row, "is_read"):
+            counts[_committed_key(row)] -= 1
+    if any(counts.values()):
+        apply_unread_deltas(session, counts)
+
+
+@sa_event.listens_for(Session, "do_orm_execute")
+def _record_notification_counters_on_bulk_delete(orm_execute_state) -> None:
+    if not orm_execute_state.is_delete:
+        return
+    mapper = orm_execute_state.bind_mapper
+    if mapper is None or not issubclass(mapper.class_, Notification):
+        return
+    columns = [getattr(Notification, name) for name in _KEY_FIELDS]
+    query = select(*columns, func.count()).where(Notification.is_read.is_(False)).group_by(*columns)
+    criteria = orm_execute_state.statement.whereclause
+    if criteria is not None:
+        query = query.where(criteria)
+    session = orm_execute_state.session
+    rows = session.connection().execute(query).all()
+    apply_unread_deltas(session, {counter_key(row[:5]): -int(row[5] or 0) for row in rows})
@@ -4,14 +4,17 @@ import uuid
 from datetime import datetime, timezone
 from typing import Any
 
-from sqlalchemy import and_, func
+from sqlalchemy import and_, event as sa_event, func, insert, select, text, update
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.orm import Session
 
 from app.models.admin_user import AdminUser
 from app.models.notification import Notification
+from app.models.notification_unread_counter import NotificationUnreadCounter
 from app.models.request import Request
-from app.services.telegram_notify import send_telegram_message
+from app.services.notification_counters import apply_unread_deltas, counter_key, record_unread_rows
+from app.services.telegram_notify import enqueue_telegram_message
 
 RECIPIENT_CLIENT = "CLIENT"
 RECIPIENT_ADMIN_USER = "ADMIN_USER"
@@ -34,6 +37,8 @@ _EVENT_LABELS = {
     EVENT_REASSIGNMENT: "Заявка переназначена",
 }
 CHAT_PARTICIPANT_ADMIN_IDS_KEY = "chat_participant_admin_ids"
+_BULK_CHUNK_SIZE = 500
+_ACTIVE_ADMIN_IDS_KEY = "notifications_active_admin_ids"
 
 
 def _as_utc_now() -> datetime:
@@ -72,26 +77,40 @@ def _telegram_text_for_event(event_type: str, request: Request, body: str | None
 
 
 def _active_admin_ids(db: Session, *, exclude_admin_user_id: uuid.UUID | None = None) -> list[uuid.UUID]:
-    try:
-        rows = (
-            db.query(AdminUser.id)
-            .filter(
-                AdminUser.role == "ADMIN",
-                AdminUser.is_active.is_(True),
+    # Memoized for the transaction so event fan-outs do not re-query admins per event.
+    cached = db.info.get(_ACTIVE_ADMIN_IDS_KEY)
+    if cached is None:
+        try:
+            rows = (
+                db.query(AdminUser.id)
+                .filter(
+                    AdminUser.role == "ADMIN",
+                    AdminUser.is_active.is_(True),
+                )
+                .all()
             )
-            .all()
-        )
-    except SQLAlchemyError:
-        # Some isolated tests bootstrap only a subset of tables.
-        return []
-    out: list[uuid.UUID] = []
-    for (admin_id,) in rows:
-        if not admin_id:
-            continue
-        if exclude_admin_user_id is not None and admin_id == exclude_admin_user_id:
-            continue
-        out.append(admin_id)
-    return out
+        except SQLAlchemyError:
+            # Some isolated tests bootstrap only a subset of tables.
+            return []
+        cached = [admin_id for (admin_id,) in rows if admin_id]
+        db.info[_ACTIVE_ADMIN_IDS_KEY] = cached
+    return [admin_id for admin_id in cached if exclude_admin_user_id is None or admin_id != exclude_admin_user_id]
+
+
+@sa_event.listens_for(Session, "after_flush")
+def _forget_active_admins_after_flush(session: Session, flush_context) -> None:
+    if _ACTIVE_ADMIN_IDS_KEY not in session.info:
+        return
+    for rows in (session.new, session.dirty, session.deleted):
+        if any(isinstance(row, AdminUser) for row in rows):
+            session.info.pop(_ACTIVE_ADMIN_IDS_KEY, None)
+            return
+
+
+@sa_event.listens_for(Session, "after_commit")
+@sa_event.listens_for(Session, "after_rollback")
+def _forget_active_admins_after_transaction(session: Session) -> None:
+    session.info.pop(_ACTIVE_ADMIN_IDS_KEY, None)
 
 
 def _chat_participant_admin_ids(request: Request) -> set[uuid.UUID]:
@@ -107,10 +126,9 @@ def _chat_participant_admin_ids(request: Request) -> set[uuid.UUID]:
     return out
 
 
-def _create_notification(
-    db: Session,
+def _notification_values(
     *,
-    request: Request,
+    request: Any,
     recipient_type: str,
     recipient_admin_user_id: uuid.UUID | None = None,
     recipient_track_number: str | None = None,
@@ -120,7 +138,7 @@ def _create_notification(
     payload: dict[str, Any] | None = None,
     responsible: str = "Система уведомлений",
     dedupe_key: str | None = None,
-) -> Notification | None:
+) -> dict[str, Any] | None:
     recipient_kind = str(recipient_type or "").strip().upper()
     if recipient_kind not in {RECIPIENT_CLIENT, RECIPIENT_ADMIN_USER}:
         return None
@@ -128,46 +146,84 @@ def _create_notification(
         return None
     if recipient_kind == RECIPIENT_ADMIN_USER and recipient_admin_user_id is None:
         return None
+    return {
+        "request_id": request.id,
+        "recipient_type": recipient_kind,
+        "recipient_admin_user_id": recipient_admin_user_id if recipient_kind == RECIPIENT_ADMIN_USER else None,
+        "recipient_track_number": (
+            _normalize_track(recipient_track_number) if recipient_kind == RECIPIENT_CLIENT else None
+        ),
+        "event_type": _normalized_event(event_type),
+        "title": str(title or "").strip() or _title_for_event(event_type, request),
+        "body": str(body or "").strip() or None,
+        "payload": dict(payload or {}),
+        "is_read": False,
+        "read_at": None,
+        "responsible": str(responsible or "").strip() or "Система уведомлений",
+        "dedupe_key": str(dedupe_key or "").strip() or None,
+    }
 
-    normalized_dedupe = str(dedupe_key or "").strip() or None
-    if normalized_dedupe:
-        exists = db.query(Notification.id).filter(Notification.dedupe_key == normalized_dedupe).first()
-        if exists is not None:
-            return None
-
-    row = Notification(
-        request_id=request.id,
-        recipient_type=recipient_kind,
-        recipient_admin_user_id=recipient_admin_user_id if recipient_kind == RECIPIENT_ADMIN_USER else None,
-        recipient_track_number=_normalize_track(recipient_track_number) if recipient_kind == RECIPIENT_CLIENT else None,
-        event_type=_normalized_event(event_type),
-        title=str(title or "").strip() or _title_for_event(event_type, request),
-        body=str(body or "").strip() or None,
-        payload=dict(payload or {}),
-        is_read=False,
-        read_at=None,
-        responsible=str(responsible or "").strip() or "Система уведомлений",
-        dedupe_key=normalized_dedupe,
-    )
-    db.add(row)
-    return row
 
+def _dialect_insert(db: Session):
+    return {"postgresql": postgresql.insert, "sqlite": sqlite.insert}.get(db.get_bind().dialect.name)
 
-def notify_request_event(
+
+def _insert_probing_dedupe_keys(db: Session, rows: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    keys = [row["dedupe_key"] for row in rows if row.get("dedupe_key")]
+    existing: set[str] = set()
+    for start in range(0, len(keys), _BULK_CHUNK_SIZE):
+        chunk = keys[start : start + _BULK_CHUNK_SIZE]
+        existing.update(key for (key,) in db.query(Notification.dedupe_key).filter(Notification.dedupe_key.in_(chunk)))
+    fresh = [row for row in rows if not row.get("dedupe_key") or row["dedupe_key"] not in existing]
+    if fresh:
+        db.execute(insert(Notification), fresh)
+    return fresh
+
+
+def create_notifications_bulk(db: Session, rows: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    """Insert prepared notification rows, skipping already used dedupe keys; returns the rows actually created."""
+    seen: set[str] = set()
+    unique_rows: list[dict[str, Any]] = []
+    for row in rows:
+        key = row.get("dedupe_key")
+        if key:
+            if key in seen:
+                continue
+            seen.add(key)
+        unique_rows.append(row)
+    if not unique_rows:
+        return []
+    dialect_insert = _dialect_insert(db)
+    if dialect_insert is None:
+        created = _insert_probing_dedupe_keys(db, unique_rows)
+    else:
+        created_keys: set[str] = set()
+        for start in range(0, len(unique_rows), _BULK_CHUNK_SIZE):
+            chunk = unique_rows[start : start + _BULK_CHUNK_SIZE]
+            # Conflicting dedupe keys are skipped by the database itself; RETURNING tells which rows landed.
+            stmt = (
+                dialect_insert(Notification)
+                .on_conflict_do_nothing(index_elements=[Notification.dedupe_key])
+                .returning(Notification.dedupe_key)
+            )
+            created_keys.update(key for (key,) in db.execute(stmt, chunk) if key)
+        created = [row for row in unique_rows if not row.get("dedupe_key") or row["dedupe_key"] in created_keys]
+    record_unread_rows(db, created, delta=1)
+    return created
+
+
+def _event_notification_rows(
     db: Session,
     *,
     request: Request,
-    event_type: str,
-    actor_role: str,
-    actor_admin_user_id: str | uuid.UUID | None = None,
-    body: str | None = None,
-    responsible: str = "Система уведомлений",
-    send_telegram: bool = True,
-    dedupe_prefix: str | None = None,
-) -> dict[str, int]:
-    event = _normalized_event(event_type)
-    actor = str(actor_role or "").strip().upper() or "SYSTEM"
-    actor_uuid = _as_uuid_or_none(actor_admin_user_id)
+    event: str,
+    actor: str,
+    actor_uuid: uuid.UUID | None,
+    body: str | None,
+    responsible: str,
+    dedupe_prefix: str | None,
+    admin_ids: list[uuid.UUID] | None = None,
+) -> list[dict[str, Any]]:
     title = _title_for_event(event, request)
     payload = {
         "request_id": str(request.id),
@@ -177,82 +233,45 @@ def notify_request_event(
         "event_type": event,
         "actor_role": actor,
     }
+    prefix = str(dedupe_prefix or "").strip()
+    rows: list[dict[str, Any]] = []
 
-    internal_created = 0
-    telegram_sent = 0
-
-    def _dedupe_key_for(recipient_marker: str) -> str | None:
-        prefix = str(dedupe_prefix or "").strip()
-        if not prefix:
-            return None
-        return f"{prefix}:{recipient_marker}"
-
-    def _notify_client() -> None:
-        nonlocal internal_created
-        track = _normalize_track(request.track_number)
-        if not track:
-            return
-        dedupe_key = _dedupe_key_for(f"client:{track}")
-        row = _create_notification(
-            db,
+    def _add(recipient_marker: str, recipient_type: str, **recipient: Any) -> None:
+        values = _notification_values(
             request=request,
-            recipient_type=RECIPIENT_CLIENT,
-            recipient_track_number=track,
+            recipient_type=recipient_type,
             event_type=event,
             title=title,
             body=body,
             payload=payload,
             responsible=responsible,
-            dedupe_key=dedupe_key,
+            dedupe_key=f"{prefix}:{recipient_marker}" if prefix else None,
+            **recipient,
         )
-        if row is not None:
-            internal_created += 1
+        if values is not None:
+            rows.append(values)
+
+    def _notify_client() -> None:
+        track = _normalize_track(request.track_number)
+        if track:
+            _add(f"client:{track}", RECIPIENT_CLIENT, recipient_track_number=track)
 
     def _notify_lawyer_if_any() -> None:
-        nonlocal internal_created
         lawyer_uuid = _as_uuid_or_none(request.assigned_lawyer_id)
         if lawyer_uuid is None:
             return
         if actor_uuid is not None and lawyer_uuid == actor_uuid:
             return
-        dedupe_key = _dedupe_key_for(f"lawyer:{lawyer_uuid}")
-        row = _create_notification(
-            db,
-            request=request,
-            recipient_type=RECIPIENT_ADMIN_USER,
-            recipient_admin_user_id=lawyer_uuid,
-            event_type=event,
-            title=title,
-            body=body,
-            payload=payload,
-            responsible=responsible,
-            dedupe_key=dedupe_key,
-        )
-        if row is not None:
-            internal_created += 1
+        _add(f"lawyer:{lawyer_uuid}", RECIPIENT_ADMIN_USER, recipient_admin_user_id=lawyer_uuid)
 
     def _notify_admins() -> None:
-        nonlocal internal_created
-        admin_ids = _active_admin_ids(db, exclude_admin_user_id=actor_uuid)
-        for admin_id in admin_ids:
-            dedupe_key = _dedupe_key_for(f"admin:{admin_id}")
-            row = _create_notification(
-                db,
-                request=request,
-                recipient_type=RECIPIENT_ADMIN_USER,
-                recipient_admin_user_id=admin_id,
-                event_type=event,
-                title=title,
-                body=body,
-                payload=payload,
-                responsible=responsible,
-                dedupe_key=dedupe_key,
-            )
-            if row is not None:
-                internal_created += 1
+        ids = admin_ids if admin_ids is not None else _active_admin_ids(db)
+        for admin_id in ids:
+            if actor_uuid is not None and admin_id == actor_uuid:
+                continue
+            _add(f"admin:{admin_id}", RECIPIENT_ADMIN_USER, recipient_admin_user_id=admin_id)
 
     def _notify_chat_participant_lawyers() -> None:
-        nonlocal internal_created
         participant_ids = _chat_participant_admin_ids(request)
         if not participant_ids:
             return
@@ -261,39 +280,23 @@ def notify_request_event(
         if not target_ids:
             return
         try:
-            rows = (
+            participants = (
                 db.query(AdminUser.id, AdminUser.role, AdminUser.is_active)
                 .filter(AdminUser.id.in_(target_ids))
                 .all()
             )
         except SQLAlchemyError:
             return
-        for admin_id, role, is_active in rows:
+        for admin_id, role, is_active in participants:
             if not admin_id or not bool(is_active):
                 continue
             role_code = str(role or "").strip().upper()
             if role_code not in {"LAWYER", "CURATOR"}:
                 continue
-            if assigned_lawyer_uuid is not None and admin_id != assigned_lawyer_uuid:
-                continue
-            if assigned_lawyer_uuid is not None and admin_id == assigned_lawyer_uuid:
-                # Assigned lawyer already gets notification via _notify_lawyer_if_any.
+            if assigned_lawyer_uuid is not None:
+                # Participants are a fallback for unassigned requests; the assigned lawyer is covered above.
                 continue
-            dedupe_key = _dedupe_key_for(f"participant:{admin_id}")
-            row = _create_notification(
-                db,
-                request=request,
-                recipient_type=RECIPIENT_ADMIN_USER,
-                recipient_admin_user_id=admin_id,
-                event_type=event,
-                title=title,
-                body=body,
-                payload=payload,
-                responsible=responsible,
-                dedupe_key=dedupe_key,
-            )
-            if row is not None:
-                internal_created += 1
+            _add(f"participant:{admin_id}", RECIPIENT_ADMIN_USER, recipient_admin_user_id=admin_id)
 
     if event in {EVENT_MESSAGE, EVENT_ATTACHMENT, EVENT_REQUEST_DATA}:
         if actor == "CLIENT":
@@ -316,13 +319,78 @@ def notify_request_event(
     else:
         _notify_client()
         _notify_lawyer_if_any()
+    return rows
+
 
+def notify_requests_sla_overdue(
+    db: Session,
+    items: list[tuple[Any, str]],
+    *,
+    responsible: str = "SLA сервис",
+    send_telegram: bool = True,
+) -> dict[str, int]:
+    """Fan SLA_OVERDUE out for many requests at once: one admin lookup, one insert per chunk."""
+    admin_ids = _active_admin_ids(db)
+    rows: list[dict[str, Any]] = []
+    for request, body in items:
+        rows.extend(
+            _event_notification_rows(
+                db,
+                request=request,
+                event=EVENT_SLA_OVERDUE,
+                actor="SYSTEM",
+                actor_uuid=None,
+                body=body,
+                responsible=responsible,
+                dedupe_prefix=f"sla:{request.id}:{request.status_code}",
+                admin_ids=admin_ids,
+            )
+        )
+
+    created = create_notifications_bulk(db, rows)
+    telegram_queued = 0
+    if send_telegram and created:
+        created_request_ids = {row["request_id"] for row in created}
+        for request, body in items:
+            if request.id not in created_request_ids:
+                continue
+            result = enqueue_telegram_message(db, _telegram_text_for_event(EVENT_SLA_OVERDUE, request, body))
+            if bool(result.get("queued")):
+                telegram_queued += 1
+    return {"internal_created": len(created), "telegram_queued": int(telegram_queued)}
+
+
+def notify_request_event(
+    db: Session,
+    *,
+    request: Request,
+    event_type: str,
+    actor_role: str,
+    actor_admin_user_id: str | uuid.UUID | None = None,
+    body: str | None = None,
+    responsible: str = "Система уведомлений",
+    send_telegram: bool = True,
+    dedupe_prefix: str | None = None,
+) -> dict[str, int]:
+    event = _normalized_event(event_type)
+    rows = _event_notification_rows(
+        db,
+        request=request,
+        event=event,
+        actor=str(actor_role or "").strip().upper() or "SYSTEM",
+        actor_uuid=_as_uuid_or_none(actor_admin_user_id),
+        body=body,
+        responsible=responsible,
+        dedupe_prefix=dedupe_prefix,
+    )
+    internal_created = len(create_notifications_bulk(db, rows)) if rows else 0
+    telegram_queued = 0
     if send_telegram and internal_created > 0:
-        result = send_telegram_message(_telegram_text_for_event(event, request, body))
-        if bool(result.get("sent")):
-            telegram_sent += 1
+        result = enqueue_telegram_message(db, _telegram_text_for_event(event, request, body))
+        if bool(result.get("queued")):
+            telegram_queued += 1
 
-    return {"internal_created": int(internal_created), "telegram_sent": int(telegram_sent)}
+    return {"internal_created": int(internal_created), "telegram_queued": int(telegram_queued)}
 
 
 def serialize_notification(row: Notification) -> dict[str, Any]:
@@ -343,6 +411,38 @@ def serialize_notification(row: Notification) -> dict[str, Any]:
     }
 
 
+def _mark_notifications_read(
+    db: Session,
+    criteria: list[Any],
+    *,
+    request_id: uuid.UUID | None,
+    notification_id: uuid.UUID | None,
+    responsible: str,
+) -> int:
+    criteria = [*criteria, Notification.is_read.is_(False)]
+    if request_id is not None:
+        criteria.append(Notification.request_id == request_id)
+    if notification_id is not None:
+        criteria.append(Notification.id == notification_id)
+    now = _as_utc_now()
+    # RETURNING reports exactly the rows this statement flipped, so concurrent readers never decrement twice.
+    marked = db.execute(
+        update(Notification)
+        .where(*criteria)
+        .values(is_read=True, read_at=now, responsible=responsible, updated_at=now)
+        .returning(
+            Notification.recipient_type,
+            Notification.recipient_admin_user_id,
+            Notification.recipient_track_number,
+            Notification.request_id,
+            Notification.event_type,
+        )
+        .execution_options(synchronize_session=False)
+    ).all()
+    record_unread_rows(db, marked, delta=-1)
+    return len(marked)
+
+
 def mark_admin_notifications_read(
     db: Session,
     *,
@@ -354,27 +454,12 @@ def mark_admin_notifications_read(
     admin_uuid = _as_uuid_or_none(admin_user_id)
     if admin_uuid is None:
         return 0
-    query = db.query(Notification).filter(
+    criteria = [
         Notification.recipient_type == RECIPIENT_ADMIN_USER,
         Notification.recipient_admin_user_id == admin_uuid,
-        Notification.is_read.is_(False),
-    )
-    if request_id is not None:
-        query = query.filter(Notification.request_id == request_id)
-    if notification_id is not None:
-        query = query.filter(Notification.id == notification_id)
-    now = _as_utc_now()
-    return int(
-        query.update(
-            {
-                Notification.is_read: True,
-                Notification.read_at: now,
-                Notification.responsible: responsible,
-                Notification.updated_at: now,
-            },
-            synchronize_session=False,
-        )
-        or 0
+    ]
+    return _mark_notifications_read(
+        db, criteria, request_id=request_id, notification_id=notification_id, responsible=responsible
     )
 
 
@@ -389,27 +474,12 @@ def mark_client_notifications_read(
     track = _normalize_track(track_number)
     if not track:
         return 0
-    query = db.query(Notification).filter(
+    criteria = [
         Notification.recipient_type == RECIPIENT_CLIENT,
         Notification.recipient_track_number == track,
-        Notification.is_read.is_(False),
-    )
-    if request_id is not None:
-        query = query.filter(Notification.request_id == request_id)
-    if notification_id is not None:
-        query = query.filter(Notification.id == notification_id)
-    now = _as_utc_now()
-    return int(
-        query.update(
-            {
-                Notification.is_read: True,
-                Notification.read_at: now,
-                Notification.responsible: responsible,
-                Notification.updated_at: now,
-            },
-            synchronize_session=False,
-        )
-        or 0
+    ]
+    return _mark_notifications_read(
+        db, criteria, request_id=request_id, notification_id=notification_id, responsible=responsible
     )
 
 
@@ -515,6 +585,25 @@ def get_client_notification(
     )
 
 
+def _unread_counter_summary(query) -> dict[str, Any]:
+    try:
+        rows = query.group_by(NotificationUnreadCounter.event_type).all()
+    except SQLAlchemyError:
+        return {"total": 0, "by_event": {}}
+    by_event = {str(event_type): int(count or 0) for event_type, count in rows if event_type and count}
+    total = int(sum(by_event.values()))
+    return {"total": total, "by_event": by_event}
+
+
+def _unread_counter_query(db: Session, recipient_type: str, request_id: uuid.UUID | None):
+    query = db.query(NotificationUnreadCounter.event_type, func.sum(NotificationUnreadCounter.unread_count)).filter(
+        NotificationUnreadCounter.recipient_type == recipient_type
+    )
+    if request_id is not None:
+        query = query.filter(NotificationUnreadCounter.request_id == request_id)
+    return query
+
+
 def unread_admin_summary(
     db: Session,
     *,
@@ -524,20 +613,10 @@ def unread_admin_summary(
     admin_uuid = _as_uuid_or_none(admin_user_id)
     if admin_uuid is None:
         return {"total": 0, "by_event": {}}
-    query = db.query(Notification.event_type, func.count(Notification.id)).filter(
-        Notification.recipient_type == RECIPIENT_ADMIN_USER,
-        Notification.recipient_admin_user_id == admin_uuid,
-        Notification.is_read.is_(False),
+    query = _unread_counter_query(db, RECIPIENT_ADMIN_USER, request_id).filter(
+        NotificationUnreadCounter.recipient_admin_user_id == admin_uuid
     )
-    if request_id is not None:
-        query = query.filter(Notification.request_id == request_id)
-    try:
-        rows = query.group_by(Notification.event_type).all()
-    except SQLAlchemyError:
-        return {"total": 0, "by_event": {}}
-    by_event = {str(event_type): int(count or 0) for event_type, count in rows if event_type}
-    total = int(sum(by_event.values()))
-    return {"total": total, "by_event": by_event}
+    return _unread_counter_summary(query)
 
 
 def unread_client_summary(
@@ -549,20 +628,10 @@ def unread_client_summary(
     track = _normalize_track(track_number)
     if not track:
         return {"total": 0, "by_event": {}}
-    query = db.query(Notification.event_type, func.count(Notification.id)).filter(
-        Notification.recipient_type == RECIPIENT_CLIENT,
-        Notification.recipient_track_number == track,
-        Notification.is_read.is_(False),
+    query = _unread_counter_query(db, RECIPIENT_CLIENT, request_id).filter(
+        NotificationUnreadCounter.recipient_track_number == track
     )
-    if request_id is not None:
-        query = query.filter(Notification.request_id == request_id)
-    try:
-        rows = query.group_by(Notification.event_type).all()
-    except SQLAlchemyError:
-        return {"total": 0, "by_event": {}}
-    by_event = {str(event_type): int(count or 0) for event_type, count in rows if event_type}
-    total = int(sum(by_event.values()))
-    return {"total": total, "by_event": by_event}
+    return _unread_counter_summary(query)
 
 
 def unread_global_summary_for_clients(
@@ -570,19 +639,7 @@ def unread_global_summary_for_clients(
     *,
     request_id: uuid.UUID | None = None,
 ) -> dict[str, Any]:
-    query = db.query(Notification.event_type, func.count(Notification.id)).filter(
-        Notification.recipient_type == RECIPIENT_CLIENT,
-        Notification.is_read.is_(False),
-    )
-    if request_id is not None:
-        query = query.filter(Notification.request_id == request_id)
-    try:
-        rows = query.group_by(Notification.event_type).all()
-    except SQLAlchemyError:
-        return {"total": 0, "by_event": {}}
-    by_event = {str(event_type): int(count or 0) for event_type, count in rows if event_type}
-    total = int(sum(by_event.values()))
-    return {"total": total, "by_event": by_event}
+    return _unread_counter_summary(_unread_counter_query(db, RECIPIENT_CLIENT, request_id))
 
 
 def unread_global_summary_for_lawyers(
@@ -591,20 +648,71 @@ def unread_global_summary_for_lawyers(
     request_id: uuid.UUID | None = None,
 ) -> dict[str, Any]:
     query = (
-        db.query(Notification.event_type, func.count(Notification.id))
-        .join(AdminUser, Notification.recipient_admin_user_id == AdminUser.id)
-        .filter(
-            Notification.recipient_type == RECIPIENT_ADMIN_USER,
-            Notification.is_read.is_(False),
-            AdminUser.role == "LAWYER",
-        )
+        _unread_counter_query(db, RECIPIENT_ADMIN_USER, request_id)
+        .join(AdminUser, NotificationUnreadCounter.recipient_admin_user_id == AdminUser.id)
+        .filter(AdminUser.role == "LAWYER")
     )
-    if request_id is not None:
-        query = query.filter(Notification.request_id == request_id)
-    try:
-        rows = query.group_by(Notification.event_type).all()
-    except SQLAlchemyError:
-        return {"total": 0, "by_event": {}}
-    by_event = {str(event_type): int(count or 0) for event_type, count in rows if event_type}
-    total = int(sum(by_event.values()))
-    return {"total": total, "by_event": by_event}
+    return _unread_counter_summary(query)
+
+
+def unread_counts_by_request(
+    db: Session,
+    request_ids: list[Any],
+    *,
+    recipient_type: str,
+    admin_user_id: uuid.UUID | None = None,
+) -> list[tuple[Any, str, int]]:
+    """(request_id, event_type, unread) rows from the counters, for list pages that badge many requests at once."""
+    if not request_ids:
+        return []
+    query = db.query(
+        NotificationUnreadCounter.request_id,
+        NotificationUnreadCounter.event_type,
+        func.sum(NotificationUnreadCounter.unread_count),
+    ).filter(
+        NotificationUnreadCounter.recipient_type == recipient_type,
+        NotificationUnreadCounter.request_id.in_(request_ids),
+    )
+    if admin_user_id is not None:
+        query = query.filter(NotificationUnreadCounter.recipient_admin_user_id == admin_user_id)
+    rows = query.group_by(NotificationUnreadCounter.request_id, NotificationUnreadCounter.event_type).all()
+    return [(request_id, event_type, int(count or 0)) for request_id, event_type, count in rows if count]
+
+
+def reconcile_notification_unread_counters(db: Session) -> dict[str, int]:
+    """Repair counter drift (raw SQL writes, failed hooks) against a fresh aggregate of unread notifications.
+
+    Call on a session with no open transaction: on PostgreSQL both reads share one REPEATABLE READ snapshot
+    taken after counter writers are locked out.
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        conn = db.connection(execution_options={"isolation_level": "REPEATABLE READ"})
+        conn.execute(text(f"LOCK TABLE {NotificationUnreadCounter.__tablename__} IN SHARE ROW EXCLUSIVE MODE"))
+    columns = (
+        Notification.recipient_type,
+        Notification.recipient_admin_user_id,
+        Notification.recipient_track_number,
+        Notification.request_id,
+        Notification.event_type,
+    )
+    expected: dict[Any, int] = {}
+    unread = select(*columns, func.count(Notification.id)).where(Notification.is_read.is_(False)).group_by(*columns)
+    for row in db.execute(unread):
+        key = counter_key(row[:5])
+        expected[key] = expected.get(key, 0) + int(row[5] or 0)
+    stored: dict[Any, int] = {}
+    counter_columns = (
+        NotificationUnreadCounter.recipient_type,
+        NotificationUnreadCounter.recipient_admin_user_id,
+        NotificationUnreadCounter.recipient_track_number,
+        NotificationUnreadCounter.request_id,
+        NotificationUnreadCounter.event_type,
+    )
+    for row in db.execute(select(*counter_columns, NotificationUnreadCounter.unread_count)):
+        key = counter_key(row[:5])
+        stored[key] = stored.get(key, 0) + int(row[5] or 0)
+    deltas = {key: expected.get(key, 0) - stored.get(key, 0) for key in set(expected) | set(stored)}
+    deltas = {key: delta for key, delta in deltas.items() if delta}
+    apply_unread_deltas(db, deltas)
+    db.commit()
+    return {"counters": len(expected), "fixed": len(deltas)}
@@ -1,16 +1,15 @@
 from __future__ import annotations
 
-import logging
+import math
+import time
+from collections import OrderedDict
 from dataclasses import dataclass
-from datetime import datetime, timedelta, timezone
 from threading import Lock
-from typing import Protocol
+from typing import Protocol, Sequence
 
 import redis
 
-from app.core.config import settings
-
-_LOG = logging.getLogger("app.rate_limit")
+from app.services.redis_client import get_redis_client, report_redis_failure, report_redis_success
 
 
 @dataclass
@@ -21,67 +20,171 @@ class RateLimitResult:
 
 
 class RateLimiter(Protocol):
-    def hit(self, key: str, *, limit: int, window_seconds: int) -> RateLimitResult:
+    def hit(self, key: str, *, limit: int, window_seconds: int, burst: int = 0) -> RateLimitResult:
+        ...
+
+    def hit_many(
+        self, keys: Sequence[str], *, limit: int, window_seconds: int, burst: int = 0
+    ) -> list[RateLimitResult]:
         ...
 
 
+# Token bucket per key: `limit` tokens refill evenly over `window_seconds`, `burst` extra tokens on top.
+# A hit is all-or-nothing across the keys, and rejected hits consume nothing, so retry_after stays honest.
+_TOKEN_BUCKET_LUA = """
+local now_parts = redis.call('TIME')
+local now = tonumber(now_parts[1]) * 1000 + math.floor(tonumber(now_parts[2]) / 1000)
+local limit = tonumber(ARGV[1])
+local window_ms = tonumber(ARGV[2])
+local capacity = limit + tonumber(ARGV[3])
+local rate = limit / window_ms
+local tokens = {}
+local allowed = 1
+for i, key in ipairs(KEYS) do
+    local state = redis.call('HMGET', key, 't', 'ts')
+    local value = tonumber(state[1])
+    local ts = tonumber(state[2])
+    if value == nil or ts == nil then
+        value = capacity
+    else
+        value = math.min(capacity, value + math.max(0, now - ts) * rate)
+    end
+    tokens[i] = value
+    if value < 1 then
+        allowed = 0
+    end
+end
+local result = {allowed}
+for i, key in ipairs(KEYS) do
+    local value = tokens[i]
+    if allowed == 1 then
+        value = value - 1
+        redis.call('HSET', key, 't', tostring(value), 'ts', now)
+        redis.call('PEXPIRE', key, math.ceil((capacity - value) / rate) + 1000)
+    end
+    result[#result + 1] = tostring(value)
+end
+return result
+"""
+
+
+def _bucket_params(limit: int, window_seconds: int, burst: int) -> tuple[int, float, float]:
+    limit = max(int(limit), 1)
+    window_ms = float(max(int(window_seconds), 1) * 1000)
+    capacity = float(limit + max(int(burst), 0))
+    return limit, window_ms, capacity
+
+
+def _bucket_result(allowed: bool, tokens: float, *, limit: int, window_ms: float, capacity: float) -> RateLimitResult:
+    retry_after = 0
+    if not allowed and tokens < 1:
+        retry_after = max(1, math.ceil((1 - tokens) * window_ms / limit / 1000))
+    return RateLimitResult(
+        allowed=allowed,
+        retry_after_seconds=retry_after,
+        current_value=max(0, math.ceil(capacity - tokens - 1e-9)),
+    )
+
+
 class InMemoryRateLimiter:
-    def __init__(self):
-        self._data: dict[str, tuple[int, datetime]] = {}
+    def __init__(self, max_keys: int = 10_000):
+        self._data: OrderedDict[str, tuple[float, float]] = OrderedDict()
+        self._max_keys = max(int(max_keys), 1)
         self._lock = Lock()
 
-    def hit(self, key: str, *, limit: int, window_seconds: int) -> RateLimitResult:
-        now = datetime.now(timezone.utc)
+    def hit(self, key: str, *, limit: int, window_seconds: int, burst: int = 0) -> RateLimitResult:
+        return self.hit_many([key], limit=limit, window_seconds=window_seconds, burst=burst)[0]
+
+    def hit_many(
+        self, keys: Sequence[str], *, limit: int, window_seconds: int, burst: int = 0
+    ) -> list[RateLimitResult]:
+        limit, window_ms, capacity = _bucket_params(limit, window_seconds, burst)
+        rate = limit / window_ms
+        now = time.monotonic() * 1000
         with self._lock:
-            count, expires_at = self._data.get(key, (0, now))
-            if expires_at <= now:
-                count = 0
-                expires_at = now + timedelta(seconds=max(int(window_seconds), 1))
-            count += 1
-            self._data[key] = (count, expires_at)
-            retry_after = max(0, int((expires_at - now).total_seconds()))
-        return RateLimitResult(allowed=count <= limit, retry_after_seconds=retry_after, current_value=count)
+            tokens: list[float] = []
+            for key in keys:
+                state = self._data.get(key)
+                if state is None:
+                    tokens.append(capacity)
+                else:
+                    tokens.append(min(capacity, state[0] + max(0.0, now - state[1]) * rate))
+            allowed = all(value >= 1 for value in tokens)
+            if allowed:
+                tokens = [value - 1 for value in tokens]
+                for key, value in zip(keys, tokens):
+                    self._data[key] = (value, now)
+                    self._data.move_to_end(key)
+                while len(self._data) > self._max_keys:
+                    self._data.popitem(last=False)
+        return [
+            _bucket_result(allowed, value, limit=limit, window_ms=window_ms, capacity=capacity) for value in tokens
+        ]
 
 
 class RedisRateLimiter:
     def __init__(self, client: redis.Redis):
         self.client = client
-
-    def hit(self, key: str, *, limit: int, window_seconds: int) -> RateLimitResult:
-        count = int(self.client.incr(key))
-        if count == 1:
-            self.client.expire(key, int(max(window_seconds, 1)))
-        ttl = int(self.client.ttl(key))
-        if ttl < 0:
-            ttl = int(max(window_seconds, 1))
-        return RateLimitResult(allowed=count <= limit, retry_after_seconds=ttl, current_value=count)
-
-
-_cached_limiter: RateLimiter | None = None
-
-
-def _build_limiter() -> RateLimiter:
-    try:
-        client = redis.Redis.from_url(
-            settings.REDIS_URL,
-            decode_responses=True,
-            socket_timeout=0.4,
-            socket_connect_timeout=0.4,
-        )
-        client.ping()
-        return RedisRateLimiter(client)
-    except Exception:
-        _LOG.warning("Redis limiter unavailable; fallback to in-memory limiter")
-        return InMemoryRateLimiter()
+        self._script = client.register_script(_TOKEN_BUCKET_LUA)
+
+    def hit(self, key: str, *, limit: int, window_seconds: int, burst: int = 0) -> RateLimitResult:
+        return self.hit_many([key], limit=limit, window_seconds=window_seconds, burst=burst)[0]
+
+    def hit_many(
+        self, keys: Sequence[str], *, limit: int, window_seconds: int, burst: int = 0
+    ) -> list[RateLimitResult]:
+        if not keys:
+            return []
+        limit, window_ms, capacity = _bucket_params(limit, window_seconds, burst)
+        # Cluster note: multi-key calls require the keys to share a hash slot.
+        reply = self._script(keys=list(keys), args=[limit, int(window_ms), int(capacity) - limit])
+        allowed = int(reply[0]) == 1
+        return [
+            _bucket_result(allowed, float(value), limit=limit, window_ms=window_ms, capacity=capacity)
+            for value in reply[1:]
+        ]
+
+
+class SharedRateLimiter:
+    """Uses the pooled Redis client per hit and degrades to a process-local limiter while Redis is down."""
+
+    def __init__(self) -> None:
+        self.fallback = InMemoryRateLimiter()
+        self._redis_limiter: RedisRateLimiter | None = None
+
+    def _limiter_for(self, client: redis.Redis) -> RedisRateLimiter:
+        limiter = self._redis_limiter
+        if limiter is None or limiter.client is not client:
+            limiter = RedisRateLimiter(client)
+            self._redis_limiter = limiter
+        return limiter
+
+    def hit(self, key: str, *, limit: int, window_seconds: int, burst: int = 0) -> RateLimitResult:
+        return self.hit_many([key], limit=limit, window_seconds=window_seconds, burst=burst)[0]
+
+    def hit_many(
+        self, keys: Sequence[str], *, limit: int, window_seconds: int, burst: int = 0
+    ) -> list[RateLimitResult]:
+        client = get_redis_client("rate_limit")
+        if client is not None:
+            try:
+                results = self._limiter_for(client).hit_many(
+                    keys, limit=limit, window_seconds=window_seconds, burst=burst
+                )
+                report_redis_success()
+                return results
+            except Exception:
+                report_redis_failure("rate_limit")
+        return self.fallback.hit_many(keys, limit=limit, window_seconds=window_seconds, burst=burst)
+
+
+_shared_limiter = SharedRateLimiter()
 
 
 def get_rate_limiter() -> RateLimiter:
-    global _cached_limiter
-    if _cached_limiter is None:
-        _cached_limiter = _build_limiter()
-    return _cached_limiter
+    return _shared_limiter
 
 
 def reset_rate_limiter_for_tests() -> None:
-    global _cached_limiter
-    _cached_limiter = None
+    global _shared_limiter
+    _shared_limiter = SharedRateLimiter()
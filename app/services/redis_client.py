@@ -0,0 +1,185 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import threading
+import time
+from typing import Any
+
+import redis
+import redis.asyncio as redis_async
+
+from app.core.config import settings
+
+CIRCUIT_CLOSED = "closed"
+CIRCUIT_OPEN = "open"
+CIRCUIT_HALF_OPEN = "half_open"
+
+_LOG = logging.getLogger("app.redis")
+
+
+class RedisCircuitBreaker:
+    """Stops hammering an unreachable Redis, but re-probes after a cooldown instead of giving up for good."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.state = CIRCUIT_CLOSED
+        self.failures = 0
+        self.opened_at: float | None = None
+        self._probe_in_flight = False
+
+    def _cooldown_seconds(self) -> float:
+        return max(0.0, float(getattr(settings, "REDIS_CIRCUIT_COOLDOWN_SECONDS", 5) or 0))
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == CIRCUIT_CLOSED:
+                return True
+            if self.state == CIRCUIT_OPEN:
+                if self.opened_at is not None and time.monotonic() - self.opened_at < self._cooldown_seconds():
+                    return False
+                self.state = CIRCUIT_HALF_OPEN
+                self._probe_in_flight = False
+            if self._probe_in_flight:
+                return False
+            self._probe_in_flight = True
+            return True
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self.state != CIRCUIT_CLOSED:
+                _LOG.info("redis circuit closed after successful probe")
+            self.state = CIRCUIT_CLOSED
+            self.failures = 0
+            self.opened_at = None
+            self._probe_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            threshold = max(1, int(getattr(settings, "REDIS_CIRCUIT_FAILURE_THRESHOLD", 3) or 1))
+            if self.state == CIRCUIT_HALF_OPEN or self.failures >= threshold:
+                if self.state != CIRCUIT_OPEN:
+                    _LOG.warning("redis circuit opened after %s failure(s)", self.failures)
+                self.state = CIRCUIT_OPEN
+                self.opened_at = time.monotonic()
+            self._probe_in_flight = False
+
+    def reset(self) -> None:
+        with self._lock:
+            self.state = CIRCUIT_CLOSED
+            self.failures = 0
+            self.opened_at = None
+            self._probe_in_flight = False
+
+
+redis_circuit = RedisCircuitBreaker()
+
+_pool_lock = threading.Lock()
+_sync_client: redis.Redis | None = None
+_async_clients: dict[int, tuple[asyncio.AbstractEventLoop, redis_async.Redis]] = {}
+
+_fallback_lock = threading.Lock()
+_fallback_counts: dict[str, int] = {}
+
+
+def _client_options() -> dict[str, Any]:
+    timeout = max(0.05, float(getattr(settings, "REDIS_SOCKET_TIMEOUT_SECONDS", 0.4) or 0.4))
+    return {
+        "decode_responses": True,
+        "socket_timeout": timeout,
+        "socket_connect_timeout": timeout,
+        "health_check_interval": max(0, int(getattr(settings, "REDIS_HEALTH_CHECK_INTERVAL_SECONDS", 30) or 0)),
+        "max_connections": max(1, int(getattr(settings, "REDIS_MAX_CONNECTIONS", 50) or 1)),
+    }
+
+
+def _shared_sync_client() -> redis.Redis:
+    global _sync_client
+    if _sync_client is not None:
+        return _sync_client
+    with _pool_lock:
+        if _sync_client is None:
+            pool = redis.ConnectionPool.from_url(settings.REDIS_URL, **_client_options())
+            _sync_client = redis.Redis(connection_pool=pool)
+        return _sync_client
+
+
+def record_redis_fallback(component: str) -> None:
+    name = str(component or "unknown")
+    with _fallback_lock:
+        _fallback_counts[name] = _fallback_counts.get(name, 0) + 1
+        count = _fallback_counts[name]
+    if count == 1 or count % 1000 == 0:
+        _LOG.warning("redis unavailable, %s served from process-local fallback (hits=%s)", name, count)
+
+
+def get_redis_client(component: str) -> redis.Redis | None:
+    """Return the pooled client, or None while the circuit is open (the caller then uses its fallback)."""
+    if not redis_circuit.allow():
+        record_redis_fallback(component)
+        return None
+    return _shared_sync_client()
+
+
+def report_redis_success() -> None:
+    redis_circuit.record_success()
+
+
+def report_redis_failure(component: str) -> None:
+    redis_circuit.record_failure()
+    record_redis_fallback(component)
+
+
+def get_async_redis_client(component: str) -> redis_async.Redis | None:
+    if not redis_circuit.allow():
+        record_redis_fallback(component)
+        return None
+    # asyncio connections are bound to the loop that opened them, so keep one pool per running loop.
+    loop = asyncio.get_running_loop()
+    with _pool_lock:
+        cached = _async_clients.get(id(loop))
+        if cached is not None and cached[0] is loop:
+            return cached[1]
+        for key, (other_loop, _) in list(_async_clients.items()):
+            if other_loop.is_closed():
+                _async_clients.pop(key, None)
+        pool = redis_async.ConnectionPool.from_url(settings.REDIS_URL, **_client_options())
+        client = redis_async.Redis(connection_pool=pool)
+        _async_clients[id(loop)] = (loop, client)
+        return client
+
+
+def redis_health() -> dict[str, Any]:
+    with _fallback_lock:
+        fallbacks = dict(_fallback_counts)
+    status = "ok"
+    issues: list[str] = []
+    try:
+        client = _shared_sync_client()
+        client.ping()
+        report_redis_success()
+    except Exception as exc:
+        report_redis_failure("health")
+        status = "degraded"
+        issues.append(f"Redis недоступен: {exc.__class__.__name__}")
+    if fallbacks:
+        issues.append("Часть запросов обслужена локальным fallback: состояние воркеров может расходиться")
+    return {
+        "status": status,
+        "circuit": redis_circuit.state,
+        "failures": redis_circuit.failures,
+        "fallback_hits": fallbacks,
+        "fallback_total": sum(fallbacks.values()),
+        "issues": issues,
+    }
+
+
+def reset_redis_for_tests() -> None:
+    global _sync_client
+    with _pool_lock:
+        _sync_client = None
+        _async_clients.clear()
+    with _fallback_lock:
+        _fallback_counts.clear()
+    redis_circuit.reset()
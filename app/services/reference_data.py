@@ -0,0 +1,183 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any
+
+from sqlalchemy.orm import Session
+
+from app.models.status import Status
+from app.models.status_group import StatusGroup
+from app.models.topic import Topic
+from app.models.topic_status_transition import TopicStatusTransition
+from app.services.versioned_cache import VersionedSnapshotCache
+
+DEFAULT_TERMINAL_STATUS_CODES = frozenset({"RESOLVED", "CLOSED", "REJECTED"})
+
+_REFERENCE_MODELS = (Status, StatusGroup, Topic, TopicStatusTransition)
+
+
+@dataclass(frozen=True)
+class StatusRef:
+    code: str
+    name: str
+    kind: str
+    is_terminal: bool
+    enabled: bool
+    sort_order: int
+    status_group_id: str | None
+
+
+@dataclass(frozen=True)
+class StatusGroupRef:
+    id: str
+    name: str
+    sort_order: int
+
+
+@dataclass(frozen=True)
+class TopicRef:
+    code: str
+    name: str
+    enabled: bool
+    sort_order: int
+
+
+@dataclass(frozen=True)
+class TransitionRef:
+    topic_code: str
+    from_status: str
+    to_status: str
+    enabled: bool
+    sla_hours: int | None
+    sort_order: int
+    created_at: datetime | None
+
+
+@dataclass(frozen=True)
+class ReferenceData:
+    statuses: dict[str, StatusRef] = field(default_factory=dict)
+    status_groups: dict[str, StatusGroupRef] = field(default_factory=dict)
+    topics: dict[str, TopicRef] = field(default_factory=dict)
+    # Enabled transitions only, per topic, in (sort_order, created_at) order.
+    transitions_by_topic: dict[str, tuple[TransitionRef, ...]] = field(default_factory=dict)
+
+    @property
+    def terminal_status_codes(self) -> frozenset[str]:
+        codes = frozenset(code for code, status in self.statuses.items() if status.is_terminal)
+        return codes or DEFAULT_TERMINAL_STATUS_CODES
+
+    def enabled_statuses(self) -> list[StatusRef]:
+        rows = [status for status in self.statuses.values() if status.enabled]
+        return sorted(rows, key=lambda status: (status.sort_order, status.name, status.code))
+
+    def ordered_status_groups(self) -> list[StatusGroupRef]:
+        return sorted(self.status_groups.values(), key=lambda group: (group.sort_order, group.name))
+
+    def transitions_for_topic(self, topic_code: str | None) -> tuple[TransitionRef, ...]:
+        return self.transitions_by_topic.get(str(topic_code or "").strip(), ())
+
+    def transition_allowed(self, topic_code: str | None, from_status: str, to_status: str) -> bool:
+        from_code = str(from_status or "").strip()
+        to_code = str(to_status or "").strip()
+        if not from_code or not to_code:
+            return False
+        if from_code == to_code:
+            return True
+        topic = str(topic_code or "").strip()
+        rules = self.transitions_for_topic(topic) if topic else ()
+        if not rules:
+            return True
+        return any(rule.from_status == from_code and rule.to_status == to_code for rule in rules)
+
+    def outgoing_sla_hours(self, topic_code: str | None, status_code: str | None) -> int | None:
+        status = str(status_code or "").strip()
+        hours = [
+            int(rule.sla_hours)
+            for rule in self.transitions_for_topic(topic_code)
+            if rule.from_status == status and rule.sla_hours is not None and int(rule.sla_hours) > 0
+        ]
+        return min(hours) if hours else None
+
+
+def _load_rows(db: Session, model) -> list[Any]:
+    return db.query(model).all()
+
+
+def _load_reference_data(db: Session) -> ReferenceData:
+    statuses = {
+        str(row.code).strip(): StatusRef(
+            code=str(row.code).strip(),
+            name=str(row.name or row.code),
+            kind=str(row.kind or "DEFAULT"),
+            is_terminal=bool(row.is_terminal),
+            enabled=bool(row.enabled),
+            sort_order=int(row.sort_order or 0),
+            status_group_id=str(row.status_group_id) if row.status_group_id else None,
+        )
+        for row in _load_rows(db, Status)
+        if str(row.code or "").strip()
+    }
+    groups = {
+        str(row.id): StatusGroupRef(id=str(row.id), name=str(row.name or ""), sort_order=int(row.sort_order or 0))
+        for row in _load_rows(db, StatusGroup)
+    }
+    topics = {
+        str(row.code).strip(): TopicRef(
+            code=str(row.code).strip(),
+            name=str(row.name or row.code),
+            enabled=bool(row.enabled),
+            sort_order=int(row.sort_order or 0),
+        )
+        for row in _load_rows(db, Topic)
+        if str(row.code or "").strip()
+    }
+    by_topic: dict[str, list[TransitionRef]] = {}
+    for row in _load_rows(db, TopicStatusTransition):
+        topic = str(row.topic_code or "").strip()
+        from_status = str(row.from_status or "").strip()
+        to_status = str(row.to_status or "").strip()
+        if not row.enabled or not topic or not from_status or not to_status:
+            continue
+        by_topic.setdefault(topic, []).append(
+            TransitionRef(
+                topic_code=topic,
+                from_status=from_status,
+                to_status=to_status,
+                enabled=True,
+                sla_hours=int(row.sla_hours) if row.sla_hours is not None else None,
+                sort_order=int(row.sort_order or 0),
+                created_at=row.created_at,
+            )
+        )
+    transitions_by_topic = {
+        topic: tuple(sorted(rules, key=lambda rule: (rule.sort_order, str(rule.created_at or ""))))
+        for topic, rules in by_topic.items()
+    }
+    return ReferenceData(
+        statuses=statuses,
+        status_groups=groups,
+        topics=topics,
+        transitions_by_topic=transitions_by_topic,
+    )
+
+
+_cache: VersionedSnapshotCache[ReferenceData] = VersionedSnapshotCache(
+    "reference_data", _load_reference_data, _REFERENCE_MODELS
+)
+
+
+def get_reference_data(db: Session) -> ReferenceData:
+    return _cache.get(db)
+
+
+def terminal_status_codes(db: Session) -> set[str]:
+    return set(get_reference_data(db).terminal_status_codes)
+
+
+def invalidate_reference_data(*, broadcast: bool = True) -> None:
+    _cache.invalidate(broadcast=broadcast)
+
+
+def reset_reference_data_for_tests() -> None:
+    _cache.reset()
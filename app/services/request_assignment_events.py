@@ -10,6 +10,7 @@ from sqlalchemy.orm import Session
 from app.models.admin_user import AdminUser
 from app.models.message import Message
 from app.models.request import Request
+from app.services.chat_events import CHAT_EVENT_MESSAGE, queue_chat_event
 from app.services.notifications import (
     EVENT_ASSIGNMENT as NOTIFICATION_EVENT_ASSIGNMENT,
     EVENT_REASSIGNMENT as NOTIFICATION_EVENT_REASSIGNMENT,
@@ -61,10 +62,7 @@ def _service_message_author(actor_role: str, actor_name: str | None) -> str:
 
 def _can_write_messages(db: Session) -> bool:
     try:
-        bind = db.get_bind()
-        if bind is None:
-            return False
-        return bool(inspect(bind).has_table(Message.__tablename__))
+        return bool(inspect(db.connection()).has_table(Message.__tablename__))
     except (SQLAlchemyError, ValueError, TypeError):
         return False
 
@@ -131,6 +129,7 @@ def apply_assignment_change(
                 responsible=safe_responsible,
             )
         )
+        queue_chat_event(db, request.id, CHAT_EVENT_MESSAGE)
     db.add(request)
     return {
         "notification_event": notification_event,
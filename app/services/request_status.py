@@ -10,6 +10,7 @@ from app.models.attachment import Attachment
 from app.models.message import Message
 from app.models.request import Request
 from app.models.status_history import StatusHistory
+from app.services.sla_metrics import track_request_sla
 
 
 def actor_admin_uuid(admin: dict[str, Any] | None) -> uuid.UUID | None:
@@ -75,6 +76,7 @@ def apply_status_change_effects(
     if not new_code or old_code == new_code:
         return
     freeze_request_messages_and_attachments(db, request.id)
+    track_request_sla(db, request)
     register_status_history(
         db,
         request,
@@ -0,0 +1,260 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import threading
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, Callable, Iterator
+
+import httpx
+from botocore.exceptions import ClientError
+from fastapi import HTTPException
+from fastapi import Request as FastapiRequest
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import RedirectResponse, Response, StreamingResponse
+from starlette.types import Receive, Scope, Send
+
+from app.core.config import settings
+
+# Upstream headers that describe the bytes being served; everything else from S3 (x-amz-*, Server, ...) is dropped.
+_PASSTHROUGH_HEADERS = ("content-length", "content-range", "content-encoding", "etag", "last-modified", "accept-ranges")
+_BODY_STATUSES = {200, 206}
+_EMPTY_STATUSES = {304, 412, 416}
+
+_client_lock = threading.Lock()
+_async_clients: dict[int, tuple[asyncio.AbstractEventLoop, httpx.AsyncClient]] = {}
+
+
+def _chunk_size() -> int:
+    return max(16, int(getattr(settings, "S3_PROXY_CHUNK_KB", 256) or 256)) * 1024
+
+
+def _async_enabled() -> bool:
+    return bool(getattr(settings, "S3_PROXY_ASYNC", False))
+
+
+def direct_download_enabled() -> bool:
+    return bool(getattr(settings, "S3_DIRECT_DOWNLOAD_ENABLED", False))
+
+
+def s3_direct_download_response(
+    storage: Any,
+    key: str,
+    *,
+    content_type: str | None = None,
+    content_disposition: str | None = None,
+) -> Response:
+    """307 to a short-lived signed `/s3` URL; Range and validators are re-sent by the browser and answered by S3."""
+    ttl = max(5, int(getattr(settings, "S3_DIRECT_DOWNLOAD_TTL_SECONDS", 60) or 60))
+    url = storage.create_presigned_download_url(
+        key,
+        expires_sec=ttl,
+        content_type=content_type,
+        content_disposition=content_disposition,
+    )
+    return RedirectResponse(url, status_code=307)
+
+
+def conditional_get_params(http_request: FastapiRequest) -> dict[str, Any]:
+    """boto3 get_object arguments for the client's Range and validators."""
+    params: dict[str, Any] = {}
+    range_header = str(http_request.headers.get("range") or "").strip()
+    # S3 serves a single range only; multi-range requests fall back to the full object.
+    if range_header.startswith("bytes=") and "," not in range_header:
+        params["Range"] = range_header
+    if_none_match = str(http_request.headers.get("if-none-match") or "").strip()
+    if if_none_match:
+        params["IfNoneMatch"] = if_none_match
+    else:
+        # RFC 9110: If-Modified-Since is ignored when If-None-Match is present.
+        raw_since = str(http_request.headers.get("if-modified-since") or "").strip()
+        if raw_since:
+            try:
+                params["IfModifiedSince"] = parsedate_to_datetime(raw_since)
+            except (TypeError, ValueError):
+                pass
+    return params
+
+
+def _http_date(value: Any) -> str | None:
+    if not isinstance(value, datetime):
+        return None
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return format_datetime(value.astimezone(timezone.utc), usegmt=True)
+
+
+def _object_headers(obj: dict) -> dict[str, str]:
+    headers = {"Accept-Ranges": "bytes"}
+    if obj.get("ContentLength") is not None:
+        headers["Content-Length"] = str(obj["ContentLength"])
+    if obj.get("ContentRange"):
+        headers["Content-Range"] = str(obj["ContentRange"])
+    if obj.get("ContentEncoding"):
+        headers["Content-Encoding"] = str(obj["ContentEncoding"])
+    if obj.get("ETag"):
+        headers["ETag"] = str(obj["ETag"])
+    last_modified = _http_date(obj.get("LastModified"))
+    if last_modified:
+        headers["Last-Modified"] = last_modified
+    return headers
+
+
+def download_audit_fields(status: int, *, missing_detail: str = "Файл не найден") -> dict[str, Any]:
+    """security_audit action/allowed/reason for a proxied response; 304/412/416 are audited apart from downloads."""
+    if status in _BODY_STATUSES:
+        return {"action": "DOWNLOAD_OBJECT", "allowed": True, "reason": None}
+    if status in _EMPTY_STATUSES:
+        return {"action": "DOWNLOAD_OBJECT_NOT_SERVED", "allowed": True, "reason": f"HTTP {status}"}
+    return {"action": "DOWNLOAD_OBJECT", "allowed": False, "reason": missing_detail}
+
+
+def _client_error_response(exc: ClientError, *, missing_detail: str) -> Response:
+    error = exc.response.get("Error", {}) or {}
+    code = str(error.get("Code") or "")
+    status = int((exc.response.get("ResponseMetadata", {}) or {}).get("HTTPStatusCode") or 0)
+    upstream_headers = (exc.response.get("ResponseMetadata", {}) or {}).get("HTTPHeaders", {}) or {}
+    if code in {"304", "NotModified"} or status == 304:
+        headers = {name.title(): str(upstream_headers[name]) for name in ("etag", "last-modified") if upstream_headers.get(name)}
+        return Response(status_code=304, headers=headers)
+    if code in {"416", "InvalidRange"} or status == 416:
+        size = error.get("ActualObjectSize")
+        return Response(status_code=416, headers={"Content-Range": f"bytes */{size}"} if size else None)
+    if code in {"412", "PreconditionFailed"} or status == 412:
+        return Response(status_code=412)
+    raise HTTPException(status_code=404, detail=missing_detail)
+
+
+def _iter_body(body: Any) -> Iterator[bytes]:
+    try:
+        yield from body.iter_chunks(chunk_size=_chunk_size())
+    finally:
+        close = getattr(body, "close", None)
+        if callable(close):
+            close()
+
+
+def _async_client(verify: Any) -> httpx.AsyncClient:
+    # httpx pools are bound to the loop that opened them, so keep one client per running loop.
+    loop = asyncio.get_running_loop()
+    with _client_lock:
+        cached = _async_clients.get(id(loop))
+        if cached is not None and cached[0] is loop:
+            return cached[1]
+        for key, (other_loop, _) in list(_async_clients.items()):
+            if other_loop.is_closed():
+                _async_clients.pop(key, None)
+        client = httpx.AsyncClient(
+            verify=verify,
+            timeout=httpx.Timeout(30.0, connect=5.0),
+            limits=httpx.Limits(max_connections=64, max_keepalive_connections=16),
+        )
+        _async_clients[id(loop)] = (loop, client)
+        return client
+
+
+class S3AsyncProxyResponse(Response):
+    """Relays a signed S3 GET from the event loop; status and validators come from S3 at send time."""
+
+    def __init__(
+        self,
+        *,
+        url: str,
+        request_headers: dict[str, str],
+        default_media_type: str,
+        headers: dict[str, str] | None,
+        missing_detail: str,
+        verify: Any = True,
+        on_outcome: Callable[[int], None] | None = None,
+    ) -> None:
+        super().__init__(status_code=200, headers=headers)
+        self.url = url
+        self.request_headers = request_headers
+        self.default_media_type = default_media_type
+        self.missing_detail = missing_detail
+        self.verify = verify
+        self.on_outcome = on_outcome
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        async with _async_client(self.verify).stream("GET", self.url, headers=self.request_headers) as upstream:
+            status = upstream.status_code
+            known = status in _BODY_STATUSES or status in _EMPTY_STATUSES
+            if self.on_outcome is not None:
+                # The route cannot see S3's answer before returning, so the outcome is reported from here.
+                await run_in_threadpool(self.on_outcome, status if known else 404)
+            if not known:
+                body = json.dumps({"detail": self.missing_detail}, ensure_ascii=False).encode("utf-8")
+                await send(
+                    {
+                        "type": "http.response.start",
+                        "status": 404,
+                        "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+                    }
+                )
+                await send({"type": "http.response.body", "body": body, "more_body": False})
+                return
+            raw_headers = [
+                (name.encode("latin-1"), upstream.headers[name].encode("latin-1"))
+                for name in _PASSTHROUGH_HEADERS
+                if name in upstream.headers and (status in _BODY_STATUSES or name != "content-length")
+            ]
+            if status in _BODY_STATUSES:
+                media_type = upstream.headers.get("content-type") or self.default_media_type
+                raw_headers.append((b"content-type", media_type.encode("latin-1")))
+            elif status != 304:
+                raw_headers.append((b"content-length", b"0"))
+            raw_headers.extend((name, value) for name, value in self.raw_headers if name not in {b"content-length"})
+            await send({"type": "http.response.start", "status": status, "headers": raw_headers})
+            if status in _BODY_STATUSES:
+                async for chunk in upstream.aiter_raw(_chunk_size()):
+                    await send({"type": "http.response.body", "body": chunk, "more_body": True})
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+
+def s3_object_response(
+    storage: Any,
+    key: str,
+    http_request: FastapiRequest,
+    *,
+    default_media_type: str = "application/octet-stream",
+    headers: dict[str, str] | None = None,
+    missing_detail: str = "Файл не найден",
+    on_outcome: Callable[[int], None] | None = None,
+) -> Response:
+    """Serve an S3 object honouring Range (206), If-None-Match / If-Modified-Since (304) and S3 validators.
+
+    `on_outcome` receives the status S3 answered with (404 for a missing object in async mode; the sync path raises).
+    """
+    params = conditional_get_params(http_request)
+    if _async_enabled() and hasattr(storage, "create_presigned_get_url"):
+        request_headers = {
+            name: str(http_request.headers[name])
+            for name in ("range", "if-none-match", "if-modified-since")
+            if name in http_request.headers
+        }
+        if "Range" not in params:
+            request_headers.pop("range", None)
+        return S3AsyncProxyResponse(
+            url=storage.create_presigned_get_url(key),
+            request_headers=request_headers,
+            default_media_type=default_media_type,
+            headers=headers,
+            missing_detail=missing_detail,
+            verify=getattr(storage, "verify", True),
+            on_outcome=on_outcome,
+        )
+    try:
+        obj = storage.get_object(key, **params) if params else storage.get_object(key)
+    except ClientError as exc:
+        response = _client_error_response(exc, missing_detail=missing_detail)
+    else:
+        response = StreamingResponse(
+            _iter_body(obj["Body"]),
+            status_code=206 if obj.get("ContentRange") else 200,
+            media_type=obj.get("ContentType") or default_media_type,
+            headers={**_object_headers(obj), **(headers or {})},
+        )
+    if on_outcome is not None:
+        on_outcome(response.status_code)
+    return response
@@ -28,6 +28,7 @@ class S3Storage:
         ca_bundle = str(settings.S3_CA_CERT_PATH or "").strip()
         if verify_ssl and ca_bundle:
             verify_ssl = ca_bundle
+        self.verify = verify_ssl
         self.client = boto3.client(
             "s3",
             endpoint_url=settings.S3_ENDPOINT,
@@ -83,13 +84,40 @@ class S3Storage:
         )
         return self._proxy_presigned_url(url)
 
+    def create_presigned_get_url(self, key: str, expires_sec: int = 60) -> str:
+        """Direct (non-proxied) signed URL; signing is local, no request is sent to S3."""
+        return self.client.generate_presigned_url(
+            "get_object",
+            Params={"Bucket": self.bucket, "Key": key},
+            ExpiresIn=expires_sec,
+            HttpMethod="GET",
+        )
+
+    def create_presigned_download_url(
+        self,
+        key: str,
+        *,
+        expires_sec: int = 60,
+        content_type: str | None = None,
+        content_disposition: str | None = None,
+    ) -> str:
+        # Signed for the browser via `/s3/*`; S3 applies the response-* overrides to the served object.
+        params: dict = {"Bucket": self.bucket, "Key": key}
+        if content_type:
+            params["ResponseContentType"] = content_type
+        if content_disposition:
+            params["ResponseContentDisposition"] = content_disposition
+        url = self.client.generate_presigned_url("get_object", Params=params, ExpiresIn=expires_sec, HttpMethod="GET")
+        return self._proxy_presigned_url(url)
+
     def head_object(self, key: str) -> dict:
         self.ensure_bucket()
         return self.client.head_object(Bucket=self.bucket, Key=key)
 
-    def get_object(self, key: str) -> dict:
+    def get_object(self, key: str, **conditions) -> dict:
+        # conditions: boto3 Range / IfNoneMatch / IfModifiedSince forwarded from the client request.
         self.ensure_bucket()
-        return self.client.get_object(Bucket=self.bucket, Key=key)
+        return self.client.get_object(Bucket=self.bucket, Key=key, **conditions)
 
     def get_avatar_proxy_path(self, key: str, token: str) -> str:
         return "/api/admin/uploads/object/" + quote(key, safe="") + "?token=" + quote(token, safe="")
@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import re
+from typing import Any
+
+from sqlalchemy import case, func, literal_column
+
+SEARCH_TRIGRAM = "trigram"
+SEARCH_FULLTEXT = "fulltext"
+
+# Columns with a search index from migration 0046; "~" on any other column stays a plain ILIKE scan.
+# trigram: GIN gin_trgm_ops, serves ILIKE '%value%' directly.
+# fulltext: GIN over to_tsvector('russian'::regconfig, coalesce(col, ''::text)), matched by word prefixes.
+SEARCHABLE_COLUMNS: dict[str, dict[str, str]] = {
+    "requests": {
+        "track_number": SEARCH_TRIGRAM,
+        "client_name": SEARCH_TRIGRAM,
+        "client_phone": SEARCH_TRIGRAM,
+        "client_email": SEARCH_TRIGRAM,
+        "description": SEARCH_FULLTEXT,
+    },
+    "clients": {
+        "full_name": SEARCH_TRIGRAM,
+        "phone": SEARCH_TRIGRAM,
+    },
+}
+
+# Literals rather than bound parameters so the expression matches the functional index.
+FULLTEXT_CONFIG_SQL = "'russian'::regconfig"
+
+_LIKE_ESCAPE = "\\"
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def search_kind(model, field: str) -> str | None:
+    return SEARCHABLE_COLUMNS.get(getattr(model, "__tablename__", ""), {}).get(field)
+
+
+def _escape_like(text: str) -> str:
+    return text.replace(_LIKE_ESCAPE, _LIKE_ESCAPE * 2).replace("%", _LIKE_ESCAPE + "%").replace("_", _LIKE_ESCAPE + "_")
+
+
+def _tsvector(col):
+    return func.to_tsvector(literal_column(FULLTEXT_CONFIG_SQL), func.coalesce(col, literal_column("''::text")))
+
+
+def _prefix_tsquery(text: str):
+    words = _WORD_RE.findall(text)
+    if not words:
+        return None
+    # Words are \w-only, so the ":*" prefix query cannot carry tsquery operators from user input.
+    return func.to_tsquery(literal_column(FULLTEXT_CONFIG_SQL), " & ".join(f"{word}:*" for word in words))
+
+
+def search_clause(col, value: Any, *, kind: str | None, dialect: str):
+    text = str(value if value is not None else "")
+    if dialect == "postgresql" and kind == SEARCH_FULLTEXT:
+        query = _prefix_tsquery(text)
+        if query is not None:
+            return _tsvector(col).op("@@")(query)
+    return col.ilike(f"%{_escape_like(text)}%", escape=_LIKE_ESCAPE)
+
+
+def search_relevance(col, value: Any, *, kind: str | None, dialect: str):
+    """Higher is better; used to order "~" results when the client asked for no explicit sort."""
+    text = str(value if value is not None else "")
+    if dialect == "postgresql" and kind == SEARCH_FULLTEXT:
+        query = _prefix_tsquery(text)
+        if query is not None:
+            return func.ts_rank(_tsvector(col), query)
+    if dialect == "postgresql" and kind == SEARCH_TRIGRAM:
+        return func.word_similarity(text, col)
+    # Portable fallback (SQLite tests): exact match, then prefix, then any substring.
+    lowered = func.lower(col)
+    needle = text.lower()
+    return case(
+        (lowered == needle, 2),
+        (lowered.like(f"{_escape_like(needle)}%", escape=_LIKE_ESCAPE), 1),
+        else_=0,
+    )
@@ -12,6 +12,7 @@ from sqlalchemy.orm import Session
 
 from app.models.security_audit_log import SecurityAuditLog
 from app.models.common import utcnow
+from app.workers.celery_app import celery_app
 
 logger = logging.getLogger(__name__)
 
@@ -105,8 +106,8 @@ def record_file_security_event(
 ) -> None:
     # Security telemetry must not block business flow if DB log write fails.
     try:
-        bind = db.get_bind()
-        if bind is None or not inspect(bind).has_table("security_audit_log"):
+        # Inspect through the session connection: a separate checkout would reset the open transaction on shared pools.
+        if not inspect(db.connection()).has_table("security_audit_log"):
             return
         row = SecurityAuditLog(
             actor_role=str(actor_role or "UNKNOWN").upper(),
@@ -143,6 +144,40 @@ def record_file_security_event(
                 logger.debug("security_audit_rollback_failed", exc_info=True)
 
 
+def enqueue_file_security_event(
+    db: Session,
+    *,
+    actor_role: str,
+    actor_subject: str,
+    actor_ip: str | None,
+    action: str,
+    scope: str,
+    object_key: str | None = None,
+    request_id: str | uuid.UUID | None = None,
+    attachment_id: str | uuid.UUID | None = None,
+    details: dict[str, Any] | None = None,
+    responsible: str | None = None,
+) -> None:
+    # Allowed events only: denied ones stay synchronous because they feed the repeated-deny alert.
+    event = {
+        "actor_role": actor_role,
+        "actor_subject": actor_subject,
+        "actor_ip": actor_ip,
+        "action": action,
+        "scope": scope,
+        "object_key": object_key,
+        "request_id": str(request_id) if request_id else None,
+        "attachment_id": str(attachment_id) if attachment_id else None,
+        "details": _safe_details(details),
+        "responsible": responsible,
+    }
+    try:
+        celery_app.send_task("app.workers.tasks.security.record_file_security_event", kwargs=event)
+    except Exception:
+        logger.warning("security_audit_enqueue_failed action=%s object_key=%s", action, object_key or "-", exc_info=True)
+        record_file_security_event(db, allowed=True, persist_now=True, **event)
+
+
 def record_pii_access_event(
     db: Session,
     *,
@@ -1,18 +1,24 @@
 from __future__ import annotations
 
+import threading
+import time
 from collections import defaultdict
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 from typing import Any
 
+from sqlalchemy import case, exists, extract, func, inspect as sa_inspect, or_, select, update
+from sqlalchemy import event as sa_event
 from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import set_committed_value
 
-from app.models.message import Message
+from app.core.config import settings
 from app.models.request import Request
 from app.models.status import Status
 from app.models.status_history import StatusHistory
 from app.models.topic_status_transition import TopicStatusTransition
+from app.services.reference_data import get_reference_data, terminal_status_codes
+from app.services.status_flow import bulk_write_values, transition_topic_codes
 
-DEFAULT_TERMINAL_STATUS_CODES = {"RESOLVED", "CLOSED", "REJECTED"}
 DEFAULT_SLA_HOURS_BY_STATUS = {
     "NEW": 24,
     "IN_PROGRESS": 72,
@@ -21,11 +27,8 @@ DEFAULT_SLA_HOURS_BY_STATUS = {
 }
 DEFAULT_SLA_HOURS = 72
 
-
-def _terminal_status_codes(db: Session) -> set[str]:
-    rows = db.query(Status.code).filter(Status.is_terminal.is_(True)).all()
-    codes = {str(code).strip() for (code,) in rows if code}
-    return codes or set(DEFAULT_TERMINAL_STATUS_CODES)
+_snapshot_lock = threading.Lock()
+_snapshot_cache: dict[str, Any] = {"expires_at": 0.0, "value": None}
 
 
 def _as_utc(value: datetime | None, fallback: datetime) -> datetime:
@@ -36,61 +39,339 @@ def _as_utc(value: datetime | None, fallback: datetime) -> datetime:
     return value.astimezone(timezone.utc)
 
 
-def _load_topic_sla_maps(db: Session) -> tuple[dict[tuple[str, str], int], dict[tuple[str, str, str], int]]:
-    rows = (
+def _outgoing_sla_map(db: Session) -> dict[tuple[str, str], int]:
+    outgoing_sla: dict[tuple[str, str], int] = {}
+    for topic, rules in get_reference_data(db).transitions_by_topic.items():
+        for rule in rules:
+            sla = int(rule.sla_hours or 0)
+            if sla <= 0:
+                continue
+            key = (topic, rule.from_status)
+            if key not in outgoing_sla or sla < outgoing_sla[key]:
+                outgoing_sla[key] = sla
+    return outgoing_sla
+
+
+def _threshold_hours(outgoing_sla_map: dict[tuple[str, str], int], topic_code: str, status_code: str) -> int:
+    return int(
+        outgoing_sla_map.get(
+            (topic_code, status_code),
+            DEFAULT_SLA_HOURS_BY_STATUS.get(status_code, DEFAULT_SLA_HOURS),
+        )
+    )
+
+
+def _current_status_started_at(
+    status_code: str,
+    history: list[tuple[str | None, datetime | None]],
+    fallback: datetime,
+    now_utc: datetime,
+) -> datetime:
+    if status_code and history:
+        for to_status, created_at in reversed(history):
+            if str(to_status or "").strip() == status_code:
+                return _as_utc(created_at, now_utc)
+    return _as_utc(fallback, now_utc)
+
+
+def invalidate_sla_snapshot() -> None:
+    with _snapshot_lock:
+        _snapshot_cache["expires_at"] = 0.0
+        _snapshot_cache["value"] = None
+
+
+def sla_hours_for_status(db: Session, topic_code: str | None, status_code: str | None) -> int:
+    status = str(status_code or "").strip()
+    sla = get_reference_data(db).outgoing_sla_hours(topic_code, status) if status else None
+    if sla:
+        return int(sla)
+    return int(DEFAULT_SLA_HOURS_BY_STATUS.get(status, DEFAULT_SLA_HOURS))
+
+
+def track_request_sla(db: Session, request: Request, *, entered_at: datetime | None = None) -> None:
+    now_utc = datetime.now(timezone.utc)
+    entered = _as_utc(entered_at, now_utc)
+    status_code = str(request.status_code or "").strip()
+    request.status_entered_at = entered
+    if status_code in terminal_status_codes(db):
+        request.sla_deadline_at = None
+    else:
+        request.sla_deadline_at = entered + timedelta(hours=sla_hours_for_status(db, request.topic_code, status_code))
+    invalidate_sla_snapshot()
+
+
+def _clear_sla_deadlines(
+    conn,
+    *,
+    topics: set[str] | None = None,
+    status_codes: set[str] | None = None,
+    request_ids: set[Any] | None = None,
+    everything: bool = False,
+) -> None:
+    # backfill_sla_state recomputes cleared deadlines from status_entered_at on the next sla_check run.
+    scopes = []
+    if topics:
+        scopes.append(Request.topic_code.in_(sorted(topics)))
+    if status_codes:
+        scopes.append(Request.status_code.in_(sorted(status_codes)))
+    if request_ids:
+        scopes.append(Request.id.in_(list(request_ids)))
+    if not (everything or scopes):
+        return
+    statement = update(Request).where(Request.sla_deadline_at.is_not(None)).values(sla_deadline_at=None)
+    if not everything:
+        statement = statement.where(or_(*scopes))
+    conn.execute(statement)
+    invalidate_sla_snapshot()
+
+
+def _status_codes(row: Status) -> set[str]:
+    history = sa_inspect(row).attrs.code.history
+    return {str(code or "").strip() for code in (*history.deleted, row.code) if str(code or "").strip()}
+
+
+@sa_event.listens_for(Session, "after_flush")
+def _clear_sla_deadlines_after_config_writes(session: Session, flush_context) -> None:
+    topics: set[str] = set()
+    status_codes: set[str] = set()
+    request_ids: set[Any] = set()
+    for row in (*session.new, *session.deleted):
+        if isinstance(row, TopicStatusTransition):
+            topics |= transition_topic_codes(row)
+        elif isinstance(row, Status):
+            status_codes |= _status_codes(row)
+    for row in session.dirty:
+        if isinstance(row, TopicStatusTransition) and session.is_modified(row, include_collections=False):
+            topics |= transition_topic_codes(row)
+        elif isinstance(row, Status) and any(
+            sa_inspect(row).attrs[name].history.has_changes() for name in ("code", "is_terminal")
+        ):
+            status_codes |= _status_codes(row)
+        elif isinstance(row, Request):
+            attrs = sa_inspect(row).attrs
+            # A status change already recomputed the deadline through track_request_sla.
+            if attrs.topic_code.history.has_changes() and not attrs.status_code.history.has_changes():
+                request_ids.add(row.id)
+                set_committed_value(row, "sla_deadline_at", None)
+    _clear_sla_deadlines(session.connection(), topics=topics, status_codes=status_codes, request_ids=request_ids)
+
+
+@sa_event.listens_for(Session, "do_orm_execute")
+def _clear_sla_deadlines_on_bulk_config_writes(orm_execute_state) -> None:
+    if not (orm_execute_state.is_update or orm_execute_state.is_delete or orm_execute_state.is_insert):
+        return
+    mapper = orm_execute_state.bind_mapper
+    if mapper is None:
+        return
+    if issubclass(mapper.class_, TopicStatusTransition):
+        scope = {"topics": bulk_write_values(orm_execute_state, TopicStatusTransition.topic_code)}
+    elif issubclass(mapper.class_, Status):
+        scope = {"status_codes": bulk_write_values(orm_execute_state, Status.code)}
+    else:
+        return
+    conn = orm_execute_state.session.connection()
+    if any(value is None for value in scope.values()):
+        _clear_sla_deadlines(conn, everything=True)
+    else:
+        _clear_sla_deadlines(conn, **scope)
+
+
+def _pending_sla_rows(
+    db: Session,
+    terminal_codes: set[str],
+    outgoing_sla_map: dict[tuple[str, str], int],
+    now_utc: datetime,
+    *,
+    limit: int | None = None,
+) -> list[dict[str, Any]]:
+    # Active requests whose SLA state has not been materialized yet (legacy rows, rows created outside the API).
+    query = (
         db.query(
-            TopicStatusTransition.topic_code,
-            TopicStatusTransition.from_status,
-            TopicStatusTransition.to_status,
-            TopicStatusTransition.sla_hours,
+            Request.id,
+            Request.track_number,
+            Request.topic_code,
+            Request.status_code,
+            Request.assigned_lawyer_id,
+            Request.status_entered_at,
+            Request.created_at,
+            Request.updated_at,
         )
-        .filter(
-            TopicStatusTransition.enabled.is_(True),
-            TopicStatusTransition.sla_hours.is_not(None),
-            TopicStatusTransition.sla_hours > 0,
+        .filter(Request.status_code.notin_(terminal_codes), Request.sla_deadline_at.is_(None))
+        .order_by(Request.id.asc())
+    )
+    if limit:
+        query = query.limit(int(limit))
+    rows = query.all()
+    if not rows:
+        return []
+
+    missing_ids = [row.id for row in rows if row.status_entered_at is None]
+    history_by_request: dict[Any, list[tuple[str | None, datetime | None]]] = defaultdict(list)
+    if missing_ids:
+        history_rows = (
+            db.query(StatusHistory.request_id, StatusHistory.to_status, StatusHistory.created_at)
+            .filter(StatusHistory.request_id.in_(missing_ids))
+            .order_by(StatusHistory.request_id.asc(), StatusHistory.created_at.asc())
+            .all()
         )
-        .all()
+        for request_id, to_status, created_at in history_rows:
+            history_by_request[request_id].append((to_status, created_at))
+
+    out: list[dict[str, Any]] = []
+    for row in rows:
+        status_code = str(row.status_code or "").strip()
+        topic_code = str(row.topic_code or "").strip()
+        if row.status_entered_at is not None:
+            entered_at = _as_utc(row.status_entered_at, now_utc)
+        else:
+            entered_at = _current_status_started_at(
+                status_code,
+                history_by_request.get(row.id, []),
+                row.updated_at or row.created_at,
+                now_utc,
+            )
+        threshold_hours = _threshold_hours(outgoing_sla_map, topic_code, status_code)
+        out.append(
+            {
+                "id": row.id,
+                "track_number": row.track_number,
+                "topic_code": row.topic_code,
+                "status_code": row.status_code,
+                "assigned_lawyer_id": row.assigned_lawyer_id,
+                "status_entered_at": entered_at,
+                "sla_deadline_at": entered_at + timedelta(hours=threshold_hours),
+            }
+        )
+    return out
+
+
+def backfill_sla_state(db: Session, *, batch_size: int | None = None) -> list[dict[str, Any]]:
+    size = max(1, int(batch_size or getattr(settings, "SLA_BACKFILL_BATCH_SIZE", 500) or 500))
+    now_utc = datetime.now(timezone.utc)
+    outgoing_sla_map = _outgoing_sla_map(db)
+    rows = _pending_sla_rows(db, terminal_status_codes(db), outgoing_sla_map, now_utc, limit=size)
+    if not rows:
+        return []
+    db.execute(
+        update(Request),
+        [
+            {"id": row["id"], "status_entered_at": row["status_entered_at"], "sla_deadline_at": row["sla_deadline_at"]}
+            for row in rows
+        ],
     )
+    invalidate_sla_snapshot()
+    return rows
 
-    outgoing_sla: dict[tuple[str, str], int] = {}
-    exact_sla: dict[tuple[str, str, str], int] = {}
-    for topic_code, from_status, to_status, sla_hours in rows:
-        topic = str(topic_code or "").strip()
-        from_code = str(from_status or "").strip()
-        to_code = str(to_status or "").strip()
-        if not topic or not from_code or not to_code:
-            continue
-        sla = int(sla_hours or 0)
-        if sla <= 0:
-            continue
-        exact_sla[(topic, from_code, to_code)] = sla
-        key = (topic, from_code)
-        if key not in outgoing_sla or sla < outgoing_sla[key]:
-            outgoing_sla[key] = sla
-    return outgoing_sla, exact_sla
-
-
-def _current_status_started_at(req: Request, request_rows: list[StatusHistory], now_utc: datetime) -> datetime:
-    current_status = str(req.status_code or "").strip()
-    if current_status and request_rows:
-        for row in reversed(request_rows):
-            if str(row.to_status or "").strip() == current_status:
-                return _as_utc(row.created_at, now_utc)
-    return _as_utc(req.updated_at or req.created_at, now_utc)
 
+def _overdue_item(row: Any, now_utc: datetime) -> dict[str, Any]:
+    entered_at = _as_utc(row["status_entered_at"], now_utc)
+    deadline_at = _as_utc(row["sla_deadline_at"], now_utc)
+    return {
+        "request_id": str(row["id"]),
+        "track_number": row["track_number"],
+        "topic_code": row["topic_code"],
+        "status_code": row["status_code"],
+        "assigned_lawyer_id": row["assigned_lawyer_id"],
+        "hours_in_status": round((now_utc - entered_at).total_seconds() / 3600.0, 2),
+        "threshold_hours": int(round((deadline_at - entered_at).total_seconds() / 3600.0)),
+    }
 
-def compute_sla_snapshot(
+
+def newly_overdue_requests(
     db: Session,
-    now: datetime | None = None,
     *,
-    include_overdue_requests: bool = False,
-) -> dict[str, Any]:
-    now_utc = _as_utc(now, datetime.now(timezone.utc))
-    terminal_codes = _terminal_status_codes(db)
-    active_requests = db.query(Request).filter(Request.status_code.notin_(terminal_codes)).all()
-    active_request_ids = [row.id for row in active_requests if row.id is not None]
+    since: datetime | None,
+    until: datetime,
+    backfilled: list[dict[str, Any]] | None = None,
+) -> list[dict[str, Any]]:
+    """Requests whose deadline fell into (since, until]; a range scan on the partial sla_deadline_at index."""
+    until_utc = _as_utc(until, datetime.now(timezone.utc))
+    query = db.query(
+        Request.id,
+        Request.track_number,
+        Request.topic_code,
+        Request.status_code,
+        Request.assigned_lawyer_id,
+        Request.status_entered_at,
+        Request.sla_deadline_at,
+    ).filter(Request.sla_deadline_at.is_not(None), Request.sla_deadline_at <= until_utc)
+    if since is not None:
+        query = query.filter(Request.sla_deadline_at > _as_utc(since, until_utc))
+    out = [_overdue_item(row._mapping, until_utc) for row in query.order_by(Request.sla_deadline_at.asc()).all()]
+    seen = {item["request_id"] for item in out}
+    # Deadlines materialized by this run may already lie before the watermark.
+    for row in backfilled or ():
+        if row["sla_deadline_at"] <= until_utc and str(row["id"]) not in seen:
+            out.append(_overdue_item(row, until_utc))
+    return out
+
+
+def _avg_time_in_status_hours(db: Session, active_filter, now_utc: datetime) -> dict[str, float]:
+    now_epoch = now_utc.timestamp()
+    totals: dict[str, list[float]] = defaultdict(lambda: [0.0, 0])
+
+    started = extract("epoch", StatusHistory.created_at)
+    segments = (
+        select(
+            StatusHistory.to_status.label("status_code"),
+            started.label("started"),
+            func.lead(started)
+            .over(partition_by=StatusHistory.request_id, order_by=StatusHistory.created_at.asc())
+            .label("ended"),
+        )
+        .join(Request, Request.id == StatusHistory.request_id)
+        .where(active_filter)
+        .subquery()
+    )
+    duration = func.coalesce(segments.c.ended, now_epoch) - segments.c.started
+    segment_rows = db.execute(
+        select(
+            segments.c.status_code,
+            func.sum(case((duration > 0, duration), else_=0)),
+            func.count(),
+        ).group_by(segments.c.status_code)
+    ).all()
+
+    created = extract("epoch", Request.created_at)
+    without_history = db.execute(
+        select(
+            Request.status_code,
+            func.sum(case((created < now_epoch, now_epoch - created), else_=0)),
+            func.count(),
+        )
+        .where(active_filter, ~exists().where(StatusHistory.request_id == Request.id))
+        .group_by(Request.status_code)
+    ).all()
+
+    for status_code, seconds, count in [*segment_rows, *without_history]:
+        code = str(status_code or "").strip() or "UNKNOWN"
+        totals[code][0] += float(seconds or 0)
+        totals[code][1] += int(count or 0)
+    return {code: round(total / count / 3600.0, 2) for code, (total, count) in totals.items() if count}
+
+
+def _frt_avg_minutes(db: Session, active_filter) -> float | None:
+    delta = extract("epoch", Request.first_lawyer_response_at) - extract("epoch", Request.created_at)
+    total, count = (
+        db.query(func.sum(delta), func.count(Request.id))
+        .filter(
+            active_filter,
+            Request.first_lawyer_response_at.is_not(None),
+            Request.first_lawyer_response_at >= Request.created_at,
+        )
+        .one()
+    )
+    if not count:
+        return None
+    return round(float(total or 0) / int(count) / 60.0, 2)
+
 
-    if not active_request_ids:
+def _build_sla_snapshot(db: Session, now_utc: datetime, include_overdue_requests: bool) -> dict[str, Any]:
+    terminal_codes = terminal_status_codes(db)
+    active_filter = Request.status_code.notin_(terminal_codes)
+    checked = int(db.query(func.count(Request.id)).filter(active_filter).scalar() or 0)
+
+    if not checked:
         result = {
             "checked_active_requests": 0,
             "overdue_total": 0,
@@ -103,100 +384,78 @@ def compute_sla_snapshot(
             result["overdue_requests"] = []
         return result
 
-    status_rows = (
-        db.query(StatusHistory)
-        .filter(StatusHistory.request_id.in_(active_request_ids))
-        .order_by(StatusHistory.request_id.asc(), StatusHistory.created_at.asc())
-        .all()
-    )
-    rows_by_request: dict[str, list[StatusHistory]] = defaultdict(list)
-    for row in status_rows:
-        rows_by_request[str(row.request_id)].append(row)
-
-    outgoing_sla_map, _ = _load_topic_sla_maps(db)
+    outgoing_sla_map = _outgoing_sla_map(db)
+    pending = _pending_sla_rows(db, terminal_codes, outgoing_sla_map, now_utc)
 
     overdue_by_status: dict[str, int] = defaultdict(int)
     overdue_by_transition: dict[str, int] = defaultdict(int)
-    overdue_requests: list[dict[str, Any]] = []
-    for req in active_requests:
-        status_code = str(req.status_code or "").strip() or "UNKNOWN"
-        topic_code = str(req.topic_code or "").strip()
-        threshold_hours = outgoing_sla_map.get(
-            (topic_code, status_code),
-            int(DEFAULT_SLA_HOURS_BY_STATUS.get(status_code, DEFAULT_SLA_HOURS)),
-        )
-        status_started_at = _current_status_started_at(req, rows_by_request.get(str(req.id), []), now_utc)
-        hours_in_status = (now_utc - status_started_at).total_seconds() / 3600.0
-        if hours_in_status > threshold_hours:
-            overdue_by_status[status_code] += 1
-            transition_key = f"{topic_code or '*'}:{status_code}->*"
-            overdue_by_transition[transition_key] += 1
-            if include_overdue_requests:
-                overdue_requests.append(
-                    {
-                        "request_id": str(req.id),
-                        "track_number": req.track_number,
-                        "topic_code": req.topic_code,
-                        "status_code": req.status_code,
-                        "assigned_lawyer_id": req.assigned_lawyer_id,
-                        "hours_in_status": round(hours_in_status, 2),
-                        "threshold_hours": int(threshold_hours),
-                    }
-                )
-
-    first_response_rows = (
-        db.query(Message.request_id, Message.created_at)
-        .filter(
-            Message.author_type == "LAWYER",
-            Message.request_id.in_(active_request_ids),
-        )
-        .order_by(Message.request_id.asc(), Message.created_at.asc())
+
+    def _count_overdue(topic_code: str | None, status_code: str | None, count: int) -> None:
+        status = str(status_code or "").strip() or "UNKNOWN"
+        topic = str(topic_code or "").strip()
+        overdue_by_status[status] += count
+        overdue_by_transition[f"{topic or '*'}:{status}->*"] += count
+
+    overdue_filter = (active_filter, Request.sla_deadline_at.is_not(None), Request.sla_deadline_at < now_utc)
+    grouped = (
+        db.query(Request.topic_code, Request.status_code, func.count(Request.id))
+        .filter(*overdue_filter)
+        .group_by(Request.topic_code, Request.status_code)
         .all()
     )
-    first_response_map = {}
-    for request_id, created_at in first_response_rows:
-        key = str(request_id)
-        if key not in first_response_map and created_at is not None:
-            first_response_map[key] = created_at
-
-    frt_minutes: list[float] = []
-    for req in active_requests:
-        first_response_at = first_response_map.get(str(req.id))
-        if not first_response_at or not req.created_at:
-            continue
-        first_dt = _as_utc(first_response_at, now_utc)
-        req_created = _as_utc(req.created_at, now_utc)
-        delta_min = (first_dt - req_created).total_seconds() / 60.0
-        if delta_min >= 0:
-            frt_minutes.append(delta_min)
-
-    durations_by_status: dict[str, list[float]] = defaultdict(list)
-    for req in active_requests:
-        request_rows = rows_by_request.get(str(req.id), [])
-        if not request_rows:
-            started_at = _as_utc(req.created_at, now_utc)
-            status_code = str(req.status_code or "").strip() or "UNKNOWN"
-            durations_by_status[status_code].append(max((now_utc - started_at).total_seconds() / 3600.0, 0.0))
-            continue
-
-        for idx, row in enumerate(request_rows):
-            start = _as_utc(row.created_at, now_utc)
-            end_raw = request_rows[idx + 1].created_at if idx + 1 < len(request_rows) else now_utc
-            end = _as_utc(end_raw, now_utc)
-            status_code = str(row.to_status or "").strip() or "UNKNOWN"
-            duration_hours = max((end - start).total_seconds() / 3600.0, 0.0)
-            durations_by_status[status_code].append(duration_hours)
+    for topic_code, status_code, count in grouped:
+        _count_overdue(topic_code, status_code, int(count or 0))
+    pending_overdue = [row for row in pending if row["sla_deadline_at"] < now_utc]
+    for row in pending_overdue:
+        _count_overdue(row["topic_code"], row["status_code"], 1)
 
     result = {
-        "checked_active_requests": int(len(active_requests)),
+        "checked_active_requests": checked,
         "overdue_total": int(sum(overdue_by_status.values())),
         "overdue_by_status": dict(overdue_by_status),
         "overdue_by_transition": dict(overdue_by_transition),
-        "frt_avg_minutes": round(sum(frt_minutes) / len(frt_minutes), 2) if frt_minutes else None,
-        "avg_time_in_status_hours": {
-            code: round(sum(values) / len(values), 2) for code, values in durations_by_status.items() if values
-        },
+        "frt_avg_minutes": _frt_avg_minutes(db, active_filter),
+        "avg_time_in_status_hours": _avg_time_in_status_hours(db, active_filter, now_utc),
     }
     if include_overdue_requests:
-        result["overdue_requests"] = overdue_requests
+        rows = (
+            db.query(
+                Request.id,
+                Request.track_number,
+                Request.topic_code,
+                Request.status_code,
+                Request.assigned_lawyer_id,
+                Request.status_entered_at,
+                Request.sla_deadline_at,
+            )
+            .filter(*overdue_filter)
+            .order_by(Request.sla_deadline_at.asc())
+            .all()
+        )
+        result["overdue_requests"] = [_overdue_item(row._mapping, now_utc) for row in rows] + [
+            _overdue_item(row, now_utc) for row in pending_overdue
+        ]
+    return result
+
+
+def compute_sla_snapshot(
+    db: Session,
+    now: datetime | None = None,
+    *,
+    include_overdue_requests: bool = False,
+    use_cache: bool = False,
+) -> dict[str, Any]:
+    now_utc = _as_utc(now, datetime.now(timezone.utc))
+    ttl = max(0, int(getattr(settings, "SLA_SNAPSHOT_CACHE_SECONDS", 0) or 0))
+    cacheable = use_cache and ttl > 0 and now is None and not include_overdue_requests
+    if cacheable:
+        with _snapshot_lock:
+            cached = _snapshot_cache["value"]
+            if cached is not None and _snapshot_cache["expires_at"] > time.monotonic():
+                return dict(cached)
+    result = _build_sla_snapshot(db, now_utc, include_overdue_requests)
+    if cacheable:
+        with _snapshot_lock:
+            _snapshot_cache["value"] = dict(result)
+            _snapshot_cache["expires_at"] = time.monotonic() + ttl
     return result
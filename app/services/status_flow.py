@@ -1,8 +1,10 @@
 from __future__ import annotations
 
+from sqlalchemy import inspect as sa_inspect, select
 from sqlalchemy.orm import Session
 
 from app.models.topic_status_transition import TopicStatusTransition
+from app.services.reference_data import get_reference_data
 
 
 def transition_allowed_for_topic(
@@ -11,36 +13,33 @@ def transition_allowed_for_topic(
     from_status: str,
     to_status: str,
 ) -> bool:
-    from_code = str(from_status or "").strip()
-    to_code = str(to_status or "").strip()
-    if not from_code or not to_code:
-        return False
-    if from_code == to_code:
-        return True
-
-    topic = str(topic_code or "").strip()
-    if not topic:
-        return True
-
-    has_any_rules = (
-        db.query(TopicStatusTransition.id)
-        .filter(
-            TopicStatusTransition.topic_code == topic,
-            TopicStatusTransition.enabled.is_(True),
-        )
-        .first()
-    )
-    if has_any_rules is None:
-        return True
-
-    matched = (
-        db.query(TopicStatusTransition.id)
-        .filter(
-            TopicStatusTransition.topic_code == topic,
-            TopicStatusTransition.from_status == from_code,
-            TopicStatusTransition.to_status == to_code,
-            TopicStatusTransition.enabled.is_(True),
-        )
-        .first()
-    )
-    return matched is not None
+    return get_reference_data(db).transition_allowed(topic_code, from_status, to_status)
+
+
+def transition_topic_codes(row: TopicStatusTransition) -> set[str]:
+    """Topics a flushed transition row belongs to, before and after the write."""
+    history = sa_inspect(row).attrs.topic_code.history
+    return {str(code or "").strip() for code in (*history.deleted, row.topic_code) if str(code or "").strip()}
+
+
+def bulk_write_values(orm_execute_state, column) -> set[str] | None:
+    """Values of `column` a bulk statement on its model touches; None when it cannot be narrowed."""
+    statement = orm_execute_state.statement
+    params = orm_execute_state.parameters
+    rows = [row for row in (params if isinstance(params, list) else [params]) if isinstance(row, dict)]
+    values = {str(row.get(column.key) or "").strip() for row in rows}
+    values.add(str(statement.compile().params.get(column.key) or "").strip())
+    if not orm_execute_state.is_insert:
+        where = statement.whereclause
+        ids = [row["id"] for row in rows if row.get("id") is not None]
+        if where is None and not ids:
+            return None
+        # Runs before the statement, so this still sees the rows as they were.
+        query = select(column).distinct()
+        query = query.where(where) if where is not None else query.where(column.class_.id.in_(ids))
+        current = orm_execute_state.session.connection().execute(query).scalars()
+        values |= {str(value or "").strip() for value in current}
+    values.discard("")
+    if orm_execute_state.is_insert and not values:
+        return None
+    return values
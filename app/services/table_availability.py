@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+import hashlib
+from dataclasses import dataclass
+from datetime import datetime
+
+from sqlalchemy.orm import Session
+
+from app.models.table_availability import TableAvailability
+from app.services.versioned_cache import VersionedSnapshotCache
+
+
+@dataclass(frozen=True)
+class TableAvailabilityRef:
+    table_name: str
+    is_active: bool
+    responsible: str | None
+    updated_at: datetime | None
+
+
+@dataclass(frozen=True)
+class TableAvailabilitySnapshot:
+    rows: dict[str, TableAvailabilityRef]
+    # Content hash, identical across processes for identical rows; feeds the admin meta ETags.
+    digest: str
+
+    def get(self, table_name: str) -> TableAvailabilityRef | None:
+        return self.rows.get(table_name)
+
+    def is_active(self, table_name: str) -> bool:
+        row = self.rows.get(table_name)
+        return True if row is None else row.is_active
+
+
+def _load_snapshot(db: Session) -> TableAvailabilitySnapshot:
+    rows = {
+        str(row.table_name): TableAvailabilityRef(
+            table_name=str(row.table_name),
+            is_active=bool(row.is_active),
+            responsible=row.responsible,
+            updated_at=row.updated_at,
+        )
+        for row in db.query(TableAvailability).all()
+        if row and row.table_name
+    }
+    digest = hashlib.sha256()
+    for name in sorted(rows):
+        ref = rows[name]
+        digest.update(f"{name}|{int(ref.is_active)}|{ref.responsible or ''}|{ref.updated_at or ''}\n".encode("utf-8"))
+    return TableAvailabilitySnapshot(rows=rows, digest=digest.hexdigest()[:16])
+
+
+_cache: VersionedSnapshotCache[TableAvailabilitySnapshot] = VersionedSnapshotCache(
+    "table_availability", _load_snapshot, (TableAvailability,)
+)
+
+
+def get_table_availability(db: Session) -> TableAvailabilitySnapshot:
+    return _cache.get(db)
+
+
+def invalidate_table_availability(*, broadcast: bool = True) -> None:
+    _cache.invalidate(broadcast=broadcast)
@@ -1,10 +1,33 @@
 from __future__ import annotations
 
-from typing import Any
+import logging
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable
 
 import httpx
+from sqlalchemy import and_, delete, func, or_
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
 
 from app.core.config import settings
+from app.models.telegram_outbox import TelegramOutboxMessage
+
+OUTBOX_PENDING = "PENDING"
+OUTBOX_SENDING = "SENDING"
+OUTBOX_SENT = "SENT"
+OUTBOX_FAILED = "FAILED"
+
+# Telegram rejects sendMessage texts longer than this.
+_TELEGRAM_TEXT_LIMIT = 4096
+_COALESCE_SEPARATOR = "\n\n"
+_STALE_PENDING_SECONDS = 600
+
+logger = logging.getLogger("app.telegram")
+
+_client_lock = threading.Lock()
+_client: httpx.Client | None = None
 
 
 def _telegram_enabled() -> bool:
@@ -18,7 +41,31 @@ def _telegram_enabled() -> bool:
     return True
 
 
-def send_telegram_message(text: str) -> dict[str, Any]:
+def _http_client() -> httpx.Client:
+    global _client
+    with _client_lock:
+        if _client is None:
+            # One keep-alive pool per process instead of a TLS handshake per message.
+            _client = httpx.Client(
+                timeout=float(settings.TELEGRAM_HTTP_TIMEOUT_SECONDS or 5.0),
+                limits=httpx.Limits(max_connections=8, max_keepalive_connections=4),
+            )
+        return _client
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _as_utc(value: datetime | None) -> datetime | None:
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+def send_telegram_message(text: str, *, chat_id: str | None = None) -> dict[str, Any]:
     payload_text = str(text or "").strip()
     if not payload_text:
         return {"ok": False, "sent": False, "reason": "empty_text"}
@@ -29,24 +76,278 @@ def send_telegram_message(text: str) -> dict[str, Any]:
         return {"ok": True, "sent": False, "mocked": True}
 
     token = str(settings.TELEGRAM_BOT_TOKEN).strip()
-    chat_id = str(settings.TELEGRAM_CHAT_ID).strip()
+    target_chat = str(chat_id or settings.TELEGRAM_CHAT_ID).strip()
     url = f"https://api.telegram.org/bot{token}/sendMessage"
 
     try:
-        with httpx.Client(timeout=5.0) as client:
-            response = client.post(
-                url,
-                json={
-                    "chat_id": chat_id,
-                    "text": payload_text,
-                    "disable_web_page_preview": True,
-                },
-            )
+        response = _http_client().post(
+            url,
+            json={
+                "chat_id": target_chat,
+                "text": payload_text,
+                "disable_web_page_preview": True,
+            },
+        )
         data = response.json() if response.content else {}
         if response.status_code >= 400 or not bool(data.get("ok")):
             print(f"[TELEGRAM ERROR] status={response.status_code} body={data}")
-            return {"ok": False, "sent": False, "status_code": response.status_code, "response": data}
+            result: dict[str, Any] = {"ok": False, "sent": False, "status_code": response.status_code, "response": data}
+            parameters = data.get("parameters") if isinstance(data, dict) else None
+            if response.status_code == 429 and isinstance(parameters, dict) and parameters.get("retry_after"):
+                result["retry_after"] = int(parameters["retry_after"])
+            return result
         return {"ok": True, "sent": True}
     except Exception as exc:
         print(f"[TELEGRAM ERROR] {exc}")
         return {"ok": False, "sent": False, "error": str(exc)}
+
+
+def enqueue_telegram_message(db: Session, text: str, *, chat_id: str | None = None) -> dict[str, Any]:
+    """Queue a message in the caller's transaction; the outbox worker delivers it after commit."""
+    payload_text = str(text or "").strip()
+    if not payload_text:
+        return {"ok": False, "queued": False, "reason": "empty_text"}
+    if not _telegram_enabled():
+        print(f"[TELEGRAM MOCK] {payload_text}")
+        return {"ok": True, "queued": False, "mocked": True}
+    db.add(
+        TelegramOutboxMessage(
+            chat_id=str(chat_id or settings.TELEGRAM_CHAT_ID).strip(),
+            text=payload_text[:_TELEGRAM_TEXT_LIMIT],
+            status=OUTBOX_PENDING,
+            attempts=0,
+            responsible="Система уведомлений",
+        )
+    )
+    return {"ok": True, "queued": True}
+
+
+def _coalesced_batches(rows: list[tuple[Any, str]]) -> list[list[tuple[Any, str]]]:
+    batches: list[list[tuple[Any, str]]] = []
+    size = 0
+    for row in rows:
+        length = len(row[1])
+        if batches and size + len(_COALESCE_SEPARATOR) + length <= _TELEGRAM_TEXT_LIMIT:
+            batches[-1].append(row)
+            size += len(_COALESCE_SEPARATOR) + length
+            continue
+        batches.append([row])
+        size = length
+    return batches
+
+
+def _retry_delay_seconds(attempts: int) -> int:
+    base = max(1, int(settings.TELEGRAM_OUTBOX_RETRY_BASE_SECONDS or 30))
+    ceiling = max(base, int(settings.TELEGRAM_OUTBOX_RETRY_MAX_SECONDS or 3600))
+    return min(ceiling, base * (2 ** max(0, attempts - 1)))
+
+
+def _schedule_retry(rows: list[TelegramOutboxMessage], error: str, now: datetime) -> int:
+    max_attempts = max(1, int(settings.TELEGRAM_OUTBOX_MAX_ATTEMPTS or 8))
+    failed = 0
+    for row in rows:
+        row.attempts = int(row.attempts or 0) + 1
+        row.last_error = error[:500]
+        row.updated_at = now
+        if row.attempts >= max_attempts:
+            row.status = OUTBOX_FAILED
+            row.next_attempt_at = None
+            failed += 1
+        else:
+            row.status = OUTBOX_PENDING
+            row.next_attempt_at = now + timedelta(seconds=_retry_delay_seconds(row.attempts))
+    return failed
+
+
+def _due_filter(now: datetime):
+    # In-flight rows keep their lease expiry in next_attempt_at; a worker that died mid-send is re-claimed after it.
+    return or_(
+        and_(
+            TelegramOutboxMessage.status == OUTBOX_PENDING,
+            or_(TelegramOutboxMessage.next_attempt_at.is_(None), TelegramOutboxMessage.next_attempt_at <= now),
+        ),
+        and_(TelegramOutboxMessage.status == OUTBOX_SENDING, TelegramOutboxMessage.next_attempt_at <= now),
+    )
+
+
+def _claim_due_rows(db: Session, size: int, now: datetime, lease_until: datetime) -> list[tuple[Any, str, str]]:
+    rows = (
+        db.query(TelegramOutboxMessage)
+        .filter(_due_filter(now))
+        .order_by(TelegramOutboxMessage.created_at.asc(), TelegramOutboxMessage.id.asc())
+        .limit(size)
+        .with_for_update(skip_locked=True)
+        .all()
+    )
+    claimed = []
+    for row in rows:
+        row.status = OUTBOX_SENDING
+        row.next_attempt_at = lease_until
+        row.updated_at = now
+        claimed.append((row.id, str(row.chat_id), row.text or ""))
+    return claimed
+
+
+def _leased_rows(db: Session, ids: list[Any], lease_until: datetime) -> list[TelegramOutboxMessage]:
+    # Rows whose lease ran out may already belong to another worker; leave those alone.
+    return (
+        db.query(TelegramOutboxMessage)
+        .filter(
+            TelegramOutboxMessage.id.in_(ids),
+            TelegramOutboxMessage.status == OUTBOX_SENDING,
+            TelegramOutboxMessage.next_attempt_at == lease_until,
+        )
+        .with_for_update()
+        .all()
+    )
+
+
+def _release_rows(db: Session, ids: list[Any], lease_until: datetime, next_attempt_at: datetime | None) -> None:
+    for row in _leased_rows(db, ids, lease_until):
+        row.status = OUTBOX_PENDING
+        row.next_attempt_at = next_attempt_at
+    db.commit()
+
+
+def deliver_telegram_outbox(
+    db: Session,
+    *,
+    batch_size: int | None = None,
+    sleep: Callable[[float], None] = time.sleep,
+) -> dict[str, Any]:
+    """Send due outbox rows, one coalesced sendMessage per chat where possible, pacing and backing off on 429.
+
+    Rows are leased in a short claim transaction and each result is recorded in its own one, so no row locks
+    are held while Telegram is being called.
+    """
+    stats: dict[str, Any] = {"picked": 0, "requests": 0, "sent": 0, "deferred": 0, "failed": 0, "purged": 0}
+    if not _telegram_enabled():
+        stats["disabled"] = True
+        return stats
+    size = max(1, int(batch_size or settings.TELEGRAM_OUTBOX_BATCH_SIZE or 200))
+    now = _utcnow()
+    lease_until = now + timedelta(seconds=max(1, int(settings.TELEGRAM_OUTBOX_LEASE_SECONDS or 900)))
+    claimed = _claim_due_rows(db, size, now, lease_until)
+
+    retention = max(1, int(settings.TELEGRAM_OUTBOX_RETENTION_HOURS or 72))
+    stats["purged"] = int(
+        db.execute(
+            delete(TelegramOutboxMessage)
+            .where(
+                TelegramOutboxMessage.status == OUTBOX_SENT,
+                TelegramOutboxMessage.sent_at < now - timedelta(hours=retention),
+            )
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        or 0
+    )
+    db.commit()
+
+    stats["picked"] = len(claimed)
+    by_chat: dict[str, list[tuple[Any, str]]] = {}
+    for row_id, chat_id, text in claimed:
+        by_chat.setdefault(chat_id, []).append((row_id, text))
+
+    interval = max(0.0, float(settings.TELEGRAM_OUTBOX_SEND_INTERVAL_MS or 0) / 1000.0)
+    # Stop early enough that a slow final request still finishes inside the lease.
+    send_deadline = lease_until - timedelta(seconds=float(settings.TELEGRAM_HTTP_TIMEOUT_SECONDS or 5.0))
+    last_sent: float | None = None
+    blocked_until: datetime | None = None
+    for chat_id, chat_rows in by_chat.items():
+        for batch in _coalesced_batches(chat_rows):
+            ids = [row_id for row_id, _ in batch]
+            if blocked_until is not None or _utcnow() >= send_deadline:
+                # Telegram asked us to back off or the lease is running out; keep the rest without spending an attempt.
+                _release_rows(db, ids, lease_until, blocked_until)
+                stats["deferred"] += len(batch)
+                continue
+            if last_sent is not None and interval:
+                wait = interval - (time.monotonic() - last_sent)
+                if wait > 0:
+                    sleep(wait)
+            result = send_telegram_message(_COALESCE_SEPARATOR.join(text for _, text in batch), chat_id=chat_id)
+            last_sent = time.monotonic()
+            stats["requests"] += 1
+            sent_at = _utcnow()
+            if result.get("sent"):
+                for row in _leased_rows(db, ids, lease_until):
+                    row.status = OUTBOX_SENT
+                    row.sent_at = sent_at
+                    row.next_attempt_at = None
+                    row.updated_at = sent_at
+                db.commit()
+                stats["sent"] += len(batch)
+            elif result.get("retry_after"):
+                blocked_until = sent_at + timedelta(seconds=int(result["retry_after"]))
+                _release_rows(db, ids, lease_until, blocked_until)
+                stats["deferred"] += len(batch)
+            else:
+                error = str(result.get("error") or result.get("response") or result.get("status_code") or "send_failed")
+                stats["failed"] += _schedule_retry(_leased_rows(db, ids, lease_until), error, sent_at)
+                db.commit()
+
+    if stats["picked"]:
+        logger.info(
+            "telegram outbox picked=%s requests=%s sent=%s deferred=%s failed=%s",
+            stats["picked"],
+            stats["requests"],
+            stats["sent"],
+            stats["deferred"],
+            stats["failed"],
+        )
+    return stats
+
+
+def telegram_outbox_health(db: Session) -> dict[str, Any]:
+    enabled = _telegram_enabled()
+    now = _utcnow()
+    try:
+        by_status = {
+            str(status): int(count or 0)
+            for status, count in db.query(TelegramOutboxMessage.status, func.count(TelegramOutboxMessage.id))
+            .group_by(TelegramOutboxMessage.status)
+            .all()
+        }
+        due = int(
+            db.query(func.count(TelegramOutboxMessage.id))
+            .filter(_due_filter(now))
+            .scalar()
+            or 0
+        )
+        oldest = (
+            db.query(func.min(TelegramOutboxMessage.created_at))
+            .filter(TelegramOutboxMessage.status.in_([OUTBOX_PENDING, OUTBOX_SENDING]))
+            .scalar()
+        )
+    except SQLAlchemyError:
+        return {
+            "status": "degraded",
+            "enabled": enabled,
+            "pending": 0,
+            "due": 0,
+            "failed": 0,
+            "sent": 0,
+            "oldest_pending_age_seconds": None,
+            "issues": ["Таблица очереди Telegram недоступна"],
+        }
+    oldest_at = _as_utc(oldest)
+    oldest_age = int((now - oldest_at).total_seconds()) if oldest_at is not None else None
+    pending = by_status.get(OUTBOX_PENDING, 0) + by_status.get(OUTBOX_SENDING, 0)
+    failed = by_status.get(OUTBOX_FAILED, 0)
+    issues: list[str] = []
+    if not enabled:
+        issues.append("Telegram не настроен: уведомления выводятся в лог")
+    if failed:
+        issues.append(f"Не доставлено после всех попыток: {failed}")
+    if oldest_age is not None and oldest_age > _STALE_PENDING_SECONDS:
+        issues.append(f"Очередь не разбирается: старейшее сообщение ждет {oldest_age} с")
+    return {
+        "status": "degraded" if (failed or (oldest_age or 0) > _STALE_PENDING_SECONDS) else "ok",
+        "enabled": enabled,
+        "pending": pending,
+        "due": due,
+        "failed": failed,
+        "sent": by_status.get(OUTBOX_SENT, 0),
+        "oldest_pending_age_seconds": oldest_age,
+        "issues": issues,
+    }
@@ -1,13 +1,33 @@
+import base64
+import json
 import uuid
+from dataclasses import dataclass
 from datetime import date, datetime, timezone
 from datetime import timedelta
 from decimal import Decimal, InvalidOperation
+from typing import Any
 
 from fastapi import HTTPException
-from sqlalchemy import asc, desc
+from sqlalchemy import and_, asc, desc, false, inspect as sa_inspect, or_
+from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.orm import Query
 
 from app.schemas.universal import UniversalQuery
+from app.services.search_index import search_clause, search_kind, search_relevance
+
+TOTAL_EXACT = "exact"
+TOTAL_ESTIMATED = "estimated"
+TOTAL_SKIP = "skip"
+# Below this planner estimate an exact COUNT is cheap enough and avoids visibly wrong small totals.
+_EXACT_COUNT_BELOW = 10_000
+
+
+@dataclass(frozen=True)
+class UniversalPage:
+    rows: list[Any]
+    total: int | None
+    total_mode: str
+    next_cursor: str | None
 
 
 def _bad_filter_value(column_key: str, kind: str) -> HTTPException:
@@ -128,7 +148,30 @@ def _is_date_only_filter_literal(raw_value) -> bool:
         return False
 
 
+def _dialect_name(q: Query) -> str:
+    try:
+        return q.session.get_bind().dialect.name
+    except Exception:
+        return ""
+
+
+def _search_filters(model, uq: UniversalQuery) -> list[tuple[Any, Any, str]]:
+    # (column, value, search kind) for "~" filters on indexed search columns.
+    terms = []
+    for f in uq.filters:
+        kind = search_kind(model, f.field) if f.op == "~" else None
+        col = getattr(model, f.field, None) if kind else None
+        if col is not None:
+            terms.append((col, f.value, kind))
+    return terms
+
+
+def _orders_by_relevance(model, uq: UniversalQuery) -> bool:
+    return not uq.sort and bool(_search_filters(model, uq))
+
+
 def apply_universal_query(q: Query, model, uq: UniversalQuery) -> Query:
+    dialect = _dialect_name(q)
     for f in uq.filters:
         col = getattr(model, f.field, None)
         if col is None:
@@ -154,10 +197,165 @@ def apply_universal_query(q: Query, model, uq: UniversalQuery) -> Query:
         elif f.op == "<=":
             q = q.filter(col <= value)
         elif f.op == "~":
-            q = q.filter(col.ilike(f"%{value}%"))
+            q = q.filter(search_clause(col, value, kind=search_kind(model, f.field), dialect=dialect))
+    # Only the requested sort: callers that page themselves add their own order after this.
+    for col, descending, nullable in _requested_sort_keys(model, uq):
+        q = q.order_by(_order_clause(col, descending, nullable))
+    return q
+
+
+def _page_order(q: Query, model, uq: UniversalQuery, keys: list[tuple[Any, bool, bool]]) -> Query:
+    # Relevance ranking for unsorted searches, then the primary-key tie-breakers apply_universal_query left out.
+    if _orders_by_relevance(model, uq):
+        dialect = _dialect_name(q)
+        relevance = [search_relevance(col, value, kind=kind, dialect=dialect) for col, value, kind in _search_filters(model, uq)]
+        q = q.order_by(desc(relevance[0] if len(relevance) == 1 else sum(relevance[1:], relevance[0])))
+    for col, descending, nullable in keys[len(_requested_sort_keys(model, uq)) :]:
+        q = q.order_by(_order_clause(col, descending, nullable))
+    return q
+
+
+def _column_nullable(col) -> bool:
+    try:
+        return bool(col.property.columns[0].nullable)
+    except Exception:
+        return True
+
+
+def _requested_sort_keys(model, uq: UniversalQuery) -> list[tuple[Any, bool, bool]]:
+    # (column, descending, nullable) for uq.sort, unknown and repeated fields dropped.
+    keys: list[tuple[Any, bool, bool]] = []
+    seen: set[str] = set()
     for s in uq.sort:
         col = getattr(model, s.field, None)
-        if col is None:
+        if col is None or s.field in seen:
             continue
-        q = q.order_by(asc(col) if s.dir == "asc" else desc(col))
-    return q
+        seen.add(s.field)
+        keys.append((col, s.dir == "desc", _column_nullable(col)))
+    return keys
+
+
+def _sort_keys(model, uq: UniversalQuery) -> list[tuple[Any, bool, bool]]:
+    # The requested keys plus the primary key columns, so every row has a unique position.
+    keys = _requested_sort_keys(model, uq)
+    seen = {col.key for col, _, _ in keys}
+    descending = keys[-1][1] if keys else False
+    mapper = sa_inspect(model)
+    for column in mapper.primary_key:
+        key = mapper.get_property_by_column(column).key
+        if key not in seen:
+            keys.append((getattr(model, key), descending, False))
+    return keys
+
+
+def _order_clause(col, descending: bool, nullable: bool):
+    if not nullable:
+        return desc(col) if descending else asc(col)
+    # PostgreSQL's default NULL placement, made explicit so SQLite pages identically and keysets stay consistent.
+    return desc(col).nulls_first() if descending else asc(col).nulls_last()
+
+
+def _keyset_after(col, descending: bool, nullable: bool, value):
+    if not nullable:
+        return col < value if descending else col > value
+    if descending:
+        return col.is_not(None) if value is None else col < value
+    return None if value is None else or_(col > value, col.is_(None))
+
+
+def _keyset_equal(col, value):
+    return col.is_(None) if value is None else col == value
+
+
+def _keyset_filter(keys: list[tuple[Any, bool, bool]], values: list[Any]):
+    clauses = []
+    for index, (col, descending, nullable) in enumerate(keys):
+        step = _keyset_after(col, descending, nullable, values[index])
+        if step is None:
+            continue
+        clauses.append(and_(*[_keyset_equal(keys[i][0], values[i]) for i in range(index)], step))
+    return or_(*clauses) if clauses else false()
+
+
+def _sort_signature(keys: list[tuple[Any, bool, bool]]) -> list[str]:
+    return [f"{col.key}:{'desc' if descending else 'asc'}" for col, descending, _ in keys]
+
+
+def _cursor_value(value):
+    if isinstance(value, datetime):
+        return (value if value.tzinfo else value.replace(tzinfo=timezone.utc)).isoformat()
+    if isinstance(value, (date, uuid.UUID, Decimal)):
+        return str(value)
+    return value
+
+
+def encode_universal_cursor(keys: list[tuple[Any, bool, bool]], row) -> str:
+    payload = {"sort": _sort_signature(keys), "keys": [_cursor_value(getattr(row, col.key)) for col, _, _ in keys]}
+    return base64.urlsafe_b64encode(json.dumps(payload, separators=(",", ":")).encode("utf-8")).decode("ascii")
+
+
+def decode_universal_cursor_or_400(keys: list[tuple[Any, bool, bool]], cursor: str) -> list[Any]:
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(str(cursor).encode("ascii")).decode("utf-8"))
+        if not isinstance(payload, dict) or payload.get("sort") != _sort_signature(keys):
+            raise ValueError("sort")
+        values = list(payload.get("keys") or [])
+        if len(values) != len(keys):
+            raise ValueError("keys")
+        return [None if value is None else _coerce_filter_value(col, value) for value, (col, _, _) in zip(values, keys)]
+    except (TypeError, ValueError, UnicodeError, HTTPException):
+        raise HTTPException(status_code=400, detail="Некорректный курсор страницы")
+
+
+def _estimated_count(q: Query) -> int | None:
+    session = q.session
+    bind = session.get_bind()
+    if bind.dialect.name != "postgresql":
+        return None
+    compiled = q.statement.compile(dialect=bind.dialect, compile_kwargs={"render_postcompile": True})
+    try:
+        with session.begin_nested():
+            plan = session.connection().exec_driver_sql(f"EXPLAIN (FORMAT JSON) {compiled}", compiled.params).scalar()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]["Plan"]["Plan Rows"])
+    except (SQLAlchemyError, LookupError, TypeError, ValueError):
+        return None
+
+
+def _page_total(q: Query, mode: str) -> tuple[int | None, str]:
+    if mode == TOTAL_SKIP:
+        return None, TOTAL_SKIP
+    if mode == TOTAL_ESTIMATED:
+        estimate = _estimated_count(q)
+        if estimate is not None and estimate >= _EXACT_COUNT_BELOW:
+            return estimate, TOTAL_ESTIMATED
+    return q.count(), TOTAL_EXACT
+
+
+def paginate_universal_query(q: Query, model, uq: UniversalQuery) -> UniversalPage:
+    """Fetch one page of a query built by apply_universal_query.
+
+    With page.cursor the page continues after the cursor's row (keyset); otherwise page.offset is used.
+    next_cursor is returned whenever more rows follow, so offset clients can switch to cursors at any point;
+    relevance-ranked search results are the exception and page by offset only.
+    """
+    keys = _sort_keys(model, uq)
+    limit = max(0, int(uq.page.limit))
+    # Relevance-ranked search results have no stable column key to resume from; they page by offset only.
+    keyset = not _orders_by_relevance(model, uq)
+    if uq.page.cursor and not keyset:
+        raise HTTPException(status_code=400, detail="Курсор недоступен при сортировке по релевантности поиска")
+    total, total_mode = _page_total(q, uq.page.total_mode)
+    q = _page_order(q, model, uq, keys)
+    if uq.page.cursor:
+        page_query = q.filter(_keyset_filter(keys, decode_universal_cursor_or_400(keys, uq.page.cursor)))
+    else:
+        page_query = q.offset(max(0, int(uq.page.offset)))
+    rows = page_query.limit(limit + 1).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        if rows and keyset:
+            next_cursor = encode_universal_cursor(keys, rows[-1])
+    return UniversalPage(rows=rows, total=total, total_mode=total_mode, next_cursor=next_cursor)
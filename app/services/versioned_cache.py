@@ -0,0 +1,144 @@
+from __future__ import annotations
+
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Generic, TypeVar
+
+from sqlalchemy import event as sa_event
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.services.redis_client import get_redis_client, report_redis_failure, report_redis_success
+
+T = TypeVar("T")
+
+
+@dataclass
+class _CacheState(Generic[T]):
+    data: T | None = None
+    bind: Any = None
+    local_version: int = -1
+    remote_version: str | None = None
+    loaded_at: float = 0.0
+    checked_at: float = 0.0
+
+
+class VersionedSnapshotCache(Generic[T]):
+    """Process-local snapshot of rarely written tables, invalidated by ORM writes to `models`.
+
+    Other processes learn about committed writes through a shared Redis version counter
+    (`<name>:version`); without Redis the snapshot expires after REFERENCE_DATA_TTL_SECONDS.
+    Load errors propagate and leave the previous state untouched.
+    """
+
+    def __init__(self, name: str, loader: Callable[[Session], T], models: tuple[type, ...]):
+        self.name = name
+        self._loader = loader
+        self._models = models
+        self._version_key = f"{name}:version"
+        self._dirty_key = f"{name}_dirty"
+        self._lock = threading.Lock()
+        self._local_version = 0
+        self._state: _CacheState[T] = _CacheState()
+        sa_event.listen(Session, "after_flush", self._mark_writes_after_flush)
+        sa_event.listen(Session, "do_orm_execute", self._mark_bulk_writes)
+        sa_event.listen(Session, "after_commit", self._broadcast_writes_after_commit)
+        sa_event.listen(Session, "after_rollback", self._drop_writes_after_rollback)
+
+    def _remote_version(self) -> str | None:
+        client = get_redis_client(self.name)
+        if client is None:
+            return None
+        try:
+            value = client.get(self._version_key)
+            report_redis_success()
+            return str(value or "0")
+        except Exception:
+            report_redis_failure(self.name)
+            return None
+
+    def _publish_remote_version(self) -> None:
+        client = get_redis_client(self.name)
+        if client is None:
+            return
+        try:
+            client.incr(self._version_key)
+            report_redis_success()
+        except Exception:
+            report_redis_failure(self.name)
+
+    def get(self, db: Session) -> T:
+        bind = db.get_bind()
+        now = time.monotonic()
+        check_every = max(0.0, float(settings.REFERENCE_DATA_VERSION_CHECK_SECONDS or 0))
+        ttl = max(0.0, float(settings.REFERENCE_DATA_TTL_SECONDS or 0))
+        state = self._state
+        with self._lock:
+            data = state.data
+            fresh = data is not None and state.bind is bind and state.local_version == self._local_version
+            remote_version = state.remote_version
+            if fresh and now - state.checked_at < check_every:
+                return data
+        if fresh:
+            # Other processes announce writes by bumping the shared version; without Redis fall back to a TTL.
+            current = self._remote_version()
+            if current is not None:
+                fresh = current == remote_version
+            else:
+                fresh = now - state.loaded_at < ttl
+            if fresh:
+                with self._lock:
+                    state.checked_at = now
+                return data
+
+        version = self._local_version
+        remote = self._remote_version()
+        loaded = self._loader(db)
+        with self._lock:
+            state.data = loaded
+            state.bind = bind
+            state.local_version = version
+            state.remote_version = remote
+            state.loaded_at = now
+            state.checked_at = now
+        return loaded
+
+    def invalidate(self, *, broadcast: bool = True) -> None:
+        with self._lock:
+            self._local_version += 1
+        if broadcast:
+            self._publish_remote_version()
+
+    def reset(self) -> None:
+        with self._lock:
+            self._local_version += 1
+            self._state.data = None
+            self._state.bind = None
+
+    def _touched_by(self, session: Session) -> bool:
+        for rows in (session.new, session.dirty, session.deleted):
+            if any(isinstance(row, self._models) for row in rows):
+                return True
+        return False
+
+    def _mark_writes_after_flush(self, session: Session, flush_context) -> None:
+        if self._touched_by(session):
+            session.info[self._dirty_key] = True
+            self.invalidate(broadcast=False)
+
+    def _mark_bulk_writes(self, orm_execute_state) -> None:
+        if not (orm_execute_state.is_update or orm_execute_state.is_delete or orm_execute_state.is_insert):
+            return
+        mapper = orm_execute_state.bind_mapper
+        if mapper is not None and issubclass(mapper.class_, self._models):
+            orm_execute_state.session.info[self._dirty_key] = True
+            self.invalidate(broadcast=False)
+
+    def _broadcast_writes_after_commit(self, session: Session) -> None:
+        if session.info.pop(self._dirty_key, None):
+            self.invalidate()
+
+    def _drop_writes_after_rollback(self, session: Session) -> None:
+        if session.info.pop(self._dirty_key, None):
+            self.invalidate(broadcast=False)
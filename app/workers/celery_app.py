@@ -8,15 +8,45 @@ celery_app.conf.imports = (
     "app.workers.tasks.assign",
     "app.workers.tasks.sla",
     "app.workers.tasks.security",
+    "app.workers.tasks.chat_crypto",
+    "app.workers.tasks.chat_activity",
+    "app.workers.tasks.kanban",
+    "app.workers.tasks.notifications",
+    "app.workers.tasks.telegram",
     "app.workers.tasks.uploads",
     "app.services.attachment_scan",
+    "app.services.lawyer_metrics",
 )
 
 celery_app.conf.beat_schedule = {
+    "deliver_telegram_outbox": {
+        "task": "app.workers.tasks.telegram.deliver_telegram_outbox",
+        "schedule": float(settings.TELEGRAM_OUTBOX_POLL_SECONDS),
+    },
     "sla_check": {"task": "app.workers.tasks.sla.sla_check", "schedule": 300.0},
     "auto_assign_unclaimed": {"task": "app.workers.tasks.assign.auto_assign_unclaimed", "schedule": 3600.0},
     "cleanup_expired_otps": {"task": "app.workers.tasks.security.cleanup_expired_otps", "schedule": 3600.0},
     "cleanup_pii_retention": {"task": "app.workers.tasks.security.cleanup_pii_retention", "schedule": 86400.0},
     "cleanup_stale_uploads": {"task": "app.workers.tasks.uploads.cleanup_stale_uploads", "schedule": 86400.0},
+    "migrate_legacy_chat_ciphertexts": {
+        "task": "app.workers.tasks.chat_crypto.migrate_legacy_chat_ciphertexts",
+        "schedule": 86400.0,
+    },
+    "reconcile_chat_activity_counters": {
+        "task": "app.workers.tasks.chat_activity.reconcile_chat_activity_counters",
+        "schedule": 86400.0,
+    },
+    "refresh_pending_kanban_cards": {
+        "task": "app.workers.tasks.kanban.refresh_pending_kanban_cards",
+        "schedule": float(settings.KANBAN_CARD_REFRESH_POLL_SECONDS),
+    },
+    "reconcile_kanban_card_projection": {
+        "task": "app.workers.tasks.kanban.reconcile_kanban_card_projection",
+        "schedule": 86400.0,
+    },
+    "reconcile_notification_unread_counters": {
+        "task": "app.workers.tasks.notifications.reconcile_notification_unread_counters",
+        "schedule": 86400.0,
+    },
 }
 celery_app.conf.timezone = "Europe/Moscow"
@@ -9,18 +9,9 @@ from app.models.admin_user import AdminUser
 from app.models.admin_user_topic import AdminUserTopic
 from app.models.audit_log import AuditLog
 from app.models.request import Request
-from app.models.status import Status
+from app.services.reference_data import terminal_status_codes
 from app.workers.celery_app import celery_app
 
-DEFAULT_TERMINAL_STATUS_CODES = {"RESOLVED", "CLOSED", "REJECTED"}
-
-
-def _terminal_status_codes(db) -> set[str]:
-    rows = db.query(Status.code).filter(Status.is_terminal.is_(True)).all()
-    codes = {str(code).strip() for (code,) in rows if code}
-    return codes or set(DEFAULT_TERMINAL_STATUS_CODES)
-
-
 @celery_app.task(name="app.workers.tasks.assign.auto_assign_unclaimed")
 def auto_assign_unclaimed():
     now = datetime.now(timezone.utc)
@@ -30,7 +21,7 @@ def auto_assign_unclaimed():
 
     db = SessionLocal()
     try:
-        terminal_codes = _terminal_status_codes(db)
+        terminal_codes = terminal_status_codes(db)
         active_load_rows = (
             db.query(Request.assigned_lawyer_id, func.count(Request.id))
             .filter(Request.assigned_lawyer_id.is_not(None))
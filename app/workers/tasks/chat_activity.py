@@ -0,0 +1,31 @@
+from __future__ import annotations
+
+from uuid import UUID
+
+from app.db.session import SessionLocal
+from app.services.chat_secure_service import flush_deferred_chat_receipt, reconcile_chat_activity
+from app.workers.celery_app import celery_app
+
+
+@celery_app.task(name="app.workers.tasks.chat_activity.reconcile_chat_activity_counters")
+def reconcile_chat_activity_counters(batch_size: int | None = None):
+    db = SessionLocal()
+    try:
+        return reconcile_chat_activity(db, batch_size=batch_size)
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+@celery_app.task(name="app.workers.tasks.chat_activity.flush_deferred_chat_receipt")
+def flush_deferred_chat_receipt_task(request_id: str, side: str, kind: str):
+    db = SessionLocal()
+    try:
+        return {"changed": flush_deferred_chat_receipt(db, request_id=UUID(request_id), side=side, kind=kind)}
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.services.chat_crypto_migration import (
+    claim_legacy_migration_lease,
+    release_legacy_migration_lease,
+    run_legacy_chat_migration,
+)
+from app.workers.celery_app import celery_app
+
+
+@celery_app.task(name="app.workers.tasks.chat_crypto.migrate_legacy_chat_ciphertexts")
+def migrate_legacy_chat_ciphertexts(
+    checkpoint: str | None = None,
+    batch_size: int | None = None,
+    max_batches: int | None = None,
+    lease: str | None = None,
+):
+    # Beat starts a chain daily; a chain that is still re-enqueuing itself keeps the lease and the new one exits.
+    owner = claim_legacy_migration_lease(lease)
+    if owner is None:
+        return {"skipped": True, "done": False, "continued": False, "checkpoint": checkpoint}
+    db = SessionLocal()
+    try:
+        result = run_legacy_chat_migration(
+            db,
+            checkpoint=checkpoint,
+            batch_size=batch_size,
+            max_batches=max_batches,
+            on_batch=lambda _batch: claim_legacy_migration_lease(owner),
+        )
+    except Exception:
+        db.rollback()
+        release_legacy_migration_lease(owner)
+        raise
+    finally:
+        db.close()
+
+    result["continued"] = False
+    if not result["done"]:
+        migrate_legacy_chat_ciphertexts.apply_async(
+            kwargs={
+                "checkpoint": result["checkpoint"],
+                "batch_size": batch_size,
+                "max_batches": max_batches,
+                "lease": owner,
+            },
+            countdown=max(1, int(getattr(settings, "CHAT_LEGACY_MIGRATION_CONTINUE_DELAY_SECONDS", 5) or 5)),
+        )
+        result["continued"] = True
+    else:
+        release_legacy_migration_lease(owner)
+    return result
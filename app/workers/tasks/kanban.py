@@ -0,0 +1,29 @@
+from __future__ import annotations
+
+from app.db.session import SessionLocal
+from app.services.kanban_cards import reconcile_kanban_cards, refresh_pending_kanban_cards
+from app.workers.celery_app import celery_app
+
+
+@celery_app.task(name="app.workers.tasks.kanban.reconcile_kanban_card_projection")
+def reconcile_kanban_card_projection(batch_size: int | None = None):
+    db = SessionLocal()
+    try:
+        return reconcile_kanban_cards(db, batch_size=batch_size)
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+@celery_app.task(name="app.workers.tasks.kanban.refresh_pending_kanban_cards")
+def refresh_pending_kanban_cards_task(batch_size: int | None = None):
+    db = SessionLocal()
+    try:
+        return refresh_pending_kanban_cards(db, batch_size=batch_size)
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
@@ -0,0 +1,17 @@
+from __future__ import annotations
+
+from app.db.session import SessionLocal
+from app.services.notifications import reconcile_notification_unread_counters as reconcile_counters
+from app.workers.celery_app import celery_app
+
+
+@celery_app.task(name="app.workers.tasks.notifications.reconcile_notification_unread_counters")
+def reconcile_notification_unread_counters():
+    db = SessionLocal()
+    try:
+        return reconcile_counters(db)
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
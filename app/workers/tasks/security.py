@@ -16,8 +16,9 @@ from app.models.request import Request
 from app.models.request_data_requirement import RequestDataRequirement
 from app.models.request_service_request import RequestServiceRequest
 from app.models.security_audit_log import SecurityAuditLog
-from app.models.status import Status
 from app.models.status_history import StatusHistory
+from app.services.reference_data import terminal_status_codes
+from app.services.security_audit import record_file_security_event
 from app.workers.celery_app import celery_app
 
 
@@ -37,6 +38,16 @@ def cleanup_expired_otps():
         db.close()
 
 
+@celery_app.task(name="app.workers.tasks.security.record_file_security_event")
+def record_file_security_event_task(**event):
+    db = SessionLocal()
+    try:
+        record_file_security_event(db, allowed=True, persist_now=True, **event)
+        return {"action": event.get("action"), "object_key": event.get("object_key")}
+    finally:
+        db.close()
+
+
 DEFAULT_RETENTION_POLICIES = {
     "otp_sessions": {"retention_days": 1, "enabled": True, "hard_delete": True, "description": "OTP-сессии"},
     "notifications": {"retention_days": 120, "enabled": True, "hard_delete": True, "description": "Уведомления"},
@@ -86,16 +97,8 @@ def _delete_by_created_at(db, model, *, cutoff: datetime) -> int:
     )
 
 
-def _terminal_status_codes(db) -> set[str]:
-    rows = db.query(Status.code).filter(Status.is_terminal.is_(True)).all()
-    codes = {str(code or "").strip().upper() for (code,) in rows if code}
-    if not codes:
-        return {"DONE", "CLOSED", "RESOLVED", "CANCELED"}
-    return codes
-
-
 def _purge_terminal_requests(db, *, cutoff: datetime) -> dict[str, int]:
-    terminal_codes = _terminal_status_codes(db)
+    terminal_codes = terminal_status_codes(db)
     rows = (
         db.query(Request.id)
         .filter(
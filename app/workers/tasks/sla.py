@@ -1,58 +1,87 @@
 from __future__ import annotations
 
+from datetime import datetime, timezone
 from uuid import UUID
 
 from app.db.session import SessionLocal
 from app.models.request import Request
-from app.services.notifications import EVENT_SLA_OVERDUE, notify_request_event
-from app.services.sla_metrics import compute_sla_snapshot
+from app.services.notifications import notify_requests_sla_overdue
+from app.services.redis_client import get_redis_client, report_redis_failure, report_redis_success
+from app.services.sla_metrics import backfill_sla_state, compute_sla_snapshot, newly_overdue_requests
 from app.workers.celery_app import celery_app
 
+_WATERMARK_KEY = "sla:overdue:checked_until"
+
+
+def _load_watermark() -> datetime | None:
+    client = get_redis_client("sla")
+    if client is None:
+        return None
+    try:
+        raw = client.get(_WATERMARK_KEY)
+        report_redis_success()
+    except Exception:
+        report_redis_failure("sla")
+        return None
+    try:
+        return datetime.fromisoformat(str(raw)) if raw else None
+    except ValueError:
+        return None
+
+
+def _store_watermark(value: datetime) -> None:
+    client = get_redis_client("sla")
+    if client is None:
+        return
+    try:
+        client.set(_WATERMARK_KEY, value.isoformat())
+        report_redis_success()
+    except Exception:
+        report_redis_failure("sla")
+
 
 def _emit_sla_overdue_notifications(db, overdue_rows: list[dict]) -> dict[str, int]:
-    internal_created = 0
-    telegram_sent = 0
+    items_by_id: dict[UUID, dict] = {}
     for item in overdue_rows:
-        request_id_raw = str(item.get("request_id") or "").strip()
-        if not request_id_raw:
-            continue
         try:
-            request_uuid = UUID(request_id_raw)
+            items_by_id[UUID(str(item.get("request_id") or "").strip())] = item
         except ValueError:
             continue
-        req = db.get(Request, request_uuid)
-        if req is None:
-            continue
-        threshold = item.get("threshold_hours")
-        spent = item.get("hours_in_status")
-        body = f"Просрочка SLA: {spent}ч > {threshold}ч"
-        dedupe_prefix = f"sla:{req.id}:{req.status_code}"
-        result = notify_request_event(
-            db,
-            request=req,
-            event_type=EVENT_SLA_OVERDUE,
-            actor_role="SYSTEM",
-            body=body,
-            responsible="SLA сервис",
-            dedupe_prefix=dedupe_prefix,
-        )
-        internal_created += int(result.get("internal_created", 0))
-        telegram_sent += int(result.get("telegram_sent", 0))
-    return {"internal_created": int(internal_created), "telegram_sent": int(telegram_sent)}
+    if not items_by_id:
+        return {"internal_created": 0, "telegram_queued": 0}
+    requests = (
+        db.query(Request.id, Request.track_number, Request.topic_code, Request.status_code, Request.assigned_lawyer_id)
+        .filter(Request.id.in_(list(items_by_id)))
+        .all()
+    )
+    items = []
+    for req in requests:
+        item = items_by_id[req.id]
+        items.append((req, f"Просрочка SLA: {item.get('hours_in_status')}ч > {item.get('threshold_hours')}ч"))
+    return notify_requests_sla_overdue(db, items)
 
 
 @celery_app.task(name="app.workers.tasks.sla.sla_check")
 def sla_check():
     db = SessionLocal()
     try:
-        snapshot = compute_sla_snapshot(db, include_overdue_requests=True)
-        overdue_rows = list(snapshot.get("overdue_requests") or [])
+        now = datetime.now(timezone.utc)
+        # Without a watermark (first run, Redis down) every overdue row is re-checked; dedupe keys keep it idempotent.
+        watermark = _load_watermark()
+        # Materialize deadlines for rows that predate the SLA columns; later runs only touch new rows.
+        backfilled = backfill_sla_state(db)
+        if backfilled:
+            db.commit()
+        snapshot = compute_sla_snapshot(db)
+        overdue_rows = newly_overdue_requests(db, since=watermark, until=now, backfilled=backfilled)
         notify_result = _emit_sla_overdue_notifications(db, overdue_rows)
         if notify_result["internal_created"] > 0:
             db.commit()
-        snapshot.pop("overdue_requests", None)
+        _store_watermark(now)
+        snapshot["newly_overdue"] = len(overdue_rows)
         snapshot["notifications_created"] = int(notify_result["internal_created"])
-        snapshot["telegram_sent"] = int(notify_result["telegram_sent"])
+        snapshot["telegram_queued"] = int(notify_result["telegram_queued"])
+        snapshot["sla_backfilled"] = len(backfilled)
         return snapshot
     except Exception:
         db.rollback()
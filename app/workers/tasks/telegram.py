@@ -0,0 +1,17 @@
+from __future__ import annotations
+
+from app.db.session import SessionLocal
+from app.services.telegram_notify import deliver_telegram_outbox
+from app.workers.celery_app import celery_app
+
+
+@celery_app.task(name="app.workers.tasks.telegram.deliver_telegram_outbox")
+def deliver_telegram_outbox_task(batch_size: int | None = None):
+    db = SessionLocal()
+    try:
+        return deliver_telegram_outbox(db, batch_size=batch_size)
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
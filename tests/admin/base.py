@@ -30,7 +30,10 @@ from app.models.client import Client
 from app.models.form_field import FormField
 from app.models.message import Message
 from app.models.notification import Notification
+from app.models.notification_unread_counter import NotificationUnreadCounter
 from app.models.invoice import Invoice
+from app.models.kanban_card import KanbanCard
+from app.models.lawyer_metric_rollup import LawyerMetricRollup
 from app.models.table_availability import TableAvailability
 from app.models.quote import Quote
 from app.models.request import Request
@@ -43,6 +46,8 @@ from app.models.topic_required_field import TopicRequiredField
 from app.models.request_data_requirement import RequestDataRequirement
 from app.models.request_service_request import RequestServiceRequest
 from app.models.topic_status_transition import TopicStatusTransition
+from app.services.sla_metrics import invalidate_sla_snapshot
+from tests.projection_tables import create_projection_tables, drop_projection_tables
 
 
 class AdminUniversalCrudBase(unittest.TestCase):
@@ -59,26 +64,25 @@ class AdminUniversalCrudBase(unittest.TestCase):
         Quote.__table__.create(bind=cls.engine)
         FormField.__table__.create(bind=cls.engine)
         Request.__table__.create(bind=cls.engine)
-        StatusGroup.__table__.create(bind=cls.engine)
-        Status.__table__.create(bind=cls.engine)
+        create_projection_tables(cls.engine)
         Message.__table__.create(bind=cls.engine)
         Attachment.__table__.create(bind=cls.engine)
-        StatusHistory.__table__.create(bind=cls.engine)
-        Topic.__table__.create(bind=cls.engine)
         TopicRequiredField.__table__.create(bind=cls.engine)
         TopicDataTemplate.__table__.create(bind=cls.engine)
         RequestDataRequirement.__table__.create(bind=cls.engine)
         RequestServiceRequest.__table__.create(bind=cls.engine)
-        TopicStatusTransition.__table__.create(bind=cls.engine)
         AdminUserTopic.__table__.create(bind=cls.engine)
         Notification.__table__.create(bind=cls.engine)
+        NotificationUnreadCounter.__table__.create(bind=cls.engine)
         Invoice.__table__.create(bind=cls.engine)
         TableAvailability.__table__.create(bind=cls.engine)
         AuditLog.__table__.create(bind=cls.engine)
 
     @classmethod
     def tearDownClass(cls):
+        drop_projection_tables(cls.engine)
         AuditLog.__table__.drop(bind=cls.engine)
+        NotificationUnreadCounter.__table__.drop(bind=cls.engine)
         Notification.__table__.drop(bind=cls.engine)
         Invoice.__table__.drop(bind=cls.engine)
         TableAvailability.__table__.drop(bind=cls.engine)
@@ -87,13 +91,8 @@ class AdminUniversalCrudBase(unittest.TestCase):
         RequestServiceRequest.__table__.drop(bind=cls.engine)
         TopicDataTemplate.__table__.drop(bind=cls.engine)
         TopicRequiredField.__table__.drop(bind=cls.engine)
-        TopicStatusTransition.__table__.drop(bind=cls.engine)
-        Topic.__table__.drop(bind=cls.engine)
-        StatusHistory.__table__.drop(bind=cls.engine)
         Attachment.__table__.drop(bind=cls.engine)
         Message.__table__.drop(bind=cls.engine)
-        Status.__table__.drop(bind=cls.engine)
-        StatusGroup.__table__.drop(bind=cls.engine)
         Request.__table__.drop(bind=cls.engine)
         FormField.__table__.drop(bind=cls.engine)
         Quote.__table__.drop(bind=cls.engine)
@@ -104,6 +103,8 @@ class AdminUniversalCrudBase(unittest.TestCase):
     def setUp(self):
         with self.SessionLocal() as db:
             db.execute(delete(AuditLog))
+            db.execute(delete(KanbanCard))
+            db.execute(delete(LawyerMetricRollup))
             db.execute(delete(StatusHistory))
             db.execute(delete(Attachment))
             db.execute(delete(Message))
@@ -125,6 +126,7 @@ class AdminUniversalCrudBase(unittest.TestCase):
             db.execute(delete(Quote))
             db.execute(delete(AdminUser))
             db.commit()
+        invalidate_sla_snapshot()
 
         def override_get_db():
             db = self.SessionLocal()
@@ -190,3 +190,44 @@ class AdminCrudMetaTests(AdminUniversalCrudBase):
             json={"is_active": False},
         )
         self.assertEqual(forbidden_patch.status_code, 403)
+
+    def test_meta_endpoints_revalidate_with_etag_until_availability_changes(self):
+        admin_headers = self._auth_headers("ADMIN")
+        first = self.client.get("/api/admin/crud/meta/tables", headers=admin_headers)
+        self.assertEqual(first.status_code, 200)
+        etag = first.headers.get("ETag")
+        self.assertTrue(etag)
+        self.assertEqual(first.headers.get("Cache-Control"), "private, no-cache")
+
+        cached = self.client.get("/api/admin/crud/meta/tables", headers={**admin_headers, "If-None-Match": etag})
+        self.assertEqual(cached.status_code, 304)
+        self.assertEqual(cached.headers.get("ETag"), etag)
+        self.assertEqual(cached.content, b"")
+
+        available = self.client.get("/api/admin/crud/meta/available-tables", headers=admin_headers)
+        available_etag = available.headers.get("ETag")
+        self.assertNotEqual(available_etag, etag)
+        self.assertEqual(
+            self.client.get(
+                "/api/admin/crud/meta/available-tables",
+                headers={**admin_headers, "If-None-Match": f"W/{available_etag}"},
+            ).status_code,
+            304,
+        )
+
+        toggled = self.client.patch(
+            "/api/admin/crud/meta/available-tables/clients",
+            headers=admin_headers,
+            json={"is_active": False},
+        )
+        self.assertEqual(toggled.status_code, 200)
+        stale = self.client.get("/api/admin/crud/meta/tables", headers={**admin_headers, "If-None-Match": etag})
+        self.assertEqual(stale.status_code, 200)
+        self.assertNotEqual(stale.headers.get("ETag"), etag)
+        self.assertNotIn("clients", {row["table"] for row in stale.json()["tables"]})
+
+        forbidden = self.client.get(
+            "/api/admin/crud/meta/tables",
+            headers={**self._auth_headers("LAWYER"), "If-None-Match": etag},
+        )
+        self.assertEqual(forbidden.status_code, 403)
@@ -1,13 +1,37 @@
+import threading
+from unittest.mock import patch
+
+from sqlalchemy import event
+
 from tests.admin.base import *  # noqa: F401,F403
 from app.chat_main import app as chat_app
 from app.db.session import get_db
+from app.services.chat_events import clear_chat_events_for_tests
 from app.services.chat_presence import clear_presence_for_tests
+from app.services.chat_receipts import clear_receipt_state_for_tests
+from app.services.chat_secure_service import create_client_message
+from app.workers.tasks import chat_activity as chat_activity_tasks
+
+
+class _WindowRedis:
+    """SET NX PX semantics for the receipt flush windows."""
+
+    def __init__(self):
+        self.keys = {}
+
+    def set(self, name, value, nx=False, px=None):
+        if nx and name in self.keys:
+            return None
+        self.keys[name] = value
+        return True
 
 
 class AdminLawyerChatTests(AdminUniversalCrudBase):
     def setUp(self):
         super().setUp()
         clear_presence_for_tests()
+        clear_chat_events_for_tests()
+        clear_receipt_state_for_tests()
         def override_get_db():
             db = self.SessionLocal()
             try:
@@ -21,6 +45,7 @@ class AdminLawyerChatTests(AdminUniversalCrudBase):
         self.chat_client.close()
         chat_app.dependency_overrides.clear()
         clear_presence_for_tests()
+        clear_chat_events_for_tests()
         super().tearDown()
 
     def test_lawyer_permissions_and_request_crud(self):
@@ -757,6 +782,78 @@ class AdminLawyerChatTests(AdminUniversalCrudBase):
             self.assertIsNotNone(read_row)
             self.assertIsNotNone(read_row.read_by_staff_at)
 
+    def test_admin_live_polling_skips_receipt_writes_without_new_activity(self):
+        with self.SessionLocal() as db:
+            lawyer = AdminUser(
+                role="LAWYER",
+                name="Юрист Receipt Batch",
+                email="lawyer.receipt.batch@example.com",
+                password_hash="hash",
+                is_active=True,
+            )
+            db.add(lawyer)
+            db.flush()
+            lawyer_id = str(lawyer.id)
+            own = Request(
+                track_number="TRK-CHAT-RECEIPTS-BATCH",
+                client_name="Клиент Receipt Batch",
+                client_phone="+79995550778",
+                status_code="IN_PROGRESS",
+                description="batched receipts",
+                extra_fields={},
+                assigned_lawyer_id=lawyer_id,
+            )
+            db.add(own)
+            db.flush()
+            db.add(Message(request_id=own.id, author_type="CLIENT", author_name="Клиент", body="first"))
+            db.commit()
+            own_id = str(own.id)
+
+        statements = []
+
+        def _capture(conn, cursor, statement, parameters, context, executemany):
+            if statement.lstrip().upper().startswith("UPDATE MESSAGES"):
+                statements.append(statement)
+
+        lawyer_headers = self._auth_headers("LAWYER", email="lawyer.receipt.batch@example.com", sub=lawyer_id)
+        window_redis = _WindowRedis()
+        event.listen(self.engine, "before_cursor_execute", _capture)
+        try:
+            redis_patch = patch("app.services.chat_receipts.get_redis_client", return_value=window_redis)
+            redis_patch.start()
+            self.addCleanup(redis_patch.stop)
+            for _ in range(3):
+                live = self.chat_client.get(f"/api/admin/chat/requests/{own_id}/live", headers=lawyer_headers)
+                self.assertEqual(live.status_code, 200)
+            self.assertEqual(len(statements), 1)
+
+            with self.SessionLocal() as db:
+                second = Message(request_id=UUID(own_id), author_type="CLIENT", author_name="Клиент", body="second")
+                db.add(second)
+                db.commit()
+                second_id = second.id
+
+            # Still inside the flush window of the first write: the receipt is deferred to the end of the window.
+            with patch("app.services.chat_receipts.celery_app.send_task") as send_task:
+                for _ in range(2):
+                    self.chat_client.get(f"/api/admin/chat/requests/{own_id}/live", headers=lawyer_headers)
+            self.assertEqual(len(statements), 1)
+            with self.SessionLocal() as db:
+                self.assertIsNone(db.get(Message, second_id).delivered_to_staff_at)
+            send_task.assert_called_once()
+            self.assertEqual(send_task.call_args.args[0], "app.workers.tasks.chat_activity.flush_deferred_chat_receipt")
+            self.assertEqual(send_task.call_args.kwargs["countdown"], settings.CHAT_RECEIPT_FLUSH_INTERVAL_MS / 1000.0)
+            self.assertIn(f"chat:receipts:req:{own_id}:STAFF:delivered:deferred", window_redis.keys)
+
+            with patch("app.workers.tasks.chat_activity.SessionLocal", self.SessionLocal):
+                flushed = chat_activity_tasks.flush_deferred_chat_receipt_task(**send_task.call_args.kwargs["kwargs"])
+            self.assertEqual(flushed, {"changed": True})
+            self.assertEqual(len(statements), 2)
+            with self.SessionLocal() as db:
+                self.assertIsNotNone(db.get(Message, second_id).delivered_to_staff_at)
+        finally:
+            event.remove(self.engine, "before_cursor_execute", _capture)
+
     def test_admin_live_detects_client_filled_request_data_updates(self):
         with self.SessionLocal() as db:
             now = datetime.now(timezone.utc)
@@ -842,3 +939,75 @@ class AdminLawyerChatTests(AdminUniversalCrudBase):
         )
         self.assertEqual(own_live_after_fill.status_code, 200)
         self.assertTrue(bool(own_live_after_fill.json().get("has_updates")))
+
+    def test_admin_chat_stream_pushes_live_state_on_new_messages(self):
+        with self.SessionLocal() as db:
+            lawyer = AdminUser(
+                role="LAWYER",
+                name="Юрист Stream",
+                email="lawyer.stream@example.com",
+                password_hash="hash",
+                is_active=True,
+            )
+            db.add(lawyer)
+            db.flush()
+            lawyer_id = str(lawyer.id)
+            own = Request(
+                track_number="TRK-CHAT-STREAM-OWN",
+                client_name="Клиент Stream",
+                client_phone="+79995550201",
+                status_code="IN_PROGRESS",
+                description="own",
+                extra_fields={},
+                assigned_lawyer_id=lawyer_id,
+            )
+            foreign = Request(
+                track_number="TRK-CHAT-STREAM-FOREIGN",
+                client_name="Клиент Stream Чужой",
+                client_phone="+79995550202",
+                status_code="IN_PROGRESS",
+                description="foreign",
+                extra_fields={},
+                assigned_lawyer_id=str(uuid4()),
+            )
+            db.add_all([own, foreign])
+            db.flush()
+            db.add(Message(request_id=own.id, author_type="CLIENT", author_name="Клиент", body="stream start"))
+            db.commit()
+            own_id = str(own.id)
+            foreign_id = str(foreign.id)
+
+        lawyer_headers = self._auth_headers("LAWYER", email="lawyer.stream@example.com", sub=lawyer_id)
+        foreign_stream = self.chat_client.get(f"/api/admin/chat/requests/{foreign_id}/stream", headers=lawyer_headers)
+        self.assertEqual(foreign_stream.status_code, 403)
+
+        def _client_writes():
+            with self.SessionLocal() as db:
+                req = db.get(Request, UUID(own_id))
+                create_client_message(db, request=req, body="pushed message")
+
+        previous_max_seconds = settings.CHAT_STREAM_MAX_SECONDS
+        settings.CHAT_STREAM_MAX_SECONDS = 1
+        writer = threading.Timer(0.3, _client_writes)
+        writer.start()
+        try:
+            response = self.chat_client.get(f"/api/admin/chat/requests/{own_id}/stream", headers=lawyer_headers)
+        finally:
+            writer.join()
+            settings.CHAT_STREAM_MAX_SECONDS = previous_max_seconds
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.headers["content-type"].startswith("text/event-stream"))
+
+        events = []
+        for block in response.text.split("\n\n"):
+            lines = [line for line in block.splitlines() if line.startswith(("event:", "data:"))]
+            if len(lines) == 2:
+                events.append((lines[0][len("event:"):].strip(), json.loads(lines[1][len("data:"):])))
+        live_events = [payload for name, payload in events if name == "live"]
+        self.assertGreaterEqual(len(live_events), 2)
+        self.assertEqual(live_events[0]["request_id"], own_id)
+        self.assertEqual(live_events[0]["message_count"], 1)
+        pushed = live_events[-1]
+        self.assertTrue(pushed["has_updates"])
+        self.assertEqual(pushed["message_count"], 2)
+        self.assertEqual([item.get("body") for item in pushed["messages"]], ["pushed message"])
@@ -1,5 +1,14 @@
 from tests.admin.base import *  # noqa: F401,F403
 
+from unittest.mock import patch
+
+from sqlalchemy import delete, event as sa_event, update
+from sqlalchemy.exc import OperationalError
+
+from app.services.kanban_cards import refresh_kanban_cards, refresh_pending_kanban_cards
+from app.services.reference_data import reset_reference_data_for_tests, terminal_status_codes
+from app.services.status_flow import transition_allowed_for_topic
+
 
 class AdminStatusFlowKanbanTests(AdminUniversalCrudBase):
     def test_request_read_markers_status_update_and_lawyer_open_reset(self):
@@ -137,6 +146,63 @@ class AdminStatusFlowKanbanTests(AdminUniversalCrudBase):
         )
         self.assertEqual(updated.status_code, 200)
 
+    def test_reference_data_is_cached_and_invalidated_by_config_writes(self):
+        headers = self._auth_headers("ADMIN", email="root@example.com")
+        with self.SessionLocal() as db:
+            db.add(Topic(code="civil-law", name="Гражданское право", enabled=True, sort_order=1))
+            db.add_all(
+                [
+                    Status(code="NEW", name="Новая", enabled=True, sort_order=0, is_terminal=False),
+                    Status(code="IN_PROGRESS", name="В работе", enabled=True, sort_order=1, is_terminal=False),
+                    Status(code="CLOSED", name="Закрыта", enabled=True, sort_order=2, is_terminal=True),
+                ]
+            )
+            db.add(TopicStatusTransition(topic_code="civil-law", from_status="NEW", to_status="IN_PROGRESS", enabled=True, sort_order=1))
+            db.commit()
+
+        statements: list[str] = []
+
+        def count_statement(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        sa_event.listen(self.engine, "before_cursor_execute", count_statement)
+        try:
+            with self.SessionLocal() as db:
+                self.assertTrue(transition_allowed_for_topic(db, "civil-law", "NEW", "IN_PROGRESS"))
+                loaded = len(statements)
+                self.assertGreater(loaded, 0)
+                for _ in range(5):
+                    self.assertFalse(transition_allowed_for_topic(db, "civil-law", "NEW", "CLOSED"))
+                    self.assertEqual(terminal_status_codes(db), {"CLOSED"})
+                self.assertEqual(len(statements), loaded)
+        finally:
+            sa_event.remove(self.engine, "before_cursor_execute", count_statement)
+
+        created = self.client.post(
+            "/api/admin/crud/topic_status_transitions",
+            headers=headers,
+            json={"topic_code": "civil-law", "from_status": "NEW", "to_status": "CLOSED", "enabled": True, "sort_order": 2},
+        )
+        self.assertEqual(created.status_code, 201)
+        with self.SessionLocal() as db:
+            self.assertTrue(transition_allowed_for_topic(db, "civil-law", "NEW", "CLOSED"))
+
+    def test_failed_reference_data_load_propagates_and_is_not_cached(self):
+        with self.SessionLocal() as db:
+            db.add(Status(code="CLOSED", name="Закрыта", enabled=True, sort_order=2, is_terminal=True))
+            db.commit()
+        reset_reference_data_for_tests()
+
+        with self.SessionLocal() as db:
+            with patch(
+                "app.services.reference_data._load_rows",
+                side_effect=OperationalError("SELECT", {}, Exception("connection reset")),
+            ):
+                with self.assertRaises(OperationalError):
+                    terminal_status_codes(db)
+            db.rollback()
+            self.assertEqual(terminal_status_codes(db), {"CLOSED"})
+
     def test_admin_can_configure_sla_hours_for_status_transition(self):
         headers = self._auth_headers("ADMIN", email="root@example.com")
         with self.SessionLocal() as db:
@@ -997,3 +1063,319 @@ class AdminStatusFlowKanbanTests(AdminUniversalCrudBase):
             [str(item.get("assigned_lawyer_name") or "") for item in response_rows],
             ["Alex Lawyer", "Boris Lawyer"],
         )
+
+    def test_requests_kanban_filters_keep_sort_mode_and_cursor_order(self):
+        with self.SessionLocal() as db:
+            db.add(Status(code="NEW", name="Новая", enabled=True, sort_order=1, is_terminal=False, kind="DEFAULT"))
+            db.add(Status(code="IN_PROGRESS", name="В работе", enabled=True, sort_order=2, is_terminal=False, kind="DEFAULT"))
+            lawyers = [
+                AdminUser(role="LAWYER", name=name, email=f"{name.lower()}@example.com", password_hash="hash", is_active=True)
+                for name in ("Boris", "Alex")
+            ]
+            db.add_all(lawyers)
+            db.flush()
+            base_created_at = datetime(2026, 3, 1, tzinfo=timezone.utc)
+            for index in range(7):
+                db.add(
+                    Request(
+                        track_number=f"TRK-KANBAN-FILTER-{index}",
+                        client_name=f"Клиент {index}",
+                        client_phone=f"+7999000040{index}",
+                        status_code="IN_PROGRESS" if index == 6 else "NEW",
+                        extra_fields={},
+                        assigned_lawyer_id=str(lawyers[index % 2].id) if index % 3 else None,
+                        created_at=base_created_at + timedelta(minutes=index),
+                    )
+                )
+            db.commit()
+
+        headers = self._auth_headers("ADMIN", email="root@example.com")
+        filters = json.dumps([{"field": "status_code", "op": "=", "value": "NEW"}])
+        seen: list[tuple[str, str]] = []
+        cursor = None
+        while True:
+            params = {"limit": 2, "sort_mode": "lawyer", "filters": filters}
+            if cursor:
+                params["cursor"] = cursor
+            page = self.client.get("/api/admin/requests/kanban", headers=headers, params=params).json()
+            self.assertEqual(page["total"], 6)
+            seen.extend((row["assigned_lawyer_name"] or "", row["track_number"]) for row in page["rows"])
+            cursor = page["next_cursor"]
+            if not cursor:
+                break
+        self.assertEqual(
+            seen,
+            [
+                ("Alex", "TRK-KANBAN-FILTER-5"),
+                ("Alex", "TRK-KANBAN-FILTER-1"),
+                ("Boris", "TRK-KANBAN-FILTER-4"),
+                ("Boris", "TRK-KANBAN-FILTER-2"),
+                ("", "TRK-KANBAN-FILTER-3"),
+                ("", "TRK-KANBAN-FILTER-0"),
+            ],
+        )
+
+    def test_requests_kanban_reads_maintained_cards_with_constant_queries_and_keyset_pages(self):
+        with self.SessionLocal() as db:
+            db.add(Status(code="NEW", name="Новая", enabled=True, sort_order=1, is_terminal=False, kind="DEFAULT"))
+            db.add(Status(code="IN_PROGRESS", name="В работе", enabled=True, sort_order=2, is_terminal=False, kind="DEFAULT"))
+            db.add(Topic(code="civil-law", name="Гражданское право", enabled=True, sort_order=1))
+            db.add(
+                TopicStatusTransition(
+                    topic_code="civil-law", from_status="NEW", to_status="IN_PROGRESS", enabled=True, sla_hours=24, sort_order=1
+                )
+            )
+            lawyer = AdminUser(
+                role="LAWYER",
+                name="Юрист Проекции",
+                email="lawyer-projection@example.com",
+                password_hash="hash",
+                is_active=True,
+            )
+            db.add(lawyer)
+            db.flush()
+            lawyer_id = str(lawyer.id)
+            base_created_at = datetime(2026, 2, 1, tzinfo=timezone.utc)
+            for index in range(5):
+                db.add(
+                    Request(
+                        track_number=f"TRK-KANBAN-CARD-{index}",
+                        client_name=f"Клиент {index}",
+                        client_phone=f"+7999000020{index}",
+                        topic_code="civil-law",
+                        status_code="NEW",
+                        description=f"card-{index}",
+                        extra_fields={},
+                        assigned_lawyer_id=lawyer_id if index % 2 else None,
+                        created_at=base_created_at + timedelta(minutes=index),
+                    )
+                )
+            db.commit()
+            self.assertEqual(db.query(KanbanCard).count(), 5)
+
+        headers = self._auth_headers("ADMIN", email="root@example.com")
+        statements: list[str] = []
+
+        def count_statement(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        def board_query_count(params: dict) -> tuple[int, dict]:
+            statements.clear()
+            sa_event.listen(self.engine, "before_cursor_execute", count_statement)
+            try:
+                response = self.client.get("/api/admin/requests/kanban", headers=headers, params=params)
+            finally:
+                sa_event.remove(self.engine, "before_cursor_execute", count_statement)
+            self.assertEqual(response.status_code, 200)
+            return len(statements), response.json()
+
+        board_query_count({"limit": 2})  # warms the reference-data cache
+        small_count, _ = board_query_count({"limit": 2})
+        with self.SessionLocal() as db:
+            for index in range(5, 25):
+                db.add(
+                    Request(
+                        track_number=f"TRK-KANBAN-CARD-{index}",
+                        client_name=f"Клиент {index}",
+                        client_phone=f"+799900003{index:02d}",
+                        topic_code="civil-law",
+                        status_code="NEW",
+                        description=f"card-{index}",
+                        extra_fields={},
+                        assigned_lawyer_id=lawyer_id,
+                        created_at=base_created_at + timedelta(minutes=index),
+                    )
+                )
+            db.commit()
+        large_count, _ = board_query_count({"limit": 25, "sort_mode": "lawyer"})
+        self.assertEqual(large_count, small_count)
+
+        seen: list[str] = []
+        cursor = None
+        while True:
+            params = {"limit": 10}
+            if cursor:
+                params["cursor"] = cursor
+            page = self.client.get("/api/admin/requests/kanban", headers=headers, params=params).json()
+            self.assertEqual(page["total"], 25)
+            seen.extend(row["id"] for row in page["rows"])
+            cursor = page["next_cursor"]
+            if not cursor:
+                self.assertFalse(page["truncated"])
+                break
+        self.assertEqual(len(seen), 25)
+        self.assertEqual(len(set(seen)), 25)
+
+        bad_cursor = self.client.get(
+            "/api/admin/requests/kanban", headers=headers, params={"limit": 10, "sort_mode": "lawyer", "cursor": "broken"}
+        )
+        self.assertEqual(bad_cursor.status_code, 400)
+
+        with self.SessionLocal() as db:
+            db.get(AdminUser, UUID(lawyer_id)).name = "Юрист Переименованный"
+            request_row = db.query(Request).filter(Request.track_number == "TRK-KANBAN-CARD-1").one()
+            request_row.status_code = "IN_PROGRESS"
+            db.add(StatusHistory(request_id=request_row.id, from_status="NEW", to_status="IN_PROGRESS", created_at=base_created_at))
+            db.commit()
+            request_id = str(request_row.id)
+
+        _, payload = board_query_count({"limit": 25})
+        rows = {row["id"]: row for row in payload["rows"]}
+        self.assertEqual(rows[request_id]["assigned_lawyer_name"], "Юрист Переименованный")
+        self.assertEqual(rows[request_id]["sla_deadline_at"], (base_created_at + timedelta(hours=24)).isoformat())
+
+    def test_bulk_transition_update_marks_only_cards_of_affected_topic_stale(self):
+        with self.SessionLocal() as db:
+            db.add(Status(code="NEW", name="Новая", enabled=True, sort_order=1, is_terminal=False, kind="DEFAULT"))
+            db.add(Status(code="IN_PROGRESS", name="В работе", enabled=True, sort_order=2, is_terminal=False, kind="DEFAULT"))
+            for code in ("civil-law", "family-law"):
+                db.add(Topic(code=code, name=code, enabled=True, sort_order=1))
+                db.add(
+                    TopicStatusTransition(
+                        topic_code=code, from_status="NEW", to_status="IN_PROGRESS", enabled=True, sla_hours=24, sort_order=1
+                    )
+                )
+                db.add(
+                    Request(
+                        track_number=f"TRK-BULK-{code}",
+                        client_name="Клиент",
+                        client_phone="+79990000300",
+                        topic_code=code,
+                        status_code="NEW",
+                        extra_fields={},
+                    )
+                )
+            db.commit()
+            self.assertEqual(db.query(KanbanCard).count(), 2)
+
+            db.execute(
+                update(TopicStatusTransition).where(TopicStatusTransition.topic_code == "civil-law").values(sla_hours=48)
+            )
+            db.commit()
+            stale = (
+                db.query(Request.topic_code)
+                .join(KanbanCard, KanbanCard.request_id == Request.id)
+                .filter(KanbanCard.refreshed_at.is_(None))
+                .all()
+            )
+            self.assertEqual([row.topic_code for row in stale], ["civil-law"])
+            self.assertEqual(db.query(KanbanCard).count(), 2)
+
+            self.assertEqual(refresh_pending_kanban_cards(db), {"built": 0, "refreshed": 1})
+            self.assertEqual(db.query(KanbanCard).filter(KanbanCard.refreshed_at.is_(None)).count(), 0)
+
+    def test_board_read_does_not_write_missing_cards_and_worker_backfills_them(self):
+        with self.SessionLocal() as db:
+            db.add(Status(code="NEW", name="Новая", enabled=True, sort_order=1, is_terminal=False, kind="DEFAULT"))
+            row = Request(
+                track_number="TRK-KANBAN-BACKFILL",
+                client_name="Клиент",
+                client_phone="+79990000310",
+                status_code="NEW",
+                extra_fields={},
+            )
+            db.add(row)
+            db.commit()
+            request_id = str(row.id)
+            db.execute(delete(KanbanCard))
+            db.commit()
+
+        headers = self._auth_headers("ADMIN", email="root@example.com")
+        response = self.client.get("/api/admin/requests/kanban", headers=headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["total"], 0)
+        with self.SessionLocal() as db:
+            self.assertEqual(db.query(KanbanCard).count(), 0)
+            self.assertEqual(refresh_pending_kanban_cards(db, batch_size=1), {"built": 1, "refreshed": 0})
+
+        response = self.client.get("/api/admin/requests/kanban", headers=headers)
+        self.assertEqual([item["id"] for item in response.json()["rows"]], [request_id])
+
+    def test_refresh_kanban_cards_overwrites_an_existing_card_in_place(self):
+        with self.SessionLocal() as db:
+            db.add(Status(code="NEW", name="Новая", enabled=True, sort_order=1, is_terminal=False, kind="DEFAULT"))
+            row = Request(
+                track_number="TRK-KANBAN-UPSERT",
+                client_name="Клиент",
+                client_phone="+79990000320",
+                status_code="NEW",
+                extra_fields={},
+            )
+            db.add(row)
+            db.commit()
+            db.execute(update(KanbanCard).values(assigned_lawyer_name="Устаревший", refreshed_at=None))
+            db.commit()
+
+            self.assertEqual(refresh_kanban_cards(db, [row.id]), 1)
+            db.commit()
+            card = db.query(KanbanCard).one()
+            self.assertIsNone(card.assigned_lawyer_name)
+            self.assertIsNotNone(card.refreshed_at)
+
+    def test_requests_kanban_deadline_sort_and_boolean_filters_page_in_sql(self):
+        now = datetime.now(timezone.utc)
+        with self.SessionLocal() as db:
+            db.add(Status(code="NEW", name="Новая", enabled=True, sort_order=1, is_terminal=False, kind="DEFAULT"))
+            deadlines = [now + timedelta(days=3), None, now - timedelta(days=1), now + timedelta(days=1), None]
+            rows_by_index = {}
+            for index, deadline in enumerate(deadlines):
+                row = Request(
+                    track_number=f"TRK-KANBAN-DEADLINE-{index}",
+                    client_name=f"Клиент {index}",
+                    client_phone=f"+7999000040{index}",
+                    status_code="NEW",
+                    description=f"deadline-{index}",
+                    extra_fields={"deadline_at": deadline.isoformat()} if deadline else {},
+                    client_has_unread_updates=index == 3,
+                    created_at=now - timedelta(hours=index),
+                )
+                db.add(row)
+                rows_by_index[index] = row
+            db.commit()
+            ids = {index: str(row.id) for index, row in rows_by_index.items()}
+
+        headers = self._auth_headers("ADMIN", email="root@example.com")
+        ordered: list[str] = []
+        cursor = None
+        while True:
+            params = {"limit": 2, "sort_mode": "deadline"}
+            if cursor:
+                params["cursor"] = cursor
+            response = self.client.get("/api/admin/requests/kanban", headers=headers, params=params)
+            self.assertEqual(response.status_code, 200)
+            page = response.json()
+            self.assertLessEqual(len(page["rows"]), 2)
+            self.assertEqual(page["total"], 5)
+            ordered.extend(row["id"] for row in page["rows"])
+            cursor = page["next_cursor"]
+            if not cursor:
+                break
+        # Dated cards first by deadline, then undated ones newest first.
+        self.assertEqual(ordered, [ids[2], ids[3], ids[0], ids[1], ids[4]])
+
+        not_overdue_unread = self.client.get(
+            "/api/admin/requests/kanban",
+            headers=headers,
+            params={
+                "limit": 1,
+                "sort_mode": "deadline",
+                "filters": json.dumps(
+                    [
+                        {"field": "overdue", "op": "=", "value": False},
+                        {"field": "has_unread_updates", "op": "!=", "value": True},
+                    ]
+                ),
+            },
+        )
+        self.assertEqual(not_overdue_unread.status_code, 200)
+        payload = not_overdue_unread.json()
+        self.assertEqual(payload["total"], 3)
+        self.assertEqual([row["id"] for row in payload["rows"]], [ids[0]])
+        self.assertTrue(payload["truncated"])
+
+        wrong_mode = self.client.get(
+            "/api/admin/requests/kanban",
+            headers=headers,
+            params={"limit": 2, "sort_mode": "lawyer", "cursor": payload["next_cursor"]},
+        )
+        self.assertEqual(wrong_mode.status_code, 400)
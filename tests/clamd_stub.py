@@ -0,0 +1,118 @@
+"""Minimal in-process clamd speaking the subset of the protocol used by app.services.clamav_client."""
+
+from __future__ import annotations
+
+import socket
+import socketserver
+import struct
+import threading
+import time
+
+STUB_VERSION = "ClamAV 1.3.1/27400/Thu Oct 16 08:21:47 2026"
+
+
+class _Handler(socketserver.BaseRequestHandler):
+    def setup(self):
+        self.buffer = b""
+
+    def _read_exact(self, size: int) -> bytes:
+        while len(self.buffer) < size:
+            part = self.request.recv(65536)
+            if not part:
+                raise ConnectionError("client closed")
+            self.buffer += part
+        data, self.buffer = self.buffer[:size], self.buffer[size:]
+        return data
+
+    def _read_command(self) -> str:
+        while b"\0" not in self.buffer:
+            part = self.request.recv(4096)
+            if not part:
+                raise ConnectionError("client closed")
+            self.buffer += part
+        raw, _, self.buffer = self.buffer.partition(b"\0")
+        return raw.decode("ascii").removeprefix("z")
+
+    def _instream(self) -> str:
+        server: StubClamdServer = self.server
+        payload = bytearray()
+        while True:
+            (size,) = struct.unpack(">I", self._read_exact(4))
+            if size == 0:
+                break
+            payload += self._read_exact(size)
+        if server.scan_delay:
+            time.sleep(server.scan_delay)
+        with server.lock:
+            server.scans += 1
+        if b"EICAR" in payload:
+            return "stream: Eicar-Test-Signature FOUND"
+        return "stream: OK"
+
+    def _reply(self, command: str) -> str:
+        if command == "PING":
+            return "PONG"
+        if command == "VERSION":
+            return STUB_VERSION
+        if command == "INSTREAM":
+            return self._instream()
+        return "UNKNOWN COMMAND"
+
+    def handle(self):
+        server: StubClamdServer = self.server
+        with server.lock:
+            if server.active >= server.max_threads:
+                # clamd drops connections beyond MaxThreads once its queue is full.
+                server.refused += 1
+                return
+            server.active += 1
+            server.connections += 1
+            server.max_active = max(server.max_active, server.active)
+        self.request.settimeout(server.idle_timeout)
+        try:
+            command = self._read_command()
+            if command != "IDSESSION":
+                self.request.sendall(self._reply(command).encode("utf-8") + b"\0")
+                return
+            request_id = 0
+            while True:
+                command = self._read_command()
+                if command == "END":
+                    return
+                request_id += 1
+                self.request.sendall(f"{request_id}: {self._reply(command)}".encode("utf-8") + b"\0")
+        except (ConnectionError, socket.timeout, OSError):
+            return
+        finally:
+            with server.lock:
+                server.active -= 1
+
+
+class StubClamdServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, *, max_threads: int = 10, idle_timeout: float = 5.0, scan_delay: float = 0.0):
+        super().__init__(("127.0.0.1", 0), _Handler)
+        self.lock = threading.Lock()
+        self.max_threads = max_threads
+        self.idle_timeout = idle_timeout
+        self.scan_delay = scan_delay
+        self.active = 0
+        self.max_active = 0
+        self.connections = 0
+        self.refused = 0
+        self.scans = 0
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+
+    @property
+    def port(self) -> int:
+        return self.server_address[1]
+
+    def start(self) -> "StubClamdServer":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
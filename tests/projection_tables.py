@@ -0,0 +1,25 @@
+"""Tables read or maintained by the request write hooks (kanban cards, SLA state, lawyer metric rollups).
+
+Any fixture that writes requests needs all of them; create and drop them together instead of listing each model.
+"""
+
+from __future__ import annotations
+
+from app.db.session import Base
+from app.models.kanban_card import KanbanCard
+from app.models.lawyer_metric_rollup import LawyerMetricRollup
+from app.models.status import Status
+from app.models.status_group import StatusGroup
+from app.models.status_history import StatusHistory
+from app.models.topic import Topic
+from app.models.topic_status_transition import TopicStatusTransition
+
+PROJECTION_MODELS = (StatusGroup, Status, Topic, TopicStatusTransition, StatusHistory, KanbanCard, LawyerMetricRollup)
+
+
+def create_projection_tables(engine) -> None:
+    Base.metadata.create_all(bind=engine, tables=[model.__table__ for model in PROJECTION_MODELS])
+
+
+def drop_projection_tables(engine) -> None:
+    Base.metadata.drop_all(bind=engine, tables=[model.__table__ for model in PROJECTION_MODELS])
@@ -1,3 +1,4 @@
+import hashlib
 import os
 import unittest
 from uuid import UUID
@@ -18,9 +19,15 @@ os.environ.setdefault("S3_BUCKET", "test")
 from app.models.attachment import Attachment
 from app.models.request import Request
 from app.models.security_audit_log import SecurityAuditLog
-from app.services.attachment_scan import SCAN_STATUS_CLEAN, SCAN_STATUS_INFECTED, scan_attachment_file_impl
+from app.services.attachment_scan import (
+    SCAN_STATUS_CLEAN,
+    SCAN_STATUS_ERROR,
+    SCAN_STATUS_INFECTED,
+    scan_attachment_file_impl,
+)
 import app.services.attachment_scan as attachment_scan_module
 from app.db import session as db_session
+from tests.projection_tables import create_projection_tables, drop_projection_tables
 
 
 class _FakeBody:
@@ -43,6 +50,25 @@ class _FakeS3Storage:
         return {"Body": _FakeBody(obj["content"]), "ContentType": obj["mime"], "ContentLength": obj["size"]}
 
 
+class _RecordingClamav:
+    instances = []
+    result = (True, None)
+
+    def __init__(self):
+        self.chunk_sizes = []
+        self.closed = False
+        _RecordingClamav.instances.append(self)
+
+    def send(self, chunk):
+        self.chunk_sizes.append(len(chunk))
+
+    def verdict(self):
+        return _RecordingClamav.result
+
+    def close(self):
+        self.closed = True
+
+
 class AttachmentScanTests(unittest.TestCase):
     @classmethod
     def setUpClass(cls):
@@ -53,6 +79,7 @@ class AttachmentScanTests(unittest.TestCase):
         )
         cls.SessionLocal = sessionmaker(bind=cls.engine, autocommit=False, autoflush=False)
         Request.__table__.create(bind=cls.engine)
+        create_projection_tables(cls.engine)
         Attachment.__table__.create(bind=cls.engine)
         SecurityAuditLog.__table__.create(bind=cls.engine)
         cls._orig_session_local = db_session.SessionLocal
@@ -66,6 +93,7 @@ class AttachmentScanTests(unittest.TestCase):
         attachment_scan_module.SessionLocal = cls._orig_scan_session_local
         SecurityAuditLog.__table__.drop(bind=cls.engine)
         Attachment.__table__.drop(bind=cls.engine)
+        drop_projection_tables(cls.engine)
         Request.__table__.drop(bind=cls.engine)
         cls.engine.dispose()
 
@@ -152,3 +180,120 @@ class AttachmentScanTests(unittest.TestCase):
             row = db.get(Attachment, UUID(attachment_id))
             self.assertEqual(row.scan_status, SCAN_STATUS_INFECTED)
             self.assertEqual(row.scan_signature, "CONTENT_POLICY")
+
+    def _create_attachment(self, track_number: str, file_name: str, mime_type: str, size_bytes: int) -> tuple[str, str]:
+        with self.SessionLocal() as db:
+            req = Request(
+                track_number=track_number,
+                client_name="Клиент",
+                client_phone="+79990000003",
+                topic_code="consulting",
+                status_code="NEW",
+                extra_fields={},
+            )
+            db.add(req)
+            db.flush()
+            key = f"requests/{req.id}/{file_name}"
+            att = Attachment(request_id=req.id, file_name=file_name, mime_type=mime_type, size_bytes=size_bytes, s3_key=key)
+            db.add(att)
+            db.commit()
+            return str(att.id), key
+
+    def test_scan_streams_chunks_to_hash_sniffer_and_clamav_in_one_pass(self):
+        payload = ("Строка договора\n" * 20000).encode("utf-8")
+        attachment_id, key = self._create_attachment("TRK-SCAN-003", "notes.txt", "text/plain", len(payload))
+        fake_s3 = _FakeS3Storage()
+        fake_s3.objects[key] = {"size": len(payload), "mime": "text/plain", "content": payload}
+        _RecordingClamav.instances = []
+        _RecordingClamav.result = (True, None)
+        with (
+            patch("app.services.attachment_scan.get_s3_storage", return_value=fake_s3),
+            patch("app.services.attachment_scan.settings.CLAMAV_ENABLED", True),
+            patch("app.services.attachment_scan.ClamavInstream", _RecordingClamav),
+            patch("app.services.attachment_scan.clamav_signature_version", return_value=None),
+        ):
+            result = scan_attachment_file_impl(attachment_id)
+
+        self.assertEqual(result.get("status"), SCAN_STATUS_CLEAN)
+        self.assertIn("clamav_send_ms", result.get("timings_ms") or {})
+        clamav = _RecordingClamav.instances[0]
+        self.assertTrue(clamav.closed)
+        self.assertGreater(len(clamav.chunk_sizes), 1)
+        self.assertLessEqual(max(clamav.chunk_sizes), 64 * 1024)
+        self.assertEqual(sum(clamav.chunk_sizes), len(payload))
+        with self.SessionLocal() as db:
+            row = db.get(Attachment, UUID(attachment_id))
+            self.assertEqual(row.content_sha256, hashlib.sha256(payload).hexdigest())
+            self.assertEqual(row.detected_mime, "text/plain")
+
+    def test_scan_stops_streaming_when_object_exceeds_size_limit(self):
+        payload = b"%PDF-1.4\n" + b"0" * (2 * 1024 * 1024)
+        attachment_id, key = self._create_attachment("TRK-SCAN-004", "big.pdf", "application/pdf", len(payload))
+        fake_s3 = _FakeS3Storage()
+        fake_s3.objects[key] = {"size": len(payload), "mime": "application/pdf", "content": payload}
+        _RecordingClamav.instances = []
+        _RecordingClamav.result = (True, None)
+        with (
+            patch("app.services.attachment_scan.get_s3_storage", return_value=fake_s3),
+            patch("app.services.attachment_scan.settings.CLAMAV_ENABLED", True),
+            patch("app.services.attachment_scan.settings.MAX_FILE_MB", 1),
+            patch("app.services.attachment_scan.ClamavInstream", _RecordingClamav),
+            patch("app.services.attachment_scan.clamav_signature_version", return_value=None),
+        ):
+            with self.assertRaises(ValueError):
+                scan_attachment_file_impl(attachment_id)
+
+        clamav = _RecordingClamav.instances[0]
+        self.assertTrue(clamav.closed)
+        self.assertLessEqual(sum(clamav.chunk_sizes), 1024 * 1024)
+        with self.SessionLocal() as db:
+            self.assertEqual(db.get(Attachment, UUID(attachment_id)).scan_status, SCAN_STATUS_ERROR)
+
+    def test_identical_content_reuses_verdict_until_signature_database_changes(self):
+        payload = b"%PDF-1.4\n" + b"EICAR-like body" * 100
+        fake_s3 = _FakeS3Storage()
+        attachment_ids = []
+        for index in range(3):
+            attachment_id, key = self._create_attachment(f"TRK-SCAN-01{index}", "same.pdf", "application/pdf", len(payload))
+            fake_s3.objects[key] = {"size": len(payload), "mime": "application/pdf", "content": payload}
+            attachment_ids.append(attachment_id)
+        _RecordingClamav.instances = []
+        _RecordingClamav.result = (False, "Win.Test.EICAR_HDB-1")
+
+        def run(attachment_id, version):
+            with (
+                patch("app.services.attachment_scan.get_s3_storage", return_value=fake_s3),
+                patch("app.services.attachment_scan.settings.CLAMAV_ENABLED", True),
+                patch("app.services.attachment_scan.ClamavInstream", _RecordingClamav),
+                patch("app.services.attachment_scan.clamav_signature_version", return_value=version),
+            ):
+                return scan_attachment_file_impl(attachment_id)
+
+        first = run(attachment_ids[0], "1.3.1/27400")
+        self.assertEqual(first["status"], SCAN_STATUS_INFECTED)
+        self.assertFalse(first["cache_hit"])
+        self.assertEqual(len(_RecordingClamav.instances), 1)
+
+        second = run(attachment_ids[1], "1.3.1/27400")
+        self.assertEqual(second["status"], SCAN_STATUS_INFECTED)
+        self.assertEqual(second["signature"], "Win.Test.EICAR_HDB-1")
+        self.assertTrue(second["cache_hit"])
+        self.assertEqual(len(_RecordingClamav.instances), 1)
+
+        _RecordingClamav.result = (True, None)
+        third = run(attachment_ids[2], "1.3.1/27401")
+        self.assertEqual(third["status"], SCAN_STATUS_CLEAN)
+        self.assertFalse(third["cache_hit"])
+        self.assertEqual(len(_RecordingClamav.instances), 2)
+        self.assertEqual(sum(_RecordingClamav.instances[1].chunk_sizes), len(payload))
+
+        with self.SessionLocal() as db:
+            versions = {str(db.get(Attachment, UUID(item)).scan_engine_version) for item in attachment_ids}
+            self.assertEqual(versions, {"1.3.1/27400", "1.3.1/27401"})
+            event = (
+                db.query(SecurityAuditLog)
+                .filter(SecurityAuditLog.attachment_id == UUID(attachment_ids[1]))
+                .order_by(SecurityAuditLog.created_at.desc())
+                .first()
+            )
+            self.assertEqual(event.details["cached_from_attachment_id"], attachment_ids[0])
@@ -20,6 +20,7 @@ from app.models.audit_log import AuditLog
 from app.models.request import Request
 from app.models.status import Status
 from app.workers.tasks import assign as assign_task
+from tests.projection_tables import create_projection_tables, drop_projection_tables
 
 
 class AutoAssignTaskTests(unittest.TestCase):
@@ -33,7 +34,7 @@ class AutoAssignTaskTests(unittest.TestCase):
         cls.SessionLocal = sessionmaker(bind=cls.engine, autocommit=False, autoflush=False)
         AdminUser.__table__.create(bind=cls.engine)
         AdminUserTopic.__table__.create(bind=cls.engine)
-        Status.__table__.create(bind=cls.engine)
+        create_projection_tables(cls.engine)
         Request.__table__.create(bind=cls.engine)
         AuditLog.__table__.create(bind=cls.engine)
 
@@ -44,8 +45,8 @@ class AutoAssignTaskTests(unittest.TestCase):
     def tearDownClass(cls):
         assign_task.SessionLocal = cls._old_session_local
         AuditLog.__table__.drop(bind=cls.engine)
+        drop_projection_tables(cls.engine)
         Request.__table__.drop(bind=cls.engine)
-        Status.__table__.drop(bind=cls.engine)
         AdminUserTopic.__table__.drop(bind=cls.engine)
         AdminUser.__table__.drop(bind=cls.engine)
         cls.engine.dispose()
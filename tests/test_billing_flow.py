@@ -25,11 +25,13 @@ from app.models.attachment import Attachment
 from app.models.invoice import Invoice
 from app.models.message import Message
 from app.models.notification import Notification
+from app.models.notification_unread_counter import NotificationUnreadCounter
 from app.models.request import Request
 from app.models.status import Status
 from app.models.status_history import StatusHistory
 from app.models.topic_status_transition import TopicStatusTransition
 from app.services.invoice_crypto import decrypt_requisites
+from tests.projection_tables import create_projection_tables, drop_projection_tables
 
 
 class _FakeS3Storage:
@@ -48,25 +50,23 @@ class BillingFlowTests(unittest.TestCase):
         cls.SessionLocal = sessionmaker(bind=cls.engine, autocommit=False, autoflush=False)
 
         AdminUser.__table__.create(bind=cls.engine)
-        Status.__table__.create(bind=cls.engine)
+        create_projection_tables(cls.engine)
         Request.__table__.create(bind=cls.engine)
         Message.__table__.create(bind=cls.engine)
         Attachment.__table__.create(bind=cls.engine)
-        StatusHistory.__table__.create(bind=cls.engine)
         Notification.__table__.create(bind=cls.engine)
+        NotificationUnreadCounter.__table__.create(bind=cls.engine)
         Invoice.__table__.create(bind=cls.engine)
-        TopicStatusTransition.__table__.create(bind=cls.engine)
 
     @classmethod
     def tearDownClass(cls):
         Invoice.__table__.drop(bind=cls.engine)
-        TopicStatusTransition.__table__.drop(bind=cls.engine)
+        drop_projection_tables(cls.engine)
+        NotificationUnreadCounter.__table__.drop(bind=cls.engine)
         Notification.__table__.drop(bind=cls.engine)
-        StatusHistory.__table__.drop(bind=cls.engine)
         Attachment.__table__.drop(bind=cls.engine)
         Message.__table__.drop(bind=cls.engine)
         Request.__table__.drop(bind=cls.engine)
-        Status.__table__.drop(bind=cls.engine)
         AdminUser.__table__.drop(bind=cls.engine)
         cls.engine.dispose()
 
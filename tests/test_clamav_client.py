@@ -0,0 +1,167 @@
+import os
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+os.environ.setdefault("DATABASE_URL", "sqlite+pysqlite:///:memory:")
+os.environ.setdefault("REDIS_URL", "redis://localhost:6379/0")
+os.environ.setdefault("S3_ENDPOINT", "http://localhost:9000")
+os.environ.setdefault("S3_ACCESS_KEY", "test")
+os.environ.setdefault("S3_SECRET_KEY", "test")
+os.environ.setdefault("S3_BUCKET", "test")
+
+import app.services.clamav_client as clamav_module
+from app.core.config import settings
+from app.services.clamav_client import (
+    ClamavBusyError,
+    ClamavInstream,
+    clamav_health,
+    clamav_signature_version,
+    parse_signature_version,
+    reset_clamav_for_tests,
+)
+from tests.clamd_stub import StubClamdServer
+
+
+def _scan(payload: bytes) -> tuple[bool, str | None]:
+    stream = ClamavInstream()
+    try:
+        for offset in range(0, len(payload), 1024):
+            stream.send(payload[offset : offset + 1024])
+        return stream.verdict()
+    finally:
+        stream.close()
+
+
+class ClamavClientTests(unittest.TestCase):
+    def setUp(self):
+        self._settings_backup = {
+            name: getattr(settings, name)
+            for name in (
+                "CLAMAV_ENABLED",
+                "CLAMAV_HOST",
+                "CLAMAV_PORT",
+                "CLAMAV_MAX_SESSIONS",
+                "CLAMAV_QUEUE_TIMEOUT_SECONDS",
+                "CLAMAV_POOL_IDLE_SECONDS",
+            )
+        }
+        self.servers = []
+        reset_clamav_for_tests()
+
+    def tearDown(self):
+        reset_clamav_for_tests()
+        for server in self.servers:
+            server.stop()
+        for name, value in self._settings_backup.items():
+            setattr(settings, name, value)
+
+    def _start(self, *, max_sessions: int, **server_options) -> StubClamdServer:
+        server = StubClamdServer(**server_options).start()
+        self.servers.append(server)
+        settings.CLAMAV_ENABLED = True
+        settings.CLAMAV_HOST = "127.0.0.1"
+        settings.CLAMAV_PORT = server.port
+        settings.CLAMAV_MAX_SESSIONS = max_sessions
+        settings.CLAMAV_QUEUE_TIMEOUT_SECONDS = 10
+        settings.CLAMAV_POOL_IDLE_SECONDS = 25
+        return server
+
+    def test_sequential_scans_share_one_idsession_connection(self):
+        server = self._start(max_sessions=2)
+        self.assertEqual(_scan(b"%PDF-1.4 clean document" * 200), (True, None))
+        self.assertEqual(_scan(b"prefix EICAR suffix"), (False, "Eicar-Test-Signature"))
+        self.assertEqual(clamav_signature_version(), "1.3.1/27400")
+
+        self.assertEqual(server.connections, 1)
+        self.assertEqual(server.scans, 2)
+        metrics = clamav_module.clamav_pool.metrics()
+        self.assertEqual(metrics["connections_opened"], 1)
+        self.assertEqual(metrics["scans"], 2)
+        self.assertEqual(metrics["in_use"], 0)
+        self.assertEqual(metrics["idle"], 1)
+
+    def test_concurrent_scans_never_exceed_session_limit(self):
+        server = self._start(max_sessions=2, max_threads=2, scan_delay=0.05)
+        results = []
+        errors = []
+
+        def worker():
+            try:
+                results.append(_scan(b"clean payload" * 100))
+            except Exception as exc:
+                errors.append(exc)
+
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(results, [(True, None)] * 8)
+        self.assertLessEqual(server.max_active, 2)
+        self.assertEqual(server.refused, 0)
+        metrics = clamav_module.clamav_pool.metrics()
+        self.assertLessEqual(metrics["connections_opened"], 2)
+        self.assertGreater(metrics["wait_ms_max"], 0)
+
+    def test_busy_pool_rejects_after_queue_timeout(self):
+        self._start(max_sessions=1)
+        settings.CLAMAV_QUEUE_TIMEOUT_SECONDS = 0
+        held = ClamavInstream()
+        try:
+            with self.assertRaises(ClamavBusyError):
+                ClamavInstream()
+        finally:
+            held.close()
+        self.assertEqual(clamav_module.clamav_pool.metrics()["busy_rejections"], 1)
+        self.assertEqual(_scan(b"after release"), (True, None))
+
+    def test_session_dropped_by_clamd_is_replaced_after_ping(self):
+        server = self._start(max_sessions=1, idle_timeout=0.2)
+        self.assertEqual(_scan(b"first"), (True, None))
+        time.sleep(0.4)
+        with patch.object(clamav_module, "_PING_AFTER_IDLE_SECONDS", 0.1):
+            self.assertEqual(_scan(b"second"), (True, None))
+        self.assertEqual(server.connections, 2)
+
+    def test_health_reports_version_and_pool_metrics(self):
+        self._start(max_sessions=3)
+        health = clamav_health()
+        self.assertEqual(health["status"], "ok")
+        self.assertEqual(health["version"], "1.3.1/27400")
+        self.assertEqual(health["pool"]["limit"], 3)
+
+        settings.CLAMAV_PORT = 1
+        reset_clamav_for_tests()
+        degraded = clamav_health()
+        self.assertEqual(degraded["status"], "degraded")
+        self.assertTrue(degraded["issues"])
+
+    def test_health_does_not_wait_for_a_saturated_pool(self):
+        self._start(max_sessions=1)
+        held = ClamavInstream()
+        try:
+            started_at = time.monotonic()
+            health = clamav_health()
+            self.assertLess(time.monotonic() - started_at, 1.0)
+        finally:
+            held.close()
+        self.assertEqual(health["status"], "degraded")
+        self.assertIn("Все сессии ClamAV заняты", health["issues"])
+
+    def test_unparsable_verdict_discards_the_session(self):
+        self._start(max_sessions=1)
+        with patch.object(clamav_module, "parse_scan_reply", side_effect=ValueError("garbled")):
+            with self.assertRaises(ValueError):
+                _scan(b"payload")
+        metrics = clamav_module.clamav_pool.metrics()
+        self.assertEqual(metrics["idle"], 0)
+        self.assertEqual(metrics["errors"], 1)
+
+    def test_signature_version_is_parsed_from_clamd_version_reply(self):
+        self.assertEqual(parse_signature_version("ClamAV 1.3.1/27400/Thu Oct 16 08:21:47 2026"), "1.3.1/27400")
+        self.assertIsNone(parse_signature_version("ClamAV 1.3.1"))
+        self.assertIsNone(parse_signature_version("UNKNOWN COMMAND"))
@@ -12,7 +12,10 @@ os.environ.setdefault("S3_SECRET_KEY", "test")
 os.environ.setdefault("S3_BUCKET", "test")
 
 from app.core.config import settings
+from app.services import chat_crypto
 from app.services.chat_crypto import (
+    clear_chat_key_cache_for_tests,
+    decrypt_message_bodies_for_request,
     decrypt_message_body,
     decrypt_message_body_for_request,
     encrypt_message_body,
@@ -65,10 +68,12 @@ class CryptoKidRotationTests(unittest.TestCase):
             "CHAT_ENCRYPTION_ACTIVE_KID": settings.CHAT_ENCRYPTION_ACTIVE_KID,
             "CHAT_ENCRYPTION_KEYS": settings.CHAT_ENCRYPTION_KEYS,
         }
+        clear_chat_key_cache_for_tests()
 
     def tearDown(self):
         for key, value in self._backup.items():
             setattr(settings, key, value)
+        clear_chat_key_cache_for_tests()
 
     def test_invoice_encrypt_uses_active_kid(self):
         settings.DATA_ENCRYPTION_SECRET = "legacy-secret-1234567890"
@@ -134,6 +139,49 @@ class CryptoKidRotationTests(unittest.TestCase):
             "request scoped",
         )
 
+    def test_chat_request_key_is_unwrapped_once_per_request_window(self):
+        settings.DATA_ENCRYPTION_SECRET = ""
+        settings.DATA_ENCRYPTION_ACTIVE_KID = "k2"
+        settings.DATA_ENCRYPTION_KEYS = "k2=new-data-secret-bbbbbbbbbbbbbbbb"
+        settings.CHAT_ENCRYPTION_SECRET = ""
+        settings.CHAT_ENCRYPTION_ACTIVE_KID = "k2"
+        settings.CHAT_ENCRYPTION_KEYS = "k2=new-chat-secret-cccccccccccccccc"
+
+        first, extra_fields, _ = encrypt_message_body_for_request("first", request_extra_fields={})
+        second, extra_fields, _ = encrypt_message_body_for_request("second", request_extra_fields=extra_fields)
+        clear_chat_key_cache_for_tests()
+
+        original_unwrap = chat_crypto._unwrap_chat_key
+        calls = []
+
+        def _counting_unwrap(payload, *, key_map):
+            calls.append(payload.get("kek_kid"))
+            return original_unwrap(payload, key_map=key_map)
+
+        chat_crypto._unwrap_chat_key = _counting_unwrap
+        try:
+            bodies = decrypt_message_bodies_for_request(
+                [first, None, "plain", second],
+                request_extra_fields=extra_fields,
+                request_id="req-1",
+            )
+            self.assertEqual(bodies, ["first", None, "plain", "second"])
+            self.assertEqual(
+                decrypt_message_body_for_request(second, request_extra_fields=extra_fields, request_id="req-1"),
+                "second",
+            )
+            self.assertEqual(len(calls), 1)
+
+            settings.CHAT_ENCRYPTION_KEYS = "k2=new-chat-secret-cccccccccccccccc,k3=next-chat-secret-dddddddddddddddd"
+            decrypt_message_body_for_request(first, request_extra_fields=extra_fields, request_id="req-1")
+            self.assertEqual(len(calls), 2)
+
+            chat_crypto.invalidate_chat_key_cache("req-1")
+            decrypt_message_body_for_request(first, request_extra_fields=extra_fields, request_id="req-1")
+            self.assertEqual(len(calls), 3)
+        finally:
+            chat_crypto._unwrap_chat_key = original_unwrap
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -18,15 +18,19 @@ os.environ.setdefault("S3_BUCKET", "test")
 from app.core.config import settings
 from app.core.security import create_jwt
 from app.db.session import get_db
+from app.api.admin.metrics import invalidate_overview_cache
 from app.main import app
 from app.models.admin_user import AdminUser
 from app.models.audit_log import AuditLog
+from app.models.lawyer_metric_rollup import LawyerMetricRollup
 from app.models.message import Message
 from app.models.request import Request
 from app.models.request_service_request import RequestServiceRequest
 from app.models.status import Status
 from app.models.status_history import StatusHistory
 from app.models.topic_status_transition import TopicStatusTransition
+from app.services.lawyer_metrics import rebuild_lawyer_metric_rollups
+from tests.projection_tables import create_projection_tables, drop_projection_tables
 
 
 class DashboardFinanceTests(unittest.TestCase):
@@ -41,19 +45,15 @@ class DashboardFinanceTests(unittest.TestCase):
         AdminUser.__table__.create(bind=cls.engine)
         AuditLog.__table__.create(bind=cls.engine)
         Request.__table__.create(bind=cls.engine)
-        Status.__table__.create(bind=cls.engine)
+        create_projection_tables(cls.engine)
         Message.__table__.create(bind=cls.engine)
         RequestServiceRequest.__table__.create(bind=cls.engine)
-        StatusHistory.__table__.create(bind=cls.engine)
-        TopicStatusTransition.__table__.create(bind=cls.engine)
 
     @classmethod
     def tearDownClass(cls):
-        StatusHistory.__table__.drop(bind=cls.engine)
-        TopicStatusTransition.__table__.drop(bind=cls.engine)
+        drop_projection_tables(cls.engine)
         RequestServiceRequest.__table__.drop(bind=cls.engine)
         Message.__table__.drop(bind=cls.engine)
-        Status.__table__.drop(bind=cls.engine)
         Request.__table__.drop(bind=cls.engine)
         AuditLog.__table__.drop(bind=cls.engine)
         AdminUser.__table__.drop(bind=cls.engine)
@@ -61,6 +61,7 @@ class DashboardFinanceTests(unittest.TestCase):
 
     def setUp(self):
         with self.SessionLocal() as db:
+            db.execute(delete(LawyerMetricRollup))
             db.execute(delete(StatusHistory))
             db.execute(delete(TopicStatusTransition))
             db.execute(delete(Message))
@@ -428,3 +429,78 @@ class DashboardFinanceTests(unittest.TestCase):
         self.assertEqual(int((body.get("by_status") or {}).get("CLOSED") or 0), 1)
         self.assertEqual(len(body.get("lawyer_loads") or []), 1)
         self.assertEqual((body.get("lawyer_loads") or [])[0].get("lawyer_id"), lawyer_a_id)
+
+    def test_rollups_follow_history_writes_and_backfill_rebuilds_them(self):
+        now = datetime.now(timezone.utc)
+        month_start = datetime(now.year, now.month, 1, tzinfo=timezone.utc)
+        with self.SessionLocal() as db:
+            db.add(Status(code="CLOSED", name="Закрыта", enabled=True, sort_order=1, is_terminal=True))
+            lawyer = AdminUser(
+                role="LAWYER",
+                name="Юрист Сводка",
+                email="lawyer.rollup@example.com",
+                password_hash="hash",
+                salary_percent=50,
+                is_active=True,
+            )
+            db.add(lawyer)
+            db.flush()
+            req = Request(
+                track_number="TRK-ROLLUP-1",
+                client_name="Клиент Сводка",
+                client_phone="+79990003001",
+                topic_code="civil",
+                status_code="CLOSED",
+                assigned_lawyer_id=str(lawyer.id),
+                invoice_amount=800,
+                extra_fields={},
+            )
+            db.add(req)
+            db.flush()
+            db.add_all(
+                [
+                    StatusHistory(request_id=req.id, from_status="INVOICE", to_status="PAID", created_at=month_start),
+                    StatusHistory(request_id=req.id, from_status="PAID", to_status="CLOSED", created_at=month_start),
+                    AuditLog(
+                        entity="requests",
+                        entity_id=str(req.id),
+                        action="MANUAL_CLAIM",
+                        diff={"assigned_lawyer_id": str(lawyer.id)},
+                        created_at=month_start,
+                    ),
+                ]
+            )
+            db.commit()
+            lawyer_id = str(lawyer.id)
+            request_id = req.id
+            live = {
+                (row.metric, float(row.value))
+                for row in db.query(LawyerMetricRollup).filter(LawyerMetricRollup.lawyer_id == lawyer_id).all()
+            }
+            self.assertEqual(
+                live,
+                {("paid_events", 1.0), ("paid_gross", 800.0), ("completed", 1.0), ("assigned", 1.0)},
+            )
+
+            db.execute(delete(LawyerMetricRollup))
+            db.commit()
+            result = rebuild_lawyer_metric_rollups(db)
+            self.assertEqual(result["status_events"], 2)
+            self.assertEqual(result["audit_events"], 1)
+            rebuilt = {(row.metric, float(row.value)) for row in db.query(LawyerMetricRollup).all()}
+            self.assertEqual(rebuilt, live)
+
+        headers = self._headers("LAWYER", sub=lawyer_id, email="lawyer.rollup@example.com")
+        body = self.client.get("/api/admin/metrics/overview?include_sla=false", headers=headers).json()
+        row = body["lawyer_loads"][0]
+        self.assertEqual(row["monthly_paid_events"], 1)
+        self.assertAlmostEqual(float(row["monthly_salary"]), 400.0, places=2)
+
+        with self.SessionLocal() as db:
+            db.add(StatusHistory(request_id=request_id, from_status="INVOICE", to_status="PAID", created_at=month_start))
+            db.commit()
+        cached = self.client.get("/api/admin/metrics/overview?include_sla=false", headers=headers).json()
+        self.assertEqual(cached["lawyer_loads"][0]["monthly_paid_events"], 1)
+        invalidate_overview_cache()
+        fresh = self.client.get("/api/admin/metrics/overview?include_sla=false", headers=headers).json()
+        self.assertEqual(fresh["lawyer_loads"][0]["monthly_paid_events"], 2)
@@ -26,9 +26,11 @@ from app.models.attachment import Attachment
 from app.models.invoice import Invoice
 from app.models.message import Message
 from app.models.notification import Notification
+from app.models.notification_unread_counter import NotificationUnreadCounter
 from app.models.request import Request
 from app.services.chat_crypto import decrypt_message_body_for_request
 from app.services.invoice_crypto import decrypt_requisites
+from tests.projection_tables import create_projection_tables, drop_projection_tables
 
 
 class _FakeS3Storage:
@@ -47,7 +49,9 @@ class InvoiceApiTests(unittest.TestCase):
         cls.SessionLocal = sessionmaker(bind=cls.engine, autocommit=False, autoflush=False)
         AdminUser.__table__.create(bind=cls.engine)
         Request.__table__.create(bind=cls.engine)
+        create_projection_tables(cls.engine)
         Notification.__table__.create(bind=cls.engine)
+        NotificationUnreadCounter.__table__.create(bind=cls.engine)
         Message.__table__.create(bind=cls.engine)
         Attachment.__table__.create(bind=cls.engine)
         Invoice.__table__.create(bind=cls.engine)
@@ -57,7 +61,9 @@ class InvoiceApiTests(unittest.TestCase):
         Invoice.__table__.drop(bind=cls.engine)
         Attachment.__table__.drop(bind=cls.engine)
         Message.__table__.drop(bind=cls.engine)
+        NotificationUnreadCounter.__table__.drop(bind=cls.engine)
         Notification.__table__.drop(bind=cls.engine)
+        drop_projection_tables(cls.engine)
         Request.__table__.drop(bind=cls.engine)
         AdminUser.__table__.drop(bind=cls.engine)
         cls.engine.dispose()
@@ -106,6 +106,10 @@ class MigrationTests(unittest.TestCase):
             "invoices",
             "security_audit_log",
             "data_retention_policies",
+            "kanban_cards",
+            "notification_unread_counters",
+            "telegram_outbox",
+            "lawyer_metric_rollups",
             "alembic_version",
         }
         tables = set(self.inspector.get_table_names())
@@ -167,6 +171,20 @@ class MigrationTests(unittest.TestCase):
         self.assertIn("lawyer_has_unread_updates", columns)
         self.assertIn("lawyer_unread_event_type", columns)
 
+    def test_requests_contains_chat_activity_counter_columns(self):
+        columns = {column["name"] for column in self.inspector.get_columns("requests")}
+        self.assertIn("chat_message_count", columns)
+        self.assertIn("chat_attachment_count", columns)
+        self.assertIn("chat_latest_message_at", columns)
+        self.assertIn("chat_latest_attachment_at", columns)
+        self.assertIn("chat_activity_version", columns)
+
+    def test_requests_contains_sla_state_columns(self):
+        columns = {column["name"] for column in self.inspector.get_columns("requests")}
+        self.assertIn("status_entered_at", columns)
+        self.assertIn("sla_deadline_at", columns)
+        self.assertIn("first_lawyer_response_at", columns)
+
     def test_status_transitions_contains_sla_hours_column(self):
         columns = {column["name"] for column in self.inspector.get_columns("topic_status_transitions")}
         self.assertIn("sla_hours", columns)
@@ -208,6 +226,33 @@ class MigrationTests(unittest.TestCase):
     def test_requests_contains_assigned_lawyer_index(self):
         indexes = {index["name"] for index in self.inspector.get_indexes("requests")}
         self.assertIn("ix_requests_assigned_lawyer_id", indexes)
+        self.assertIn("ix_requests_sla_deadline_at_active", indexes)
+
+    def test_search_columns_have_trigram_and_fulltext_indexes(self):
+        request_indexes = {index["name"] for index in self.inspector.get_indexes("requests")}
+        client_indexes = {index["name"] for index in self.inspector.get_indexes("clients")}
+        self.assertIn("ix_requests_track_number_trgm", request_indexes)
+        self.assertIn("ix_requests_client_name_trgm", request_indexes)
+        self.assertIn("ix_requests_client_phone_trgm", request_indexes)
+        self.assertIn("ix_requests_description_fts", request_indexes)
+        self.assertIn("ix_clients_full_name_trgm", client_indexes)
+
+    def test_kanban_cards_contains_keyset_sort_indexes(self):
+        columns = {column["name"] for column in self.inspector.get_columns("kanban_cards")}
+        self.assertIn("sla_deadline_at", columns)
+        self.assertIn("assigned_lawyer_sort_key", columns)
+        indexes = {index["name"] for index in self.inspector.get_indexes("kanban_cards")}
+        self.assertIn("ix_kanban_cards_created_request", indexes)
+        self.assertIn("ix_kanban_cards_lawyer_sort", indexes)
+        self.assertIn("ix_kanban_cards_deadline", indexes)
+
+    def test_notification_unread_counters_contains_recipient_indexes(self):
+        columns = {column["name"] for column in self.inspector.get_columns("notification_unread_counters")}
+        self.assertIn("counter_key", columns)
+        self.assertIn("unread_count", columns)
+        indexes = {index["name"] for index in self.inspector.get_indexes("notification_unread_counters")}
+        self.assertIn("ix_notification_unread_counters_admin", indexes)
+        self.assertIn("ix_notification_unread_counters_track", indexes)
 
     def test_workspace_payload_tables_contain_ordering_indexes(self):
         message_indexes = {index["name"] for index in self.inspector.get_indexes("messages")}
@@ -336,6 +381,9 @@ class MigrationTests(unittest.TestCase):
         self.assertIn("scanned_at", columns)
         self.assertIn("content_sha256", columns)
         self.assertIn("detected_mime", columns)
+        self.assertIn("scan_engine_version", columns)
+        indexes = {index["name"] for index in self.inspector.get_indexes("attachments")}
+        self.assertIn("ix_attachments_content_sha256", indexes)
 
     def test_landing_featured_staff_contains_core_columns(self):
         columns = {column["name"] for column in self.inspector.get_columns("landing_featured_staff")}
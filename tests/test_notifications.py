@@ -7,6 +7,7 @@ from unittest.mock import patch
 from botocore.exceptions import ClientError
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine, delete
+from sqlalchemy import event as sa_event
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.pool import StaticPool
 
@@ -25,15 +26,27 @@ from app.main import app as main_app
 from app.models.admin_user import AdminUser
 from app.models.attachment import Attachment
 from app.models.audit_log import AuditLog
+from app.models.kanban_card import KanbanCard
 from app.models.message import Message
 from app.models.notification import Notification
+from app.models.notification_unread_counter import NotificationUnreadCounter
 from app.models.request import Request
 from app.models.status import Status
 from app.models.status_history import StatusHistory
 from app.models.topic_status_transition import TopicStatusTransition
 from app.services.chat_secure_service import create_admin_or_lawyer_message
-from app.services.notifications import EVENT_REQUEST_DATA, notify_request_event
+from app.services.notifications import (
+    EVENT_REQUEST_DATA,
+    mark_admin_notifications_read,
+    notify_request_event,
+    notify_requests_sla_overdue,
+    reconcile_notification_unread_counters,
+    unread_admin_summary,
+    unread_client_summary,
+    unread_global_summary_for_lawyers,
+)
 from app.workers.tasks import sla as sla_task
+from tests.projection_tables import create_projection_tables, drop_projection_tables
 
 
 class _FakeS3Storage:
@@ -62,17 +75,17 @@ class NotificationFlowTests(unittest.TestCase):
         AdminUser.__table__.create(bind=cls.engine)
         AuditLog.__table__.create(bind=cls.engine)
         Request.__table__.create(bind=cls.engine)
+        create_projection_tables(cls.engine)
         Message.__table__.create(bind=cls.engine)
         Attachment.__table__.create(bind=cls.engine)
-        StatusHistory.__table__.create(bind=cls.engine)
-        TopicStatusTransition.__table__.create(bind=cls.engine)
         Notification.__table__.create(bind=cls.engine)
+        NotificationUnreadCounter.__table__.create(bind=cls.engine)
 
     @classmethod
     def tearDownClass(cls):
+        drop_projection_tables(cls.engine)
+        NotificationUnreadCounter.__table__.drop(bind=cls.engine)
         Notification.__table__.drop(bind=cls.engine)
-        TopicStatusTransition.__table__.drop(bind=cls.engine)
-        StatusHistory.__table__.drop(bind=cls.engine)
         Attachment.__table__.drop(bind=cls.engine)
         Message.__table__.drop(bind=cls.engine)
         Request.__table__.drop(bind=cls.engine)
@@ -82,6 +95,7 @@ class NotificationFlowTests(unittest.TestCase):
 
     def setUp(self):
         with self.SessionLocal() as db:
+            db.execute(delete(KanbanCard))
             db.execute(delete(Notification))
             db.execute(delete(StatusHistory))
             db.execute(delete(TopicStatusTransition))
@@ -533,11 +547,10 @@ class NotificationSlaTests(unittest.TestCase):
         cls.SessionLocal = sessionmaker(bind=cls.engine, autocommit=False, autoflush=False)
         AdminUser.__table__.create(bind=cls.engine)
         Request.__table__.create(bind=cls.engine)
-        Status.__table__.create(bind=cls.engine)
+        create_projection_tables(cls.engine)
         Message.__table__.create(bind=cls.engine)
-        TopicStatusTransition.__table__.create(bind=cls.engine)
-        StatusHistory.__table__.create(bind=cls.engine)
         Notification.__table__.create(bind=cls.engine)
+        NotificationUnreadCounter.__table__.create(bind=cls.engine)
 
         cls._old_sla_session_local = sla_task.SessionLocal
         sla_task.SessionLocal = cls.SessionLocal
@@ -545,11 +558,10 @@ class NotificationSlaTests(unittest.TestCase):
     @classmethod
     def tearDownClass(cls):
         sla_task.SessionLocal = cls._old_sla_session_local
+        NotificationUnreadCounter.__table__.drop(bind=cls.engine)
         Notification.__table__.drop(bind=cls.engine)
-        StatusHistory.__table__.drop(bind=cls.engine)
-        TopicStatusTransition.__table__.drop(bind=cls.engine)
+        drop_projection_tables(cls.engine)
         Message.__table__.drop(bind=cls.engine)
-        Status.__table__.drop(bind=cls.engine)
         Request.__table__.drop(bind=cls.engine)
         AdminUser.__table__.drop(bind=cls.engine)
         cls.engine.dispose()
@@ -620,3 +632,130 @@ class NotificationSlaTests(unittest.TestCase):
         with self.SessionLocal() as db:
             rows = db.query(Notification).filter(Notification.event_type == "SLA_OVERDUE").all()
             self.assertGreaterEqual(len(rows), 2)
+
+    def test_unread_counters_follow_notification_writes_and_reconcile_repairs_drift(self):
+        with self.SessionLocal() as db:
+            admin = AdminUser(
+                role="ADMIN", name="Админ", email="root-counter@example.com", password_hash="hash", is_active=True
+            )
+            lawyer = AdminUser(
+                role="LAWYER", name="Юрист", email="lawyer-counter@example.com", password_hash="hash", is_active=True
+            )
+            db.add_all([admin, lawyer])
+            db.flush()
+            req = Request(
+                track_number="TRK-NOTIF-COUNTER",
+                client_name="Клиент",
+                client_phone="+79990000010",
+                topic_code="civil",
+                status_code="NEW",
+                description="counter",
+                extra_fields={},
+                assigned_lawyer_id=str(lawyer.id),
+            )
+            db.add(req)
+            db.flush()
+            created = notify_requests_sla_overdue(db, [(req, "Просрочено")], send_telegram=False)
+            client_row = Notification(
+                request_id=req.id,
+                recipient_type="CLIENT",
+                recipient_track_number="TRK-NOTIF-COUNTER",
+                event_type="STATUS",
+                title="Статус",
+                payload={},
+                is_read=False,
+            )
+            db.add(client_row)
+            db.commit()
+            self.assertEqual(created["internal_created"], 2)
+
+            self.assertEqual(
+                unread_admin_summary(db, admin_user_id=lawyer.id), {"total": 1, "by_event": {"SLA_OVERDUE": 1}}
+            )
+            self.assertEqual(unread_global_summary_for_lawyers(db)["total"], 1)
+            self.assertEqual(unread_client_summary(db, track_number="trk-notif-counter")["total"], 1)
+
+            self.assertEqual(mark_admin_notifications_read(db, admin_user_id=lawyer.id, request_id=req.id), 1)
+            self.assertEqual(mark_admin_notifications_read(db, admin_user_id=lawyer.id, request_id=req.id), 0)
+            db.delete(client_row)
+            db.commit()
+            self.assertEqual(unread_admin_summary(db, admin_user_id=lawyer.id)["total"], 0)
+            self.assertEqual(unread_client_summary(db, track_number="TRK-NOTIF-COUNTER")["total"], 0)
+            self.assertEqual(unread_admin_summary(db, admin_user_id=admin.id)["total"], 1)
+            self.assertEqual(db.query(NotificationUnreadCounter).count(), 1)
+
+            db.execute(delete(NotificationUnreadCounter))
+            db.commit()
+            self.assertEqual(reconcile_notification_unread_counters(db), {"counters": 1, "fixed": 1})
+            self.assertEqual(unread_admin_summary(db, admin_user_id=admin.id, request_id=req.id)["total"], 1)
+
+            db.execute(delete(Notification).where(Notification.request_id == req.id))
+            db.commit()
+            self.assertEqual(unread_admin_summary(db, admin_user_id=admin.id)["total"], 0)
+            self.assertEqual(db.query(NotificationUnreadCounter).count(), 0)
+
+    def test_request_event_fans_out_in_one_insert_and_skips_dedupe_conflicts(self):
+        with self.SessionLocal() as db:
+            admins = [
+                AdminUser(
+                    role="ADMIN",
+                    name=f"Админ {index}",
+                    email=f"fanout-{index}@example.com",
+                    password_hash="hash",
+                    is_active=True,
+                )
+                for index in range(3)
+            ]
+            lawyer = AdminUser(
+                role="LAWYER", name="Юрист", email="fanout-lawyer@example.com", password_hash="hash", is_active=True
+            )
+            db.add_all([*admins, lawyer])
+            db.flush()
+            req = Request(
+                track_number="TRK-NOTIF-FANOUT",
+                client_name="Клиент",
+                client_phone="+79990000011",
+                topic_code="civil",
+                status_code="NEW",
+                description="fanout",
+                extra_fields={},
+                assigned_lawyer_id=str(lawyer.id),
+            )
+            db.add(req)
+            db.commit()
+            db.refresh(req)
+
+            statements: list[str] = []
+
+            def _capture(conn, cursor, statement, parameters, context, executemany):
+                statements.append(statement.lstrip().split(" ", 1)[0].upper())
+
+            sa_event.listen(self.engine, "before_cursor_execute", _capture)
+            try:
+                first = notify_request_event(
+                    db,
+                    request=req,
+                    event_type=EVENT_REQUEST_DATA,
+                    actor_role="CLIENT",
+                    send_telegram=False,
+                    dedupe_prefix="fanout:1",
+                )
+                second = notify_request_event(
+                    db,
+                    request=req,
+                    event_type=EVENT_REQUEST_DATA,
+                    actor_role="CLIENT",
+                    send_telegram=False,
+                    dedupe_prefix="fanout:1",
+                )
+            finally:
+                sa_event.remove(self.engine, "before_cursor_execute", _capture)
+            db.commit()
+
+            self.assertEqual(first["internal_created"], 4)
+            self.assertEqual(second["internal_created"], 0)
+            # One admin lookup for both events; per call one notification insert, plus one counter upsert for the first.
+            self.assertEqual(statements.count("SELECT"), 1)
+            self.assertEqual(statements.count("INSERT"), 3)
+            self.assertEqual(db.query(Notification).filter(Notification.request_id == req.id).count(), 4)
+            self.assertEqual(unread_admin_summary(db, admin_user_id=lawyer.id)["total"], 1)
@@ -19,6 +19,7 @@ from app.main import app
 from app.models.otp_session import OtpSession
 from app.models.request import Request
 from app.services.rate_limit import InMemoryRateLimiter
+from tests.projection_tables import create_projection_tables, drop_projection_tables
 
 
 class OtpRateLimitTests(unittest.TestCase):
@@ -31,11 +32,13 @@ class OtpRateLimitTests(unittest.TestCase):
         )
         cls.SessionLocal = sessionmaker(bind=cls.engine, autocommit=False, autoflush=False)
         Request.__table__.create(bind=cls.engine)
+        create_projection_tables(cls.engine)
         OtpSession.__table__.create(bind=cls.engine)
 
     @classmethod
     def tearDownClass(cls):
         OtpSession.__table__.drop(bind=cls.engine)
+        drop_projection_tables(cls.engine)
         Request.__table__.drop(bind=cls.engine)
         cls.engine.dispose()
 
@@ -139,3 +142,23 @@ class OtpRateLimitTests(unittest.TestCase):
             )
             self.assertEqual(wrong_second.status_code, 429)
             self.assertIn("Слишком много OTP-запросов", wrong_second.json().get("detail", ""))
+
+    def test_in_memory_limiter_hit_many_is_atomic_and_bounded(self):
+        limiter = InMemoryRateLimiter(max_keys=3)
+        first = limiter.hit_many(["ip", "phone"], limit=1, window_seconds=60)
+        self.assertTrue(all(item.allowed for item in first))
+
+        # The exhausted "ip" bucket rejects the batch and the fresh "email" bucket is left untouched.
+        blocked = limiter.hit_many(["ip", "email"], limit=1, window_seconds=60)
+        self.assertEqual([item.allowed for item in blocked], [False, False])
+        self.assertGreaterEqual(blocked[0].retry_after_seconds, 1)
+        self.assertTrue(limiter.hit("email", limit=1, window_seconds=60).allowed)
+
+        limiter.hit("track", limit=1, window_seconds=60)
+        self.assertEqual(len(limiter._data), 3)
+        self.assertNotIn("ip", limiter._data)
+        self.assertTrue(limiter.hit("ip", limit=1, window_seconds=60).allowed)
+
+        burst = InMemoryRateLimiter()
+        allowed = [burst.hit("otp", limit=1, window_seconds=60, burst=2).allowed for _ in range(4)]
+        self.assertEqual(allowed, [True, True, True, False])
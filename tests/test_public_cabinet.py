@@ -25,11 +25,13 @@ from app.main import app as main_app
 from app.models.attachment import Attachment
 from app.models.message import Message
 from app.models.notification import Notification
+from app.models.notification_unread_counter import NotificationUnreadCounter
 from app.models.request import Request
 from app.services.chat_crypto import decrypt_message_body_for_request
 from app.models.request_data_requirement import RequestDataRequirement
 from app.models.status_history import StatusHistory
 from app.services.chat_presence import clear_presence_for_tests, set_typing_presence
+from tests.projection_tables import create_projection_tables, drop_projection_tables
 
 
 class _FakeBody:
@@ -71,18 +73,20 @@ class PublicCabinetTests(unittest.TestCase):
         )
         cls.SessionLocal = sessionmaker(bind=cls.engine, autocommit=False, autoflush=False)
         Request.__table__.create(bind=cls.engine)
+        create_projection_tables(cls.engine)
         Notification.__table__.create(bind=cls.engine)
+        NotificationUnreadCounter.__table__.create(bind=cls.engine)
         Message.__table__.create(bind=cls.engine)
         Attachment.__table__.create(bind=cls.engine)
         RequestDataRequirement.__table__.create(bind=cls.engine)
-        StatusHistory.__table__.create(bind=cls.engine)
 
     @classmethod
     def tearDownClass(cls):
         RequestDataRequirement.__table__.drop(bind=cls.engine)
-        StatusHistory.__table__.drop(bind=cls.engine)
+        drop_projection_tables(cls.engine)
         Attachment.__table__.drop(bind=cls.engine)
         Message.__table__.drop(bind=cls.engine)
+        NotificationUnreadCounter.__table__.drop(bind=cls.engine)
         Notification.__table__.drop(bind=cls.engine)
         Request.__table__.drop(bind=cls.engine)
         cls.engine.dispose()
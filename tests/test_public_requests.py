@@ -21,13 +21,16 @@ from app.main import app
 from app.core.config import settings
 from app.core.security import create_jwt, decode_jwt
 from app.db.session import get_db
+from app.models.admin_user import AdminUser
 from app.models.client import Client
 from app.models.audit_log import AuditLog
 from app.models.notification import Notification
+from app.models.notification_unread_counter import NotificationUnreadCounter
 from app.models.otp_session import OtpSession
 from app.models.request import Request
 from app.models.request_service_request import RequestServiceRequest
 from app.models.topic_required_field import TopicRequiredField
+from tests.projection_tables import create_projection_tables, drop_projection_tables
 
 
 class PublicRequestCreateTests(unittest.TestCase):
@@ -42,17 +45,23 @@ class PublicRequestCreateTests(unittest.TestCase):
         Client.__table__.create(bind=cls.engine)
         AuditLog.__table__.create(bind=cls.engine)
         Request.__table__.create(bind=cls.engine)
+        create_projection_tables(cls.engine)
+        AdminUser.__table__.create(bind=cls.engine)
         RequestServiceRequest.__table__.create(bind=cls.engine)
         Notification.__table__.create(bind=cls.engine)
+        NotificationUnreadCounter.__table__.create(bind=cls.engine)
         OtpSession.__table__.create(bind=cls.engine)
         TopicRequiredField.__table__.create(bind=cls.engine)
 
     @classmethod
     def tearDownClass(cls):
         RequestServiceRequest.__table__.drop(bind=cls.engine)
+        NotificationUnreadCounter.__table__.drop(bind=cls.engine)
         Notification.__table__.drop(bind=cls.engine)
         OtpSession.__table__.drop(bind=cls.engine)
         TopicRequiredField.__table__.drop(bind=cls.engine)
+        AdminUser.__table__.drop(bind=cls.engine)
+        drop_projection_tables(cls.engine)
         Request.__table__.drop(bind=cls.engine)
         AuditLog.__table__.drop(bind=cls.engine)
         Client.__table__.drop(bind=cls.engine)
@@ -23,11 +23,14 @@ from app.models.admin_user import AdminUser
 from app.models.admin_user_topic import AdminUserTopic
 from app.models.audit_log import AuditLog
 from app.models.client import Client
+from app.models.kanban_card import KanbanCard
 from app.models.notification import Notification
+from app.models.notification_unread_counter import NotificationUnreadCounter
 from app.models.request import Request
 from app.models.status import Status
 from app.models.topic_required_field import TopicRequiredField
 from app.workers.tasks import assign as assign_task
+from tests.projection_tables import create_projection_tables, drop_projection_tables
 
 
 class RequestRatesTests(unittest.TestCase):
@@ -43,9 +46,10 @@ class RequestRatesTests(unittest.TestCase):
         AdminUserTopic.__table__.create(bind=cls.engine)
         Client.__table__.create(bind=cls.engine)
         Request.__table__.create(bind=cls.engine)
-        Status.__table__.create(bind=cls.engine)
+        create_projection_tables(cls.engine)
         TopicRequiredField.__table__.create(bind=cls.engine)
         Notification.__table__.create(bind=cls.engine)
+        NotificationUnreadCounter.__table__.create(bind=cls.engine)
         AuditLog.__table__.create(bind=cls.engine)
 
         cls._old_session_local = assign_task.SessionLocal
@@ -54,10 +58,11 @@ class RequestRatesTests(unittest.TestCase):
     @classmethod
     def tearDownClass(cls):
         assign_task.SessionLocal = cls._old_session_local
+        drop_projection_tables(cls.engine)
         AuditLog.__table__.drop(bind=cls.engine)
+        NotificationUnreadCounter.__table__.drop(bind=cls.engine)
         Notification.__table__.drop(bind=cls.engine)
         TopicRequiredField.__table__.drop(bind=cls.engine)
-        Status.__table__.drop(bind=cls.engine)
         Request.__table__.drop(bind=cls.engine)
         Client.__table__.drop(bind=cls.engine)
         AdminUserTopic.__table__.drop(bind=cls.engine)
@@ -67,6 +72,7 @@ class RequestRatesTests(unittest.TestCase):
     def setUp(self):
         with self.SessionLocal() as db:
             db.execute(delete(AuditLog))
+            db.execute(delete(KanbanCard))
             db.execute(delete(Notification))
             db.execute(delete(TopicRequiredField))
             db.execute(delete(Status))
@@ -0,0 +1,92 @@
+import os
+import unittest
+from unittest.mock import patch
+
+os.environ.setdefault("DATABASE_URL", "sqlite+pysqlite:///:memory:")
+os.environ.setdefault("REDIS_URL", "redis://localhost:6379/0")
+os.environ.setdefault("S3_ENDPOINT", "http://localhost:9000")
+os.environ.setdefault("S3_ACCESS_KEY", "test")
+os.environ.setdefault("S3_SECRET_KEY", "test")
+os.environ.setdefault("S3_BUCKET", "test")
+
+from app.core.config import settings
+from app.services import redis_client
+from app.services.rate_limit import get_rate_limiter, reset_rate_limiter_for_tests
+from app.services.redis_client import (
+    CIRCUIT_CLOSED,
+    CIRCUIT_HALF_OPEN,
+    CIRCUIT_OPEN,
+    get_redis_client,
+    redis_circuit,
+    redis_health,
+    reset_redis_for_tests,
+)
+
+
+class _BrokenRedis:
+    def __init__(self):
+        self.calls = 0
+
+    def register_script(self, source):
+        def run(keys=None, args=None):
+            self.calls += 1
+            raise ConnectionError("redis down")
+
+        return run
+
+    def ping(self):
+        self.calls += 1
+        raise ConnectionError("redis down")
+
+
+class RedisClientCircuitTests(unittest.TestCase):
+    def setUp(self):
+        reset_redis_for_tests()
+        reset_rate_limiter_for_tests()
+        self.broken = _BrokenRedis()
+        self.patcher = patch.object(redis_client, "_shared_sync_client", return_value=self.broken)
+        self.patcher.start()
+
+    def tearDown(self):
+        self.patcher.stop()
+        reset_redis_for_tests()
+        reset_rate_limiter_for_tests()
+
+    def test_rate_limiter_falls_back_and_circuit_stops_calling_redis(self):
+        limiter = get_rate_limiter()
+        with patch.object(settings, "REDIS_CIRCUIT_FAILURE_THRESHOLD", 2), patch.object(
+            settings, "REDIS_CIRCUIT_COOLDOWN_SECONDS", 60
+        ):
+            results = [limiter.hit("otp:test", limit=3, window_seconds=60) for _ in range(5)]
+
+        self.assertEqual([item.allowed for item in results], [True, True, True, False, False])
+        self.assertEqual(results[-1].current_value, 3)
+        self.assertGreaterEqual(results[-1].retry_after_seconds, 1)
+        self.assertEqual(redis_circuit.state, CIRCUIT_OPEN)
+        # Two failed hits open the circuit; later hits are served locally without touching Redis.
+        self.assertEqual(self.broken.calls, 2)
+        health = redis_health()
+        self.assertEqual(health["status"], "degraded")
+        self.assertEqual(health["fallback_hits"]["rate_limit"], 5)
+
+    def test_circuit_reprobes_after_cooldown_and_closes_on_success(self):
+        with patch.object(settings, "REDIS_CIRCUIT_FAILURE_THRESHOLD", 1), patch.object(
+            settings, "REDIS_CIRCUIT_COOLDOWN_SECONDS", 60
+        ):
+            redis_circuit.record_failure()
+            self.assertEqual(redis_circuit.state, CIRCUIT_OPEN)
+            self.assertIsNone(get_redis_client("test"))
+
+            with patch("app.services.redis_client.time.monotonic", return_value=redis_circuit.opened_at + 61):
+                self.assertIs(get_redis_client("test"), self.broken)
+                self.assertEqual(redis_circuit.state, CIRCUIT_HALF_OPEN)
+                # Only one probe at a time while half-open.
+                self.assertIsNone(get_redis_client("test"))
+                redis_circuit.record_success()
+
+        self.assertEqual(redis_circuit.state, CIRCUIT_CLOSED)
+        self.assertIs(get_redis_client("test"), self.broken)
+
+
+if __name__ == "__main__":
+    unittest.main()
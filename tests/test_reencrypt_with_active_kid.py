@@ -4,7 +4,8 @@ import hmac
 import os
 import unittest
 from datetime import datetime, timezone
-from uuid import uuid4
+from unittest.mock import patch
+from uuid import UUID, uuid4
 
 from sqlalchemy import create_engine, delete, text
 from sqlalchemy.orm import sessionmaker
@@ -23,8 +24,21 @@ from app.models.invoice import Invoice
 from app.models.message import Message
 from app.models.request import Request
 from app.scripts import reencrypt_with_active_kid as reencrypt_script
-from app.services.chat_crypto import extract_message_kid
+from app.services.chat_crypto import (
+    decrypt_message_body_for_request,
+    encrypt_message_body_for_request,
+    extract_message_kid,
+    extract_request_chat_kek_kid,
+)
+from app.services.chat_crypto_migration import (
+    claim_legacy_migration_lease,
+    count_legacy_chat_messages,
+    release_legacy_migration_lease,
+    run_legacy_chat_migration,
+)
+from app.workers.tasks import chat_crypto as chat_crypto_task
 from app.services.invoice_crypto import extract_requisites_kid
+from tests.projection_tables import create_projection_tables, drop_projection_tables
 
 
 def _xor_bytes(a: bytes, b: bytes) -> bytes:
@@ -64,17 +78,22 @@ class ReencryptWithKidTests(unittest.TestCase):
         cls.SessionLocal = sessionmaker(bind=cls.engine, autocommit=False, autoflush=False)
         AdminUser.__table__.create(bind=cls.engine)
         Request.__table__.create(bind=cls.engine)
+        create_projection_tables(cls.engine)
         Message.__table__.create(bind=cls.engine)
         Invoice.__table__.create(bind=cls.engine)
 
         cls._old_session_local = reencrypt_script.SessionLocal
+        cls._old_task_session_local = chat_crypto_task.SessionLocal
         reencrypt_script.SessionLocal = cls.SessionLocal
+        chat_crypto_task.SessionLocal = cls.SessionLocal
 
     @classmethod
     def tearDownClass(cls):
         reencrypt_script.SessionLocal = cls._old_session_local
+        chat_crypto_task.SessionLocal = cls._old_task_session_local
         Invoice.__table__.drop(bind=cls.engine)
         Message.__table__.drop(bind=cls.engine)
+        drop_projection_tables(cls.engine)
         Request.__table__.drop(bind=cls.engine)
         AdminUser.__table__.drop(bind=cls.engine)
         cls.engine.dispose()
@@ -142,6 +161,7 @@ class ReencryptWithKidTests(unittest.TestCase):
                 totp_enabled=True,
                 totp_secret_encrypted=_legacy_invoice_token(old_secret),
                 is_active=True,
+                responsible="",
             )
             db.add(admin)
 
@@ -178,13 +198,281 @@ class ReencryptWithKidTests(unittest.TestCase):
             admin_token = db.execute(text("SELECT totp_secret_encrypted FROM admin_users LIMIT 1")).scalar_one()
             message_token = db.execute(text("SELECT body FROM messages LIMIT 1")).scalar_one()
             request_row = db.execute(text("SELECT extra_fields FROM requests LIMIT 1")).scalar_one()
+            admin_responsible = db.execute(text("SELECT responsible FROM admin_users LIMIT 1")).scalar_one()
+            invoice_responsible = db.execute(text("SELECT responsible FROM invoices LIMIT 1")).scalar_one()
 
         self.assertEqual(extract_requisites_kid(str(invoice_token)), "k2")
         self.assertEqual(extract_requisites_kid(str(admin_token)), "k2")
+        self.assertEqual(admin_responsible, "Администратор системы")
+        self.assertEqual(invoice_responsible, "seed")
         self.assertTrue(str(message_token).startswith("chatenc:v3:"))
         self.assertEqual(extract_message_kid(str(message_token)), "k2")
         self.assertIn("chat_crypto", str(request_row))
 
+    def test_reencrypt_script_pages_batches_and_rewraps_request_keys(self):
+        old_secret = "legacy-secret-aaaaaaaaaaaaaaaa"
+        settings.DATA_ENCRYPTION_SECRET = ""
+        settings.DATA_ENCRYPTION_ACTIVE_KID = "k1"
+        settings.DATA_ENCRYPTION_KEYS = f"k1={old_secret}"
+        settings.CHAT_ENCRYPTION_SECRET = ""
+        settings.CHAT_ENCRYPTION_ACTIVE_KID = "k1"
+        settings.CHAT_ENCRYPTION_KEYS = f"k1={old_secret}"
+
+        v3_body, extra_fields, _ = encrypt_message_body_for_request("v3 body", request_extra_fields={})
+        self.assertEqual(extract_request_chat_kek_kid(extra_fields), "k1")
+        with self.SessionLocal() as db:
+            req = Request(
+                track_number=f"TRK-RES-{uuid4().hex[:8].upper()}",
+                client_name="Клиент",
+                client_phone="+79990001144",
+                topic_code="consulting",
+                status_code="NEW",
+                extra_fields=extra_fields,
+            )
+            db.add(req)
+            db.flush()
+            request_id = req.id
+            now = datetime.now(timezone.utc)
+            for body in [v3_body, _legacy_chat_token("legacy a", old_secret), _legacy_chat_token("legacy b", old_secret)]:
+                db.execute(
+                    Message.__table__.insert().values(
+                        id=uuid4(),
+                        request_id=req.id,
+                        author_type="CLIENT",
+                        author_name="Клиент",
+                        body=body,
+                        immutable=False,
+                        created_at=now,
+                        updated_at=now,
+                        responsible="seed",
+                    )
+                )
+            db.commit()
+
+        settings.DATA_ENCRYPTION_ACTIVE_KID = "k2"
+        settings.DATA_ENCRYPTION_KEYS = f"k1={old_secret},k2=new-data-secret-bbbbbbbbbbbbbbbb"
+        settings.CHAT_ENCRYPTION_ACTIVE_KID = "k2"
+        settings.CHAT_ENCRYPTION_KEYS = f"k1={old_secret},k2=new-chat-secret-cccccccccccccccc"
+
+        lines: list[str] = []
+        result = reencrypt_script.reencrypt_with_active_kid(dry_run=False, batch_size=1, workers=2, report=lines.append)
+        self.assertEqual(result["errors"], 0)
+        self.assertEqual(result["request_keys_rewrapped"], 1)
+        self.assertEqual(result["messages_total"], 3)
+        self.assertEqual(result["messages_reencrypted"], 2)
+        self.assertIsNone(result["resume_token"])
+        self.assertTrue(any(line.startswith("stage=messages processed=3/3") for line in lines))
+        self.assertTrue(all("eta=" in line and "resume=" in line for line in lines))
+
+        with self.SessionLocal() as db:
+            request_row = db.get(Request, request_id)
+            message_rows = db.query(Message).filter(Message.request_id == request_id).all()
+            bodies = [row.body for row in message_rows]
+            last_message_id = max(row.id for row in message_rows)
+        self.assertEqual(extract_request_chat_kek_kid(request_row.extra_fields), "k2")
+        self.assertEqual(
+            sorted(decrypt_message_body_for_request(body, request_extra_fields=request_row.extra_fields) for body in bodies),
+            ["legacy a", "legacy b", "v3 body"],
+        )
+
+        resumed = reencrypt_script.reencrypt_with_active_kid(
+            dry_run=True,
+            resume_token=f"messages:{last_message_id}",
+        )
+        self.assertEqual(resumed["invoices_total"], 0)
+        self.assertEqual(resumed["request_keys_total"], 0)
+        self.assertEqual(resumed["messages_total"], 0)
+        with self.assertRaises(ValueError):
+            reencrypt_script.reencrypt_with_active_kid(resume_token="unknown:1")
+
+    def test_request_key_rewrap_rereads_rows_changed_after_the_page_was_read(self):
+        old_secret = "legacy-secret-aaaaaaaaaaaaaaaa"
+        settings.CHAT_ENCRYPTION_SECRET = ""
+        settings.CHAT_ENCRYPTION_ACTIVE_KID = "k1"
+        settings.CHAT_ENCRYPTION_KEYS = f"k1={old_secret}"
+        body, extra_fields, _ = encrypt_message_body_for_request("before rotation", request_extra_fields={})
+        with self.SessionLocal() as db:
+            req = Request(
+                track_number="TRK-REWRAP-RACE",
+                client_name="Клиент",
+                client_phone="+79990001145",
+                topic_code="consulting",
+                status_code="NEW",
+                extra_fields=extra_fields,
+            )
+            db.add(req)
+            db.flush()
+            db.add(Message(request_id=req.id, author_type="CLIENT", author_name="Клиент", body=body))
+            db.commit()
+            request_id = req.id
+
+        settings.CHAT_ENCRYPTION_ACTIVE_KID = "k2"
+        settings.CHAT_ENCRYPTION_KEYS = f"k1={old_secret},k2=new-chat-secret-cccccccccccccccc"
+        original_page = reencrypt_script._page
+
+        def page_then_concurrent_write(db, id_column, *columns, **kwargs):
+            rows = original_page(db, id_column, *columns, **kwargs)
+            if id_column is Request.id and rows:
+                with self.SessionLocal() as other:
+                    request_row = other.get(Request, request_id)
+                    request_row.extra_fields = {**request_row.extra_fields, "note": "written meanwhile"}
+                    other.add(Message(request_id=request_id, author_type="LAWYER", author_name="Юрист", body="during rotation"))
+                    other.commit()
+            return rows
+
+        with patch.object(reencrypt_script, "_page", side_effect=page_then_concurrent_write):
+            result = reencrypt_script.reencrypt_with_active_kid(dry_run=False, batch_size=10)
+        self.assertEqual(result["errors"], 0)
+
+        with self.SessionLocal() as db:
+            request_row = db.get(Request, request_id)
+            bodies = [row.body for row in db.query(Message).filter(Message.request_id == request_id).all()]
+        self.assertEqual(request_row.extra_fields["note"], "written meanwhile")
+        self.assertEqual(extract_request_chat_kek_kid(request_row.extra_fields), "k2")
+        self.assertEqual(
+            sorted(decrypt_message_body_for_request(body, request_extra_fields=request_row.extra_fields) for body in bodies),
+            ["before rotation", "during rotation"],
+        )
+
+    def _seed_legacy_chat(self, *, secret: str, messages: int) -> str:
+        with self.SessionLocal() as db:
+            req = Request(
+                track_number=f"TRK-LEG-{uuid4().hex[:8].upper()}",
+                client_name="Клиент",
+                client_phone="+79990001133",
+                topic_code="consulting",
+                status_code="NEW",
+                extra_fields={},
+            )
+            db.add(req)
+            db.flush()
+            request_id = str(req.id)
+            for index in range(messages):
+                db.execute(
+                    Message.__table__.insert().values(
+                        id=uuid4(),
+                        request_id=req.id,
+                        author_type="CLIENT",
+                        author_name="Клиент",
+                        body=_legacy_chat_token(f"legacy {index}", secret),
+                        immutable=False,
+                        created_at=datetime.now(timezone.utc),
+                        updated_at=datetime.now(timezone.utc),
+                        responsible="seed",
+                    )
+                )
+            db.execute(
+                Message.__table__.insert().values(
+                    id=uuid4(),
+                    request_id=uuid4(),
+                    author_type="CLIENT",
+                    author_name="Клиент",
+                    body=_legacy_chat_token("orphan", secret),
+                    immutable=False,
+                    created_at=datetime.now(timezone.utc),
+                    updated_at=datetime.now(timezone.utc),
+                    responsible="seed",
+                )
+            )
+            db.commit()
+        return request_id
+
+    def test_legacy_chat_migration_is_batched_and_resumable(self):
+        old_secret = "legacy-secret-aaaaaaaaaaaaaaaa"
+        settings.CHAT_ENCRYPTION_SECRET = ""
+        settings.CHAT_ENCRYPTION_ACTIVE_KID = "k2"
+        settings.CHAT_ENCRYPTION_KEYS = f"k1={old_secret},k2=new-chat-secret-cccccccccccccccc"
+        request_id = self._seed_legacy_chat(secret=old_secret, messages=5)
+
+        with self.SessionLocal() as db:
+            dry = run_legacy_chat_migration(db, batch_size=2, max_batches=0, throttle_seconds=0, dry_run=True)
+            self.assertEqual(dry["migrated"], 5)
+            self.assertEqual(count_legacy_chat_messages(db), 6)
+
+            first = run_legacy_chat_migration(db, batch_size=2, max_batches=1, throttle_seconds=0)
+            self.assertEqual(first["scanned"], 2)
+            self.assertFalse(first["done"])
+            self.assertEqual(count_legacy_chat_messages(db), 6 - first["migrated"])
+
+        result = chat_crypto_task.migrate_legacy_chat_ciphertexts(checkpoint=first["checkpoint"], batch_size=50)
+        self.assertTrue(result["done"])
+        self.assertFalse(result["continued"])
+        self.assertEqual(result["scanned"], 4)
+        self.assertEqual(first["migrated"] + result["migrated"], 5)
+        self.assertEqual(first["orphaned"] + result["orphaned"], 1)
+        self.assertEqual(result["errors"], 0)
+
+        with self.SessionLocal() as db:
+            self.assertEqual(count_legacy_chat_messages(db), 1)
+            request_row = db.get(Request, UUID(request_id))
+            bodies = [
+                body
+                for (body,) in db.execute(
+                    text("SELECT body FROM messages WHERE request_id = :request_id"),
+                    {"request_id": UUID(request_id).hex},
+                ).all()
+            ]
+        self.assertEqual(len(bodies), 5)
+        self.assertTrue(all(str(body).startswith("chatenc:v3:k2:") for body in bodies))
+        self.assertEqual(
+            sorted(decrypt_message_body_for_request(body, request_extra_fields=request_row.extra_fields) for body in bodies),
+            [f"legacy {index}" for index in range(5)],
+        )
+
+    def test_legacy_chat_migration_chain_is_single_flight(self):
+        settings.CHAT_ENCRYPTION_SECRET = ""
+        settings.CHAT_ENCRYPTION_ACTIVE_KID = "k2"
+        settings.CHAT_ENCRYPTION_KEYS = "k1=legacy-secret-aaaaaaaaaaaaaaaa,k2=new-chat-secret-cccccccccccccccc"
+        with patch("app.services.chat_crypto_migration.get_redis_client", return_value=None):
+            running = claim_legacy_migration_lease()
+            try:
+                skipped = chat_crypto_task.migrate_legacy_chat_ciphertexts()
+                self.assertTrue(skipped["skipped"])
+                self.assertEqual(claim_legacy_migration_lease(running), running)
+
+                resumed = chat_crypto_task.migrate_legacy_chat_ciphertexts(lease=running)
+                self.assertTrue(resumed["done"])
+                self.assertNotIn("skipped", resumed)
+            finally:
+                release_legacy_migration_lease(running)
+            self.assertIsNotNone(claim_legacy_migration_lease("next-chain"))
+            release_legacy_migration_lease("next-chain")
+
+    def test_message_send_reuses_chat_key_wrapped_by_concurrent_writer(self):
+        settings.CHAT_ENCRYPTION_SECRET = ""
+        settings.CHAT_ENCRYPTION_ACTIVE_KID = "k2"
+        settings.CHAT_ENCRYPTION_KEYS = "k2=new-chat-secret-cccccccccccccccc"
+        with self.SessionLocal() as db:
+            req = Request(
+                track_number="TRK-CHAT-KEY-RACE",
+                client_name="Клиент",
+                client_phone="+79990001144",
+                topic_code="consulting",
+                status_code="NEW",
+                extra_fields={"note": "keep"},
+            )
+            db.add(req)
+            db.commit()
+            request_id = req.id
+
+        with self.SessionLocal() as stale, self.SessionLocal() as other:
+            stale_request = stale.get(Request, request_id)
+            self.assertNotIn("chat_crypto", stale_request.extra_fields)
+            other.add(Message(request_id=request_id, author_type="CLIENT", author_name="Клиент", body="first"))
+            other.commit()
+
+            stale.add(Message(request_id=request_id, author_type="LAWYER", author_name="Юрист", body="second"))
+            stale.commit()
+
+        with self.SessionLocal() as db:
+            request_row = db.get(Request, request_id)
+            bodies = [row.body for row in db.query(Message).filter(Message.request_id == request_id).all()]
+        self.assertEqual(request_row.extra_fields["note"], "keep")
+        self.assertEqual(
+            sorted(decrypt_message_body_for_request(body, request_extra_fields=request_row.extra_fields) for body in bodies),
+            ["first", "second"],
+        )
+
 
 if __name__ == "__main__":
     unittest.main()
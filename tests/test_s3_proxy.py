@@ -0,0 +1,166 @@
+import os
+import unittest
+from datetime import datetime, timezone
+from unittest.mock import patch
+
+import httpx
+from botocore.exceptions import ClientError
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+os.environ.setdefault("DATABASE_URL", "sqlite+pysqlite:///:memory:")
+os.environ.setdefault("REDIS_URL", "redis://localhost:6379/0")
+os.environ.setdefault("S3_ENDPOINT", "http://localhost:9000")
+os.environ.setdefault("S3_ACCESS_KEY", "test")
+os.environ.setdefault("S3_SECRET_KEY", "test")
+os.environ.setdefault("S3_BUCKET", "test")
+
+from app.core.config import settings
+from app.services.s3_proxy import s3_object_response
+
+_PAYLOAD = bytes(range(256)) * 40
+_ETAG = '"5d41402abc4b2a76b9719d911017c592"'
+_LAST_MODIFIED = datetime(2026, 10, 1, 12, 0, tzinfo=timezone.utc)
+
+
+class _FakeBody:
+    def __init__(self, payload: bytes):
+        self.payload = payload
+        self.closed = False
+
+    def iter_chunks(self, chunk_size=65536):
+        for i in range(0, len(self.payload), chunk_size):
+            yield self.payload[i : i + chunk_size]
+
+    def close(self):
+        self.closed = True
+
+
+class _FakeS3Storage:
+    def __init__(self):
+        self.calls = []
+
+    def get_object(self, key: str, **conditions) -> dict:
+        self.calls.append(conditions)
+        if key != "requests/doc.mp4":
+            raise ClientError({"Error": {"Code": "NoSuchKey"}, "ResponseMetadata": {"HTTPStatusCode": 404}}, "GetObject")
+        if conditions.get("IfNoneMatch") == _ETAG:
+            raise ClientError(
+                {
+                    "Error": {"Code": "304", "Message": "Not Modified"},
+                    "ResponseMetadata": {"HTTPStatusCode": 304, "HTTPHeaders": {"etag": _ETAG}},
+                },
+                "GetObject",
+            )
+        obj = {"ContentType": "video/mp4", "ETag": _ETAG, "LastModified": _LAST_MODIFIED}
+        raw_range = conditions.get("Range")
+        if raw_range:
+            start_raw, _, end_raw = raw_range.removeprefix("bytes=").partition("-")
+            start = int(start_raw)
+            if start >= len(_PAYLOAD):
+                raise ClientError(
+                    {
+                        "Error": {"Code": "InvalidRange", "ActualObjectSize": str(len(_PAYLOAD))},
+                        "ResponseMetadata": {"HTTPStatusCode": 416},
+                    },
+                    "GetObject",
+                )
+            end = min(int(end_raw) if end_raw else len(_PAYLOAD) - 1, len(_PAYLOAD) - 1)
+            part = _PAYLOAD[start : end + 1]
+            obj.update(Body=_FakeBody(part), ContentLength=len(part), ContentRange=f"bytes {start}-{end}/{len(_PAYLOAD)}")
+            return obj
+        obj.update(Body=_FakeBody(_PAYLOAD), ContentLength=len(_PAYLOAD))
+        return obj
+
+    def create_presigned_get_url(self, key: str, expires_sec: int = 60) -> str:
+        return f"http://s3.local/test/{key}?X-Amz-Signature=abc"
+
+
+class S3ProxyTests(unittest.TestCase):
+    def setUp(self):
+        self._async_backup = settings.S3_PROXY_ASYNC
+        self.storage = _FakeS3Storage()
+        proxy_app = FastAPI()
+
+        @proxy_app.get("/object/{key:path}")
+        def get_object(key: str, request: Request):
+            return s3_object_response(self.storage, key, request, headers={"Content-Disposition": "inline"})
+
+        self.client = TestClient(proxy_app)
+
+    def tearDown(self):
+        settings.S3_PROXY_ASYNC = self._async_backup
+        self.client.close()
+
+    def test_full_range_and_conditional_requests(self):
+        full = self.client.get("/object/requests/doc.mp4")
+        self.assertEqual(full.status_code, 200)
+        self.assertEqual(full.content, _PAYLOAD)
+        self.assertEqual(full.headers["etag"], _ETAG)
+        self.assertEqual(full.headers["accept-ranges"], "bytes")
+        self.assertEqual(full.headers["last-modified"], "Thu, 01 Oct 2026 12:00:00 GMT")
+        self.assertEqual(full.headers["content-disposition"], "inline")
+        self.assertEqual(self.storage.calls[-1], {})
+
+        partial = self.client.get("/object/requests/doc.mp4", headers={"Range": "bytes=100-199"})
+        self.assertEqual(partial.status_code, 206)
+        self.assertEqual(partial.content, _PAYLOAD[100:200])
+        self.assertEqual(partial.headers["content-range"], f"bytes 100-199/{len(_PAYLOAD)}")
+        self.assertEqual(partial.headers["content-length"], "100")
+
+        not_modified = self.client.get("/object/requests/doc.mp4", headers={"If-None-Match": _ETAG})
+        self.assertEqual(not_modified.status_code, 304)
+        self.assertEqual(not_modified.headers["etag"], _ETAG)
+        self.assertEqual(not_modified.content, b"")
+
+        unsatisfiable = self.client.get("/object/requests/doc.mp4", headers={"Range": f"bytes={len(_PAYLOAD)}-"})
+        self.assertEqual(unsatisfiable.status_code, 416)
+        self.assertEqual(unsatisfiable.headers["content-range"], f"bytes */{len(_PAYLOAD)}")
+
+        self.client.get("/object/requests/doc.mp4", headers={"Range": "bytes=0-1,5-9"})
+        self.assertNotIn("Range", self.storage.calls[-1])
+
+        missing = self.client.get("/object/requests/other.pdf")
+        self.assertEqual(missing.status_code, 404)
+        self.assertEqual(missing.json()["detail"], "Файл не найден")
+
+    def test_async_mode_relays_signed_get_with_client_validators(self):
+        seen = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            seen.append(request)
+            if request.headers.get("if-none-match") == _ETAG:
+                return httpx.Response(304, headers={"ETag": _ETAG, "x-amz-request-id": "secret"})
+            if request.url.path.endswith("missing.pdf"):
+                return httpx.Response(404, content=b"<Error/>")
+            return httpx.Response(
+                206,
+                stream=httpx.ByteStream(_PAYLOAD[:10]),
+                headers={
+                    "Content-Type": "video/mp4",
+                    "Content-Range": f"bytes 0-9/{len(_PAYLOAD)}",
+                    "ETag": _ETAG,
+                    "x-amz-request-id": "secret",
+                },
+            )
+
+        settings.S3_PROXY_ASYNC = True
+        with patch(
+            "app.services.s3_proxy._async_client",
+            side_effect=lambda verify: httpx.AsyncClient(transport=httpx.MockTransport(handler)),
+        ):
+            partial = self.client.get("/object/requests/doc.mp4", headers={"Range": "bytes=0-9"})
+            not_modified = self.client.get("/object/requests/doc.mp4", headers={"If-None-Match": _ETAG})
+            missing = self.client.get("/object/requests/missing.pdf")
+
+        self.assertEqual(partial.status_code, 206)
+        self.assertEqual(partial.content, _PAYLOAD[:10])
+        self.assertEqual(partial.headers["content-range"], f"bytes 0-9/{len(_PAYLOAD)}")
+        self.assertEqual(partial.headers["content-disposition"], "inline")
+        self.assertNotIn("x-amz-request-id", partial.headers)
+        self.assertEqual(seen[0].headers["range"], "bytes=0-9")
+        self.assertIn("X-Amz-Signature", str(seen[0].url))
+        self.assertEqual(not_modified.status_code, 304)
+        self.assertEqual(not_modified.headers["etag"], _ETAG)
+        self.assertEqual(missing.status_code, 404)
+        self.assertEqual(self.storage.calls, [])
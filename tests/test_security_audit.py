@@ -4,6 +4,7 @@ from datetime import timedelta
 from uuid import UUID
 from unittest.mock import patch
 
+import httpx
 from botocore.exceptions import ClientError
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine, delete
@@ -25,8 +26,10 @@ from app.models.admin_user import AdminUser
 from app.models.attachment import Attachment
 from app.models.message import Message
 from app.models.notification import Notification
+from app.models.notification_unread_counter import NotificationUnreadCounter
 from app.models.request import Request
 from app.models.security_audit_log import SecurityAuditLog
+from tests.projection_tables import create_projection_tables, drop_projection_tables
 
 
 class _FakeBody:
@@ -42,12 +45,17 @@ class _FakeS3Storage:
     def __init__(self):
         self.objects = {}
 
-    def get_object(self, key: str) -> dict:
+    def get_object(self, key: str, **conditions) -> dict:
         obj = self.objects.get(key)
         if obj is None:
             raise ClientError({"Error": {"Code": "404", "Message": "Not Found"}}, "GetObject")
+        if conditions.get("IfNoneMatch") == '"v1"':
+            raise ClientError({"Error": {"Code": "304"}, "ResponseMetadata": {"HTTPStatusCode": 304}}, "GetObject")
         return {"Body": _FakeBody(obj["content"]), "ContentType": obj["mime"], "ContentLength": obj["size"]}
 
+    def create_presigned_get_url(self, key: str, expires_sec: int = 60) -> str:
+        return f"http://s3.local/test/{key}?X-Amz-Signature=abc"
+
 
 class SecurityAuditTests(unittest.TestCase):
     @classmethod
@@ -60,7 +68,9 @@ class SecurityAuditTests(unittest.TestCase):
         cls.SessionLocal = sessionmaker(bind=cls.engine, autocommit=False, autoflush=False)
         AdminUser.__table__.create(bind=cls.engine)
         Request.__table__.create(bind=cls.engine)
+        create_projection_tables(cls.engine)
         Notification.__table__.create(bind=cls.engine)
+        NotificationUnreadCounter.__table__.create(bind=cls.engine)
         Message.__table__.create(bind=cls.engine)
         Attachment.__table__.create(bind=cls.engine)
         SecurityAuditLog.__table__.create(bind=cls.engine)
@@ -70,7 +80,9 @@ class SecurityAuditTests(unittest.TestCase):
         SecurityAuditLog.__table__.drop(bind=cls.engine)
         Attachment.__table__.drop(bind=cls.engine)
         Message.__table__.drop(bind=cls.engine)
+        NotificationUnreadCounter.__table__.drop(bind=cls.engine)
         Notification.__table__.drop(bind=cls.engine)
+        drop_projection_tables(cls.engine)
         Request.__table__.drop(bind=cls.engine)
         AdminUser.__table__.drop(bind=cls.engine)
         cls.engine.dispose()
@@ -159,6 +171,92 @@ class SecurityAuditTests(unittest.TestCase):
             self.assertEqual(str(row.attachment_id), attachment_id)
             self.assertEqual(row.scope, "REQUEST_ATTACHMENT")
 
+    def _public_attachment(self, fake_s3: _FakeS3Storage, *, stored: bool) -> tuple[str, dict[str, str]]:
+        with self.SessionLocal() as db:
+            req = Request(
+                track_number="TRK-SEC-PUB-2",
+                client_name="Клиент",
+                client_phone="+79990001011",
+                topic_code="civil-law",
+                status_code="NEW",
+                extra_fields={},
+                total_attachments_bytes=0,
+            )
+            db.add(req)
+            db.flush()
+            key = f"requests/{req.id}/doc.pdf"
+            att = Attachment(
+                request_id=req.id,
+                message_id=None,
+                file_name="doc.pdf",
+                mime_type="application/pdf",
+                size_bytes=4,
+                s3_key=key,
+                responsible="Клиент",
+            )
+            db.add(att)
+            db.commit()
+            attachment_id = str(att.id)
+        if stored:
+            fake_s3.objects[key] = {"size": 4, "mime": "application/pdf", "content": b"data"}
+        public_token = create_jwt({"sub": "TRK-SEC-PUB-2", "purpose": "VIEW_REQUEST"}, settings.PUBLIC_JWT_SECRET, timedelta(days=1))
+        return attachment_id, {settings.PUBLIC_COOKIE_NAME: public_token}
+
+    def _download_events(self) -> list[tuple[str, bool, int | None]]:
+        with self.SessionLocal() as db:
+            rows = db.query(SecurityAuditLog).filter(SecurityAuditLog.actor_role == "CLIENT").all()
+            return sorted((row.action, row.allowed, (row.details or {}).get("http_status")) for row in rows)
+
+    def test_public_attachment_not_modified_is_audited_apart_from_downloads(self):
+        fake_s3 = _FakeS3Storage()
+        attachment_id, cookies = self._public_attachment(fake_s3, stored=True)
+        with patch("app.api.public.uploads.get_s3_storage", return_value=fake_s3):
+            full = self.client.get(f"/api/public/uploads/object/{attachment_id}", cookies=cookies)
+            cached = self.client.get(
+                f"/api/public/uploads/object/{attachment_id}", cookies=cookies, headers={"If-None-Match": '"v1"'}
+            )
+        self.assertEqual(full.status_code, 200)
+        self.assertEqual(cached.status_code, 304)
+        self.assertEqual(
+            self._download_events(),
+            [("DOWNLOAD_OBJECT", True, 200), ("DOWNLOAD_OBJECT_NOT_SERVED", True, 304)],
+        )
+
+    def test_async_proxy_audits_the_status_s3_answered_with(self):
+        fake_s3 = _FakeS3Storage()
+        attachment_id, cookies = self._public_attachment(fake_s3, stored=False)
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            if request.headers.get("if-none-match") == '"v1"':
+                return httpx.Response(304)
+            if request.headers.get("range"):
+                return httpx.Response(416, headers={"Content-Range": "bytes */4"})
+            return httpx.Response(404, content=b"<Error/>")
+
+        async_backup = settings.S3_PROXY_ASYNC
+        settings.S3_PROXY_ASYNC = True
+        try:
+            with patch("app.api.public.uploads.get_s3_storage", return_value=fake_s3), patch(
+                "app.services.s3_proxy._async_client",
+                side_effect=lambda verify: httpx.AsyncClient(transport=httpx.MockTransport(handler)),
+            ):
+                url = f"/api/public/uploads/object/{attachment_id}"
+                missing = self.client.get(url, cookies=cookies)
+                cached = self.client.get(url, cookies=cookies, headers={"If-None-Match": '"v1"'})
+                unsatisfiable = self.client.get(url, cookies=cookies, headers={"Range": "bytes=10-"})
+        finally:
+            settings.S3_PROXY_ASYNC = async_backup
+
+        self.assertEqual([missing.status_code, cached.status_code, unsatisfiable.status_code], [404, 304, 416])
+        self.assertEqual(
+            self._download_events(),
+            [
+                ("DOWNLOAD_OBJECT", False, 404),
+                ("DOWNLOAD_OBJECT_NOT_SERVED", True, 304),
+                ("DOWNLOAD_OBJECT_NOT_SERVED", True, 416),
+            ],
+        )
+
     def test_public_request_card_read_writes_pii_access_event(self):
         with self.SessionLocal() as db:
             req = Request(
@@ -0,0 +1,172 @@
+import os
+import unittest
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
+
+from sqlalchemy import create_engine, delete
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+os.environ.setdefault("DATABASE_URL", "sqlite+pysqlite:///:memory:")
+os.environ.setdefault("REDIS_URL", "redis://localhost:6379/0")
+os.environ.setdefault("S3_ENDPOINT", "http://localhost:9000")
+os.environ.setdefault("S3_ACCESS_KEY", "test")
+os.environ.setdefault("S3_SECRET_KEY", "test")
+os.environ.setdefault("S3_BUCKET", "test")
+
+from app.core.config import settings
+from app.models.telegram_outbox import TelegramOutboxMessage
+from app.services.telegram_notify import deliver_telegram_outbox, enqueue_telegram_message, telegram_outbox_health
+
+
+class _FakeResponse:
+    def __init__(self, status_code: int, body: dict):
+        self.status_code = status_code
+        self._body = body
+        self.content = b"{}"
+
+    def json(self):
+        return self._body
+
+
+class _FakeTelegramClient:
+    def __init__(self, responses=None):
+        self.calls = []
+        self.responses = list(responses or [])
+
+    def post(self, url, json):
+        self.calls.append(json)
+        if self.responses:
+            return self.responses.pop(0)
+        return _FakeResponse(200, {"ok": True})
+
+
+class TelegramOutboxTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.engine = create_engine(
+            "sqlite+pysqlite:///:memory:",
+            connect_args={"check_same_thread": False},
+            poolclass=StaticPool,
+        )
+        cls.SessionLocal = sessionmaker(bind=cls.engine, autocommit=False, autoflush=False)
+        TelegramOutboxMessage.__table__.create(bind=cls.engine)
+
+    @classmethod
+    def tearDownClass(cls):
+        TelegramOutboxMessage.__table__.drop(bind=cls.engine)
+        cls.engine.dispose()
+
+    def setUp(self):
+        self._settings_backup = {
+            "TELEGRAM_BOT_TOKEN": settings.TELEGRAM_BOT_TOKEN,
+            "TELEGRAM_CHAT_ID": settings.TELEGRAM_CHAT_ID,
+            "TELEGRAM_OUTBOX_SEND_INTERVAL_MS": settings.TELEGRAM_OUTBOX_SEND_INTERVAL_MS,
+            "TELEGRAM_OUTBOX_MAX_ATTEMPTS": settings.TELEGRAM_OUTBOX_MAX_ATTEMPTS,
+        }
+        settings.TELEGRAM_BOT_TOKEN = "123456:telegram-test-token"
+        settings.TELEGRAM_CHAT_ID = "42"
+        settings.TELEGRAM_OUTBOX_SEND_INTERVAL_MS = 0
+        with self.SessionLocal() as db:
+            db.execute(delete(TelegramOutboxMessage))
+            db.commit()
+
+    def tearDown(self):
+        for key, value in self._settings_backup.items():
+            setattr(settings, key, value)
+
+    def test_outbox_coalesces_messages_per_chat_into_one_request(self):
+        with self.SessionLocal() as db:
+            for index in range(3):
+                self.assertTrue(enqueue_telegram_message(db, f"Событие {index}")["queued"])
+            enqueue_telegram_message(db, "Другой чат", chat_id="77")
+            db.commit()
+
+        client = _FakeTelegramClient()
+        with self.SessionLocal() as db, patch("app.services.telegram_notify._http_client", return_value=client):
+            stats = deliver_telegram_outbox(db)
+            self.assertEqual(stats["picked"], 4)
+            self.assertEqual(stats["requests"], 2)
+            self.assertEqual(stats["sent"], 4)
+            self.assertEqual(client.calls[0]["chat_id"], "42")
+            self.assertEqual(client.calls[0]["text"], "Событие 0\n\nСобытие 1\n\nСобытие 2")
+            self.assertEqual(client.calls[1]["chat_id"], "77")
+            statuses = {row.status for row in db.query(TelegramOutboxMessage).all()}
+            self.assertEqual(statuses, {"SENT"})
+            self.assertEqual(deliver_telegram_outbox(db)["picked"], 0)
+
+    def test_outbox_backs_off_on_rate_limit_and_fails_after_max_attempts(self):
+        settings.TELEGRAM_OUTBOX_MAX_ATTEMPTS = 2
+        with self.SessionLocal() as db:
+            enqueue_telegram_message(db, "Первый")
+            enqueue_telegram_message(db, "Второй", chat_id="77")
+            db.commit()
+
+        limited = _FakeTelegramClient([_FakeResponse(429, {"ok": False, "parameters": {"retry_after": 30}})])
+        with self.SessionLocal() as db, patch("app.services.telegram_notify._http_client", return_value=limited):
+            stats = deliver_telegram_outbox(db)
+            self.assertEqual(stats["requests"], 1)
+            self.assertEqual(stats["deferred"], 2)
+            rows = db.query(TelegramOutboxMessage).all()
+            self.assertTrue(all(row.status == "PENDING" and row.attempts == 0 for row in rows))
+            retry_at = min(row.next_attempt_at for row in rows).replace(tzinfo=timezone.utc)
+            self.assertGreater(retry_at, datetime.now(timezone.utc) + timedelta(seconds=20))
+            self.assertEqual(deliver_telegram_outbox(db)["picked"], 0)
+
+            for row in rows:
+                row.next_attempt_at = None
+            db.commit()
+
+        broken = _FakeTelegramClient([_FakeResponse(500, {"ok": False})] * 4)
+        with self.SessionLocal() as db, patch("app.services.telegram_notify._http_client", return_value=broken):
+            deliver_telegram_outbox(db)
+            for row in db.query(TelegramOutboxMessage).all():
+                row.next_attempt_at = None
+            db.commit()
+            stats = deliver_telegram_outbox(db)
+            self.assertEqual(stats["failed"], 2)
+            health = telegram_outbox_health(db)
+            self.assertEqual(health["status"], "degraded")
+            self.assertEqual(health["failed"], 2)
+            self.assertEqual(health["pending"], 0)
+
+    def test_outbox_commits_lease_before_sending_and_reclaims_expired_leases(self):
+        with self.SessionLocal() as db:
+            enqueue_telegram_message(db, "Арендованное")
+            db.commit()
+
+        seen_statuses = []
+
+        class _InspectingClient(_FakeTelegramClient):
+            def post(inner, url, json):
+                with self.SessionLocal() as other:
+                    seen_statuses.append(other.query(TelegramOutboxMessage.status).scalar())
+                    self.assertEqual(deliver_telegram_outbox(other)["picked"], 0)
+                return super().post(url, json)
+
+        with self.SessionLocal() as db, patch("app.services.telegram_notify._http_client", return_value=_InspectingClient()):
+            self.assertEqual(deliver_telegram_outbox(db)["sent"], 1)
+        self.assertEqual(seen_statuses, ["SENDING"])
+
+        with self.SessionLocal() as db:
+            row = db.query(TelegramOutboxMessage).one()
+            self.assertEqual(row.status, "SENT")
+            row.status = "SENDING"
+            row.next_attempt_at = datetime.now(timezone.utc) - timedelta(seconds=1)
+            db.commit()
+
+        client = _FakeTelegramClient()
+        with self.SessionLocal() as db, patch("app.services.telegram_notify._http_client", return_value=client):
+            stats = deliver_telegram_outbox(db)
+            self.assertEqual((stats["picked"], stats["sent"]), (1, 1))
+            self.assertEqual(db.query(TelegramOutboxMessage.status).scalar(), "SENT")
+
+    def test_outbox_is_bypassed_when_telegram_is_not_configured(self):
+        settings.TELEGRAM_BOT_TOKEN = "change_me"
+        with self.SessionLocal() as db:
+            result = enqueue_telegram_message(db, "Локально")
+            db.commit()
+            self.assertTrue(result["mocked"])
+            self.assertFalse(result["queued"])
+            self.assertEqual(db.query(TelegramOutboxMessage).count(), 0)
+            self.assertTrue(deliver_telegram_outbox(db)["disabled"])
@@ -1,3 +1,4 @@
+import os
 import unittest
 import uuid
 from datetime import date, datetime, timezone
@@ -5,11 +6,23 @@ from decimal import Decimal
 
 from fastapi import HTTPException
 from sqlalchemy import Boolean, Date, DateTime, Float, Integer, Numeric, String, create_engine
+from sqlalchemy.dialects import postgresql
 from sqlalchemy.dialects.postgresql import UUID as PGUUID
 from sqlalchemy.orm import DeclarativeBase, Mapped, Session, mapped_column
 
-from app.schemas.universal import FilterClause, Page, UniversalQuery
-from app.services.universal_query import _coerce_filter_value, apply_universal_query
+os.environ.setdefault("DATABASE_URL", "sqlite+pysqlite:///:memory:")
+os.environ.setdefault("REDIS_URL", "redis://localhost:6379/0")
+os.environ.setdefault("S3_ENDPOINT", "http://localhost:9000")
+os.environ.setdefault("S3_ACCESS_KEY", "test")
+os.environ.setdefault("S3_SECRET_KEY", "test")
+os.environ.setdefault("S3_BUCKET", "test")
+
+from app.models.admin_user import AdminUser
+from app.models.request import Request
+from app.schemas.universal import FilterClause, Page, SortClause, UniversalQuery
+from app.services.search_index import SEARCH_FULLTEXT, SEARCH_TRIGRAM, search_clause
+from app.services.universal_query import _coerce_filter_value, apply_universal_query, paginate_universal_query
+from tests.projection_tables import create_projection_tables, drop_projection_tables
 
 
 class _Base(DeclarativeBase):
@@ -42,6 +55,14 @@ class _ApplyQueryModel(_ApplyBase):
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=False))
 
 
+class _KeysetQueryModel(_ApplyBase):
+    __tablename__ = "_uq_keyset_test_model"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    rank: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+
+
 class UniversalQueryCoercionTests(unittest.TestCase):
     def test_boolean_accepts_string_values(self):
         self.assertTrue(_coerce_filter_value(_QueryTestModel.bool_col, "true"))
@@ -147,5 +168,150 @@ class UniversalQueryApplyTests(unittest.TestCase):
         self.assertEqual([row.id for row in rows], [2])
 
 
+class UniversalQueryPaginationTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.engine = create_engine("sqlite+pysqlite:///:memory:")
+        _ApplyBase.metadata.create_all(cls.engine)
+        with Session(cls.engine) as session:
+            session.add_all(
+                [
+                    _KeysetQueryModel(
+                        id=index,
+                        rank=None if index % 3 == 0 else index % 4,
+                        created_at=datetime(2026, 2, 1 + index % 5, tzinfo=timezone.utc),
+                    )
+                    for index in range(1, 24)
+                ]
+            )
+            session.commit()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.engine.dispose()
+
+    def _walk(self, session, sort, *, limit=4):
+        ids = []
+        cursor = None
+        while True:
+            uq = UniversalQuery(sort=sort, page=Page(limit=limit, cursor=cursor, total_mode="skip"))
+            q = apply_universal_query(session.query(_KeysetQueryModel), _KeysetQueryModel, uq)
+            page = paginate_universal_query(q, _KeysetQueryModel, uq)
+            self.assertIsNone(page.total)
+            ids.extend(row.id for row in page.rows)
+            if page.next_cursor is None:
+                return ids
+            cursor = page.next_cursor
+
+    def test_keyset_pages_match_offset_order_including_null_sort_values(self):
+        sorts = [
+            [SortClause(field="rank", dir="asc")],
+            [SortClause(field="rank", dir="desc"), SortClause(field="created_at", dir="asc")],
+            [SortClause(field="created_at", dir="desc")],
+            [],
+        ]
+        with Session(self.engine) as session:
+            for sort in sorts:
+                uq = UniversalQuery(sort=sort, page=Page(limit=100))
+                q = apply_universal_query(session.query(_KeysetQueryModel), _KeysetQueryModel, uq)
+                expected = [row.id for row in paginate_universal_query(q, _KeysetQueryModel, uq).rows]
+                self.assertEqual(len(expected), 23)
+                self.assertEqual(self._walk(session, sort), expected)
+
+    def test_apply_adds_only_the_requested_order(self):
+        with Session(self.engine) as session:
+            unsorted = UniversalQuery(filters=[FilterClause(field="rank", op=">", value="0")], page=Page(limit=10))
+            q = apply_universal_query(session.query(_KeysetQueryModel), _KeysetQueryModel, unsorted)
+            self.assertNotIn("ORDER BY", str(q.statement.compile()))
+            uq = UniversalQuery(sort=[SortClause(field="rank", dir="desc")], page=Page(limit=10))
+            q = apply_universal_query(session.query(_KeysetQueryModel), _KeysetQueryModel, uq)
+            order_by = str(q.statement.compile()).split("ORDER BY", 1)[1]
+            self.assertIn("rank DESC", order_by)
+            self.assertNotIn(".id", order_by)
+
+    def test_offset_page_reports_exact_total_and_next_cursor(self):
+        with Session(self.engine) as session:
+            uq = UniversalQuery(sort=[SortClause(field="rank", dir="asc")], page=Page(limit=5, offset=20, total_mode="estimated"))
+            q = apply_universal_query(session.query(_KeysetQueryModel), _KeysetQueryModel, uq)
+            page = paginate_universal_query(q, _KeysetQueryModel, uq)
+        # SQLite has no planner estimate, so small results always fall back to an exact count.
+        self.assertEqual(page.total, 23)
+        self.assertEqual(page.total_mode, "exact")
+        self.assertEqual(len(page.rows), 3)
+        self.assertIsNone(page.next_cursor)
+
+    def test_cursor_from_other_sort_is_rejected(self):
+        with Session(self.engine) as session:
+            first = UniversalQuery(sort=[SortClause(field="rank", dir="asc")], page=Page(limit=2))
+            q = apply_universal_query(session.query(_KeysetQueryModel), _KeysetQueryModel, first)
+            cursor = paginate_universal_query(q, _KeysetQueryModel, first).next_cursor
+            self.assertIsNotNone(cursor)
+            other = UniversalQuery(sort=[SortClause(field="rank", dir="desc")], page=Page(limit=2, cursor=cursor))
+            q = apply_universal_query(session.query(_KeysetQueryModel), _KeysetQueryModel, other)
+            with self.assertRaises(HTTPException) as ctx:
+                paginate_universal_query(q, _KeysetQueryModel, other)
+        self.assertEqual(ctx.exception.status_code, 400)
+
+
+class UniversalQuerySearchTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.engine = create_engine("sqlite+pysqlite:///:memory:")
+        Request.__table__.create(bind=cls.engine)
+        create_projection_tables(cls.engine)
+        AdminUser.__table__.create(bind=cls.engine)
+        with Session(cls.engine) as session:
+            for index, name in enumerate(["John Smith", "Smithson", "Smith", "Anna Brown", "Discount 100%"]):
+                session.add(
+                    Request(
+                        track_number=f"TRK-SEARCH-{index}",
+                        client_name=name,
+                        client_phone=f"+7999000{index:04d}",
+                        extra_fields={},
+                    )
+                )
+            session.commit()
+
+    @classmethod
+    def tearDownClass(cls):
+        AdminUser.__table__.drop(bind=cls.engine)
+        drop_projection_tables(cls.engine)
+        Request.__table__.drop(bind=cls.engine)
+        cls.engine.dispose()
+
+    def _names(self, filters, sort=None):
+        with Session(self.engine) as session:
+            uq = UniversalQuery(filters=filters, sort=sort or [], page=Page(limit=10))
+            q = apply_universal_query(session.query(Request), Request, uq)
+            page = paginate_universal_query(q, Request, uq)
+            return [row.client_name for row in page.rows], page.next_cursor
+
+    def test_search_orders_by_relevance_without_explicit_sort(self):
+        names, _ = self._names([FilterClause(field="client_name", op="~", value="smith")])
+        self.assertEqual(names, ["Smith", "Smithson", "John Smith"])
+        names, _ = self._names(
+            [FilterClause(field="client_name", op="~", value="smith")],
+            sort=[SortClause(field="client_name", dir="asc")],
+        )
+        self.assertEqual(names, ["John Smith", "Smith", "Smithson"])
+
+    def test_search_value_wildcards_are_literal(self):
+        names, _ = self._names([FilterClause(field="client_name", op="~", value="0%")])
+        self.assertEqual(names, ["Discount 100%"])
+        names, _ = self._names([FilterClause(field="client_name", op="~", value="_")])
+        self.assertEqual(names, [])
+
+    def test_postgres_search_uses_index_friendly_expressions(self):
+        dialect = postgresql.dialect()
+        trigram = str(search_clause(Request.client_name, "Иван", kind=SEARCH_TRIGRAM, dialect="postgresql").compile(dialect=dialect))
+        self.assertIn("requests.client_name ILIKE", trigram)
+        fulltext = str(
+            search_clause(Request.description, "договор аренды", kind=SEARCH_FULLTEXT, dialect="postgresql").compile(
+                dialect=dialect
+            )
+        )
+        self.assertIn("to_tsvector('russian'::regconfig, coalesce(requests.description, ''::text)) @@ to_tsquery(", fulltext)
+
+
 if __name__ == "__main__":
     unittest.main()
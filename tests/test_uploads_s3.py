@@ -26,8 +26,10 @@ from app.models.admin_user import AdminUser
 from app.models.attachment import Attachment
 from app.models.message import Message
 from app.models.notification import Notification
+from app.models.notification_unread_counter import NotificationUnreadCounter
 from app.models.request import Request
 from app.services.s3_storage import S3Storage
+from tests.projection_tables import create_projection_tables, drop_projection_tables
 
 _AVATAR_PNG_1X1 = base64.b64decode(
     "iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAQAAAC1HAwCAAAAC0lEQVR42mP8/x8AAwMCAO7+T5kAAAAASUVORK5CYII="
@@ -50,6 +52,9 @@ class _FakeS3Storage:
     def create_presigned_put_url(self, key: str, mime_type: str, expires_sec: int = 900) -> str:
         return f"https://s3.local/{key}?expires={expires_sec}"
 
+    def create_presigned_download_url(self, key: str, *, expires_sec: int = 60, content_type=None, content_disposition=None) -> str:
+        return f"/s3/test/{key}?expires={expires_sec}&disposition={content_disposition}"
+
     def head_object(self, key: str) -> dict:
         obj = self.objects.get(key)
         if obj is None:
@@ -74,7 +79,9 @@ class UploadsS3Tests(unittest.TestCase):
         cls.SessionLocal = sessionmaker(bind=cls.engine, autocommit=False, autoflush=False)
         AdminUser.__table__.create(bind=cls.engine)
         Request.__table__.create(bind=cls.engine)
+        create_projection_tables(cls.engine)
         Notification.__table__.create(bind=cls.engine)
+        NotificationUnreadCounter.__table__.create(bind=cls.engine)
         Message.__table__.create(bind=cls.engine)
         Attachment.__table__.create(bind=cls.engine)
 
@@ -82,7 +89,9 @@ class UploadsS3Tests(unittest.TestCase):
     def tearDownClass(cls):
         Attachment.__table__.drop(bind=cls.engine)
         Message.__table__.drop(bind=cls.engine)
+        NotificationUnreadCounter.__table__.drop(bind=cls.engine)
         Notification.__table__.drop(bind=cls.engine)
+        drop_projection_tables(cls.engine)
         Request.__table__.drop(bind=cls.engine)
         AdminUser.__table__.drop(bind=cls.engine)
         cls.engine.dispose()
@@ -386,6 +395,55 @@ class UploadsS3Tests(unittest.TestCase):
         self.assertIn("application/pdf", response.headers.get("content-type", ""))
         self.assertIn("inline;", response.headers.get("content-disposition", ""))
 
+    def test_public_attachment_object_redirects_to_signed_url_in_direct_mode(self):
+        fake_s3 = _FakeS3Storage()
+        with self.SessionLocal() as db:
+            req = Request(
+                track_number="TRK-PUB-DIRECT",
+                client_name="Клиент",
+                client_phone="+79994443323",
+                topic_code="civil-law",
+                status_code="IN_PROGRESS",
+                extra_fields={},
+            )
+            db.add(req)
+            db.flush()
+            key = f"requests/{req.id}/direct.pdf"
+            attachment = Attachment(
+                request_id=req.id,
+                file_name="direct.pdf",
+                mime_type="application/pdf",
+                size_bytes=1280,
+                s3_key=key,
+            )
+            db.add(attachment)
+            db.commit()
+            attachment_id = str(attachment.id)
+            track = req.track_number
+
+        public_token = create_jwt({"sub": track, "purpose": "VIEW_REQUEST"}, settings.PUBLIC_JWT_SECRET, timedelta(days=1))
+        cookies = {settings.PUBLIC_COOKIE_NAME: public_token}
+
+        with (
+            patch("app.api.public.uploads.get_s3_storage", return_value=fake_s3),
+            patch("app.services.s3_proxy.settings.S3_DIRECT_DOWNLOAD_ENABLED", True),
+            patch("app.services.s3_proxy.settings.S3_DIRECT_DOWNLOAD_TTL_SECONDS", 45),
+            patch("app.services.security_audit.celery_app.send_task") as send_task,
+        ):
+            response = self.client.get(f"/api/public/uploads/object/{attachment_id}", cookies=cookies, follow_redirects=False)
+
+        self.assertEqual(response.status_code, 307)
+        location = response.headers["location"]
+        self.assertTrue(location.startswith(f"/s3/test/{key}?expires=45"))
+        self.assertIn("filename*=UTF-8''direct.pdf", location)
+        self.assertEqual(response.headers.get("cache-control"), "no-store")
+        send_task.assert_called_once()
+        self.assertEqual(send_task.call_args.args[0], "app.workers.tasks.security.record_file_security_event")
+        event = send_task.call_args.kwargs["kwargs"]
+        self.assertEqual(event["attachment_id"], attachment_id)
+        self.assertEqual(event["object_key"], key)
+        self.assertEqual(event["details"], {"mode": "signed_url"})
+
     def test_public_attachment_object_is_blocked_while_scan_pending(self):
         fake_s3 = _FakeS3Storage()
         with self.SessionLocal() as db:
@@ -987,3 +1045,17 @@ class UploadsS3Tests(unittest.TestCase):
             fake_client.presign_params[1],
             {"Bucket": settings.S3_BUCKET, "Key": "avatars/test-user/photo-2.png", "ContentType": "image/png"},
         )
+
+    def test_s3_storage_signs_download_url_for_s3_proxy_path(self):
+        storage = S3Storage()
+        url = storage.create_presigned_download_url(
+            "requests/abc/file.pdf",
+            expires_sec=30,
+            content_type="application/pdf",
+            content_disposition="inline; filename*=UTF-8''file.pdf",
+        )
+
+        self.assertTrue(url.startswith(f"/s3/{settings.S3_BUCKET}/requests/abc/file.pdf?"))
+        self.assertIn("Signature=", url)
+        self.assertIn("response-content-type=application%2Fpdf", url)
+        self.assertIn("response-content-disposition=", url)
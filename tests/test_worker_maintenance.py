@@ -1,9 +1,10 @@
 import os
 import unittest
+from unittest.mock import patch
 from datetime import datetime, timedelta, timezone
 from uuid import uuid4
 
-from sqlalchemy import create_engine, delete
+from sqlalchemy import create_engine, delete, update
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.pool import StaticPool
 
@@ -14,20 +15,27 @@ os.environ.setdefault("S3_ACCESS_KEY", "test")
 os.environ.setdefault("S3_SECRET_KEY", "test")
 os.environ.setdefault("S3_BUCKET", "test")
 
+from app.models.admin_user import AdminUser
 from app.models.attachment import Attachment
 from app.models.audit_log import AuditLog
 from app.models.data_retention_policy import DataRetentionPolicy
 from app.models.message import Message
 from app.models.notification import Notification
+from app.models.notification_unread_counter import NotificationUnreadCounter
 from app.models.otp_session import OtpSession
 from app.models.request import Request
 from app.models.security_audit_log import SecurityAuditLog
 from app.models.status import Status
 from app.models.status_history import StatusHistory
 from app.models.topic_status_transition import TopicStatusTransition
+from app.services.chat_secure_service import get_chat_activity_summary, mark_messages_read_for_staff
+from app.services.request_status import apply_status_change_effects
+from app.services.sla_metrics import compute_sla_snapshot
+from app.workers.tasks import chat_activity as chat_activity_task
 from app.workers.tasks import security as security_task
 from app.workers.tasks import sla as sla_task
 from app.workers.tasks import uploads as uploads_task
+from tests.projection_tables import create_projection_tables, drop_projection_tables
 
 
 class WorkerMaintenanceTaskTests(unittest.TestCase):
@@ -44,16 +52,18 @@ class WorkerMaintenanceTaskTests(unittest.TestCase):
         AuditLog.__table__.create(bind=cls.engine)
         SecurityAuditLog.__table__.create(bind=cls.engine)
         Request.__table__.create(bind=cls.engine)
+        create_projection_tables(cls.engine)
+        AdminUser.__table__.create(bind=cls.engine)
         Attachment.__table__.create(bind=cls.engine)
-        Status.__table__.create(bind=cls.engine)
         Message.__table__.create(bind=cls.engine)
-        StatusHistory.__table__.create(bind=cls.engine)
-        TopicStatusTransition.__table__.create(bind=cls.engine)
         Notification.__table__.create(bind=cls.engine)
+        NotificationUnreadCounter.__table__.create(bind=cls.engine)
 
         cls._old_security_session_local = security_task.SessionLocal
         cls._old_uploads_session_local = uploads_task.SessionLocal
         cls._old_sla_session_local = sla_task.SessionLocal
+        cls._old_chat_activity_session_local = chat_activity_task.SessionLocal
+        chat_activity_task.SessionLocal = cls.SessionLocal
         security_task.SessionLocal = cls.SessionLocal
         uploads_task.SessionLocal = cls.SessionLocal
         sla_task.SessionLocal = cls.SessionLocal
@@ -63,12 +73,13 @@ class WorkerMaintenanceTaskTests(unittest.TestCase):
         security_task.SessionLocal = cls._old_security_session_local
         uploads_task.SessionLocal = cls._old_uploads_session_local
         sla_task.SessionLocal = cls._old_sla_session_local
-        StatusHistory.__table__.drop(bind=cls.engine)
+        chat_activity_task.SessionLocal = cls._old_chat_activity_session_local
+        drop_projection_tables(cls.engine)
+        NotificationUnreadCounter.__table__.drop(bind=cls.engine)
         Notification.__table__.drop(bind=cls.engine)
-        TopicStatusTransition.__table__.drop(bind=cls.engine)
         Message.__table__.drop(bind=cls.engine)
-        Status.__table__.drop(bind=cls.engine)
         Attachment.__table__.drop(bind=cls.engine)
+        AdminUser.__table__.drop(bind=cls.engine)
         Request.__table__.drop(bind=cls.engine)
         SecurityAuditLog.__table__.drop(bind=cls.engine)
         AuditLog.__table__.drop(bind=cls.engine)
@@ -338,6 +349,60 @@ class WorkerMaintenanceTaskTests(unittest.TestCase):
             all_attachments = db.query(Attachment).all()
             self.assertEqual(len(all_attachments), 3)
 
+    def test_chat_activity_counters_follow_writes_and_reconcile(self):
+        with self.SessionLocal() as db:
+            req = Request(
+                track_number="TRK-ACT-1",
+                client_name="Клиент",
+                client_phone="+79990001101",
+                status_code="NEW",
+                extra_fields={},
+            )
+            db.add(req)
+            db.flush()
+            first = Message(request_id=req.id, author_type="CLIENT", author_name="Клиент", body="first")
+            second = Message(request_id=req.id, author_type="LAWYER", author_name="Юрист", body="second")
+            db.add_all([first, second])
+            db.flush()
+            db.add(Attachment(request_id=req.id, message_id=first.id, file_name="a.pdf", mime_type="application/pdf", size_bytes=10, s3_key="k1"))
+            db.commit()
+            req_id = req.id
+            second_id = second.id
+
+        with self.SessionLocal() as db:
+            summary = get_chat_activity_summary(db, req_id)
+            self.assertEqual(summary["message_count"], 2)
+            self.assertEqual(summary["attachment_count"], 1)
+            self.assertIsNotNone(summary["latest_activity_at"])
+            version = summary["activity_version"]
+            latest_before = summary["latest_message_at"]
+
+            self.assertTrue(mark_messages_read_for_staff(db, request_id=req_id))
+            summary = get_chat_activity_summary(db, req_id)
+            self.assertGreater(summary["activity_version"], version)
+            self.assertGreaterEqual(summary["latest_message_at"], latest_before)
+            self.assertFalse(mark_messages_read_for_staff(db, request_id=req_id))
+
+            db.delete(db.get(Message, second_id))
+            db.commit()
+            self.assertEqual(get_chat_activity_summary(db, req_id)["message_count"], 1)
+
+            db.query(Attachment).filter(Attachment.request_id == req_id).delete(synchronize_session=False)
+            db.commit()
+            self.assertEqual(get_chat_activity_summary(db, req_id)["attachment_count"], 1)
+
+        result = chat_activity_task.reconcile_chat_activity_counters()
+        self.assertEqual(result["scanned"], 1)
+        self.assertEqual(result["fixed"], 1)
+        self.assertTrue(result["done"])
+
+        with self.SessionLocal() as db:
+            summary = get_chat_activity_summary(db, req_id)
+            self.assertEqual(summary["message_count"], 1)
+            self.assertEqual(summary["attachment_count"], 0)
+            self.assertIsNone(summary["latest_attachment_at"])
+        self.assertEqual(chat_activity_task.reconcile_chat_activity_counters()["fixed"], 0)
+
     def test_sla_check_computes_overdue_and_frt(self):
         now = datetime.now(timezone.utc)
         with self.SessionLocal() as db:
@@ -460,3 +525,156 @@ class WorkerMaintenanceTaskTests(unittest.TestCase):
         self.assertEqual(result["overdue_total"], 1)
         self.assertGreaterEqual(result["overdue_by_status"].get("NEW", 0), 1)
         self.assertGreaterEqual(result["overdue_by_transition"].get("civil:NEW->*", 0), 1)
+
+    def test_sla_check_only_notifies_deadlines_passed_since_last_run(self):
+        now = datetime.now(timezone.utc)
+        lawyer_id = uuid4()
+        with self.SessionLocal() as db:
+            db.add(Status(code="NEW", name="Новая", enabled=True, sort_order=0, is_terminal=False))
+            db.add(
+                Request(
+                    track_number="TRK-SLA-WM-1",
+                    client_name="Клиент SLA WM",
+                    client_phone="+79990002301",
+                    topic_code="civil",
+                    status_code="NEW",
+                    extra_fields={},
+                    assigned_lawyer_id=str(lawyer_id),
+                    status_entered_at=now - timedelta(hours=25),
+                    sla_deadline_at=now - timedelta(hours=1),
+                )
+            )
+            db.commit()
+
+        with patch.object(sla_task, "_load_watermark", return_value=now - timedelta(hours=2)):
+            first = sla_task.sla_check()
+        self.assertEqual(first["newly_overdue"], 1)
+        self.assertEqual(first["notifications_created"], 1)
+        with patch.object(sla_task, "_load_watermark", return_value=now - timedelta(minutes=30)):
+            second = sla_task.sla_check()
+        self.assertEqual(second["newly_overdue"], 0)
+        self.assertEqual(second["overdue_total"], 1)
+
+        with self.SessionLocal() as db:
+            rows = db.query(Notification).filter(Notification.event_type == "SLA_OVERDUE").all()
+            self.assertEqual([row.recipient_admin_user_id for row in rows], [lawyer_id])
+
+    def test_sla_state_is_materialized_once_and_follows_status_changes(self):
+        now = datetime.now(timezone.utc)
+        with self.SessionLocal() as db:
+            db.add_all(
+                [
+                    Status(code="NEW", name="Новая", enabled=True, sort_order=0, is_terminal=False),
+                    Status(code="IN_PROGRESS", name="В работе", enabled=True, sort_order=1, is_terminal=False),
+                    Status(code="CLOSED", name="Закрыта", enabled=True, sort_order=2, is_terminal=True),
+                ]
+            )
+            req = Request(
+                track_number="TRK-SLA-INC-1",
+                client_name="Клиент SLA INC",
+                client_phone="+79990002201",
+                topic_code="civil",
+                status_code="NEW",
+                extra_fields={},
+                created_at=now - timedelta(hours=30),
+                updated_at=now - timedelta(hours=30),
+            )
+            db.add(req)
+            db.commit()
+            request_id = req.id
+
+        first = sla_task.sla_check()
+        self.assertEqual(first["sla_backfilled"], 1)
+        self.assertEqual(first["overdue_total"], 1)
+        with self.SessionLocal() as db:
+            row = db.get(Request, request_id)
+            deadline = row.sla_deadline_at.replace(tzinfo=timezone.utc)
+            self.assertAlmostEqual((deadline - (now - timedelta(hours=6))).total_seconds(), 0, delta=5)
+
+            row.status_code = "IN_PROGRESS"
+            apply_status_change_effects(db, row, from_status="NEW", to_status="IN_PROGRESS")
+            db.commit()
+
+        second = sla_task.sla_check()
+        self.assertEqual(second["sla_backfilled"], 0)
+        self.assertEqual(second["overdue_total"], 0)
+        self.assertIn("IN_PROGRESS", second["avg_time_in_status_hours"])
+
+        with self.SessionLocal() as db:
+            row = db.get(Request, request_id)
+            self.assertIsNotNone(row.status_entered_at)
+            row.status_code = "CLOSED"
+            apply_status_change_effects(db, row, from_status="IN_PROGRESS", to_status="CLOSED")
+            db.commit()
+            self.assertIsNone(db.get(Request, request_id).sla_deadline_at)
+            self.assertEqual(compute_sla_snapshot(db)["checked_active_requests"], 0)
+
+    def test_sla_deadlines_follow_transition_status_and_topic_config_writes(self):
+        now = datetime.now(timezone.utc)
+        entered = now - timedelta(hours=30)
+        with self.SessionLocal() as db:
+            db.add(Status(code="NEW", name="Новая", enabled=True, sort_order=0, is_terminal=False))
+            db.add(
+                TopicStatusTransition(
+                    topic_code="civil", from_status="NEW", to_status="IN_PROGRESS", enabled=True, sla_hours=48, sort_order=1
+                )
+            )
+            rows = {
+                topic: Request(
+                    track_number=f"TRK-SLA-CFG-{topic}",
+                    client_name="Клиент SLA CFG",
+                    client_phone="+79990002401",
+                    topic_code=topic,
+                    status_code="NEW",
+                    extra_fields={},
+                    status_entered_at=entered,
+                )
+                for topic in ("civil", "family")
+            }
+            db.add_all(rows.values())
+            db.commit()
+            ids = {topic: row.id for topic, row in rows.items()}
+
+        def deadlines() -> dict[str, float | None]:
+            with self.SessionLocal() as db:
+                out = {}
+                for topic, request_id in ids.items():
+                    deadline = db.get(Request, request_id).sla_deadline_at
+                    if deadline is not None:
+                        deadline = (deadline.replace(tzinfo=timezone.utc) - entered) / timedelta(hours=1)
+                    out[topic] = deadline
+                return out
+
+        self.assertEqual(sla_task.sla_check()["sla_backfilled"], 2)
+        self.assertEqual(deadlines(), {"civil": 48, "family": 24})
+
+        with self.SessionLocal() as db:
+            db.query(TopicStatusTransition).one().sla_hours = 12
+            db.commit()
+        self.assertEqual(deadlines(), {"civil": None, "family": 24})
+        result = sla_task.sla_check()
+        self.assertEqual(result["sla_backfilled"], 1)
+        self.assertEqual(result["overdue_total"], 2)
+        self.assertEqual(deadlines(), {"civil": 12, "family": 24})
+
+        with self.SessionLocal() as db:
+            db.get(Request, ids["family"]).topic_code = "civil"
+            db.commit()
+        self.assertEqual(deadlines(), {"civil": 12, "family": None})
+        sla_task.sla_check()
+        self.assertEqual(deadlines(), {"civil": 12, "family": 12})
+
+        with self.SessionLocal() as db:
+            db.execute(update(TopicStatusTransition).where(TopicStatusTransition.topic_code == "civil").values(sla_hours=60))
+            db.commit()
+        self.assertEqual(deadlines(), {"civil": None, "family": None})
+        self.assertEqual(sla_task.sla_check()["sla_backfilled"], 2)
+        self.assertEqual(deadlines(), {"civil": 60, "family": 60})
+
+        with self.SessionLocal() as db:
+            db.query(Status).filter(Status.code == "NEW").one().is_terminal = True
+            db.commit()
+        self.assertEqual(deadlines(), {"civil": None, "family": None})
+        result = sla_task.sla_check()
+        self.assertEqual(result["sla_backfilled"], 0)
+        self.assertEqual(result["checked_active_requests"], 0)